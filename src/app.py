@@ -2,22 +2,23 @@ import sys
 import collections
 from typing import Callable, List, Optional, Annotated
 from datetime import datetime
-from flask import Flask, g, jsonify, abort, request, Response, redirect, make_response
+from flask import Flask, g, jsonify, abort, request, Response, redirect, make_response, stream_with_context
+from werkzeug.datastructures import Headers, MultiDict
 from neo4j.exceptions import TransactionError
 import os
 import re
 import csv
 import requests
-from requests.adapters import HTTPAdapter, Retry
-import threading
 import urllib.request
+import concurrent.futures
 from io import StringIO
 # Don't confuse urllib (Python native library) with urllib3 (3rd-party library, requests also uses urllib3)
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 from pathlib import Path
 import logging
 import json
-import time
+import gzip
+import orjson
 
 # pymemcache.client.base.PooledClient is a thread-safe client pool 
 # that provides the same API as pymemcache.client.base.Client
@@ -27,11 +28,16 @@ from pymemcache import serde
 # Local modules
 import app_neo4j_queries
 import provenance
+import jobs
+import bulk_update
+import bulk_registration
+from reindex_dispatcher import ReindexDispatcher
 from schema import schema_manager
 from schema import schema_errors
 from schema import schema_triggers
 from schema import schema_validators
 from schema import schema_neo4j_queries
+from schema import schema_http_client
 from schema.schema_constants import SchemaConstants, ReindexPriorityLevelEnum
 from schema.schema_constants import DataVisibilityEnum
 from schema.schema_constants import MetadataScopeEnum
@@ -93,6 +99,57 @@ else:
     MEMCACHED_MODE = False
     MEMCACHED_PREFIX = 'NONE'
 
+# Max number of ids accepted by a single `POST /documents` call and the number of threads
+# used to generate the documents of one call
+# Default values are used if the properties are missing in the configuration file
+DOCUMENTS_BATCH_MAX_SIZE = app.config.get('DOCUMENTS_BATCH_MAX_SIZE', 1000)
+DOCUMENTS_BATCH_MAX_WORKERS = app.config.get('DOCUMENTS_BATCH_MAX_WORKERS', 8)
+
+# Number of entities fetched from neo4j per page when streaming `GET /<entity_type>/entities?format=ndjson`
+ENTITIES_STREAM_PAGE_SIZE = app.config.get('ENTITIES_STREAM_PAGE_SIZE', 500)
+
+# Number of entities created by one neo4j statement when creating multiple samples/datasets,
+# also the number of rows validated and written at a time by `POST /entities/bulk-register`
+BULK_CREATE_BATCH_SIZE = app.config.get('BULK_CREATE_BATCH_SIZE', SchemaConstants.NEO4J_BULK_CREATE_BATCH_SIZE)
+
+# Number of entities written by one neo4j transaction and number of threads validating and running the
+# triggers of one batch of `PUT /datasets` and `PUT /uploads`. Before the next batch, the bulk update waits at most
+# BULK_UPDATE_REINDEX_WAIT_SECONDS for the reindex queue to get below BULK_UPDATE_MAX_REINDEX_QUEUE_SIZE uuids
+# Default values are used if the properties are missing in the configuration file
+BULK_UPDATE_BATCH_SIZE = app.config.get('BULK_UPDATE_BATCH_SIZE', 50)
+BULK_UPDATE_MAX_WORKERS = app.config.get('BULK_UPDATE_MAX_WORKERS', 4)
+BULK_UPDATE_MAX_REINDEX_QUEUE_SIZE = app.config.get('BULK_UPDATE_MAX_REINDEX_QUEUE_SIZE', 100)
+BULK_UPDATE_REINDEX_WAIT_SECONDS = app.config.get('BULK_UPDATE_REINDEX_WAIT_SECONDS', 300)
+
+# The JSON response bodies of at least this many bytes are gzip compressed when the client accepts it
+# Default values are used if the properties are missing in the configuration file
+JSON_RESPONSE_GZIP_MIN_SIZE = app.config.get('JSON_RESPONSE_GZIP_MIN_SIZE', 1024)
+JSON_RESPONSE_GZIP_LEVEL = app.config.get('JSON_RESPONSE_GZIP_LEVEL', 6)
+
+# The search-api reindex calls are queued and dispatched by a background thread of each worker process
+# Default values are used if the properties are missing in the configuration file
+reindex_dispatcher = ReindexDispatcher(app.config['SEARCH_API_URL'],
+                                       batch_size = app.config.get('REINDEX_BATCH_SIZE', 50),
+                                       coalesce_seconds = app.config.get('REINDEX_COALESCE_SECONDS', 1),
+                                       max_retries = app.config.get('REINDEX_MAX_RETRIES', 5),
+                                       backoff_seconds = app.config.get('REINDEX_BACKOFF_SECONDS', 2))
+
+# The bulk updates and the background bulk registrations run as jobs tracked in a SQLite file shared by the workers,
+# kept in the instance folder by default so it survives the container restarts. A job whose worker stops renewing
+# its lease for JOBS_LEASE_SECONDS gets resumed by another worker, checking every JOBS_POLL_SECONDS
+# Default values are used if the properties are missing in the configuration file
+job_store = jobs.JobStore(app.config.get('JOBS_DB_PATH', os.path.join(app.instance_path, 'jobs.db')),
+                          lease_seconds = app.config.get('JOBS_LEASE_SECONDS', 300))
+job_runner = jobs.JobRunner(job_store,
+                            resume_token_getter = lambda: get_internal_token(),
+                            poll_seconds = app.config.get('JOBS_POLL_SECONDS', 60),
+                            max_attempts = app.config.get('JOBS_MAX_ATTEMPTS', 3),
+                            retention_seconds = app.config.get('JOBS_RETENTION_DAYS', 7) * 24 * 3600)
+
+# The job types, see the handlers registered at the end
+JOB_TYPE_BULK_UPDATE = 'bulk_update'
+JOB_TYPE_BULK_REGISTRATION = 'bulk_registration'
+
 # Read the secret key which may be submitted in HTTP Request Headers to override the lockout of
 # updates to entities with characteristics prohibiting their modification.
 LOCKED_ENTITY_UPDATE_OVERRIDE_KEY = app.config['LOCKED_ENTITY_UPDATE_OVERRIDE_KEY']
@@ -134,6 +191,23 @@ def http_not_found(e):
 def http_internal_server_error(e):
     return jsonify(error = str(e)), 500
 
+
+# Error handler for 503 Service Unavailable with custom error message
+@app.errorhandler(503)
+def http_service_unavailable(e):
+    return jsonify(error = str(e)), 503
+
+
+####################################################################################################
+## Register request hooks
+####################################################################################################
+
+# Each worker process resumes the jobs abandoned by the recycled or crashed workers,
+# the monitor thread is only started once per process
+@app.before_request
+def start_job_monitor():
+    job_runner.ensure_started()
+
 ####################################################################################################
 ## AuthHelper initialization
 ####################################################################################################
@@ -232,6 +306,22 @@ try:
                               MEMCACHED_PREFIX)
 
     logger.info('Initialized schema_manager successfully :)')
+
+    # All the outbound HTTP calls go through the shared upstream client
+    # Default values are used if the properties are missing in the configuration file
+    schema_http_client.register_upstream('search-api', app.config['SEARCH_API_URL'])
+    schema_http_client.configure(connect_timeout = app.config.get('UPSTREAM_CONNECT_TIMEOUT'),
+                                 read_timeout = app.config.get('UPSTREAM_READ_TIMEOUT'),
+                                 max_retries = app.config.get('UPSTREAM_MAX_RETRIES'),
+                                 backoff_factor = app.config.get('UPSTREAM_BACKOFF_FACTOR'),
+                                 circuit_breaker_threshold = app.config.get('UPSTREAM_CIRCUIT_BREAKER_THRESHOLD'),
+                                 circuit_breaker_reset_timeout = app.config.get('UPSTREAM_CIRCUIT_BREAKER_RESET_TIMEOUT'))
+
+    # The ancestry reads only use the HAS_ANCESTOR closure once it has been backfilled
+    schema_neo4j_queries.set_ancestry_closure_reads(app.config.get('ANCESTRY_CLOSURE_READS', False))
+
+    # The trigger methods cascading updates to other entities queue their reindex too
+    schema_manager.set_reindex_dispatcher(reindex_dispatcher)
 except Exception:
     msg =   f"Failed to initialize the schema_manager with" \
             f" _schema_yaml_file={_schema_yaml_file}."
@@ -374,6 +464,30 @@ def get_status():
         except Exception:
             logger.error('Failed to connect to Memcached server :(')
 
+    # Hit/miss counters of the token introspection cache of the worker process serving this request
+    status_data['token_info_cache'] = schema_manager.get_token_info_cache_stats()
+
+    # HTTP cache hit ratio and latency of each upstream service called by the worker process serving this request
+    status_data['upstreams'] = schema_http_client.get_metrics()
+
+    # Number of uuids waiting to be reindexed by the worker process serving this request
+    status_data['reindex_queue_size'] = reindex_dispatcher.get_queue_size()
+
+    # Cache fills computed and coalesced (recomputations saved) by the worker process serving this request
+    status_data['single_flight'] = schema_manager.get_single_flight_stats()
+
+    # In-process L1 cache (in front of Memcached) of the worker process serving this request
+    status_data['l1_cache'] = schema_manager.get_l1_cache_stats()
+
+    # Distinct query texts and executions of each named neo4j query of the worker process serving this request
+    status_data['neo4j_queries'] = schema_neo4j_queries.get_query_registry()
+
+    # Time spent in each trigger method by the worker process serving this request, most expensive first
+    status_data['trigger_timings'] = schema_manager.get_trigger_timing_stats()
+
+    # Parsed list/json_string property values memoized by the worker process serving this request
+    status_data['parsed_literals'] = schema_manager.get_parsed_literal_cache_stats()
+
     return jsonify(status_data)
 
 
@@ -401,6 +515,12 @@ Delete ALL the following cached data from Memcached, Data-Admin access is requir
     - cached yaml content from github raw URLs
     - cached TSV file content for reference DOIs redirect
 
+Only the cached data of this deployment is affected, the cache generation (part of all the cache keys)
+gets incremented so the old entries are no longer reachable and expire on their own
+
+When the optional `?entity_type=` query parameter is specified, only the cached complete entities
+and index documents of that entity type are deleted
+
 Returns
 -------
 str
@@ -411,8 +531,21 @@ def flush_all_cache():
     msg = ''
 
     if MEMCACHED_MODE:
-        memcached_client_instance.flush_all()
-        msg = 'All cached data (entities, IDs, yamls, tsv) has been deleted from Memcached'
+        entity_type = request.args.get('entity_type')
+
+        if entity_type is None:
+            schema_manager.increment_cache_generation()
+            msg = 'All cached data (entities, IDs, yamls, tsv) has been deleted from Memcached'
+        else:
+            normalized_entity_type = schema_manager.normalize_entity_type(entity_type)
+
+            try:
+                schema_manager.validate_normalized_entity_type(normalized_entity_type)
+            except schema_errors.InvalidNormalizedEntityTypeException:
+                bad_request_error(f"Invalid entity type provided: {entity_type}")
+
+            schema_manager.increment_cache_generation(normalized_entity_type)
+            msg = f'All cached {normalized_entity_type} data has been deleted from Memcached'
     else:
         msg = 'No caching is being used because Memcached mode is not enabled at all'
 
@@ -538,9 +671,13 @@ bool
 @app.route('/entities/<id>/instanceof/<type>', methods=['GET'])
 def get_entities_instanceof(id, type):
     try:
-        uuid = schema_manager.get_hubmap_ids(id.strip())['uuid']
+        uuid = schema_manager.resolve_uuid(id.strip())
         instanceof: bool = schema_manager.entity_instanceof(uuid, type)
     except requests.exceptions.RequestException as e:
+        # No response when the circuit breaker is open, or the connection failed or timed out
+        if e.response is None:
+            service_unavailable_error("The uuid-api service is currently unavailable, please try again later")
+
         status_code = e.response.status_code
         if status_code == 400:
             bad_request_error(e.response.text)
@@ -902,15 +1039,8 @@ def get_entity_by_id(id):
     if public_entity and not user_in_hubmap_read_group(request):
         final_result = schema_manager.exclude_properties_from_response(fields_to_exclude, final_result)
     
-    # Check the size of what is to be returned through the AWS Gateway, and replace it with
-    # a response that links to an Object in the AWS S3 Bucket, if appropriate.
-    resp_body = json.dumps(final_result).encode('utf-8')
-    try_resp = try_stash_response_body(resp_body)
-    if try_resp is not None:
-        return try_resp
-
-    # Return a regular response through the AWS Gateway
-    return jsonify(final_result)
+    # Serialized once for the S3 size check, the S3 upload and the response body
+    return json_response(final_result)
 
 
 """
@@ -942,6 +1072,97 @@ def get_document_by_id(id):
     return jsonify(result_dict)
 
 
+"""
+Retrieve the OpenSearch documents of multiple entities in one call, used by search-api for
+(re)indexing instead of calling `GET /documents/<id>` for each entity
+
+The ids are resolved in bulk, the entity nodes are fetched with a single neo4j query and the
+`on_index_trigger` methods run in a bounded pool of threads. The documents are streamed back
+as NDJSON, one line per requested id in the same order as the request. An id that can't be
+resolved, isn't accessible, or fails to generate results in a line of
+{"id": <id>, "error": <message>} instead of failing the whole batch
+
+The gateway treats this endpoint as public accessible
+
+Request Body
+-------
+A json list of HuBMAP IDs (e.g. HBM123.ABCD.456) or UUIDs of target entities
+
+Returns
+-------
+application/x-ndjson
+    One document per line for each of the given ids
+"""
+@app.route('/documents', methods = ['POST'])
+def get_documents():
+    # Token is not required, but if an invalid token provided,
+    # we need to tell the client with a 401 error
+    validate_token_if_auth_header_exists(request)
+
+    # Always expect a json body
+    require_json(request)
+
+    id_list = request.get_json()
+
+    if not isinstance(id_list, list) or not id_list or not all(isinstance(id, str) and id.strip() for id in id_list):
+        bad_request_error("The request body must be a non-empty json list of HuBMAP IDs or UUIDs")
+
+    if len(id_list) > DOCUMENTS_BATCH_MAX_SIZE:
+        bad_request_error(f"The request body can contain at most {DOCUMENTS_BATCH_MAX_SIZE} ids")
+
+    # Use the internal token to query the target entities
+    # since public entities don't require user token
+    token = get_internal_token()
+
+    # The user authorization is checked once for the whole batch
+    user_authorized = user_in_hubmap_read_group(request)
+
+    ids_to_uuids = schema_manager.resolve_uuids(id_list)
+    entities_dict = schema_neo4j_queries.get_entities_by_uuids(neo4j_driver_instance, set(ids_to_uuids.values()))
+
+    # The worker threads have no request context, pass the actual request object instead of the proxy
+    request_obj = request._get_current_object()
+
+    def generate_document(id):
+        uuid = ids_to_uuids.get(id)
+
+        if (uuid is None) or (uuid not in entities_dict):
+            return {'id': id, 'error': f"Entity of id: {id} not found"}
+
+        entity_dict = entities_dict[uuid]
+        normalized_entity_type = entity_dict['entity_type']
+
+        try:
+            public_entity = (_get_entity_visibility(normalized_entity_type, entity_dict) == DataVisibilityEnum.PUBLIC)
+
+            if not public_entity and not user_authorized:
+                return {'id': id, 'error': f"The requested {normalized_entity_type} has non-public data. A Globus token with access permission is required."}
+
+            # Get the entity result of the indexable dictionary from cache if exists, otherwise regenerate and cache
+            metadata_dict = schema_manager.get_index_metadata(request_obj, token, entity_dict)
+            final_result = schema_manager.normalize_document_result_for_response(entity_dict = metadata_dict)
+
+            if public_entity and not user_authorized:
+                fields_to_exclude = schema_manager.get_fields_to_exclude(normalized_entity_type)
+                final_result = schema_manager.exclude_properties_from_response(fields_to_exclude, final_result)
+
+            return final_result
+        except Exception:
+            msg = f"Failed to generate the document of {normalized_entity_type} {uuid}"
+            # Log the full stack trace, prepend a line with our message
+            logger.exception(msg)
+
+            return {'id': id, 'error': msg}
+
+    def generate():
+        with concurrent.futures.ThreadPoolExecutor(max_workers = DOCUMENTS_BATCH_MAX_WORKERS) as executor:
+            # `executor.map()` maintains the same order of results as the given ids
+            for document in executor.map(generate_document, id_list):
+                yield json.dumps(document) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype = 'application/x-ndjson')
+
+
 """
 Retrive the full tree above the referenced entity and build the provenance document
 
@@ -997,6 +1218,10 @@ def get_entity_provenance(id):
     if 'depth' in request.args:
         depth = int(request.args.get('depth'))
 
+    provenance_json = schema_manager.get_provenance_cache(entity_dict, depth)
+    if provenance_json is not None:
+        return Response(response = provenance_json, mimetype = "application/json")
+
     # Convert neo4j json to dict
     neo4j_result = app_neo4j_queries.get_provenance(neo4j_driver_instance, uuid, depth)
     raw_provenance_dict = dict(neo4j_result['json'])
@@ -1009,6 +1234,10 @@ def get_entity_provenance(id):
 
     provenance_json = provenance.get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instance)
 
+    # Purged by a write to any entity of the graph, see schema_manager.delete_memcached_cache()
+    entity_uuids = {node['uuid'] for node in normalized_provenance_dict['nodes'] if node.get('label') != 'Activity'}
+    schema_manager.set_provenance_cache(entity_dict, depth, provenance_json, entity_uuids)
+
     # Response with the provenance details
     return Response(response = provenance_json, mimetype = "application/json")
 
@@ -1063,8 +1292,18 @@ def get_entities_by_type(entity_type):
     except schema_errors.InvalidNormalizedEntityTypeException as e:
         bad_request_error("Invalid entity type provided: " + entity_type)
 
+    # Stream the complete entities as NDJSON when `?format=ndjson` is specified
+    response_format = request.args.get('format')
+    stream_ndjson = False
+
+    if response_format is not None:
+        if (response_format.lower() != 'ndjson') or (len(request.args) > 1):
+            bad_request_error("Only '?format=ndjson' is supported and it can't be combined with other query string")
+
+        stream_ndjson = True
+
     # Result filtering based on query string
-    if bool(request.args):
+    if bool(request.args) and not stream_ndjson:
         property_key = request.args.get('property')
 
         if property_key is not None:
@@ -1103,6 +1342,29 @@ def get_entities_by_type(entity_type):
         # Get user token from Authorization header.  Since this endpoint is not exposed through the AWS Gateway
         token = get_user_token(request)
 
+        if stream_ndjson:
+            # Only one page of entities is held in memory at a time no matter how many entities of this type exist
+            request_args = request.args
+
+            def generate():
+                last_uuid = None
+
+                while True:
+                    entities_page = app_neo4j_queries.get_entities_by_type_page(neo4j_driver_instance, normalized_entity_type, last_uuid, ENTITIES_STREAM_PAGE_SIZE)
+
+                    if not entities_page:
+                        break
+
+                    complete_entities_page = schema_manager.get_complete_entities_list(request_args, token, entities_page, generated_properties_to_skip)
+
+                    for entity_dict in schema_manager.normalize_entities_list_for_response(complete_entities_page):
+                        yield json.dumps(entity_dict) + '\n'
+
+                    # Ordered uuid keyset as the cursor of next page
+                    last_uuid = entities_page[-1]['uuid']
+
+            return Response(stream_with_context(generate()), mimetype = 'application/x-ndjson')
+
         # Get back a list of entity dicts for the given entity type
         entities_list = app_neo4j_queries.get_entities_by_type(neo4j_driver_instance, normalized_entity_type)
 
@@ -1402,6 +1664,115 @@ def create_multiple_samples(count):
     return jsonify(generated_ids_dict_list)
 
 
+"""
+Register multiple donors or samples from a TSV file in the bulk registration format, see
+bulk-registration/donors-tsv.md and bulk-registration/samples-tsv.md
+
+The TSV is taken from the `file` field of a multipart/form-data request or the raw request body,
+and processed BULK_CREATE_BATCH_SIZE rows at a time: the rows are validated against the schema,
+the ids are created with one uuid-api call per parent and the entities are created in one neo4j
+transaction. An invalid row doesn't stop the others from being registered
+
+With `background=true`, the rows are stored in a job and registered after the response, so the
+registration doesn't depend on the lifetime of the request
+
+Parameters
+----------
+entity_type : str
+    Either donor or sample, from the query string
+background : str
+    Optional, `true` to register the rows in a background job
+
+Returns
+-------
+tsv
+    The result of each row: row, status (created/invalid/failed), uuid, hubmap_id, submission_id, error
+json
+    With `background=true`, the job_id and the number of rows, the job is in the Location header
+"""
+@app.route('/entities/bulk-register', methods = ['POST'])
+def bulk_register_entities():
+    if READ_ONLY_MODE:
+        forbidden_error("Access not granted when entity-api in READ-ONLY mode")
+
+    # If an invalid token provided, we need to tell the client with a 401 error, rather
+    # than a 500 error later if the token is not good.
+    validate_token_if_auth_header_exists(request)
+    # Get user token from Authorization header
+    user_token = get_user_token(request)
+
+    normalized_entity_type = schema_manager.normalize_entity_type(request.args.get('entity_type', ''))
+
+    if normalized_entity_type not in bulk_registration.COLUMNS:
+        bad_request_error("The 'entity_type' query parameter must be either donor or sample")
+
+    try:
+        # Check if re-indexing is to be suppressed after entity creation.
+        suppress_reindex = schema_manager.suppress_reindex(request_args=request.args)
+        # Determine valid re-indexing priority using Request parameters.
+        reindex_priority = schema_manager.get_reindex_priority(request_args=request.args
+                                                               , calc_suppress_reindex=suppress_reindex)
+    except Exception as e:
+        bad_request_error(e)
+
+    try:
+        user_info_dict = schema_manager.get_user_info(request)
+    except Exception as e:
+        unauthorized_error(str(e))
+
+    if 'file' in request.files:
+        tsv_stream = request.files['file'].stream
+    else:
+        tsv_stream = request.stream
+
+    # Read the header row before responding so a malformed file is still a 400
+    try:
+        reader = bulk_registration.open_tsv(tsv_stream, normalized_entity_type)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        bad_request_error(str(e))
+
+    # Store the rows and register them in a background job instead of streaming the results
+    if request.args.get('background', '').lower() == 'true':
+        try:
+            job_items = [row for chunk in bulk_registration.read_chunks(reader, BULK_CREATE_BATCH_SIZE) for row in chunk]
+        except (UnicodeDecodeError, csv.Error) as e:
+            bad_request_error(str(e))
+
+        job_params = {
+            'entity_type': normalized_entity_type,
+            'args': request.args.to_dict(flat = False),
+        'method': request.method,
+            'application': request.headers.get(SchemaConstants.HUBMAP_APP_HEADER),
+            'user_info': user_info_dict
+        }
+        job_id = job_runner.submit(JOB_TYPE_BULK_REGISTRATION, job_params, job_items, user_info_dict.get('sub'), user_token)
+
+        # The result of each row is available via GET /jobs/<id>?items=true
+        return jsonify({'job_id': job_id, 'rows': len(job_items)}), 202, {'Location': f'/jobs/{job_id}'}
+
+    # stream_with_context() keeps the request context while the rows are being processed
+    def generate():
+        yield bulk_registration.format_results([], header = True)
+
+        for chunk in bulk_registration.read_chunks(reader, BULK_CREATE_BATCH_SIZE):
+            results = bulk_register_entities_chunk(request, normalized_entity_type, user_token, user_info_dict, chunk)
+
+            created_uuids = [result['uuid'] for result in results if result['status'] == bulk_registration.STATUS_CREATED]
+
+            if suppress_reindex:
+                logger.info(f"Re-indexing suppressed during bulk registration of {len(created_uuids)} {normalized_entity_type} entities")
+            else:
+                for uuid in created_uuids:
+                    reindex_entity(uuid, user_token, reindex_priority)
+
+            yield bulk_registration.format_results(results)
+
+    response = Response(stream_with_context(generate()), mimetype = 'text/tab-separated-values')
+    response.headers['Content-Disposition'] = f'attachment; filename={normalized_entity_type.lower()}-registration-results.tsv'
+
+    return response
+
+
 """
 Update the properties of a given entity
 
@@ -1729,15 +2100,8 @@ def get_ancestors(id):
                 filtered_final_result.append(ancestor)
         final_result = filtered_final_result
     
-    # Check the size of what is to be returned through the AWS Gateway, and replace it with
-    # a response that links to an Object in the AWS S3 Bucket, if appropriate.
-    resp_body = json.dumps(final_result).encode('utf-8')
-    try_resp = try_stash_response_body(resp_body)
-    if try_resp is not None:
-        return try_resp
-    
-    # Return a regular response through the AWS Gateway
-    return jsonify(final_result)
+    # Serialized once for the S3 size check, the S3 upload and the response body
+    return json_response(final_result)
 
 
 """
@@ -1813,15 +2177,8 @@ def get_descendants(id):
         # Final result after normalization
         final_result = schema_manager.normalize_entities_list_for_response(complete_entities_list)
 
-    # Check the size of what is to be returned through the AWS Gateway, and replace it with
-    # a response that links to an Object in the AWS S3 Bucket, if appropriate.
-    resp_body = json.dumps(final_result).encode('utf-8')
-    try_resp = try_stash_response_body(resp_body)
-    if try_resp is not None:
-        return try_resp
-    
-    # Return a regular response through the AWS Gateway
-    return jsonify(final_result)
+    # Serialized once for the S3 size check, the S3 upload and the response body
+    return json_response(final_result)
 
 
 """
@@ -1936,15 +2293,8 @@ def get_parents(id):
                 filtered_final_result.append(parent)
         final_result = filtered_final_result
 
-    # Check the size of what is to be returned through the AWS Gateway, and replace it with
-    # a response that links to an Object in the AWS S3 Bucket, if appropriate.
-    resp_body = json.dumps(final_result).encode('utf-8')
-    try_resp = try_stash_response_body(resp_body)
-    if try_resp is not None:
-        return try_resp
-    
-    # Return a regular response through the AWS Gateway
-    return jsonify(final_result)
+    # Serialized once for the S3 size check, the S3 upload and the response body
+    return json_response(final_result)
 
 
 """
@@ -2020,15 +2370,8 @@ def get_children(id):
         # Final result after normalization
         final_result = schema_manager.normalize_entities_list_for_response(complete_entities_list)
 
-    # Check the size of what is to be returned through the AWS Gateway, and replace it with
-    # a response that links to an Object in the AWS S3 Bucket, if appropriate.
-    resp_body = json.dumps(final_result).encode('utf-8')
-    try_resp = try_stash_response_body(resp_body)
-    if try_resp is not None:
-        return try_resp
-    
-    # Return a regular response through the AWS Gateway
-    return jsonify(final_result)
+    # Serialized once for the S3 size check, the S3 upload and the response body
+    return json_response(final_result)
 
 
 """
@@ -2157,15 +2500,8 @@ def get_siblings(id):
                 filtered_final_result.append(sibling)
         final_result = filtered_final_result
 
-    # Check the size of what is to be returned through the AWS Gateway, and replace it with
-    # a response that links to an Object in the AWS S3 Bucket, if appropriate.
-    resp_body = json.dumps(final_result).encode('utf-8')
-    try_resp = try_stash_response_body(resp_body)
-    if try_resp is not None:
-        return try_resp
-    
-    # Return a regular response through the AWS Gateway
-    return jsonify(final_result)
+    # Serialized once for the S3 size check, the S3 upload and the response body
+    return json_response(final_result)
 
 
 """
@@ -2283,15 +2619,8 @@ def get_tuplets(id):
                 filtered_final_result.append(tuplet)
         final_result = filtered_final_result
     
-    # Check the size of what is to be returned through the AWS Gateway, and replace it with
-    # a response that links to an Object in the AWS S3 Bucket, if appropriate.
-    resp_body = json.dumps(final_result).encode('utf-8')
-    try_resp = try_stash_response_body(resp_body)
-    if try_resp is not None:
-        return try_resp
-    
-    # Return a regular response through the AWS Gateway
-    return jsonify(final_result)
+    # Serialized once for the S3 size check, the S3 upload and the response body
+    return json_response(final_result)
 
 
 """
@@ -3615,10 +3944,8 @@ def get_prov_info_for_dataset(id):
         HEADER_PROCESSED_DATASET_STATUS, HEADER_PROCESSED_DATASET_PORTAL_URL, HEADER_DATASET_SAMPLES
     ]
 
-    hubmap_ids = schema_manager.get_hubmap_ids(id)
-
-    # Get the target uuid if all good
-    uuid = hubmap_ids['hm_uuid']
+    # The target uuid is already resolved by query_target_entity()
+    uuid = entity_dict['uuid']
     dataset = app_neo4j_queries.get_individual_prov_info(neo4j_driver_instance, uuid)
     if dataset is None:
         bad_request_error("Query For this Dataset Returned no Records. Make sure this is a Primary Dataset")
@@ -3849,7 +4176,7 @@ def sankey_data():
     # Instantiation of the list dataset_sankey_list
     dataset_sankey_list = []
 
-    cache_key = f'{MEMCACHED_PREFIX}sankey'
+    cache_key = f'{schema_manager.get_cache_namespace()}_sankey'
 
     if MEMCACHED_MODE:
         if memcached_client_instance.get(cache_key) is not None:
@@ -4020,7 +4347,7 @@ def paired_dataset(id):
             unauthorized_error(user_token.get_data().decode())
         # Also check if the parased token is invalid or expired
         # Set the second paremeter as False to skip group check
-        user_info = auth_helper_instance.getUserInfo(user_token, False)
+        user_info = schema_manager.get_token_info(user_token, False)
         if isinstance(user_info, Response):
             unauthorized_error(user_info.get_data().decode())
 
@@ -4244,8 +4571,12 @@ https://github.com/hubmapconsortium/entity-api/issues/698
 This is used by Data Ingest Board application for now.
 
 Shirey: With this use case we're not worried about a lot of concurrent calls to this endpoint (only one user,
-Brendan, will be ever using it). Just start a thread on request and loop through the Datasets/Uploads to change
-with a 5 second delay or so between them to allow some time for reindexing.
+Brendan, will be ever using it). Just start a thread on request and loop through the Datasets/Uploads to change.
+
+The updates are applied in-process in batches by a background job, see update_datasets_uploads(), which waits
+for the reindex queue to drain between the batches to allow some time for reindexing. The job id is returned in
+the Location header so the progress can be followed with GET /jobs/<id>, and the job is resumed by another
+worker if this one gets recycled.
 
 Example call
 1) pick Dataset entities to change by querying Neo4J...
@@ -4277,6 +4608,9 @@ def entity_bulk_update():
         bad_request_error("Request object field 'entities' is either missing, "
                           "does not contain a list, or contains an empty list")
 
+    if not all(isinstance(entity, dict) for entity in entities):
+        bad_request_error(f"Each {entity_type} must be a json object")
+
     user_token: str = get_user_token(request)
     for entity in entities:
         validate_user_update_privilege(entity, user_token)
@@ -4286,8 +4620,15 @@ def entity_bulk_update():
     logger.debug(f"Bulk updating the following {entity_type} uuids:")
     logger.debug(uuids)
 
-    if None in uuids:
-        bad_request_error(f"All {entity_type}s must have a 'uuid' field")
+    if not all(isinstance(uuid, str) and uuid.strip() for uuid in uuids):
+        bad_request_error(f"All {entity_type}s must have a non-empty string 'uuid' field")
+
+    # Accept HuBMAP IDs as well, resolved to the actual uuids in bulk
+    ids_to_uuids = schema_manager.resolve_uuids(uuids)
+    for entity in entities:
+        entity['uuid'] = ids_to_uuids.get(entity['uuid'], entity['uuid'])
+
+    uuids = [e["uuid"] for e in entities]
     if len(set(uuids)) != len(uuids):
         bad_request_error(f"{entity_type}s must have unique 'uuid' fields")
 
@@ -4300,7 +4641,7 @@ def entity_bulk_update():
     uuids = set([e["uuid"] for e in entities])
     try:
         fields = {"uuid", "entity_type"}
-        db_entities = app_neo4j_queries.get_entities_by_uuid(neo4j_driver_instance, uuids, fields)
+        db_entities = schema_neo4j_queries.get_entities_by_uuid(neo4j_driver_instance, uuids, fields)
     except Exception as e:
         logger.error(f"Error while submitting datasets: {str(e)}")
         bad_request_error(str(e))
@@ -4309,14 +4650,72 @@ def entity_bulk_update():
     if len(diff) > 0:
         bad_request_error(f"No {entity_type} found with the following uuids: {', '.join(diff)}")
 
-    logger.info(f"Bulk update {len(entities)} {entity_type} in a separate thread...")
+    try:
+        user_info_dict = schema_manager.get_user_info(request)
+    except Exception as e:
+        unauthorized_error(str(e))
+
+    logger.info(f"Bulk update {len(entities)} {entity_type} in a background job...")
+
+    # The validators and triggers run after this request has returned, with the same
+    # application header the internal PUT /entities/<id> calls used to send
+    job_params = {
+        'entity_type': entity_type.capitalize(),
+        'args': request.args.to_dict(flat = False),
+        'method': request.method,
+        'application': SchemaConstants.ENTITY_API_APP,
+        'user_info': user_info_dict
+    }
+    job_items = [(entity.pop('uuid'), entity) for entity in entities]
+    job_id = job_runner.submit(JOB_TYPE_BULK_UPDATE, job_params, job_items, user_info_dict.get('sub'), user_token)
+
+    # The progress is available via GET /jobs/<id>
+    return jsonify(list(uuids)), 202, {'Location': f'/jobs/{job_id}'}
+
+
+"""
+Get the status and progress of a background job, E.g., a bulk update or a bulk registration
+
+Only the user who submitted the job and the data admins can see it
+
+Parameters
+----------
+id : str
+    The job id, from the Location header of the response that submitted the job
+items : str
+    Optional query string, `true` to include the status and result of each item
+
+Returns
+-------
+json
+    The job status (queued/running/completed/failed), the number of items in each status
+    (pending/succeeded/failed) and the items when requested
+"""
+@app.route('/jobs/<id>', methods = ['GET'])
+def get_job(id):
+    user_token = get_user_token(request, non_public_access_required = True)
+
+    try:
+        user_info_dict = schema_manager.get_user_info(request)
+    except Exception as e:
+        unauthorized_error(str(e))
+
+    job = job_store.get_job(id, include_items = request.args.get('items', '').lower() == 'true')
 
-    thread_instance =\
-        threading.Thread(target=update_datasets_uploads,
-                         args=(entities, user_token, app.config["ENTITY_API_URL"]))
-    thread_instance.start()
+    if job is None:
+        not_found_error(f"Job of id: {id} not found")
 
-    return jsonify(list(uuids)), 202
+    if job['owner'] != user_info_dict.get('sub'):
+        is_admin = schema_manager.get_request_auth_value('has_data_admin_privs', auth_helper_instance.has_data_admin_privs, user_token)
+
+        if is_admin is not True:
+            forbidden_error("Access not granted")
+
+    # The params hold the user info of the submitter
+    job.pop('params')
+    job.pop('owner')
+
+    return json_response(job)
 
 
 """
@@ -4342,7 +4741,16 @@ def get_batch_ids():
     validate_token_if_auth_header_exists(request)
     require_json(request)
     json_data_dict = request.get_json()
-    ids = app_neo4j_queries.get_batch_ids(neo4j_driver_instance, json_data_dict)    
+
+    if not isinstance(json_data_dict, list) or not all(isinstance(id, str) and id.strip() for id in json_data_dict):
+        bad_request_error("The request body must be a json list of HuBMAP IDs or UUIDs")
+
+    # Both HuBMAP IDs and UUIDs are resolved in bulk, keep the given ids as the keys of the result
+    # Skip uuid-api since an id unknown to Neo4j has no entity to return anyway
+    ids_to_uuids = schema_manager.resolve_uuids(json_data_dict, use_uuid_api = False)
+    uuids_dict = app_neo4j_queries.get_batch_ids(neo4j_driver_instance, list(set(ids_to_uuids.values())))
+    ids = {id: uuids_dict[uuid] for id, uuid in ids_to_uuids.items() if uuid in uuids_dict}
+
     return jsonify(ids)
 
 
@@ -4410,6 +4818,18 @@ def internal_server_error(err_msg):
     abort(500, description = err_msg)
 
 
+"""
+Throws error for 503 Service Unavailable with message
+
+Parameters
+----------
+err_msg : str
+    The custom error message to return to end users
+"""
+def service_unavailable_error(err_msg):
+    abort(503, description = err_msg)
+
+
 """
 Parse the token from Authorization header
 
@@ -4428,8 +4848,9 @@ str
 def get_user_token(request, non_public_access_required = False):
     # Get user token from Authorization header
     # getAuthorizationTokens() also handles MAuthorization header but we are not using that here
+    # The token is parsed once and shared within the request scope
     try:
-        user_token = auth_helper_instance.getAuthorizationTokens(request.headers)
+        user_token = schema_manager.get_request_user_token(request)
     except Exception:
         msg = "Failed to parse the Authorization token by calling commons.auth_helper.getAuthorizationTokens()"
         # Log the full stack trace, prepend a line with our message
@@ -4477,8 +4898,8 @@ def user_in_hubmap_read_group(request):
     try:
         # The property 'hmgroupids' is ALWASYS in the output with using schema_manager.get_user_info()
         # when the token in request is a groups token
-        user_info = schema_manager.get_user_info(request)
-        hubmap_read_group_uuid = auth_helper_instance.groupNameToId('HuBMAP-READ')['uuid']
+        # The membership is resolved once per request, endpoints can call this inside loops
+        return schema_manager.user_in_group(request, 'HuBMAP-READ')
     except Exception as e:
         # Log the full stack trace, prepend a line with our message
         logger.exception(e)
@@ -4489,9 +4910,6 @@ def user_in_hubmap_read_group(request):
         return False
 
 
-    return (hubmap_read_group_uuid in user_info['hmgroupids'])
-
-
 """
 Check if a user has valid access to update a given entity
 
@@ -4504,12 +4922,13 @@ user_token : str
 """
 def validate_user_update_privilege(entity, user_token):
     # A user has update privileges if they are a data admin or are in the same group that registered the entity
-    is_admin = auth_helper_instance.has_data_admin_privs(user_token)
+    # Resolved once per request, the bulk update endpoints call this for each entity
+    is_admin = schema_manager.get_request_auth_value('has_data_admin_privs', auth_helper_instance.has_data_admin_privs, user_token)
 
     if isinstance(is_admin, Response):
         abort(is_admin)
 
-    user_write_groups: List[dict] = auth_helper_instance.get_user_write_groups(user_token)
+    user_write_groups: List[dict] = schema_manager.get_request_auth_value('user_write_groups', auth_helper_instance.get_user_write_groups, user_token)
 
     if isinstance(user_write_groups, Response):
         abort(user_write_groups)
@@ -4546,7 +4965,8 @@ def validate_token_if_auth_header_exists(request):
 
         # Also check if the parased token is invalid or expired
         # Set the second paremeter as False to skip group check
-        user_info = auth_helper_instance.getUserInfo(user_token, False)
+        # Only validated once per request even if called multiple times
+        user_info = schema_manager.get_request_auth_value('token_user_info', schema_manager.get_token_info, user_token, False)
 
         if isinstance(user_info, Response):
             unauthorized_error(user_info.get_data().decode())
@@ -4571,6 +4991,88 @@ def try_stash_response_body(resp_body):
     
 
 
+"""
+Serialize the result to JSON once and use the same bytes for the size check and upload of
+try_stash_response_body() and for the response body
+
+Parameters
+----------
+result : dict or list
+    The final result to be returned
+
+Returns
+-------
+flask.Response
+    The JSON response, or the response linking to the S3 object for the large ones
+"""
+def json_response(result):
+    resp_body = encode_json_response_body(result)
+
+    # Check the size of what is to be returned through the AWS Gateway, and replace it with
+    # a response that links to an Object in the AWS S3 Bucket, if appropriate.
+    try_resp = try_stash_response_body(resp_body)
+    if try_resp is not None:
+        return try_resp
+
+    # Return a regular response through the AWS Gateway
+    return build_json_response(resp_body)
+
+
+"""
+Serialize the result to JSON bytes with orjson, with the keys sorted like jsonify()
+
+Parameters
+----------
+result : dict or list
+    The result to be serialized
+
+Returns
+-------
+bytes
+    The UTF-8 encoded JSON
+"""
+def encode_json_response_body(result):
+    try:
+        # The values orjson doesn't support natively (E.g., Decimal) are converted the same way as jsonify()
+        return orjson.dumps(result, default = app.json.default, option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    except TypeError as e:
+        # E.g., integers that don't fit in 64 bits
+        logger.warning(f"Failed to serialize the result with orjson, falling back to the stdlib json: {e}")
+        return app.json.dumps(result).encode('utf-8')
+
+
+"""
+Build the response of an already serialized JSON body, gzip compressed if it's large enough
+and the client accepts it
+
+Parameters
+----------
+resp_body : bytes
+    The UTF-8 encoded JSON
+status : int
+    The HTTP status code, 200 by default
+
+Returns
+-------
+flask.Response
+    The JSON response with Content-Length set
+"""
+def build_json_response(resp_body, status = 200):
+    headers = {}
+
+    if len(resp_body) >= JSON_RESPONSE_GZIP_MIN_SIZE:
+        # The response depends on Accept-Encoding from this size
+        headers['Vary'] = 'Accept-Encoding'
+
+        if request.accept_encodings['gzip']:
+            resp_body = gzip.compress(resp_body, compresslevel = JSON_RESPONSE_GZIP_LEVEL)
+            headers['Content-Encoding'] = 'gzip'
+
+    headers['Content-Length'] = str(len(resp_body))
+
+    return Response(response = resp_body, status = status, headers = headers, mimetype = 'application/json')
+
+
 """
 Get the token for internal use only
 
@@ -4796,6 +5298,10 @@ def create_entity_details(request, normalized_entity_type, user_token, json_data
         msg = f"Failed to create new HuBMAP ids via the uuid-api service"
         logger.exception(msg)
 
+        # No response when the circuit breaker is open, or the connection failed or timed out
+        if e.response is None:
+            service_unavailable_error("The uuid-api service is currently unavailable, please try again later")
+
         # Due to the use of response.raise_for_status() in schema_manager.create_hubmap_ids()
         # we can access the status codes from the exception
         status_code = e.response.status_code
@@ -4950,6 +5456,10 @@ def create_multiple_samples_details(request, normalized_entity_type, user_token,
         msg = f"Failed to create new HuBMAP ids via the uuid-api service"
         logger.exception(msg)
 
+        # No response when the circuit breaker is open, or the connection failed or timed out
+        if e.response is None:
+            service_unavailable_error("The uuid-api service is currently unavailable, please try again later")
+
         # Due to the use of response.raise_for_status() in schema_manager.create_hubmap_ids()
         # we can access the status codes from the exception
         status_code = e.response.status_code
@@ -5033,7 +5543,7 @@ def create_multiple_samples_details(request, normalized_entity_type, user_token,
     # Create new sample nodes and needed relationships as well as activity node in one transaction
     try:
         # No return value
-        app_neo4j_queries.create_multiple_samples(neo4j_driver_instance, samples_dict_list, activity_data_dict, json_data_dict['direct_ancestor_uuid'])
+        app_neo4j_queries.create_multiple_samples(neo4j_driver_instance, samples_dict_list, activity_data_dict, json_data_dict['direct_ancestor_uuid'], BULK_CREATE_BATCH_SIZE)
     except TransactionError:
         msg = "Failed to create multiple samples"
         # Log the full stack trace, prepend a line with our message
@@ -5045,6 +5555,168 @@ def create_multiple_samples_details(request, normalized_entity_type, user_token,
     return new_ids_dict_list
 
 
+"""
+Validate a chunk of the rows of a bulk registration TSV, create the ids of the valid rows and the
+entities with their linkages to the direct ancestors in one neo4j transaction
+
+The rows go through the same validations and 'before_create_trigger' methods as `POST /entities/<entity_type>`,
+but the sources of the samples are looked up with one query, the ids of the rows sharing the same parent
+and all the Activity ids are created with one uuid-api call each
+
+Parameters
+----------
+request: Flask request object
+    The instance of Flask request passed in from application request
+normalized_entity_type : str
+    Either Donor or Sample
+user_token: str
+    The user's globus groups token
+user_info_dict : dict
+    The user info of the request, see schema_manager.get_user_info()
+chunk : list
+    The (row number, TSV row dict) tuples, see bulk_registration.read_chunks()
+before_create : Callable[[dict], None], optional
+    Called with the new ids dict of each row keyed by row number right before the entities are created,
+    E.g., to let a resumed job find the entities created by a worker that died before recording them
+
+Returns
+-------
+list
+    The result dict of each row with the bulk_registration.RESULT_COLUMNS keys, in the same order
+"""
+def bulk_register_entities_chunk(request, normalized_entity_type, user_token, user_info_dict, chunk, before_create = None):
+    results = {row_number: {'row': row_number} for row_number, tsv_row in chunk}
+
+    def set_error(row_number, status, error):
+        results[row_number].update({'status': status, 'error': str(error)})
+
+    valid_rows = []
+    for row_number, tsv_row in chunk:
+        try:
+            json_data_dict = bulk_registration.to_json_data(normalized_entity_type, tsv_row)
+            schema_manager.validate_json_data_against_schema(json_data_dict, normalized_entity_type)
+            schema_manager.execute_property_level_validators('before_property_create_validators', normalized_entity_type, request, {}, json_data_dict)
+
+            valid_rows.append((row_number, json_data_dict))
+        # No need to log the validation errors
+        except (ValueError, schema_errors.SchemaValidationException) as e:
+            set_error(row_number, bulk_registration.STATUS_INVALID, e)
+        except Exception as e:
+            logger.exception(f"Failed to validate row {row_number} of the bulk registration")
+            set_error(row_number, bulk_registration.STATUS_FAILED, e)
+
+    # Look up the sources of all the samples at once
+    if valid_rows and (normalized_entity_type == 'Sample'):
+        sample_rows = valid_rows
+        valid_rows = []
+
+        try:
+            ids_to_uuids = schema_manager.resolve_uuids([json_data_dict['direct_ancestor_uuid'] for row_number, json_data_dict in sample_rows])
+            ancestors_dict = schema_neo4j_queries.get_entities_by_uuids(neo4j_driver_instance, set(ids_to_uuids.values()))
+            organ_types_dict = schema_manager.get_organ_types()
+        except Exception:
+            msg = "Failed to look up the sources of the samples"
+            # Log the full stack trace, prepend a line with our message
+            logger.exception(msg)
+
+            for row_number, json_data_dict in sample_rows:
+                set_error(row_number, bulk_registration.STATUS_FAILED, msg)
+        else:
+            for row_number, json_data_dict in sample_rows:
+                direct_ancestor_dict = ancestors_dict.get(ids_to_uuids.get(json_data_dict['direct_ancestor_uuid']))
+
+                try:
+                    bulk_registration.validate_sample_source(json_data_dict, direct_ancestor_dict, organ_types_dict)
+                except ValueError as e:
+                    set_error(row_number, bulk_registration.STATUS_INVALID, e)
+                    continue
+
+                # Link to the source by uuid even if its hubmap_id is given
+                json_data_dict['direct_ancestor_uuid'] = direct_ancestor_dict['uuid']
+                valid_rows.append((row_number, json_data_dict))
+
+    # Create the ids of the rows sharing the same parent with one call
+    rows_with_ids = []
+    for group in bulk_registration.group_by_parent(normalized_entity_type, valid_rows):
+        try:
+            new_ids_dict_list = schema_manager.create_hubmap_ids(normalized_entity_type, group[0][1], user_token, user_info_dict, len(group))
+        except schema_errors.NoDataProviderGroupException:
+            if 'group_uuid' in group[0][1]:
+                msg = "Invalid 'group_uuid' value, can't create the entity"
+            else:
+                msg = "The user does not have the correct Globus group associated with, can't create the entity"
+        except schema_errors.UnmatchedDataProviderGroupException:
+            msg = "The user does not belong to the given Globus group, can't create the entity"
+        except schema_errors.MultipleDataProviderGroupException:
+            msg = "The user has mutiple Globus groups associated with, please specify one using 'group_uuid'"
+        except requests.exceptions.RequestException:
+            msg = "Failed to create new HuBMAP ids via the uuid-api service"
+            logger.exception(msg)
+        except Exception as e:
+            logger.exception("Failed to create new HuBMAP ids of the bulk registration")
+            msg = str(e)
+        else:
+            rows_with_ids.extend((row_number, json_data_dict, new_ids_dict) for (row_number, json_data_dict), new_ids_dict in zip(group, new_ids_dict_list))
+            continue
+
+        for row_number, json_data_dict in group:
+            set_error(row_number, bulk_registration.STATUS_FAILED, msg)
+
+    entity_dicts_list = []
+    direct_ancestor_uuids = []
+    registered_rows = []
+    for row_number, json_data_dict, new_ids_dict in rows_with_ids:
+        new_data_dict = {**json_data_dict, **user_info_dict, **new_ids_dict}
+
+        try:
+            # Use {} since no existing dict
+            generated_before_create_trigger_data_dict = schema_manager.generate_triggered_data( trigger_type=TriggerTypeEnum.BEFORE_CREATE
+                                                                                                , normalized_class=normalized_entity_type
+                                                                                                , request_args=request.args
+                                                                                                , user_token=user_token
+                                                                                                , existing_data_dict={}
+                                                                                                , new_data_dict=new_data_dict)
+        except Exception:
+            logger.exception(f"Failed to execute one of the 'before_create_trigger' methods of row {row_number} of the bulk registration")
+            set_error(row_number, bulk_registration.STATUS_FAILED, "Failed to execute one of the 'before_create_trigger' methods, can't create the entity")
+            continue
+
+        merged_dict = {**json_data_dict, **generated_before_create_trigger_data_dict}
+
+        # Same as the 'after_create_trigger' methods: a Donor is linked to the Lab of its group_uuid
+        # and a Sample to its source
+        if normalized_entity_type == 'Donor':
+            direct_ancestor_uuids.append(merged_dict['group_uuid'])
+        else:
+            direct_ancestor_uuids.append(json_data_dict['direct_ancestor_uuid'])
+
+        # Filter out the transient properties (not to be stored) and properties with None value
+        entity_dicts_list.append(schema_manager.remove_transient_and_none_values(merged_dict, normalized_entity_type))
+        registered_rows.append((row_number, new_ids_dict))
+
+    if registered_rows:
+        try:
+            # One Activity node per entity, same as creating the entities one by one
+            activity_dicts_list = schema_manager.generate_activities_data(normalized_entity_type, request.args, user_token, user_info_dict, len(registered_rows))
+
+            if before_create:
+                before_create({row_number: new_ids_dict for row_number, new_ids_dict in registered_rows})
+
+            app_neo4j_queries.create_registered_entities(neo4j_driver_instance, normalized_entity_type, entity_dicts_list, activity_dicts_list, direct_ancestor_uuids, BULK_CREATE_BATCH_SIZE)
+
+            for row_number, new_ids_dict in registered_rows:
+                results[row_number].update({'status': bulk_registration.STATUS_CREATED, **new_ids_dict})
+        except Exception:
+            msg = f"Failed to create the {normalized_entity_type} entities of rows {registered_rows[0][0]} to {registered_rows[-1][0]}"
+            # Log the full stack trace, prepend a line with our message
+            logger.exception(msg)
+
+            for row_number, new_ids_dict in registered_rows:
+                set_error(row_number, bulk_registration.STATUS_FAILED, msg)
+
+    return [results[row_number] for row_number, tsv_row in chunk]
+
+
 """
 Create multiple dataset nodes and relationships with the source entity node
 
@@ -5083,6 +5755,10 @@ def create_multiple_component_details(request, normalized_entity_type, user_toke
         msg = f"Failed to create new HuBMAP ids via the uuid-api service"
         logger.exception(msg)
 
+        # No response when the circuit breaker is open, or the connection failed or timed out
+        if e.response is None:
+            service_unavailable_error("The uuid-api service is currently unavailable, please try again later")
+
         # Due to the use of response.raise_for_status() in schema_manager.create_hubmap_ids()
         # we can access the status codes from the exception
         status_code = e.response.status_code
@@ -5153,7 +5829,7 @@ def create_multiple_component_details(request, normalized_entity_type, user_toke
     activity_data_dict = schema_manager.generate_activity_data(normalized_entity_type, request.args, user_token, user_info_dict)
     activity_data_dict['creation_action'] = creation_action
     try:
-        created_datasets = app_neo4j_queries.create_multiple_datasets(neo4j_driver_instance, datasets_dict_list, activity_data_dict, direct_ancestor)
+        created_datasets = app_neo4j_queries.create_multiple_datasets(neo4j_driver_instance, datasets_dict_list, activity_data_dict, direct_ancestor, BULK_CREATE_BATCH_SIZE)
     except TransactionError:
         msg = "Failed to create multiple samples"
         # Log the full stack trace, prepend a line with our message
@@ -5343,42 +6019,53 @@ def query_target_entity(id, user_token):
     cache_result = None
 
     try:
-        # Get cached ids if exist otherwise retrieve from UUID-API
-        hubmap_ids = schema_manager.get_hubmap_ids(id.strip())
-
-        # Get the target uuid if all good
-        uuid = hubmap_ids['hm_uuid']
+        # Resolve the uuid from the in-process map, Memcached, or Neo4j
+        # Only fall back to UUID-API when the id is unknown to Neo4j
+        uuid = schema_manager.resolve_uuid(id.strip())
 
         # Look up the cache again by the uuid since we only use uuid in the cache key
         if MEMCACHED_MODE and MEMCACHED_PREFIX and memcached_client_instance:
-            cache_key = f'{MEMCACHED_PREFIX}_neo4j_{uuid}'
-            cache_result = memcached_client_instance.get(cache_key)
+            cache_key = f'{schema_manager.get_cache_namespace()}_neo4j_{uuid}'
+            cache_result = schema_manager.get_cached_data(cache_key)
 
         if cache_result is None:
             logger.info(f'Neo4j entity cache of {uuid} not found or expired at time {datetime.now()}')
 
-            # Make a new query against neo4j
-            entity_dict = schema_neo4j_queries.get_entity(neo4j_driver_instance, uuid)
+            def get_neo4j_entity():
+                # Make a new query against neo4j
+                entity_dict = schema_neo4j_queries.get_entity(neo4j_driver_instance, uuid)
 
-            # The uuid exists via uuid-api doesn't mean it also exists in Neo4j
-            if not entity_dict:
-                logger.info(f"Entity of uuid: {uuid} not found in Neo4j")
+                # The uuid exists via uuid-api doesn't mean it also exists in Neo4j
+                if not entity_dict:
+                    logger.info(f"Entity of uuid: {uuid} not found in Neo4j")
 
-                # Still use the user provided id, especially when it's a hubmap_id, for error message
-                not_found_error(f"Entity of id: {id} not found in Neo4j")
-            
-            # Save to cache
-            if MEMCACHED_MODE and MEMCACHED_PREFIX and memcached_client_instance:
-                logger.info(f'Creating neo4j entity result cache of {uuid} at time {datetime.now()}')
+                    # Still use the user provided id, especially when it's a hubmap_id, for error message
+                    not_found_error(f"Entity of id: {id} not found in Neo4j")
 
-                cache_key = f'{MEMCACHED_PREFIX}_neo4j_{uuid}'
-                memcached_client_instance.set(cache_key, entity_dict, expire = SchemaConstants.MEMCACHED_TTL)
+                # Save to cache
+                if MEMCACHED_MODE and MEMCACHED_PREFIX and memcached_client_instance:
+                    logger.info(f'Creating neo4j entity result cache of {uuid} at time {datetime.now()}')
+
+                    cache_key = f'{schema_manager.get_cache_namespace()}_neo4j_{uuid}'
+                    schema_manager.set_cached_data(cache_key, entity_dict, expire = SchemaConstants.MEMCACHED_TTL)
+
+                return entity_dict
+
+            # Only one thread/worker queries neo4j for the same expired cache, the others wait for its result
+            if MEMCACHED_MODE and MEMCACHED_PREFIX and memcached_client_instance:
+                entity_dict = schema_manager.single_flight(f'{schema_manager.get_cache_namespace()}_neo4j_{uuid}', get_neo4j_entity)
+            else:
+                entity_dict = get_neo4j_entity()
         else:
             logger.info(f'Using neo4j entity cache of UUID {uuid} at time {datetime.now()}')
 
             entity_dict = cache_result
     except requests.exceptions.RequestException as e:
-        # Due to the use of response.raise_for_status() in schema_manager.get_hubmap_ids()
+        # No response when the circuit breaker is open, or the connection failed or timed out
+        if e.response is None:
+            service_unavailable_error("The uuid-api service is currently unavailable, please try again later")
+
+        # Due to the use of response.raise_for_status() in schema_manager.get_hubmap_ids() called by schema_manager.resolve_uuid()
         # we can access the status codes from the exception
         status_code = e.response.status_code
 
@@ -5410,6 +6097,10 @@ Delete the cached data of all possible keys used for the given entity_uuid and e
 By taking entity_uuid and entity_type as input, it eliminates the need to call query_target_entity()
 which is more useful when the input id could be either UUID or HuBMAP ID.
 
+The cached documents of the other entities that embed or derive from this entity (descendants,
+associated collections/datasets/upload) are recorded in the dependency index when they are cached,
+so they get deleted in the same batch without traversing the graph
+
 Parameters
 ----------
 entity_uuid : str
@@ -5419,52 +6110,14 @@ entity_type : str
 """
 def delete_cache(entity_uuid, entity_type):
     if MEMCACHED_MODE:
-        descendant_uuids = []
-        collection_dataset_uuids = []
-        upload_dataset_uuids = []
-        collection_uuids = []
-        dataset_upload_dict = {}
-        publication_collection_dict = {}
-
-        # Determine the associated cache keys based on the entity type
-        # For Donor/Datasets/Sample/Publication, delete the cache of all the descendants
-        if entity_type in ['Donor', 'Sample', 'Dataset', 'Publication']:
-            descendant_uuids = schema_neo4j_queries.get_descendants(neo4j_driver_instance, entity_uuid , 'uuid')
-
-        # For Collection/Epicollection, delete the cache for each of its associated datasets (via [:IN_COLLECTION])
-        if schema_manager.entity_type_instanceof(entity_type, 'Collection'):
-            collection_dataset_uuids = schema_neo4j_queries.get_collection_associated_datasets(neo4j_driver_instance, entity_uuid , 'uuid')
-
-        # For Upload, delete the cache for each of its associated Datasets (via [:IN_UPLOAD])
-        if entity_type == 'Upload':
-            upload_dataset_uuids = schema_neo4j_queries.get_upload_datasets(neo4j_driver_instance, entity_uuid , 'uuid')
-
-        # For Dataset, also delete the cache of associated Collections and Upload
-        if entity_type == 'Dataset':
-            collection_uuids = schema_neo4j_queries.get_dataset_collections(neo4j_driver_instance, entity_uuid , 'uuid')
-            dataset_upload_dict = schema_neo4j_queries.get_dataset_upload(neo4j_driver_instance, entity_uuid)
-
-        # For Publication, also delete cache of the associated collection
-        if entity_type == 'Publication':
-            publication_collection_dict = schema_neo4j_queries.get_publication_associated_collection(neo4j_driver_instance, entity_uuid)
-            
-        # We only use uuid in the cache key acorss all the cache types
-        uuids_list = [entity_uuid] + descendant_uuids + collection_dataset_uuids + upload_dataset_uuids + collection_uuids
-
-        # Add to the list if the target dataset has linked upload
-        if dataset_upload_dict:
-            uuids_list.append(dataset_upload_dict['uuid'])
+        logger.info(f"Deleting the cache of {entity_type} {entity_uuid} and its dependents")
 
-        # Add to the list if the target publicaiton has associated collection
-        if publication_collection_dict:
-            uuids_list.append(publication_collection_dict['uuid'])
-
-        # Final batch delete
-        schema_manager.delete_memcached_cache(uuids_list)
+        schema_manager.delete_memcached_cache([entity_uuid])
 
 
 """
-Make a call to search-api to trigger reindex of this entity document in elasticsearch
+Queue the reindex of this entity document in elasticsearch, the call to search-api is made
+by the background dispatcher so the write endpoints return as soon as neo4j commits
 
 Parameters
 ----------
@@ -5476,22 +6129,9 @@ priority_level:
     Value from the enumeration ReindexPriorityLevelEnum
 """
 def reindex_entity(uuid:str, user_token:str, priority_level:int = ReindexPriorityLevelEnum.HIGH.value) -> None:
-    headers = {
-        'Authorization': f'Bearer {user_token}'
-    }
+    logger.info(f"Queueing the reindex of uuid: {uuid}")
 
-    logger.info(f"Making a call to search-api to reindex uuid: {uuid}")
-
-    response = requests.put(f"{app.config['SEARCH_API_URL']}/reindex/{uuid}"
-                            , headers=headers
-                            , params={'priority': priority_level})
-
-    # The reindex takes time, so 202 Accepted response status code indicates that
-    # the request has been accepted for processing, but the processing has not been completed
-    if response.status_code == 202:
-        logger.info(f"The search-api has accepted the reindex request for uuid: {uuid}")
-    else:
-        logger.error(f"The search-api failed to initialize the reindex for uuid: {uuid}")
+    reindex_dispatcher.enqueue(uuid, user_token, priority_level)
 
 
 """
@@ -5539,110 +6179,269 @@ def validate_organ_code(organ_code):
 
 
 """
-Bulk update the entities in the entity-api.
+Bulk update the entities in-process, called by the bulk update job, see run_bulk_update_job()
 
-This function supports request throttling and retries.
+The updates go through the same validations and 'before_update_trigger'/'after_update_trigger' methods
+as `PUT /entities/<id>`, but BULK_UPDATE_BATCH_SIZE entities are written in one neo4j transaction, their
+caches are deleted at once and their reindex queued at once. Before the next batch, the thread waits for
+the reindex queue to drain below BULK_UPDATE_MAX_REINDEX_QUEUE_SIZE so the pace follows search-api
 
 Parameters
 ----------
 entity_updates : dict
-    The dictionary of entity updates. The key is the uuid and the value is the
-    update dictionary.
-token : str
-    The groups token for the request.
-entity_api_url : str
-    The url of the entity-api.
-total_tries : int, optional
-    The number of total requests to be made for each update, by default 3.
-throttle : float, optional
-    The time to wait between requests and retries, by default 5.
-after_each_callback : Callable[[int], None], optional
-    A callback function to be called after each update, by default None. The index
-    of the update is passed as a parameter to the callback.
+    The update dict of each entity keyed by uuid
+normalized_entity_type : str
+    Either Dataset or Upload
+user_token : str
+    The user's globus groups token
+user_info_dict : dict
+    The user info of the request, see schema_manager.get_user_info()
+bulk_request : bulk_update.InternalRequest
+    The args and headers of the request passed to the validator and trigger methods
+after_each_batch : Callable[[dict], None], optional
+    Called with the results of each batch, see bulk_update.apply_updates()
+before_write : Callable[[list], None], optional
+    Called with the uuids of each batch right before it gets written, the update dicts
+    of these uuids hold the normalized values by then
 
 Returns
 -------
 dict
-    The results of the bulk update. The key is the uuid of the entity. If
-    successful, the value is a dictionary with "success" as True and "data" as the
-    entity data. If failed, the value is a dictionary with "success" as False and
-    "data" as the error message.
-"""
-def bulk_update_entities(
-    entity_updates: dict,
-    token: str,
-    entity_api_url: str,
-    total_tries: int = 3,
-    throttle: float = 5,
-    after_each_callback: Optional[Callable[[int], None]] = None,
-) -> dict:
-    headers = {
-        "Authorization": f"Bearer {token}",
-        SchemaConstants.HUBMAP_APP_HEADER: SchemaConstants.ENTITY_API_APP,
-    }
-    # create a session with retries
-    session = requests.Session()
-    session.headers = headers
-    retries = Retry(
-        total=total_tries,
-        backoff_factor=throttle,
-        status_forcelist=[500, 502, 503, 504],
-    )
-    session.mount(entity_api_url, HTTPAdapter(max_retries=retries))
-
-    results = {}
-    with session as s:
-        for idx, (uuid, payload) in enumerate(entity_updates.items()):
-            try:
-                # https://github.com/hubmapconsortium/entity-api/issues/698#issuecomment-2260799700
-                # yuanzhou: When you iterate over the target uuids make individual PUT /entities/<uuid> calls.
-                # The main reason we use the PUT call rather than direct neo4j query is because the entity update
-                # needs to go through the schema trigger methods and generate corresponding values programmatically
-                # before sending over to neo4j.
-                # The PUT call returns the response immediately while the backend updating may be still going on.
-                res = s.put(f"{entity_api_url}/entities/{uuid}", json=payload)
-                
-                results[uuid] = {
-                    "success": res.ok,
-                    "data": res.json() if res.ok else res.json().get("error"),
-                }
+    The results of the bulk update keyed by uuid, see bulk_update.apply_updates()
+"""
+def update_datasets_uploads(entity_updates: dict, normalized_entity_type: str, user_token: str, user_info_dict: dict, bulk_request: bulk_update.InternalRequest,
+                            after_each_batch: Optional[Callable[[dict], None]] = None, before_write: Optional[Callable[[list], None]] = None) -> dict:
+
+    suppress_reindex = schema_manager.suppress_reindex(request_args=bulk_request.args)
+    reindex_priority = schema_manager.get_reindex_priority(request_args=bulk_request.args
+                                                           , calc_suppress_reindex=suppress_reindex)
+
+    def load_entities(uuids):
+        return schema_neo4j_queries.get_entities_by_uuids(neo4j_driver_instance, uuids)
+
+    def prepare_update(uuid, json_data_dict, existing_entity_dict):
+        # Normalize user provided status
+        if "status" in json_data_dict:
+            json_data_dict["status"] = schema_manager.normalize_status(json_data_dict["status"])
+
+        # Same validations as PUT /entities/<id>, the lockout can't be overridden here
+        schema_manager.execute_entity_level_validator(validator_type='before_entity_update_validator'
+                                                      , normalized_entity_type=normalized_entity_type
+                                                      , request=bulk_request
+                                                      , existing_entity_dict=existing_entity_dict)
+        schema_manager.validate_json_data_against_schema(json_data_dict, normalized_entity_type, existing_entity_dict = existing_entity_dict)
+        schema_manager.execute_property_level_validators('before_property_update_validators', normalized_entity_type, bulk_request, existing_entity_dict, json_data_dict)
+
+        generated_before_update_trigger_data_dict = schema_manager.generate_triggered_data( trigger_type=TriggerTypeEnum.BEFORE_UPDATE
+                                                                                            , normalized_class=normalized_entity_type
+                                                                                            , request_args=bulk_request.args
+                                                                                            , user_token=user_token
+                                                                                            , existing_data_dict=existing_entity_dict
+                                                                                            , new_data_dict={**user_info_dict, **json_data_dict})
+
+        merged_dict = {**json_data_dict, **generated_before_update_trigger_data_dict}
+
+        # Filter out the transient properties (not to be stored) and properties with None value
+        return schema_manager.remove_transient_and_none_values(merged_dict, normalized_entity_type)
+
+    def write_updates(entity_data_dicts):
+        if before_write:
+            before_write(list(entity_data_dicts))
 
-                logger.info(f"Successfully made No.{idx + 1} internal entity-api call to update {uuid}")
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Failed to update entity {uuid}: {e}")
-                results[uuid] = {"success": False, "data": str(e)}
+        return schema_neo4j_queries.update_entities(neo4j_driver_instance, normalized_entity_type, entity_data_dicts, BULK_UPDATE_BATCH_SIZE)
 
-            if after_each_callback:
-                after_each_callback(idx)
+    def finish_update(uuid, json_data_dict, updated_entity_dict):
+        # Same as PUT /entities/<id>, only the status change has 'after_update_trigger' methods among the accepted fields
+        if json_data_dict.get('status'):
+            schema_manager.generate_triggered_data( trigger_type=TriggerTypeEnum.AFTER_UPDATE
+                                                    , normalized_class=normalized_entity_type
+                                                    , request_args=bulk_request.args
+                                                    , user_token=user_token
+                                                    , existing_data_dict={**json_data_dict, **updated_entity_dict, **user_info_dict}
+                                                    , new_data_dict=json_data_dict)
 
-            if idx < len(entity_updates) - 1:
-                time.sleep(throttle)
+    def end_batch(uuids):
+        if MEMCACHED_MODE:
+            logger.info(f"Deleting the cache of {len(uuids)} bulk updated {normalized_entity_type} entities and their dependents")
+            schema_manager.delete_memcached_cache(uuids)
+
+        if suppress_reindex:
+            logger.info(f"Re-indexing suppressed during bulk update of {len(uuids)} {normalized_entity_type} entities")
+            return
+
+        for uuid in uuids:
+            reindex_entity(uuid, user_token, reindex_priority)
 
-    logger.debug("Returning bulk_update_entities() resulting data")
-    logger.debug(results)
+        # Let search-api catch up before writing the next batch
+        if not reindex_dispatcher.wait_for_capacity(BULK_UPDATE_MAX_REINDEX_QUEUE_SIZE, timeout = BULK_UPDATE_REINDEX_WAIT_SECONDS):
+            logger.warning(f"The reindex queue is still at {reindex_dispatcher.get_queue_size()} uuids after "
+                           f"{BULK_UPDATE_REINDEX_WAIT_SECONDS} seconds, continuing the bulk update")
 
-    return results
+    # Runs outside of the request, the abort() of the helpers still needs the application context
+    with app.app_context():
+        update_res = bulk_update.apply_updates(entity_updates,
+                                               load_entities,
+                                               prepare_update,
+                                               write_updates,
+                                               finish_update,
+                                               end_batch,
+                                               batch_size = BULK_UPDATE_BATCH_SIZE,
+                                               max_workers = BULK_UPDATE_MAX_WORKERS,
+                                               after_each_batch = after_each_batch)
+
+    succeeded_count = sum(1 for res in update_res.values() if res["success"])
+    logger.info(f"Bulk updated {succeeded_count} of {len(update_res)} {normalized_entity_type} entities")
+
+    return update_res
 
 
 """
-Bulk update the entities called in a separate thread
+Build the request passed to the validator and trigger methods of a background job
 
 Parameters
 ----------
-entity_updates : dict
-    The dictionary of entity updates
-token : str
-    The groups token for the request
-entity_api_url : str
-    The url of the entity-api
+job_params : dict
+    The parameters of the job with the 'args' and 'method' of the original request, the 'application' header value
+    and the 'user_info' of the submitter
+user_token : str
+    The user's globus groups token, or the internal token when the job is resumed
+
+Returns
+-------
+bulk_update.InternalRequest
+    The args, headers, method and user info of the original request
 """
-def update_datasets_uploads(entity_updates: list, token: str, entity_api_url: str) -> None:
-    update_payload = {ds.pop("uuid"): ds for ds in entity_updates}
-    update_res = bulk_update_entities(update_payload, token, entity_api_url)
+def build_job_request(job_params, user_token):
+    headers = Headers({'Authorization': f'Bearer {user_token}'})
+
+    if job_params.get('application'):
+        headers[SchemaConstants.HUBMAP_APP_HEADER] = job_params['application']
 
-    for uuid, res in update_res.items():
-        if not res["success"]:
-            logger.error(f"Failed to update entity {uuid}: {res['data']}")
+    # Never authorize with the token of a resumed job, which is the internal token
+    return bulk_update.InternalRequest(args = MultiDict(job_params['args']), headers = headers, method = job_params.get('method'), user_info = job_params['user_info'])
+
+
+"""
+Run a bulk update job submitted by PUT /datasets or PUT /uploads, see jobs.JobRunner.register_handler()
+
+Parameters
+----------
+job : dict
+    The job, see jobs.JobStore.get_job()
+items : list
+    The (uuid, update dict, marker) tuples not reported yet, the marker is the normalized update dict
+    of the entities an abandoned run was writing
+report : Callable[[dict], None]
+    Records the status and result of the updated items
+mark : Callable[[dict], None]
+    Records the normalized update dict of the entities about to be written
+user_token : str
+    The user's globus groups token, or the internal token when the job is resumed
+"""
+def run_bulk_update_job(job, items, report, mark, user_token):
+    job_params = job['params']
+    normalized_entity_type = job_params['entity_type']
+    job_request = build_job_request(job_params, user_token)
+    entity_updates = {uuid: json_data_dict for uuid, json_data_dict, marker in items}
+
+    # The abandoned run may have committed these updates without reporting them, applying them again
+    # would E.g., append another status_history entry, so the ones already in neo4j are only reported
+    markers = {uuid: marker for uuid, json_data_dict, marker in items if marker is not None}
+    if markers:
+        existing_entity_dicts = schema_neo4j_queries.get_entities_by_uuids(neo4j_driver_instance, list(markers))
+        applied_uuids = [uuid for uuid, marker in markers.items()
+                         if uuid in existing_entity_dicts and bulk_update.is_update_applied(marker, existing_entity_dicts[uuid])]
+
+        if applied_uuids:
+            logger.info(f"Skipping {len(applied_uuids)} {normalized_entity_type} entities already updated by the abandoned run of job {job['id']}")
+
+            report({uuid: (jobs.ITEM_STATUS_SUCCEEDED, None) for uuid in applied_uuids})
+
+            if MEMCACHED_MODE:
+                schema_manager.delete_memcached_cache(applied_uuids)
+
+            if not schema_manager.suppress_reindex(request_args=job_request.args):
+                reindex_priority = schema_manager.get_reindex_priority(request_args=job_request.args, calc_suppress_reindex=False)
+                for uuid in applied_uuids:
+                    reindex_entity(uuid, user_token, reindex_priority)
+
+            for uuid in applied_uuids:
+                del entity_updates[uuid]
+
+    def report_batch(batch_results):
+        report({uuid: (jobs.ITEM_STATUS_SUCCEEDED, None) if res['success'] else (jobs.ITEM_STATUS_FAILED, res['data'])
+                for uuid, res in batch_results.items()})
+
+    def mark_batch(uuids):
+        mark({uuid: entity_updates[uuid] for uuid in uuids})
+
+    update_datasets_uploads(entity_updates, normalized_entity_type, user_token, job_params['user_info'],
+                            job_request, after_each_batch = report_batch, before_write = mark_batch)
+
+
+"""
+Run a bulk registration job submitted by POST /entities/bulk-register?background=true,
+see jobs.JobRunner.register_handler()
+
+Parameters
+----------
+job : dict
+    The job, see jobs.JobStore.get_job()
+items : list
+    The (row number, TSV row dict, marker) tuples not reported yet, the marker is the new ids dict
+    of the rows an abandoned run was creating
+report : Callable[[dict], None]
+    Records the status and result of the registered rows
+mark : Callable[[dict], None]
+    Records the new ids dict of the rows about to be created
+user_token : str
+    The user's globus groups token, or the internal token when the job is resumed
+"""
+def run_bulk_registration_job(job, items, report, mark, user_token):
+    job_params = job['params']
+    normalized_entity_type = job_params['entity_type']
+    job_request = build_job_request(job_params, user_token)
+
+    suppress_reindex = schema_manager.suppress_reindex(request_args=job_request.args)
+    reindex_priority = schema_manager.get_reindex_priority(request_args=job_request.args
+                                                           , calc_suppress_reindex=suppress_reindex)
+
+    def reindex_created(created_uuids):
+        if suppress_reindex:
+            logger.info(f"Re-indexing suppressed during bulk registration of {len(created_uuids)} {normalized_entity_type} entities")
+        else:
+            for uuid in created_uuids:
+                reindex_entity(uuid, user_token, reindex_priority)
+
+    rows = [(int(row_number), tsv_row) for row_number, tsv_row, marker in items]
+
+    # The abandoned run may have created the entities of these rows without reporting them,
+    # the rows whose entity exists are only reported instead of creating duplicates
+    markers = {int(row_number): marker for row_number, tsv_row, marker in items if marker is not None}
+    if markers:
+        existing_entity_dicts = schema_neo4j_queries.get_entities_by_uuids(neo4j_driver_instance, [marker['uuid'] for marker in markers.values()])
+        created_rows = {row_number: marker for row_number, marker in markers.items() if marker['uuid'] in existing_entity_dicts}
+
+        if created_rows:
+            logger.info(f"Skipping {len(created_rows)} rows already registered by the abandoned run of job {job['id']}")
+
+            report({row_number: (jobs.ITEM_STATUS_SUCCEEDED, {'row': row_number, 'status': bulk_registration.STATUS_CREATED, **marker})
+                    for row_number, marker in created_rows.items()})
+            reindex_created([marker['uuid'] for marker in created_rows.values()])
+
+            rows = [(row_number, tsv_row) for row_number, tsv_row in rows if row_number not in created_rows]
+
+    # Runs outside of the request, the abort() of the helpers still needs the application context
+    with app.app_context():
+        for index in range(0, len(rows), BULK_CREATE_BATCH_SIZE):
+            chunk = rows[index:index + BULK_CREATE_BATCH_SIZE]
+            results = bulk_register_entities_chunk(job_request, normalized_entity_type, user_token, job_params['user_info'], chunk, before_create = mark)
+
+            # Record the created rows right away so a resumed job doesn't create them again
+            report({result['row']: (jobs.ITEM_STATUS_SUCCEEDED if result.get('status') == bulk_registration.STATUS_CREATED else jobs.ITEM_STATUS_FAILED, result)
+                    for result in results})
+
+            reindex_created([result['uuid'] for result in results if result.get('status') == bulk_registration.STATUS_CREATED])
 
 
 """
@@ -5756,6 +6555,14 @@ def _get_metadata_by_id(entity_id:str=None, metadata_scope:MetadataScopeEnum=Met
         return final_result
 
 
+####################################################################################################
+## Register the background job handlers
+####################################################################################################
+
+job_runner.register_handler(JOB_TYPE_BULK_UPDATE, run_bulk_update_job)
+job_runner.register_handler(JOB_TYPE_BULK_REGISTRATION, run_bulk_registration_job)
+
+
 ####################################################################################################
 ## For local development/testing
 ####################################################################################################
@@ -1,10 +1,10 @@
-from typing import Iterable, List, Optional, Union
 from neo4j.exceptions import TransactionError
 import logging
 import json
 
 # Local modules
 from schema import schema_neo4j_queries
+from schema.schema_constants import SchemaConstants
 
 
 logger = logging.getLogger(__name__)
@@ -75,18 +75,17 @@ def get_entities_by_type(neo4j_driver, entity_type, property_key = None):
         query = (f"MATCH (e:{entity_type}) "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(e.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(e[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (e:{entity_type}) "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
                  f"RETURN apoc.coll.toSet(COLLECT(e)) AS {record_field_name}")
 
-    logger.info("======get_entities_by_type() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_entities_by_type', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'property_key': property_key})
 
         if record and record[record_field_name]:
             if property_key:
@@ -99,6 +98,46 @@ def get_entities_by_type(neo4j_driver, entity_type, property_key = None):
     return results
 
 
+"""
+Get one page of the entities of the given type ordered by uuid, used as a cursor
+to iterate through all the entities without loading them all at once
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+entity_type : str
+    One of the normalized entity types: Dataset, Collection, Sample, Donor
+last_uuid : str
+    The uuid of the last entity of the previous page, None for the first page
+limit : int
+    The max number of entities in the page
+
+Returns
+-------
+list
+    A list of entity dicts of the given type, empty when there are no more entities
+"""
+def get_entities_by_type_page(neo4j_driver, entity_type, last_uuid = None, limit = 500):
+    results = []
+
+    query = (f"MATCH (e:{entity_type}) "
+             f"WHERE $last_uuid IS NULL OR e.uuid > $last_uuid "
+             f"RETURN e AS {record_field_name} "
+             f"ORDER BY e.uuid "
+             f"LIMIT $limit")
+
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_entities_by_type_page', query)
+
+    with neo4j_driver.session() as session:
+        records = session.run(query, last_uuid = last_uuid, limit = limit)
+
+        for record in records:
+            results.append(schema_neo4j_queries.node_to_dict(record[record_field_name]))
+
+    return results
+
+
 """
 Determine if given dataset has componet children
 
@@ -116,11 +155,13 @@ boolean
 """
 def dataset_has_component_children(neo4j_driver, dataset_uuid):
     query = (f"MATCH p=(ds1:Dataset)<-[:ACTIVITY_OUTPUT]-(a:Activity)<-[:ACTIVITY_INPUT]-(ds2:Dataset) "
-             f"WHERE ds2.uuid = '{dataset_uuid}' AND a.creation_action = 'Multi-Assay Split' "
+             f"WHERE ds2.uuid = $dataset_uuid AND a.creation_action = 'Multi-Assay Split' "
              f"RETURN (count(p) > 0) as {record_field_name}")
 
+    schema_neo4j_queries.register_query('app_neo4j_queries.dataset_has_component_children', query)
+
     with neo4j_driver.session() as session:
-        result = session.run(query).value()
+        result = session.run(query, dataset_uuid = dataset_uuid).value()
     return result[0]
 
 """
@@ -141,17 +182,21 @@ list
 def get_ancestor_organs(neo4j_driver, entity_uuid):
     results = []
 
+    if schema_neo4j_queries.ancestry_closure_reads_enabled():
+        match_clause = "MATCH (e:Entity {uuid:$entity_uuid})-[:HAS_ANCESTOR]->(organ:Sample {sample_category:'organ'}) "
+    else:
+        match_clause = "MATCH (e:Entity {uuid:$entity_uuid})<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(organ:Sample {sample_category:'organ'}) "
+
     # specimen_type -> sample_category 12/15/2022
-    query = (f"MATCH (e:Entity {{uuid:'{entity_uuid}'}})<-[*]-(organ:Sample {{sample_category:'organ'}}) "
+    query = (match_clause +
              # COLLECT() returns a list
              # apoc.coll.toSet() reruns a set containing unique nodes
              f"RETURN apoc.coll.toSet(COLLECT(organ)) AS {record_field_name}")
 
-    logger.info("======get_ancestor_organs() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_ancestor_organs', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'entity_uuid': entity_uuid})
 
         if record and record[record_field_name]:
             results = schema_neo4j_queries.nodes_to_dicts(record[record_field_name])
@@ -172,41 +217,24 @@ activity_dict : dict
     The dict containing generated activity data
 direct_ancestor_uuid : str
     The uuid of the direct ancestor to be linked to
+batch_size : int
+    The number of samples created by one statement
 """
-def create_multiple_samples(neo4j_driver, samples_dict_list, activity_data_dict, direct_ancestor_uuid):
+def create_multiple_samples(neo4j_driver, samples_dict_list, activity_data_dict, direct_ancestor_uuid, batch_size = SchemaConstants.NEO4J_BULK_CREATE_BATCH_SIZE):
     try:
         with neo4j_driver.session() as session:
-            entity_dict = {}
-
             tx = session.begin_transaction()
 
-            activity_uuid = activity_data_dict['uuid']
-
-            # Step 1: create the Activity node
-            schema_neo4j_queries.create_activity_tx(tx, activity_data_dict)
+            # Create the Activity node, the samples and all the relationships
+            create_activity_outputs_tx(tx, 'Sample', samples_dict_list, activity_data_dict, direct_ancestor_uuid, batch_size)
 
-            # Step 2: create relationship from source entity node to this Activity node
-            schema_neo4j_queries.create_relationship_tx(tx, direct_ancestor_uuid, activity_uuid, 'ACTIVITY_INPUT', '->')
-
-            # Step 3: create each new sample node and link to the Activity node at the same time
-            for sample_dict in samples_dict_list:
-                node_properties_map = schema_neo4j_queries.build_properties_map(sample_dict)
-
-                query = (f"MATCH (a:Activity) "
-                         f"WHERE a.uuid = '{activity_uuid}' "
-                         # Always define the Entity label in addition to the target `entity_type` label
-                         f"CREATE (e:Entity:Sample {node_properties_map} ) "
-                         f"CREATE (a)-[:ACTIVITY_OUTPUT]->(e)")
-
-                logger.info("======create_multiple_samples() individual query======")
-                logger.debug(query)
-
-                result = tx.run(query)
+            # The new samples have no descendants yet
+            schema_neo4j_queries.rebuild_ancestry_closure_tx(tx, [sample_dict['uuid'] for sample_dict in samples_dict_list])
 
             # Then
             tx.commit()
     except TransactionError as te:
-        msg = f"TransactionError from calling create_multiple_samples(): {te.value}"
+        msg = f"TransactionError from calling create_multiple_samples(): {te}"
         # Log the full stack trace, prepend a line with our message
         logger.exception(msg)
 
@@ -215,7 +243,7 @@ def create_multiple_samples(neo4j_driver, samples_dict_list, activity_data_dict,
 
             tx.rollback()
 
-        raise TransactionError(msg)
+        raise TransactionError(tx, msg)
 
 
 """
@@ -231,59 +259,226 @@ activity_dict : dict
     The dict containing generated activity data
 direct_ancestor_uuid : str
     The uuid of the direct ancestor to be linked to
+batch_size : int
+    The number of datasets created by one statement
+
+Returns
+-------
+list
+    The dicts of the created datasets in the same order
 """
-def create_multiple_datasets(neo4j_driver, datasets_dict_list, activity_data_dict, direct_ancestor_uuid):
+def create_multiple_datasets(neo4j_driver, datasets_dict_list, activity_data_dict, direct_ancestor_uuid, batch_size = SchemaConstants.NEO4J_BULK_CREATE_BATCH_SIZE):
     try:
         with neo4j_driver.session() as session:
-            entity_dict = {}
-
             tx = session.begin_transaction()
 
-            activity_uuid = activity_data_dict['uuid']
-
-            # Step 1: create the Activity node
-            schema_neo4j_queries.create_activity_tx(tx, activity_data_dict)
-
-            # Step 2: create relationship from source entity node to this Activity node
-            schema_neo4j_queries.create_relationship_tx(tx, direct_ancestor_uuid, activity_uuid, 'ACTIVITY_INPUT', '->')
-
-            # Step 3: create each new sample node and link to the Activity node at the same time
-            output_dicts_list = []
-            for dataset_dict in datasets_dict_list:
-                # Remove dataset_link_abs_dir once more before entity creation
-                dataset_link_abs_dir = dataset_dict.pop('dataset_link_abs_dir', None)
-                node_properties_map = schema_neo4j_queries.build_properties_map(dataset_dict)
-
-                query = (f"MATCH (a:Activity) "
-                         f"WHERE a.uuid = '{activity_uuid}' "
-                         # Always define the Entity label in addition to the target `entity_type` label
-                         f"CREATE (e:Entity:Dataset {node_properties_map} ) "
-                         f"CREATE (a)-[:ACTIVITY_OUTPUT]->(e)" 
-                         f"RETURN e AS {record_field_name}")
-
-                logger.info("======create_multiple_samples() individual query======")
-                logger.debug(query)
-
-                result = tx.run(query)
-                record = result.single()
-                entity_node = record[record_field_name]
-                entity_dict = schema_neo4j_queries.node_to_dict(entity_node)
-                entity_dict['dataset_link_abs_dir'] = dataset_link_abs_dir
-                output_dicts_list.append(entity_dict)
+            # Remove dataset_link_abs_dir once more before entity creation
+            dataset_link_abs_dirs = {dataset_dict['uuid']: dataset_dict.pop('dataset_link_abs_dir', None) for dataset_dict in datasets_dict_list}
+
+            # Create the Activity node, the datasets and all the relationships
+            output_dicts_list = create_activity_outputs_tx(tx, 'Dataset', datasets_dict_list, activity_data_dict, direct_ancestor_uuid, batch_size)
+
+            for entity_dict in output_dicts_list:
+                entity_dict['dataset_link_abs_dir'] = dataset_link_abs_dirs[entity_dict['uuid']]
+
+            # The new datasets have no descendants yet
+            schema_neo4j_queries.rebuild_ancestry_closure_tx(tx, [dataset_dict['uuid'] for dataset_dict in output_dicts_list])
+
             # Then
             tx.commit()
             return output_dicts_list
     except TransactionError as te:
-        msg = f"TransactionError from calling create_multiple_samples(): {te.value}"
+        msg = f"TransactionError from calling create_multiple_datasets(): {te}"
         # Log the full stack trace, prepend a line with our message
         logger.exception(msg)
 
         if tx.closed() == False:
-            logger.error("Failed to commit create_multiple_samples() transaction, rollback")
+            logger.error("Failed to commit create_multiple_datasets() transaction, rollback")
+
+            tx.rollback()
+
+        raise TransactionError(tx, msg)
+
+
+"""
+Create the Activity node linked from the direct ancestor and the entity nodes it outputs, with one
+UNWIND statement per batch of entities. The first statement also creates the Activity node and the
+ACTIVITY_INPUT relationship, and each statement creates the ACTIVITY_OUTPUT relationships of its entities
+
+Parameters
+----------
+tx : neo4j.Transaction object
+    The neo4j.Transaction object instance
+entity_type : str
+    The label of the entities besides Entity, either Sample or Dataset
+entity_dicts_list : list
+    The dicts of the entities to be created
+activity_data_dict : dict
+    The dict containing generated activity data
+direct_ancestor_uuid : str
+    The uuid of the direct ancestor to be linked to
+batch_size : int
+    The number of entities created by one statement
+
+Returns
+-------
+list
+    The dicts of the created entities in the same order
+"""
+def create_activity_outputs_tx(tx, entity_type, entity_dicts_list, activity_data_dict, direct_ancestor_uuid, batch_size = SchemaConstants.NEO4J_BULK_CREATE_BATCH_SIZE):
+    # Always define the Entity label in addition to the target `entity_type` label
+    create_entities_clause = (f"UNWIND $rows AS row "
+                              f"CREATE (e:Entity:{entity_type}) "
+                              f"{schema_neo4j_queries.properties_set_clause('e', params = 'row')}"
+                              f"CREATE (a)-[:ACTIVITY_OUTPUT]->(e) "
+                              f"RETURN e AS {record_field_name}")
+
+    first_batch_query = (f"MATCH (ancestor:Entity {{uuid: $direct_ancestor_uuid}}) "
+                         f"CREATE (a:Activity) "
+                         f"{schema_neo4j_queries.properties_set_clause('a', params = '$activity')}"
+                         f"CREATE (ancestor)-[:ACTIVITY_INPUT]->(a) "
+                         f"WITH a "
+                         f"{create_entities_clause}")
+
+    next_batch_query = (f"MATCH (a:Activity {{uuid: $activity_uuid}}) "
+                        f"{create_entities_clause}")
+
+    schema_neo4j_queries.register_query(f'create_multiple_{entity_type.lower()}s', first_batch_query)
+    schema_neo4j_queries.register_query(f'create_multiple_{entity_type.lower()}s', next_batch_query)
+
+    batch_size = max(batch_size, 1)
+    output_dicts_list = []
+
+    # An empty list still creates the Activity node like the per-entity statements did
+    for index in range(0, max(len(entity_dicts_list), 1), batch_size):
+        rows = [schema_neo4j_queries.build_properties_params(entity_dict) for entity_dict in entity_dicts_list[index:index + batch_size]]
+
+        if index == 0:
+            result = tx.run(first_batch_query,
+                            direct_ancestor_uuid = direct_ancestor_uuid,
+                            activity = schema_neo4j_queries.build_properties_params(activity_data_dict),
+                            rows = rows)
+        else:
+            result = tx.run(next_batch_query, activity_uuid = activity_data_dict['uuid'], rows = rows)
+
+        entity_dicts = [schema_neo4j_queries.node_to_dict(record[record_field_name]) for record in result]
+
+        # Nothing gets created when the direct ancestor doesn't exist
+        if len(entity_dicts) != len(rows):
+            raise TransactionError(tx, f"Created {len(entity_dicts)} of {len(rows)} {entity_type} nodes linked to the direct ancestor {direct_ancestor_uuid}")
+
+        output_dicts_list.extend(entity_dicts)
+
+    return output_dicts_list
+
+
+"""
+Create the entity nodes each with its own Activity node linked from its own direct ancestor, as
+`POST /entities/<entity_type>` does for one entity, with one UNWIND statement per batch of entities
+
+Parameters
+----------
+tx : neo4j.Transaction object
+    The neo4j.Transaction object instance
+entity_type : str
+    The label of the entities besides Entity, either Donor or Sample
+entity_dicts_list : list
+    The dicts of the entities to be created
+activity_dicts_list : list
+    The dicts containing generated activity data of each entity
+direct_ancestor_uuids : list
+    The uuid of the direct ancestor of each entity, the Lab node for a Donor
+batch_size : int
+    The number of entities created by one statement
+
+Returns
+-------
+list
+    The uuids of the created entities in the same order
+"""
+def create_entities_with_activities_tx(tx, entity_type, entity_dicts_list, activity_dicts_list, direct_ancestor_uuids, batch_size = SchemaConstants.NEO4J_BULK_CREATE_BATCH_SIZE):
+    # Always define the Entity label in addition to the target `entity_type` label
+    query = (f"UNWIND $rows AS row "
+             f"MATCH (ancestor:Entity {{uuid: row.direct_ancestor_uuid}}) "
+             f"CREATE (a:Activity) "
+             f"{schema_neo4j_queries.properties_set_clause('a', params = 'row.activity')}"
+             f"CREATE (ancestor)-[:ACTIVITY_INPUT]->(a) "
+             f"CREATE (e:Entity:{entity_type}) "
+             f"{schema_neo4j_queries.properties_set_clause('e', params = 'row.entity')}"
+             f"CREATE (a)-[:ACTIVITY_OUTPUT]->(e) "
+             f"RETURN e.uuid AS {record_field_name}")
+
+    schema_neo4j_queries.register_query(f'create_{entity_type.lower()}s_with_activities', query)
+
+    batch_size = max(batch_size, 1)
+    created_uuids = []
+
+    for index in range(0, len(entity_dicts_list), batch_size):
+        rows = [{'entity': schema_neo4j_queries.build_properties_params(entity_dict),
+                 'activity': schema_neo4j_queries.build_properties_params(activity_dict),
+                 'direct_ancestor_uuid': direct_ancestor_uuid}
+                for entity_dict, activity_dict, direct_ancestor_uuid in zip(entity_dicts_list[index:index + batch_size],
+                                                                             activity_dicts_list[index:index + batch_size],
+                                                                             direct_ancestor_uuids[index:index + batch_size])]
+
+        uuids = [record[record_field_name] for record in tx.run(query, rows = rows)]
+
+        # The rows whose direct ancestor doesn't exist create nothing
+        if len(uuids) != len(rows):
+            raise TransactionError(tx, f"Created {len(uuids)} of {len(rows)} {entity_type} nodes, some direct ancestors not found")
+
+        created_uuids.extend(uuids)
+
+    return created_uuids
+
+
+"""
+Create the entity nodes registered in bulk and the linkages to their direct ancestors in one transaction
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+entity_type : str
+    Either Donor or Sample
+entity_dicts_list : list
+    The dicts of the entities to be created
+activity_dicts_list : list
+    The dicts containing generated activity data of each entity
+direct_ancestor_uuids : list
+    The uuid of the direct ancestor of each entity, the Lab node for a Donor
+batch_size : int
+    The number of entities created by one statement
+
+Returns
+-------
+list
+    The uuids of the created entities in the same order
+"""
+def create_registered_entities(neo4j_driver, entity_type, entity_dicts_list, activity_dicts_list, direct_ancestor_uuids, batch_size = SchemaConstants.NEO4J_BULK_CREATE_BATCH_SIZE):
+    try:
+        with neo4j_driver.session() as session:
+            tx = session.begin_transaction()
+
+            created_uuids = create_entities_with_activities_tx(tx, entity_type, entity_dicts_list, activity_dicts_list, direct_ancestor_uuids, batch_size)
+
+            # The new entities have no descendants yet
+            schema_neo4j_queries.rebuild_ancestry_closure_tx(tx, created_uuids)
+
+            tx.commit()
+
+            return created_uuids
+    except TransactionError as te:
+        msg = f"TransactionError from calling create_registered_entities(): {te}"
+        # Log the full stack trace, prepend a line with our message
+        logger.exception(msg)
+
+        if tx.closed() == False:
+            logger.error("Failed to commit create_registered_entities() transaction, rollback")
 
             tx.rollback()
 
-        raise TransactionError(msg)
+        raise TransactionError(tx, msg)
 
 
 """
@@ -305,7 +500,7 @@ def get_sorted_revisions(neo4j_driver, uuid):
     results = []
 
     query = (f"MATCH (prev:Dataset)<-[:REVISION_OF *0..]-(e:Dataset)<-[:REVISION_OF *0..]-(next:Dataset) "
-             f"WHERE e.uuid='{uuid}' "
+             f"WHERE e.uuid=$uuid "
              # COLLECT() returns a list
              # apoc.coll.toSet() reruns a set containing unique nodes
              f"WITH apoc.coll.toSet(COLLECT(next) + COLLECT(e) + COLLECT(prev)) AS collection "
@@ -313,11 +508,10 @@ def get_sorted_revisions(neo4j_driver, uuid):
              f"WITH node ORDER BY node.created_timestamp DESC "
              f"RETURN COLLECT(node) AS {record_field_name}")
 
-    logger.info("======get_sorted_revisions() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_sorted_revisions', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             # Convert the list of nodes to a list of dicts
@@ -350,24 +544,23 @@ dict
 def get_sorted_multi_revisions(neo4j_driver, uuid, fetch_all=True, property_key=False):
     results = []
     match_case = '' if fetch_all is True else 'AND prev.status = "Published" AND next.status = "Published" '
-    collect_prop = f".{property_key}" if property_key else ''
+    collect_prop = "[$property_key]" if property_key else ''
 
     query = (
         "MATCH (e:Dataset), (next:Dataset), (prev:Dataset),"
         f"p = (e)-[:REVISION_OF *0..]->(prev),"
         f"n = (e)<-[:REVISION_OF *0..]-(next) "
-        f"WHERE e.uuid='{uuid}' {match_case}"
+        f"WHERE e.uuid=$uuid {match_case}"
         "WITH length(p) AS p_len, prev, length(n) AS n_len, next "
         "ORDER BY prev.created_timestamp, next.created_timestamp DESC "
         f"WITH p_len, collect(distinct prev{collect_prop}) AS prev_revisions, n_len, collect(distinct next{collect_prop}) AS next_revisions "
         f"RETURN [collect(distinct next_revisions), collect(distinct prev_revisions)] AS {record_field_name}"
     )
 
-    logger.info("======get_sorted_revisions() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_sorted_multi_revisions', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key})
 
         if record and record[record_field_name] and len(record[record_field_name]) > 0:
             record[record_field_name][0].pop()  # the target will appear twice, pop it from the next list
@@ -408,22 +601,21 @@ def get_previous_revisions(neo4j_driver, uuid, property_key = None):
 
     if property_key:
         query = (f"MATCH (e:Entity)-[:REVISION_OF*]->(prev:Entity) "
-                 f"WHERE e.uuid='{uuid}' "
+                 f"WHERE e.uuid=$uuid "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(prev.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(prev[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (e:Entity)-[:REVISION_OF*]->(prev:Entity) "
-                 f"WHERE e.uuid='{uuid}' "
+                 f"WHERE e.uuid=$uuid "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
                  f"RETURN apoc.coll.toSet(COLLECT(prev)) AS {record_field_name}")
 
-    logger.info("======get_previous_revisions() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_previous_revisions', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key})
 
         if record and record[record_field_name]:
             if property_key:
@@ -458,22 +650,21 @@ def get_next_revisions(neo4j_driver, uuid, property_key = None):
 
     if property_key:
         query = (f"MATCH (e:Entity)<-[:REVISION_OF*]-(next:Entity) "
-                 f"WHERE e.uuid='{uuid}' "
+                 f"WHERE e.uuid=$uuid "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(next.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(next[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (e:Entity)<-[:REVISION_OF*]-(next:Entity) "
-                 f"WHERE e.uuid='{uuid}' "
+                 f"WHERE e.uuid=$uuid "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
                  f"RETURN apoc.coll.toSet(COLLECT(next)) AS {record_field_name}")
 
-    logger.info("======get_next_revisions() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_next_revisions', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key})
 
         if record and record[record_field_name]:
             if property_key:
@@ -505,16 +696,15 @@ def is_next_revision_latest(neo4j_driver, uuid):
     results = []
 
     query = (f"MATCH (e:Entity)<-[:REVISION_OF*]-(rev:Entity)<-[:REVISION_OF*]-(next:Entity) "
-             f"WHERE e.uuid='{uuid}' "
+             f"WHERE e.uuid=$uuid "
              # COLLECT() returns a list
              # apoc.coll.toSet() reruns a set containing unique nodes
              f"RETURN apoc.coll.toSet(COLLECT(next.uuid)) AS {record_field_name}")
 
-    logger.info("======is_next_revision_latest() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.is_next_revision_latest', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             results = record[record_field_name]
@@ -540,17 +730,16 @@ tuple
     Else return None
 """
 def nested_previous_revisions(neo4j_driver, previous_revision_list):
-    query = (f"WITH {previous_revision_list} AS uuidList "
+    query = ("WITH $previous_revision_list AS uuidList "
             "MATCH (ds1:Dataset)-[r:REVISION_OF]->(ds2:Dataset) "
             "WHERE ds1.uuid IN uuidList AND ds2.uuid IN uuidList "
             "WITH COLLECT(DISTINCT ds1.uuid) AS connectedUUID1, COLLECT(DISTINCT ds2.uuid) as connectedUUID2 "
             "RETURN connectedUUID1, connectedUUID2 ")
 
-    logger.info("======nested_previous_revisions() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.nested_previous_revisions', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'previous_revision_list': list(previous_revision_list)})
     if record[0]:
         return record
     else:
@@ -570,10 +759,10 @@ depth : int
     The maximum number of hops in the traversal
 """
 def get_provenance(neo4j_driver, uuid, depth):
-    # max_level_str is the string used to put a limit on the number of levels to traverse
-    max_level_str = ''
+    # max_level is used to put a limit on the number of levels to traverse, -1 for no limit
+    max_level = -1
     if depth is not None and len(str(depth)) > 0:
-        max_level_str = f"maxLevel: {depth}, "
+        max_level = int(depth)
     delimiter = ', '
     entity_properties = ['group_uuid', 'created_by_user_displayname', 'created_by_user_sub', 'created_by_user_email', 'uuid', 'dataset_type', 'hubmap_id', 'entity_type', 'status', 'created_timestamp']
     activity_properties = ['hubmap_id', 'created_by_user_displayname', 'created_by_user_sub', 'created_by_user_email', 'creation_action', 'uuid', 'status', 'created_timestamp']
@@ -583,8 +772,8 @@ def get_provenance(neo4j_driver, uuid, depth):
     activity_cypher_pairs_string = delimiter.join(activity_cypher_pairs_list)
     # More info on apoc.path.subgraphAll() procedure: https://neo4j.com/labs/apoc/4.0/graph-querying/expand-subgraph/
     query = (f"MATCH (n:Entity) "
-             f"WHERE n.uuid = '{uuid}' "
-             f"CALL apoc.path.subgraphAll(n, {{ {max_level_str} relationshipFilter:'<ACTIVITY_INPUT|<ACTIVITY_OUTPUT', labelFilter:'-Lab' }}) "
+             f"WHERE n.uuid = $uuid "
+             f"CALL apoc.path.subgraphAll(n, {{ maxLevel: $max_level, relationshipFilter:'<ACTIVITY_INPUT|<ACTIVITY_OUTPUT', labelFilter:'-Lab' }}) "
              f"YIELD nodes, relationships "
              f"WITH [node in nodes | "
              f"  CASE "
@@ -597,11 +786,10 @@ def get_provenance(neo4j_driver, uuid, depth):
              f"WITH {{ nodes:nodes, relationships:rels }} as json "
              f"RETURN json")
 
-    logger.info("======get_provenance() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_provenance', query)
 
     with neo4j_driver.session() as session:
-        return session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        return session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuid': uuid, 'max_level': max_level})
 
 
 """
@@ -624,20 +812,19 @@ def get_dataset_latest_revision(neo4j_driver, uuid, public = False):
         # Don't use [r:REVISION_OF] because
         # Binding a variable length relationship pattern to a variable ('r') is deprecated
         query = (f"MATCH (e:Dataset)<-[:REVISION_OF*]-(next:Dataset) "
-                 f"WHERE e.uuid='{uuid}' AND next.status='Published' "
+                 f"WHERE e.uuid=$uuid AND next.status='Published' "
                  f"WITH LAST(COLLECT(next)) as latest "
                  f"RETURN latest AS {record_field_name}")
     else:
         query = (f"MATCH (e:Dataset)<-[:REVISION_OF*]-(next:Dataset) "
-                 f"WHERE e.uuid='{uuid}' "
+                 f"WHERE e.uuid=$uuid "
                  f"WITH LAST(COLLECT(next)) as latest "
                  f"RETURN latest AS {record_field_name}")
 
-    logger.info("======get_dataset_latest_revision() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_dataset_latest_revision', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuid': uuid})
 
         # Only convert when record[record_field_name] is not None (namely the cypher result is not null)
         if record and record[record_field_name]:
@@ -663,14 +850,13 @@ def get_dataset_revision_number(neo4j_driver, uuid):
     # Don't use [r:REVISION_OF] because
     # Binding a variable length relationship pattern to a variable ('r') is deprecated
     query = (f"MATCH (e:Dataset)-[:REVISION_OF*]->(prev:Dataset) "
-             f"WHERE e.uuid='{uuid}' "
+             f"WHERE e.uuid=$uuid "
              f"RETURN COUNT(prev) AS {record_field_name}")
 
-    logger.info("======get_dataset_revision_number() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_dataset_revision_number', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             # The revision number is the count of previous revisions plus 1
@@ -693,15 +879,14 @@ def get_associated_organs_from_dataset(neo4j_driver, dataset_uuid):
     results = []
 
     # specimen_type -> sample_category 12/15/2022
-    query = (f"MATCH (ds:Dataset)<-[*]-(organ:Sample {{sample_category:'organ'}}) "
-             f"WHERE ds.uuid='{dataset_uuid}'"
+    query = (f"MATCH (ds:Dataset)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(organ:Sample {{sample_category:'organ'}}) "
+             f"WHERE ds.uuid=$dataset_uuid "
              f"RETURN apoc.coll.toSet(COLLECT(organ)) AS {record_field_name}")
 
-    logger.info("======get_associated_organs_from_dataset() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_associated_organs_from_dataset', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'dataset_uuid': dataset_uuid})
 
         if record and record[record_field_name]:
             results = schema_neo4j_queries.nodes_to_dicts(record[record_field_name])
@@ -723,15 +908,14 @@ def get_associated_samples_from_dataset(neo4j_driver, dataset_uuid):
     results = []
 
     # specimen_type -> sample_category 12/15/2022
-    query = (f"MATCH (ds:Dataset)<-[*]-(sample:Sample) "
-             f"WHERE ds.uuid='{dataset_uuid}' AND NOT sample.sample_category = 'organ' "
+    query = (f"MATCH (ds:Dataset)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(sample:Sample) "
+             f"WHERE ds.uuid=$dataset_uuid AND NOT sample.sample_category = 'organ' "
              f"RETURN apoc.coll.toSet(COLLECT(sample)) AS {record_field_name}")
 
-    logger.info("======get_associated_samples_from_dataset() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_associated_samples_from_dataset', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'dataset_uuid': dataset_uuid})
 
         if record and record[record_field_name]:
             results = schema_neo4j_queries.nodes_to_dicts(record[record_field_name])
@@ -753,15 +937,14 @@ def get_associated_donors_from_dataset(neo4j_driver, dataset_uuid):
     results = []
 
     # specimen_type -> sample_category 12/15/2022
-    query = (f"MATCH (ds:Dataset)<-[*]-(donor:Donor) "
-             f"WHERE ds.uuid='{dataset_uuid}'"
+    query = (f"MATCH (ds:Dataset)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(donor:Donor) "
+             f"WHERE ds.uuid=$dataset_uuid "
              f"RETURN apoc.coll.toSet(COLLECT(donor)) AS {record_field_name}")
 
-    logger.info("======get_associated_donors_from_dataset() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_associated_donors_from_dataset', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'dataset_uuid': dataset_uuid})
 
         if record and record[record_field_name]:
             results = schema_neo4j_queries.nodes_to_dicts(record[record_field_name])
@@ -782,31 +965,40 @@ dataset_uuid : string
     the uuid of the desired dataset
 """
 def get_individual_prov_info(neo4j_driver, dataset_uuid):
-    query = (f"MATCH (ds:Dataset {{uuid: '{dataset_uuid}'}})<-[*]-(firstSample:Sample)<-[*]-(donor:Donor)"
+    # The ancestors and descendants are either one hop away through the HAS_ANCESTOR closure or any number of hops
+    if schema_neo4j_queries.ancestry_closure_reads_enabled():
+        ancestor_path = "-[:HAS_ANCESTOR]->"
+        descendant_path = "<-[:HAS_ANCESTOR]-"
+        processed_dataset_match = "(ds)<-[:HAS_ANCESTOR]-(processed_dataset:Dataset)<-[:ACTIVITY_OUTPUT]-(a3)"
+    else:
+        ancestor_path = "<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-"
+        descendant_path = "-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]->"
+        processed_dataset_match = "(ds)-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]->(a3)-[:ACTIVITY_OUTPUT]->(processed_dataset:Dataset)"
+
+    query = (f"MATCH (ds:Dataset {{uuid: $dataset_uuid}}){ancestor_path}(firstSample:Sample){ancestor_path}(donor:Donor)"
              f" WHERE (:Dataset)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(firstSample)"
              f" WITH ds, COLLECT(distinct donor) AS DONOR, COLLECT(distinct firstSample) AS FIRSTSAMPLE"
-             f" OPTIONAL MATCH (ds)<-[*]-(metaSample:Sample)"
+             f" OPTIONAL MATCH (ds){ancestor_path}(metaSample:Sample)"
              f" WHERE NOT metaSample.metadata IS NULL AND NOT TRIM(metaSample.metadata) = ''"
              f" WITH ds, FIRSTSAMPLE, DONOR, COLLECT(distinct metaSample) AS METASAMPLE"
-             f" OPTIONAL MATCH (ds)<-[*]-(ruiSample:Sample)"
+             f" OPTIONAL MATCH (ds){ancestor_path}(ruiSample:Sample)"
              f" WHERE NOT ruiSample.rui_location IS NULL AND NOT TRIM(ruiSample.rui_location) = ''"
              f" WITH ds, FIRSTSAMPLE, DONOR, METASAMPLE, COLLECT(distinct ruiSample) AS RUISAMPLE"
              # specimen_type -> sample_category 12/15/2022
-             f" OPTIONAL match (donor)-[:ACTIVITY_INPUT]->(oa)-[:ACTIVITY_OUTPUT]->(organ:Sample {{sample_category:'organ'}})-[*]->(ds)"
+             f" OPTIONAL match (donor)-[:ACTIVITY_INPUT]->(oa)-[:ACTIVITY_OUTPUT]->(organ:Sample {{sample_category:'organ'}}){descendant_path}(ds)"
              f" WITH ds, FIRSTSAMPLE, DONOR, METASAMPLE, RUISAMPLE, COLLECT(distinct organ) AS ORGAN "
-             f" OPTIONAL MATCH (ds)-[*]->(a3)-[:ACTIVITY_OUTPUT]->(processed_dataset:Dataset)"
+             f" OPTIONAL MATCH {processed_dataset_match}"
              f" WHERE toLower(a3.creation_action) ENDS WITH 'process'"
              f" WITH ds, FIRSTSAMPLE, DONOR, METASAMPLE, RUISAMPLE, ORGAN, COLLECT(distinct processed_dataset) AS PROCESSED_DATASET"
              f" RETURN ds.uuid, FIRSTSAMPLE, DONOR, RUISAMPLE, ORGAN, ds.hubmap_id, ds.status, ds.group_name,"
              f" ds.group_uuid, ds.created_timestamp, ds.created_by_user_email, ds.last_modified_timestamp, "
              f" ds.last_modified_user_email, ds.lab_dataset_id, ds.dataset_type, METASAMPLE, PROCESSED_DATASET")
-    logger.info("======get_prov_info() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_individual_prov_info', query)
 
     record_contents = []
     record_dict = {}
     with neo4j_driver.session() as session:
-        result = session.run(query)
+        result = session.run(query, dataset_uuid = dataset_uuid)
         if result.peek() is None:
             return
         for record in result:
@@ -869,14 +1061,13 @@ dataset_uuid : string
     the uuid of the desired dataset
 """
 def get_all_dataset_samples(neo4j_driver, dataset_uuid):
-    query = f"MATCH p = (ds:Dataset {{uuid: '{dataset_uuid}'}})<-[*]-(dn:Donor) return p"
-    logger.info("======get_all_dataset_samples() query======")
-    logger.debug(query)
+    query = "MATCH p = (ds:Dataset {uuid: $dataset_uuid})<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(dn:Donor) return p"
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_all_dataset_samples', query)
 
     # Dictionary of Dictionaries, keyed by UUID, containing each Sample returned in the Neo4j Path
     dataset_sample_list = {}
     with neo4j_driver.session() as session:
-        result = session.run(query)
+        result = session.run(query, dataset_uuid = dataset_uuid)
         if result.peek() is None:
             return
         for record in result:
@@ -902,17 +1093,16 @@ neo4j_driver : neo4j.Driver object
 def get_sankey_info(neo4j_driver, public_only):
     public_only_query = " "
     if public_only:
-        public_only_query = f"AND toLower(ds.status) = 'published' "
+        public_only_query = "AND toLower(ds.status) = 'published' "
     query = (f"MATCH (donor:Donor)-[:ACTIVITY_INPUT]->(organ_activity:Activity)-[:ACTIVITY_OUTPUT]-> "
-            f"(organ:Sample {{sample_category:'organ'}})-[*]->(a:Activity)-[:ACTIVITY_OUTPUT]->(ds:Dataset) "
+            f"(organ:Sample {{sample_category:'organ'}})-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]->(a:Activity)-[:ACTIVITY_OUTPUT]->(ds:Dataset) "
             f"WHERE toLower(a.creation_action) = 'create dataset activity' "
             f"AND NOT (ds)<-[:REVISION_OF]-(:Entity) "
             f"{public_only_query} "
             f"RETURN DISTINCT ds.group_name, COLLECT(DISTINCT organ.organ), ds.dataset_type, ds.status, ds.uuid "
             f"ORDER BY ds.group_name")
 
-    logger.info("======get_sankey_info() query======")
-    logger.debug(query)
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_sankey_info', query)
     
     with neo4j_driver.session() as session:
         # Because we're returning multiple things, we use session.run rather than session.read_transaction
@@ -944,15 +1134,17 @@ neo4j_driver : neo4j.Driver object
 """
 def get_unpublished(neo4j_driver):
     query = (
-        "MATCH (ds:Dataset)<-[*]-(d:Donor) "
+        "MATCH (ds:Dataset)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(d:Donor) "
         "WHERE ds.status <> 'Published' and ds.status <> 'Hold' "
         # specimen_type -> sample_category 12/15/2022
-        "OPTIONAL MATCH (ds)<-[*]-(s:Sample {sample_category:'organ'}) "
+        "OPTIONAL MATCH (ds)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(s:Sample {sample_category:'organ'}) "
         "RETURN distinct ds.data_types as data_types, ds.group_name as organization, ds.uuid as uuid, "
         "ds.hubmap_id as hubmap_id, s.organ as organ, d.hubmap_id as donor_hubmap_id, "
         "d.submission_id as donor_submission_id, ds.lab_dataset_id as provider_experiment_id"
     )
 
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_unpublished', query)
+
     with neo4j_driver.session() as session:
         rval = session.run(query).data()
         return rval
@@ -985,19 +1177,24 @@ or 2*2 nodes beyond the sample
 """
 def get_paired_dataset(neo4j_driver, uuid, data_type, search_depth):
     # search depth is doubled because there is an activity node between each entity node
-    number_of_jumps = f"*"
+    number_of_jumps = "*"
     if search_depth is not None:
         search_depth = 2 * search_depth
         number_of_jumps = f"*..{search_depth}"
-    data_type = f"['{data_type}']"
+    # The data_types are stored as the string literal of a list
+    data_types = f"['{data_type}']"
+    # The variable length can't be a parameter, so there is one query text per search_depth
     query = (
-        f'MATCH (ds:Dataset)<-[*]-(s:Sample) WHERE ds.uuid = "{uuid}" AND (:Dataset)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(s)'
-        f'MATCH (ods)<-[{number_of_jumps}]-(s) WHERE ods.data_types = "{data_type}"'
+        f'MATCH (ds:Dataset)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(s:Sample) WHERE ds.uuid = $uuid AND (:Dataset)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(s)'
+        f'MATCH (ods)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT{number_of_jumps}]-(s) WHERE ods.data_types = $data_types '
         f'return ods.uuid as uuid, ods.status as status'
     )
+
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_paired_dataset', query)
+
     paired_datasets = []
     with neo4j_driver.session() as session:
-        rval = session.run(query).data()
+        rval = session.run(query, uuid = uuid, data_types = data_types).data()
         return rval
 
 
@@ -1020,25 +1217,26 @@ dict
 """
 def get_siblings(neo4j_driver, uuid, status, prop_key, include_revisions):
     sibling_uuids = schema_neo4j_queries.get_siblings(neo4j_driver, uuid, property_key='uuid')
-    sibling_uuids_string = str(sibling_uuids)
     revision_query_string = "AND NOT (e)<-[:REVISION_OF]-(:Entity) "
     status_query_string = ""
     prop_query_string = f"RETURN apoc.coll.toSet(COLLECT(e)) AS {record_field_name}"
     if include_revisions:
         revision_query_string = ""
     if status is not None:
-        status_query_string = f"AND (NOT e:Dataset OR TOLOWER(e.status) = '{status}') "
+        status_query_string = "AND (NOT e:Dataset OR TOLOWER(e.status) = $status) "
     if prop_key is not None:
-        prop_query_string = f"RETURN apoc.coll.toSet(COLLECT(e.{prop_key})) AS {record_field_name}"
+        prop_query_string = f"RETURN apoc.coll.toSet(COLLECT(e[$property_key])) AS {record_field_name}"
     results = []
     query = ("MATCH (e:Entity) "
-             f"WHERE e.uuid IN {sibling_uuids_string} "
+             f"WHERE e.uuid IN $uuids "
              f"{revision_query_string}"
              f"{status_query_string}"
              f"{prop_query_string}")
 
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_siblings', query)
+
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuids': sibling_uuids, 'status': status, 'property_key': prop_key})
 
         if record and record[record_field_name]:
             if prop_key:
@@ -1069,21 +1267,22 @@ dict
 """
 def get_tuplets(neo4j_driver, uuid, status, prop_key):
     tuplet_uuids = schema_neo4j_queries.get_tuplets(neo4j_driver, uuid, property_key='uuid')
-    tuplets_uuids_string = str(tuplet_uuids)
     status_query_string = ""
     prop_query_string = f"RETURN apoc.coll.toSet(COLLECT(e)) AS {record_field_name}"
     if status is not None:
-        status_query_string = f"AND (NOT e:Dataset OR TOLOWER(e.status) = '{status}') "
+        status_query_string = "AND (NOT e:Dataset OR TOLOWER(e.status) = $status) "
     if prop_key is not None:
-        prop_query_string = f"RETURN apoc.coll.toSet(COLLECT(e.{prop_key})) AS {record_field_name}"
+        prop_query_string = f"RETURN apoc.coll.toSet(COLLECT(e[$property_key])) AS {record_field_name}"
     results = []
     query = ("MATCH (e:Entity) "
-             f"WHERE e.uuid IN {tuplets_uuids_string} "
+             f"WHERE e.uuid IN $uuids "
              f"{status_query_string}"
              f"{prop_query_string}")
 
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_tuplets', query)
+
     with neo4j_driver.session() as session:
-        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query)
+        record = session.read_transaction(schema_neo4j_queries.execute_readonly_tx, query, {'uuids': tuplet_uuids, 'status': status, 'property_key': prop_key})
 
         if record and record[record_field_name]:
             if prop_key:
@@ -1116,11 +1315,14 @@ def uuids_all_exist(neo4j_driver, uuids:list):
     expected_match_count = len(uuids)
 
     record_field_name = 'match_count'
-    query = (f"MATCH (e:Entity) WHERE e.uuid IN {uuids} RETURN COUNT(e) AS {record_field_name}")
+    query = (f"MATCH (e:Entity) WHERE e.uuid IN $uuids RETURN COUNT(e) AS {record_field_name}")
+
+    schema_neo4j_queries.register_query('app_neo4j_queries.uuids_all_exist', query)
 
     with neo4j_driver.session() as session:
         record = session.read_transaction( schema_neo4j_queries.execute_readonly_tx
-                                           , query)
+                                           , query
+                                           , {'uuids': list(uuids)})
 
     if not record or not record[record_field_name]:
         raise Exception(f"Failure retrieving a Neo4j result to verify"
@@ -1133,55 +1335,6 @@ def uuids_all_exist(neo4j_driver, uuids:list):
                     f" exist as node identifiers in the Neo4j graph.")
 
 
-"""
-Get the entities from the neo4j database with the given uuids.
-
-Parameters
-----------
-uuids : Union[str, Iterable]
-    The uuid(s) of the entities to get.
-fields : Union[dict, Iterable, None], optional
-    The fields to return for each entity. If None, all fields are returned.
-    If a dict, the keys are the database fields to return and the values are the names to return them as.
-    If an iterable, the fields to return. Defaults to None.
-
-Returns
--------
-Optional[List[neo4j.Record]]:
-    The entity records with the given uuids, or None if no datasets were found.
-    The specified fields are returned for each entity.
-Raises
-------
-ValueError
-    If fields is not a dict, an iterable, or None.
-"""
-def get_entities_by_uuid(neo4j_driver,
-                         uuids: Union[str, Iterable],
-                         fields: Union[dict, Iterable, None] = None) -> Optional[list]:
-
-    if isinstance(uuids, str):
-        uuids = [uuids]
-    if not isinstance(uuids, list):
-        uuids = list(uuids)
-
-    if fields is None or len(fields) == 0:
-        return_stmt = 'e'
-    elif isinstance(fields, dict):
-        return_stmt = ', '.join([f'e.{field} AS {name}' for field, name in fields.items()])
-    elif isinstance(fields, Iterable):
-        return_stmt = ', '.join([f'e.{field} AS {field}' for field in fields])
-    else:
-        raise ValueError("fields must be a dict or an iterable")
-
-    with neo4j_driver.session() as session:
-        length = len(uuids)
-        query = "MATCH (e:Entity) WHERE e.uuid IN $uuids RETURN " + return_stmt
-        records = session.run(query, uuids=uuids).fetch(length)
-        if records is None or len(records) == 0:
-            return None
-
-        return records
-
 """
 Get the uuid and hubmap_id for each entity in a list of ids.
 
@@ -1203,6 +1356,8 @@ def get_batch_ids(neo4j_driver, id_list):
     RETURN apoc.map.fromPairs(COLLECT([e.uuid, e.hubmap_id])) AS result
     """
 
+    schema_neo4j_queries.register_query('app_neo4j_queries.get_batch_ids', query)
+
     with neo4j_driver.session() as session:
         record = session.run(query, id_list=id_list)
         raw = record.single()["result"]
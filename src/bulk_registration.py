@@ -0,0 +1,296 @@
+import io
+import csv
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Parsing, validation and result formatting of the donor/sample bulk registration TSV files,
+see bulk-registration/donors-tsv.md and bulk-registration/samples-tsv.md
+
+The columns are mapped to the entity properties defined in the schema yaml, any other column is
+passed through as is so its name must be one of the properties (E.g., group_uuid)
+"""
+
+# Key: TSV column, value: entity property
+COLUMNS = {
+    'Donor': {
+        'lab_id': 'lab_donor_id',
+        'lab_name': 'label',
+        'selection_protocol': 'protocol_url',
+        'description': 'description'
+    },
+    'Sample': {
+        'source_id': 'direct_ancestor_uuid',
+        'lab_id': 'lab_tissue_sample_id',
+        'sample_type': 'sample_category',
+        'organ_type': 'organ',
+        'sample_protocol': 'protocol_url',
+        'description': 'description',
+        'rui_location': 'rui_location'
+    }
+}
+
+# The TSV columns that can't be blank
+REQUIRED_COLUMNS = {
+    'Donor': ['lab_name', 'selection_protocol'],
+    'Sample': ['source_id', 'lab_id', 'sample_type', 'sample_protocol']
+}
+
+# The columns of the per-row result file
+RESULT_COLUMNS = ['row', 'status', 'uuid', 'hubmap_id', 'submission_id', 'error']
+
+# The key of the cells beyond the header columns, csv.DictReader puts them under the None key
+# which doesn't survive the JSON serialization of the rows stored by a background job
+EXTRA_CELLS_KEY = '_extra_cells'
+
+# The status of each row in the result file
+STATUS_CREATED = 'created'
+STATUS_INVALID = 'invalid'
+STATUS_FAILED = 'failed'
+
+
+"""
+Open the uploaded TSV and read its header row
+
+Parameters
+----------
+binary_stream : file-like object
+    The uploaded file or the raw request body stream
+normalized_entity_type : str
+    Either Donor or Sample
+
+Returns
+-------
+csv.DictReader
+    The reader positioned at the first data row
+
+Raises
+------
+ValueError
+    If the header row is missing or lacks any of the required columns
+"""
+def open_tsv(binary_stream, normalized_entity_type):
+    # Tolerate the byte order mark added by spreadsheet applications
+    text_stream = io.TextIOWrapper(binary_stream, encoding = 'utf-8-sig', newline = '')
+    reader = csv.DictReader(text_stream, delimiter = '\t')
+
+    if not reader.fieldnames:
+        raise ValueError("The TSV file is empty")
+
+    reader.fieldnames = [fieldname.strip() for fieldname in reader.fieldnames]
+
+    missing_columns = [column for column in REQUIRED_COLUMNS[normalized_entity_type] if column not in reader.fieldnames]
+
+    if missing_columns:
+        raise ValueError(f"Missing required columns in the TSV file: {', '.join(missing_columns)}")
+
+    return reader
+
+
+"""
+Read the rows of the TSV in chunks, so each chunk can be validated and written before reading the next
+
+Parameters
+----------
+reader : csv.DictReader
+    The reader returned by open_tsv()
+chunk_size : int
+    The max number of rows in one chunk
+
+Returns
+-------
+generator
+    Lists of (row number, TSV row dict) tuples, the rows are numbered from 1 excluding the header and the blank lines.
+    The cells beyond the header columns are kept under EXTRA_CELLS_KEY
+"""
+def read_chunks(reader, chunk_size):
+    chunk = []
+    row_number = 0
+
+    for tsv_row in reader:
+        # Skip the blank lines, E.g., the trailing ones
+        if not any((value or '').strip() for key, value in tsv_row.items() if key is not None):
+            continue
+
+        extra_cells = tsv_row.pop(None, None)
+        if extra_cells:
+            tsv_row[EXTRA_CELLS_KEY] = extra_cells
+
+        row_number += 1
+        chunk.append((row_number, tsv_row))
+
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+"""
+Convert one TSV row to the request json of creating the entity via POST
+
+Parameters
+----------
+normalized_entity_type : str
+    Either Donor or Sample
+tsv_row : dict
+    The row returned by read_chunks()
+
+Returns
+-------
+dict
+    The entity properties, the blank cells are omitted
+
+Raises
+------
+ValueError
+    If the row has more cells than the header, a cell is not a string or the rui_location is not valid json
+"""
+def to_json_data(normalized_entity_type, tsv_row):
+    if tsv_row.get(EXTRA_CELLS_KEY) or tsv_row.get(None):
+        raise ValueError("The row has more cells than the header")
+
+    columns = COLUMNS[normalized_entity_type]
+    json_data_dict = {}
+
+    for column, value in tsv_row.items():
+        # csv.DictReader fills the missing cells with None
+        if value is None:
+            continue
+
+        # E.g., a row stored by a background job before the extra cells were moved to EXTRA_CELLS_KEY
+        if not isinstance(value, str):
+            raise ValueError(f"Invalid value of column {column}, the row may have more cells than the header")
+
+        if not value.strip():
+            continue
+
+        json_data_dict[columns.get(column, column)] = value.strip()
+
+    if normalized_entity_type == 'Sample':
+        # Compared case insensitively per the TSV format
+        if 'sample_category' in json_data_dict:
+            json_data_dict['sample_category'] = json_data_dict['sample_category'].lower()
+
+        if 'organ' in json_data_dict:
+            json_data_dict['organ'] = json_data_dict['organ'].upper()
+
+        if 'rui_location' in json_data_dict:
+            try:
+                json_data_dict['rui_location'] = json.loads(json_data_dict['rui_location'])
+            except ValueError:
+                raise ValueError("The rui_location is not valid json")
+
+    return json_data_dict
+
+
+"""
+The same checks on the source of a new sample as `POST /entities/sample`, plus the rui_location rules
+of the TSV format
+
+Parameters
+----------
+json_data_dict : dict
+    The sample properties returned by to_json_data()
+direct_ancestor_dict : dict
+    The source entity, None if it can't be found
+organ_types_dict : dict
+    The organ types keyed by the 2-letter organ code, see schema_manager.get_organ_types()
+
+Raises
+------
+ValueError
+    If the sample can't be registered with this source
+"""
+def validate_sample_source(json_data_dict, direct_ancestor_dict, organ_types_dict):
+    if direct_ancestor_dict is None:
+        raise ValueError(f"Source of id: {json_data_dict['direct_ancestor_uuid']} not found")
+
+    if direct_ancestor_dict['entity_type'] not in ['Donor', 'Sample']:
+        raise ValueError("The source must be either a Donor or a Sample")
+
+    if json_data_dict['sample_category'] == 'organ':
+        if direct_ancestor_dict['entity_type'] != 'Donor':
+            raise ValueError("To register an organ, the source has to be a Donor")
+
+        if 'organ' not in json_data_dict:
+            raise ValueError("A valid organ code is required when registering an organ associated with a Donor")
+
+        if (not json_data_dict['organ'].isalpha()) or (len(json_data_dict['organ']) != 2):
+            raise ValueError(f"Invalid organ code {json_data_dict['organ']}. Must be 2-letter alphabetic code")
+
+        if json_data_dict['organ'] not in organ_types_dict:
+            raise ValueError(f"Unable to find organ code {json_data_dict['organ']} via the ontology-api")
+
+        if 'rui_location' in json_data_dict:
+            raise ValueError("The rui_location can't be provided when registering an organ")
+    else:
+        if 'organ' in json_data_dict:
+            raise ValueError("The sample category must be organ when an organ code is provided")
+
+        if direct_ancestor_dict['entity_type'] == 'Donor':
+            raise ValueError("The sample category must be organ when the direct ancestor is a Donor")
+
+
+"""
+Group the rows sharing the same parent so the ids of each group can be minted with one uuid-api call
+
+Parameters
+----------
+normalized_entity_type : str
+    Either Donor or Sample
+rows : list
+    The (row number, json data dict) tuples of the valid rows
+
+Returns
+-------
+list
+    The lists of rows of each group, in the order of their first rows
+"""
+def group_by_parent(normalized_entity_type, rows):
+    groups = {}
+
+    for row in rows:
+        json_data_dict = row[1]
+
+        # The parent of a Donor is the Lab of the given group_uuid or the user's only data provider group
+        if normalized_entity_type == 'Donor':
+            key = json_data_dict.get('group_uuid')
+        # uuid-api takes a single organ code for all the ids of one call
+        else:
+            key = (json_data_dict['direct_ancestor_uuid'], json_data_dict.get('organ'))
+
+        groups.setdefault(key, []).append(row)
+
+    return list(groups.values())
+
+
+"""
+Format the results of a chunk of rows as TSV lines
+
+Parameters
+----------
+results : list
+    The dicts of the RESULT_COLUMNS of each row
+header : bool
+    Whether to start with the header line
+
+Returns
+-------
+str
+    The TSV lines
+"""
+def format_results(results, header = False):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames = RESULT_COLUMNS, delimiter = '\t', extrasaction = 'ignore', lineterminator = '\n')
+
+    if header:
+        writer.writeheader()
+
+    writer.writerows(results)
+
+    return output.getvalue()
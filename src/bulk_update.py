@@ -0,0 +1,171 @@
+import logging
+import collections
+import concurrent.futures
+
+logger = logging.getLogger(__name__)
+
+
+"""
+The request passed to the validator and trigger methods of the bulk updates, which run after the
+`PUT /datasets` or `PUT /uploads` request has returned. Only `args`, `headers`, `method` and `user_info` are used by them
+
+args : dict-like
+    A copy of the query string arguments of the original request
+headers : dict-like
+    The headers the validators check, E.g., X-Hubmap-Application
+method : str
+    The HTTP method of the original request, E.g., validate_group_name() allows clearing the group on PUT
+user_info : dict
+    The user info of the submitter resolved from their token by the original request, see schema_manager.get_user_info().
+    The permissions are checked against it since a resumed job only has the internal token
+"""
+InternalRequest = collections.namedtuple('InternalRequest', ['args', 'headers', 'method', 'user_info'])
+
+
+"""
+Apply the updates of multiple entities in-process, one batch of `batch_size` entities at a time:
+    - the existing entities of the batch are read with `load_entities`
+    - each update is validated and turned into the node properties by `prepare_update`,
+      at most `max_workers` entities at a time
+    - the prepared updates of the batch are written by `write_updates` in one neo4j transaction
+    - `finish_update` runs the follow-ups of each written entity, E.g., the 'after_update_trigger' methods
+    - `end_batch` gets the uuids of the written entities to invalidate the cache and queue the
+      reindex once per batch, it may block to throttle the next batch
+
+A failed entity doesn't stop the others, its error is recorded in the results
+
+Parameters
+----------
+entity_updates : dict
+    The update dict of each entity keyed by uuid
+load_entities : Callable[[list], dict]
+    Takes the uuids of a batch, returns the existing entity dicts keyed by uuid
+prepare_update : Callable[[str, dict, dict], dict]
+    Takes the uuid, the update dict and the existing entity dict, returns the properties to write
+write_updates : Callable[[dict], dict]
+    Takes the properties to write keyed by uuid, returns the updated entity dicts keyed by uuid
+finish_update : Callable[[str, dict, dict], None]
+    Takes the uuid, the update dict and the updated entity dict
+end_batch : Callable[[list], None]
+    Takes the uuids of the entities written by the batch
+batch_size : int
+    The max number of entities written in one transaction
+max_workers : int
+    The max number of entities prepared or finished concurrently
+after_each_batch : Callable[[dict], None], optional
+    Called with the results of each batch, E.g., to record the progress of a job
+
+Returns
+-------
+dict
+    The results of the bulk update. The key is the uuid of the entity. If successful, the value
+    is a dictionary with "success" as True and "data" as the updated entity dict. If failed, the
+    value is a dictionary with "success" as False and "data" as the error message.
+"""
+def apply_updates(entity_updates, load_entities, prepare_update, write_updates, finish_update, end_batch, batch_size = 50, max_workers = 4, after_each_batch = None):
+    results = {}
+    uuids = list(entity_updates)
+    batch_size = max(batch_size, 1)
+
+    def set_failed(uuid, error):
+        logger.error(f"Failed to update entity {uuid}: {error}")
+        results[uuid] = {"success": False, "data": str(error)}
+
+    def process_batch(batch_uuids):
+        try:
+            existing_entity_dicts = load_entities(batch_uuids)
+        except Exception as e:
+            logger.exception(f"Failed to read the entities of the bulk update batch starting at {batch_uuids[0]}")
+
+            for uuid in batch_uuids:
+                set_failed(uuid, e)
+            return
+
+        def prepare(uuid):
+            if uuid not in existing_entity_dicts:
+                raise LookupError(f"Entity of uuid: {uuid} not found in Neo4j")
+
+            return prepare_update(uuid, entity_updates[uuid], existing_entity_dicts[uuid])
+
+        prepared_futures = {uuid: executor.submit(prepare, uuid) for uuid in batch_uuids}
+
+        entity_data_dicts = {}
+        for uuid, future in prepared_futures.items():
+            try:
+                entity_data_dicts[uuid] = future.result()
+            except Exception as e:
+                set_failed(uuid, e)
+
+        if not entity_data_dicts:
+            return
+
+        try:
+            updated_entity_dicts = write_updates(entity_data_dicts)
+        except Exception as e:
+            logger.exception(f"Failed to write the bulk update of {len(entity_data_dicts)} entities")
+
+            for uuid in entity_data_dicts:
+                set_failed(uuid, e)
+            return
+
+        finished_futures = {uuid: executor.submit(finish_update, uuid, entity_updates[uuid], updated_entity_dicts[uuid]) for uuid in entity_data_dicts}
+
+        for uuid, future in finished_futures.items():
+            try:
+                future.result()
+                results[uuid] = {"success": True, "data": updated_entity_dicts[uuid]}
+            except Exception as e:
+                set_failed(uuid, f"The entity has been updated, but failed to execute one of the 'after_update_trigger' methods: {e}")
+
+        # The entities are written even if a follow-up failed
+        try:
+            end_batch(list(entity_data_dicts))
+        except Exception:
+            logger.exception(f"Failed to invalidate the cache or queue the reindex of the bulk update of {len(entity_data_dicts)} entities")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = max(max_workers, 1)) as executor:
+        for index in range(0, len(uuids), batch_size):
+            batch_uuids = uuids[index:index + batch_size]
+
+            process_batch(batch_uuids)
+
+            if after_each_batch:
+                after_each_batch({uuid: results[uuid] for uuid in batch_uuids})
+
+            logger.info(f"Bulk updated {index + len(batch_uuids)} of {len(uuids)} entities")
+
+    return results
+
+
+"""
+Check whether an entity already carries all the values of an update, E.g., when a resumed bulk update
+job doesn't know if the write of an abandoned run went through
+
+The values other than strings, integers and booleans are stored as their Python string literals,
+see schema_neo4j_queries.build_properties_params()
+
+Parameters
+----------
+update_dict : dict
+    The normalized update dict of the entity
+entity_dict : dict
+    The entity dict read from neo4j
+
+Returns
+-------
+bool
+    True if applying the update again would not change any of the updated properties
+"""
+def is_update_applied(update_dict, entity_dict):
+    for key, value in update_dict.items():
+        existing_value = entity_dict.get(key)
+
+        if existing_value == value:
+            continue
+
+        if not isinstance(value, (str, int, bool)) and existing_value == str(value):
+            continue
+
+        return False
+
+    return True
@@ -0,0 +1,491 @@
+import os
+import json
+import time
+import contextlib
+import uuid
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# The status of a job
+JOB_STATUS_QUEUED = 'queued'
+JOB_STATUS_RUNNING = 'running'
+JOB_STATUS_COMPLETED = 'completed'
+JOB_STATUS_FAILED = 'failed'
+
+# The status of each item of a job
+ITEM_STATUS_PENDING = 'pending'
+ITEM_STATUS_SUCCEEDED = 'succeeded'
+ITEM_STATUS_FAILED = 'failed'
+
+
+"""
+Durable table of the background jobs and their items in a local SQLite file
+
+The file is shared by all the worker processes on the host, so it must be on a persistent volume
+(E.g., the instance folder mounted into the container) for the jobs to survive a restart.
+A running job holds a lease that its worker keeps renewing, a job whose lease has expired
+is considered abandoned (E.g., the worker got recycled by uwsgi) and can be claimed by another worker.
+
+Only the parameters needed to run the job are stored, never the user token
+
+Parameters
+----------
+db_path : str
+    The path of the SQLite file, created if missing
+lease_seconds : float
+    How long a claimed job stays owned by its worker without a lease renewal
+"""
+class JobStore(object):
+
+    def __init__(self, db_path, lease_seconds = 300):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok = True)
+
+        # Write-ahead logging lets the GET /jobs/<id> readers run while a job is being updated
+        connection = sqlite3.connect(self.db_path, timeout = 30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.close()
+
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                               "id TEXT PRIMARY KEY, job_type TEXT NOT NULL, status TEXT NOT NULL, "
+                               "params TEXT, owner TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                               "lease_until REAL NOT NULL DEFAULT 0, created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS job_items ("
+                               "job_id TEXT NOT NULL, item_key TEXT NOT NULL, position INTEGER NOT NULL, "
+                               "status TEXT NOT NULL, payload TEXT, marker TEXT, result TEXT, updated_at REAL NOT NULL, "
+                               "PRIMARY KEY (job_id, item_key))")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_status_lease ON jobs (status, lease_until)")
+
+    """
+    Create a job with all its items pending
+
+    Parameters
+    ----------
+    job_type : str
+        The job type, which determines the handler running the job, see JobRunner.register_handler()
+    params : dict
+        The JSON serializable parameters of the job
+    items : list
+        The (item key, JSON serializable payload) tuples of the job, processed in this order
+    owner : str
+        The 'sub' of the user who submitted the job
+    claimed : bool
+        Whether the caller takes the lease of the job right away, so no other worker can claim it
+        before it starts. Otherwise the job is queued until claimed, see claim_job()
+
+    Returns
+    -------
+    str
+        The id of the new job
+    """
+    def create_job(self, job_type, params, items, owner = None, claimed = False):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        if claimed:
+            status, attempts, lease_until = JOB_STATUS_RUNNING, 1, now + self.lease_seconds
+        else:
+            status, attempts, lease_until = JOB_STATUS_QUEUED, 0, 0
+
+        with self._connect() as connection:
+            connection.execute("INSERT INTO jobs (id, job_type, status, params, owner, attempts, lease_until, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               (job_id, job_type, status, json.dumps(params), owner, attempts, lease_until, now, now))
+            connection.executemany("INSERT INTO job_items (job_id, item_key, position, status, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                                   [(job_id, str(item_key), position, ITEM_STATUS_PENDING, json.dumps(payload), now)
+                                    for position, (item_key, payload) in enumerate(items)])
+
+        return job_id
+
+    """
+    Take the lease of a job to run it
+
+    Parameters
+    ----------
+    job_id : str
+        The id of the job to claim, None to claim the oldest queued or abandoned job
+
+    Returns
+    -------
+    dict
+        The claimed job, see get_job(), None if there is no job to claim
+    """
+    def claim_job(self, job_id = None):
+        now = time.time()
+
+        with self._connect(immediate = True) as connection:
+            query = "SELECT id FROM jobs WHERE status IN (?, ?) AND lease_until < ?"
+            parameters = [JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, now]
+
+            if job_id:
+                query += " AND id = ?"
+                parameters.append(job_id)
+
+            row = connection.execute(query + " ORDER BY created_at LIMIT 1", parameters).fetchone()
+
+            if row is None:
+                return None
+
+            connection.execute("UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                               (JOB_STATUS_RUNNING, now + self.lease_seconds, now, row['id']))
+
+        return self.get_job(row['id'])
+
+    """
+    Extend the lease of a running job
+
+    Parameters
+    ----------
+    job_id : str
+        The id of the job
+    """
+    def renew_lease(self, job_id):
+        now = time.time()
+
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = ?",
+                               (now + self.lease_seconds, now, job_id, JOB_STATUS_RUNNING))
+
+    """
+    Give up the lease of a running job so it can be claimed again right away
+
+    Parameters
+    ----------
+    job_id : str
+        The id of the job
+    error : str
+        The reason of the release
+    """
+    def release_job(self, job_id, error = None):
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET lease_until = 0, error = ?, updated_at = ? WHERE id = ? AND status = ?",
+                               (error, time.time(), job_id, JOB_STATUS_RUNNING))
+
+    """
+    Mark a job as done
+
+    Parameters
+    ----------
+    job_id : str
+        The id of the job
+    status : str
+        Either JOB_STATUS_COMPLETED or JOB_STATUS_FAILED
+    error : str
+        The reason of the failure
+    """
+    def finish_job(self, job_id, status, error = None):
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET status = ?, error = ?, lease_until = 0, updated_at = ? WHERE id = ?",
+                               (status, error, time.time(), job_id))
+
+    """
+    Get the items of a job not processed yet
+
+    Parameters
+    ----------
+    job_id : str
+        The id of the job
+
+    Returns
+    -------
+    list
+        The (item key, payload, marker) tuples in the order they were submitted,
+        the marker is None unless set by set_item_markers()
+    """
+    def get_pending_items(self, job_id):
+        with self._connect() as connection:
+            rows = connection.execute("SELECT item_key, payload, marker FROM job_items WHERE job_id = ? AND status = ? ORDER BY position",
+                                      (job_id, ITEM_STATUS_PENDING)).fetchall()
+
+        return [(row['item_key'], json.loads(row['payload']), json.loads(row['marker']) if row['marker'] is not None else None) for row in rows]
+
+    """
+    Record what is about to be written for some pending items of a job, before the write is committed
+
+    A worker dying between the commit and set_item_results() leaves the items pending, the marker
+    tells the resumed job to check whether the write went through instead of applying it twice
+
+    Parameters
+    ----------
+    job_id : str
+        The id of the job
+    markers : dict
+        The JSON serializable marker of each item keyed by item key
+    """
+    def set_item_markers(self, job_id, markers):
+        now = time.time()
+
+        with self._connect() as connection:
+            connection.executemany("UPDATE job_items SET marker = ?, updated_at = ? WHERE job_id = ? AND item_key = ? AND status = ?",
+                                   [(json.dumps(marker), now, job_id, str(item_key), ITEM_STATUS_PENDING) for item_key, marker in markers.items()])
+            connection.execute("UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = ?",
+                               (now + self.lease_seconds, now, job_id, JOB_STATUS_RUNNING))
+
+    """
+    Record the results of some items of a job and renew its lease
+
+    Parameters
+    ----------
+    job_id : str
+        The id of the job
+    results : dict
+        The (status, JSON serializable result) tuple of each item keyed by item key
+    """
+    def set_item_results(self, job_id, results):
+        now = time.time()
+
+        with self._connect() as connection:
+            connection.executemany("UPDATE job_items SET status = ?, result = ?, updated_at = ? WHERE job_id = ? AND item_key = ?",
+                                   [(status, json.dumps(result), now, job_id, str(item_key)) for item_key, (status, result) in results.items()])
+            connection.execute("UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = ?",
+                               (now + self.lease_seconds, now, job_id, JOB_STATUS_RUNNING))
+
+    """
+    Get a job with the number of its items in each status
+
+    Parameters
+    ----------
+    job_id : str
+        The id of the job
+    include_items : bool
+        Whether to include the status and result of each item
+
+    Returns
+    -------
+    dict
+        The job, None if not found
+    """
+    def get_job(self, job_id, include_items = False):
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+            if row is None:
+                return None
+
+            counts = {ITEM_STATUS_PENDING: 0, ITEM_STATUS_SUCCEEDED: 0, ITEM_STATUS_FAILED: 0}
+            for count_row in connection.execute("SELECT status, COUNT(*) AS count FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)):
+                counts[count_row['status']] = count_row['count']
+
+            job = {
+                'id': row['id'],
+                'job_type': row['job_type'],
+                'status': row['status'],
+                'params': json.loads(row['params']),
+                'owner': row['owner'],
+                'error': row['error'],
+                'attempts': row['attempts'],
+                'created_at': row['created_at'],
+                'updated_at': row['updated_at'],
+                'total': sum(counts.values()),
+                'counts': counts
+            }
+
+            if include_items:
+                item_rows = connection.execute("SELECT item_key, status, result FROM job_items WHERE job_id = ? ORDER BY position", (job_id,))
+                job['items'] = [{'key': item_row['item_key'],
+                                 'status': item_row['status'],
+                                 'result': json.loads(item_row['result']) if item_row['result'] is not None else None}
+                                for item_row in item_rows]
+
+        return job
+
+    """
+    Delete the completed and failed jobs last updated before the given time
+
+    Parameters
+    ----------
+    older_than : float
+        The epoch time in seconds
+    """
+    def purge_finished_jobs(self, older_than):
+        with self._connect() as connection:
+            job_ids = [(row['id'],) for row in connection.execute("SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                                                                  (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED, older_than))]
+            connection.executemany("DELETE FROM job_items WHERE job_id = ?", job_ids)
+            connection.executemany("DELETE FROM jobs WHERE id = ?", job_ids)
+
+        if job_ids:
+            logger.info(f"Purged {len(job_ids)} finished jobs")
+
+    # One connection and transaction per call, the sqlite3 connections can't be shared across threads
+    # `immediate` takes the write lock before reading, so the claims of the worker processes are serialized
+    @contextlib.contextmanager
+    def _connect(self, immediate = False):
+        connection = sqlite3.connect(self.db_path, timeout = 30, isolation_level = None)
+        connection.row_factory = sqlite3.Row
+
+        try:
+            connection.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield connection
+            connection.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+
+"""
+Runs the jobs of the JobStore in background threads of each worker process
+
+A submitted job starts right away in the worker that received the request, with the user token of
+the request kept in memory. A monitor thread of each worker claims the queued jobs and the jobs
+abandoned by another worker and resumes them from their pending items with the token returned by
+`resume_token_getter`, since the user token is not stored
+
+Parameters
+----------
+job_store : JobStore
+    The durable job table
+resume_token_getter : Callable[[], str]
+    Returns the token used to resume the jobs
+poll_seconds : float
+    How often the monitor thread looks for abandoned jobs
+max_attempts : int
+    The max number of times a job is claimed before it is marked as failed
+retention_seconds : float
+    How long the finished jobs are kept
+"""
+class JobRunner(object):
+
+    def __init__(self, job_store, resume_token_getter, poll_seconds = 60, max_attempts = 3, retention_seconds = 7 * 24 * 3600):
+        self.job_store = job_store
+        self.resume_token_getter = resume_token_getter
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+
+        # Key: job type, value: the handler
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._monitor_thread = None
+        self._pid = None
+
+    """
+    Register the handler of a job type
+
+    The handler is called as handler(job, items, report, mark, user_token) where `items` are the pending
+    (item key, payload, marker) tuples, `report` takes the {item key: (status, result)} dict of the processed
+    items and `mark` takes the {item key: marker} dict of the items about to be written, see
+    JobStore.set_item_markers(). Items not reported stay pending and get processed again when the job
+    is resumed, the handler must skip the marked items whose write already went through
+
+    Parameters
+    ----------
+    job_type : str
+        The job type
+    handler : Callable
+        The handler running the jobs of this type
+    """
+    def register_handler(self, job_type, handler):
+        self._handlers[job_type] = handler
+
+    """
+    Store a new job and start running it in a background thread
+
+    Parameters
+    ----------
+    job_type : str
+        The job type of a registered handler
+    params : dict
+        The JSON serializable parameters of the job
+    items : list
+        The (item key, JSON serializable payload) tuples of the job
+    owner : str
+        The 'sub' of the user who submitted the job
+    user_token : str
+        The user's globus groups token, only kept in memory
+
+    Returns
+    -------
+    str
+        The id of the new job
+    """
+    def submit(self, job_type, params, items, owner, user_token):
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for the job type: {job_type}")
+
+        # Created with its lease taken, so the monitor threads only ever resume it
+        # with the resume token once this worker has abandoned it
+        job_id = self.job_store.create_job(job_type, params, items, owner, claimed = True)
+
+        self.ensure_started()
+
+        self._start_job(self.job_store.get_job(job_id), user_token)
+
+        return job_id
+
+    # The monitor thread is started lazily in each worker process since
+    # uwsgi forks the workers after the app gets loaded in the master
+    def ensure_started(self):
+        with self._lock:
+            if self._pid != os.getpid() or self._monitor_thread is None or not self._monitor_thread.is_alive():
+                self._pid = os.getpid()
+                self._monitor_thread = threading.Thread(target = self._monitor, name = 'job-monitor', daemon = True)
+                self._monitor_thread.start()
+
+    def _monitor(self):
+        while True:
+            try:
+                job = self.job_store.claim_job()
+
+                while job:
+                    logger.info(f"Resuming the {job['job_type']} job {job['id']}, attempt {job['attempts']}")
+                    self._start_job(job, self.resume_token_getter())
+
+                    job = self.job_store.claim_job()
+
+                self.job_store.purge_finished_jobs(time.time() - self.retention_seconds)
+            except Exception:
+                logger.exception("Failed to resume the abandoned jobs")
+
+            time.sleep(self.poll_seconds)
+
+    def _start_job(self, job, user_token):
+        thread = threading.Thread(target = self._run_job, args = (job, user_token), name = f"job-{job['id']}", daemon = True)
+        thread.start()
+
+    def _run_job(self, job, user_token):
+        job_id = job['id']
+
+        if job['attempts'] > self.max_attempts:
+            logger.error(f"Giving up the {job['job_type']} job {job_id} after {self.max_attempts} attempts")
+            self.job_store.finish_job(job_id, JOB_STATUS_FAILED, f"Gave up after {self.max_attempts} attempts")
+            return
+
+        # Keep the lease while the handler runs a long batch without reporting
+        stopped = threading.Event()
+
+        def heartbeat():
+            while not stopped.wait(self.job_store.lease_seconds / 3):
+                self.job_store.renew_lease(job_id)
+
+        heartbeat_thread = threading.Thread(target = heartbeat, name = f"job-heartbeat-{job_id}", daemon = True)
+        heartbeat_thread.start()
+
+        try:
+            handler = self._handlers[job['job_type']]
+            items = self.job_store.get_pending_items(job_id)
+
+            handler(job, items,
+                    lambda results: self.job_store.set_item_results(job_id, results),
+                    lambda markers: self.job_store.set_item_markers(job_id, markers),
+                    user_token)
+
+            self.job_store.finish_job(job_id, JOB_STATUS_COMPLETED)
+
+            logger.info(f"Completed the {job['job_type']} job {job_id}")
+        except Exception as e:
+            logger.exception(f"Failed to run the {job['job_type']} job {job_id}")
+
+            # Retried by the monitor thread with the items still pending
+            self.job_store.release_job(job_id, str(e))
+        finally:
+            stopped.set()
@@ -0,0 +1,235 @@
+import os
+import ast
+import sys
+import json
+import logging
+import argparse
+from flask import Config
+
+# Local modules
+from schema import schema_manager
+from hubmap_commons import neo4j_driver
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Opt-in tool that rewrites the `list` and `json_string` entity properties stored in Neo4j as the string
+representation of Python list/dict into canonical JSON, so schema_manager.convert_str_literal() always
+takes its json.loads() fast path instead of ast.literal_eval()
+
+Other services still parse these properties with ast.literal_eval(), so a value is only rewritten when
+its JSON text evaluates to the same Python value, E.g., not for the values containing True/False/None.
+The entity writes of entity-api keep storing the Python string representation, run this again to
+rewrite the entities created or updated since the last run.
+
+Runs in dry-run mode and only reports what would be rewritten unless `--write` is specified:
+
+    cd src && python migrate_str_literals.py [--write] [--entity-type Dataset] [--batch-size 500]
+"""
+
+
+"""
+Get the stored list/json_string properties of each entity type defined in the schema yaml
+
+Parameters
+----------
+schema : dict
+    The schema yaml loaded by schema_manager.load_provenance_schema()
+entity_types : list
+    The entity types to migrate, all of them if empty
+
+Returns
+-------
+dict
+    The lists of property keys keyed by entity type
+"""
+def get_str_literal_properties(schema, entity_types = []):
+    str_literal_properties = {}
+
+    for entity_type, entity_schema in schema['ENTITIES'].items():
+        if entity_types and (entity_type not in entity_types):
+            continue
+
+        properties = entity_schema['properties']
+
+        # The transient properties are never stored in Neo4j
+        property_keys = [key for key in properties
+                         if (properties[key].get('type') in ['list', 'json_string']) and (not properties[key].get('transient', False))]
+
+        if property_keys:
+            str_literal_properties[entity_type] = property_keys
+
+    return str_literal_properties
+
+
+"""
+Get the canonical JSON of a parsed list/dict property value
+
+Parameters
+----------
+data : list or dict
+    The value parsed by schema_manager.convert_str_literal()
+
+Returns
+-------
+str
+    The JSON text, None when ast.literal_eval() would not evaluate it to the same value
+"""
+def to_canonical_json(data):
+    json_str = json.dumps(data, ensure_ascii = False)
+
+    try:
+        if ast.literal_eval(json_str) == data:
+            return json_str
+    except (SyntaxError, ValueError, TypeError):
+        pass
+
+    return None
+
+
+"""
+Rewrite the list/json_string properties of all the entities of one type, paged by uuid
+
+Parameters
+----------
+driver : neo4j.Driver object
+    The neo4j database connection pool
+entity_type : str
+    One of the entity types defined in the schema yaml, used as the node label
+property_keys : list
+    The keys of the list/json_string properties of the entity type
+batch_size : int
+    The number of entities read and written at a time
+write : bool
+    Only count the values to rewrite when False
+
+Returns
+-------
+dict
+    The number of property values rewritten (or to rewrite), already JSON, not representable, invalid
+    and changed by another write since they were read
+"""
+def migrate_entity_type(driver, entity_type, property_keys, batch_size, write):
+    counts = {
+        'rewritten': 0,
+        'already_json': 0,
+        'not_representable': 0,
+        'invalid': 0,
+        'changed': 0
+    }
+
+    # The label comes from the schema yaml, labels can't be query parameters
+    read_query = (f"MATCH (e:{entity_type}) "
+                  f"WHERE e.uuid > $last_uuid "
+                  f"RETURN e.uuid AS uuid, [key IN $property_keys | e[key]] AS property_values "
+                  f"ORDER BY e.uuid "
+                  f"LIMIT $batch_size")
+
+    # Only the properties still holding the value that was read are rewritten, so an entity update
+    # made in the meantime is never overwritten. `SET e += ...` leaves the other properties including
+    # last_modified_timestamp as they are
+    write_query = ("UNWIND $rows AS row "
+                   "MATCH (e:Entity {uuid: row.uuid}) "
+                   "WITH e, row, [key IN keys(row.properties) WHERE e[key] = row.original[key]] AS unchanged_keys "
+                   "SET e += apoc.map.submap(row.properties, unchanged_keys) "
+                   "RETURN sum(size(unchanged_keys)) AS written")
+
+    last_uuid = ''
+
+    with driver.session() as session:
+        while True:
+            records = list(session.run(read_query, last_uuid = last_uuid, property_keys = property_keys, batch_size = batch_size))
+
+            if not records:
+                break
+
+            rows = []
+            for record in records:
+                properties = {}
+                original = {}
+
+                for key, value in zip(property_keys, record['property_values']):
+                    if not isinstance(value, str):
+                        continue
+
+                    try:
+                        if isinstance(json.loads(value), (list, dict)):
+                            counts['already_json'] += 1
+                            continue
+                    except ValueError:
+                        pass
+
+                    data = schema_manager.convert_str_literal(value)
+
+                    if not isinstance(data, (list, dict)):
+                        logger.warning(f"Skipped the invalid {entity_type}.{key} of uuid: {record['uuid']}")
+                        counts['invalid'] += 1
+                        continue
+
+                    json_str = to_canonical_json(data)
+
+                    if json_str is None:
+                        counts['not_representable'] += 1
+                        continue
+
+                    properties[key] = json_str
+                    original[key] = value
+                    counts['rewritten'] += 1
+
+                if properties:
+                    rows.append({'uuid': record['uuid'], 'properties': properties, 'original': original})
+
+            if rows and write:
+                record = session.run(write_query, rows = rows).single()
+                written = (record['written'] or 0) if record else 0
+
+                # Including the entities deleted in the meantime
+                changed = sum(len(row['properties']) for row in rows) - written
+                if changed:
+                    logger.warning(f"Skipped {changed} {entity_type} property values changed since they were read")
+
+                counts['rewritten'] -= changed
+                counts['changed'] += changed
+
+            last_uuid = records[-1]['uuid']
+
+            logger.info(f"{entity_type}: processed up to uuid {last_uuid}, {counts}")
+
+    return counts
+
+
+def main():
+    logging.basicConfig(format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s', level=logging.INFO, datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description = "Rewrite the list/json_string entity properties in Neo4j into canonical JSON")
+    parser.add_argument('--write', action = 'store_true', help = "Write the rewritten values to Neo4j, only report them otherwise")
+    parser.add_argument('--entity-type', action = 'append', default = [], help = "The entity type to migrate, can be repeated, all by default")
+    parser.add_argument('--batch-size', type = int, default = 500, help = "The number of entities read and written at a time")
+    args = parser.parse_args()
+
+    # Same configuration as the app
+    config = Config(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance'))
+    config.from_pyfile('app.cfg')
+
+    schema = schema_manager.load_provenance_schema(config['SCHEMA_YAML_FILE'])
+
+    str_literal_properties = get_str_literal_properties(schema, args.entity_type)
+
+    driver = neo4j_driver.instance(config['NEO4J_URI'], config['NEO4J_USERNAME'], config['NEO4J_PASSWORD'])
+
+    try:
+        for entity_type, property_keys in str_literal_properties.items():
+            logger.info(f"Migrating {entity_type} properties {property_keys}, write: {args.write}")
+
+            counts = migrate_entity_type(driver, entity_type, property_keys, args.batch_size, args.write)
+
+            logger.info(f"Done with {entity_type}: {counts}")
+    finally:
+        neo4j_driver.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
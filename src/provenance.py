@@ -1,4 +1,4 @@
-from prov.model import ProvDocument, PROV
+import json
 import logging
 import datetime
 
@@ -6,17 +6,27 @@ import datetime
 logger = logging.getLogger(__name__)
 
 HUBMAP_NAMESPACE = 'hubmap'
+HUBMAP_NAMESPACE_URI = 'https://hubmapconsortium.org/'
+
+# The PROV-JSON representation of the prov:Person and prov:Organization qualified names
+PROV_PERSON = {'$': 'prov:Person', 'type': 'prov:QUALIFIED_NAME'}
+PROV_ORGANIZATION = {'$': 'prov:Organization', 'type': 'prov:QUALIFIED_NAME'}
 
 """
 Build the provenance document based on the W3C PROV-DM
 https://www.w3.org/TR/prov-dm/
 
+The PROV-JSON document is emitted directly with the records indexed by identifier, which produces the
+same output as building a prov.model.ProvDocument and calling its serialize() in linear time
+
 Parameters
 ----------
 uuid : str
     The UUID of the associated entity
 normalized_provenance_dict : dict
     The dict that contains all the normalized entity properties defined by the schema yaml
+auth_helper_instance: AuthHelper
+    The auth helper instance passed in
 
 Returns
 -------
@@ -24,9 +34,7 @@ str
     A JSON string representation of the provenance document
 """
 def get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instance):
-    prov_doc = ProvDocument()
-    # The 'prov' prefix is build-in namespace, no need to redefine here
-    prov_doc.add_namespace(HUBMAP_NAMESPACE, 'https://hubmapconsortium.org/')
+    prov_doc = ProvJSONDocument()
   
     # A bit validation
     if 'relationships' not in normalized_provenance_dict:
@@ -39,6 +47,12 @@ def get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instanc
     nodes_dict = {}
     for node in normalized_provenance_dict['nodes']:
         nodes_dict[node['uuid']] = node
+
+    # The same groups info is used to build the organization record of every node
+    globus_groups_info = auth_helper_instance.get_globus_groups_info()
+
+    # Only set when a new activity gets registered and also used for the entities registered after it
+    activity_time = None
     
     # Loop through the relationships and build the provenance document
     for rel_dict in normalized_provenance_dict['relationships']:
@@ -81,15 +95,12 @@ def get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instanc
 
             # Only add the same agent once
             # Multiple entities can be associated to the same agent
-            agent = prov_doc.get_record(agent_uri)
-            if len(agent) == 0:
-                doc_agent = prov_doc.agent(agent_uri, agent_record)
-            else:
-                doc_agent = agent[0]
+            if not prov_doc.has_record(agent_uri):
+                prov_doc.add_record('agent', agent_uri, agent_record)
 
             # Organization
             # Get the organization information from the entity node
-            org_record = get_organization_record(entity_node, auth_helper_instance)
+            org_record = get_organization_record(entity_node, auth_helper_instance, globus_groups_info)
 
             # Build the organization uri
             group_uuid_prov_key = f'{HUBMAP_NAMESPACE}:groupUUID'
@@ -97,27 +108,25 @@ def get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instanc
 
             # Only add the same organization once
             # Multiple entities can be associated to different agents who are from the same organization
-            org = prov_doc.get_record(org_uri)
-            if len(org) == 0:
-                doc_org = prov_doc.agent(org_uri, org_record)
-            else:
-                doc_org = org[0]
+            if not prov_doc.has_record(org_uri):
+                prov_doc.add_record('agent', org_uri, org_record)
 
             # Build the activity uri
             activity_uri = build_uri(HUBMAP_NAMESPACE, 'activities', activity_node['uuid'])
             
             # Register activity if not already registered
-            activity = prov_doc.get_record(activity_uri)
-            if len(activity) == 0:
+            if not prov_doc.has_record(activity_uri):
+                # Convert the timestampt integer to datetime string
+                # Note: in our case, prov:startTime is the same as prov:endTime
+                activity_time = timestamp_to_datetime(activity_node['created_timestamp'])
+
                 # Shared attributes to be added to the PROV document       
                 activity_attributes = {
+                    'prov:startTime': activity_time,
+                    'prov:endTime': activity_time,
                     'prov:type': 'Activity'
                 }
 
-                # Convert the timestampt integer to datetime string
-                # Note: in our case, prov:startTime is the same as prov:endTime
-                activity_time = timestamp_to_datetime(activity_node['created_timestamp'])
-
                 # Add prefix to all other attributes
                 for key in activity_node:
                     prov_key = f'{HUBMAP_NAMESPACE}:{key}'
@@ -128,18 +137,20 @@ def get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instanc
                         activity_attributes[prov_key] = activity_node[key]
 
                 # Register activity
-                doc_activity = prov_doc.activity(activity_uri, activity_time, activity_time, activity_attributes)
+                prov_doc.add_record('activity', activity_uri, activity_attributes)
                 
                 # Relationship: the agent actedOnBehalfOf the org
-                prov_doc.actedOnBehalfOf(doc_agent, doc_org, doc_activity)
-            else:
-                doc_activity = activity[0]    
+                prov_doc.add_record('actedOnBehalfOf', None, {
+                    'prov:delegate': agent_uri,
+                    'prov:responsible': org_uri,
+                    'prov:activity': activity_uri
+                })
             
             # Build the entity uri
             entity_uri = build_uri(HUBMAP_NAMESPACE, 'entities', entity_node['uuid'])
 
             # Register entity is not already registered
-            if len(prov_doc.get_record(entity_uri)) == 0:
+            if not prov_doc.has_record(entity_uri):
                 # Shared attributes to be added to the PROV document
                 entity_attributes = {
                     'prov:type': 'Entity'
@@ -148,7 +159,6 @@ def get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instanc
                 # Add prefix to all other attributes
                 for key in entity_node:
                     # Entity property values can be list or dict, skip
-                    # And list and dict are unhashable types when calling `prov_doc.entity()`
                     if not isinstance(entity_node[key], (list, dict)):
                         prov_key = f'{HUBMAP_NAMESPACE}:{key}'
                         # Use datetime string instead of timestamp integer
@@ -158,7 +168,7 @@ def get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instanc
                             entity_attributes[prov_key] = entity_node[key]
             
                 # Register entity
-                prov_doc.entity(entity_uri, entity_attributes)
+                prov_doc.add_record('entity', entity_uri, entity_attributes)
 
         # Build activity uri and entity uri if not already built
         # For the Lab nodes
@@ -172,11 +182,11 @@ def get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instanc
         # (Activity) - [ACTIVITY_OUTPUT] -> (Entity)
         if rel_dict['rel_data']['type'] == 'ACTIVITY_OUTPUT':
             # Relationship: the entity wasGeneratedBy the activity
-            prov_doc.wasGeneratedBy(entity_uri, activity_uri)
+            prov_doc.add_record('wasGeneratedBy', None, {'prov:entity': entity_uri, 'prov:activity': activity_uri})
         # (Entity) - [ACTIVITY_INPUT] -> (Activity)
         elif rel_dict['rel_data']['type'] == 'ACTIVITY_INPUT':
             # Relationship: the activity used the entity
-            prov_doc.used(activity_uri, entity_uri)
+            prov_doc.add_record('used', None, {'prov:activity': activity_uri, 'prov:entity': entity_uri})
 
     # Format into json string based on the PROV-JSON Serialization
     # https://www.w3.org/Submission/prov-json/
@@ -185,6 +195,86 @@ def get_provenance_history(uuid, normalized_provenance_dict, auth_helper_instanc
     return serialized_json
 
 
+"""
+PROV-JSON document emitted record by record, the records are indexed by identifier so checking
+whether one is already registered is a dict lookup
+
+The output is the same as serializing a prov.model.ProvDocument with the hubmap namespace:
+    - the records are grouped by type, in the order each type first appears
+    - the relations without identifier get the anonymous ids `_:id1`, `_:id2`, ... in the order they are added,
+      a relation equal to one added before gets the same id and both are listed under it
+    - None attribute values are left out, int and float values are typed as xsd:int and xsd:double
+"""
+class ProvJSONDocument(object):
+
+    def __init__(self):
+        self._container = {
+            'prefix': {HUBMAP_NAMESPACE: HUBMAP_NAMESPACE_URI}
+        }
+        self._identifiers = set()
+        self._anonymous_ids = {}
+
+    """
+    Check if a record of the given identifier is already registered
+
+    Parameters
+    ----------
+    identifier : str
+        The record uri
+
+    Returns
+    -------
+    bool
+        True if registered
+    """
+    def has_record(self, identifier):
+        return identifier in self._identifiers
+
+    """
+    Add a record
+
+    Parameters
+    ----------
+    record_type : str
+        The PROV-JSON record type: agent, activity, entity, actedOnBehalfOf, wasGeneratedBy, used
+    identifier : str
+        The record uri, None for an anonymous relation
+    attributes : dict
+        The record attributes keyed by qualified name
+    """
+    def add_record(self, record_type, identifier, attributes):
+        if identifier is None:
+            # The anonymous relations only have qualified name attributes
+            relation_key = (record_type, tuple(attributes.items()))
+            identifier = self._anonymous_ids.setdefault(relation_key, f'_:id{len(self._anonymous_ids) + 1}')
+
+        self._identifiers.add(identifier)
+
+        record_json = {}
+        for key, value in attributes.items():
+            if value is not None:
+                record_json[key] = encode_attribute_value(value)
+
+        records = self._container.setdefault(record_type, {})
+        if identifier not in records:
+            records[identifier] = record_json
+        elif isinstance(records[identifier], list):
+            records[identifier].append(record_json)
+        else:
+            records[identifier] = [records[identifier], record_json]
+
+    """
+    Serialize into the PROV-JSON string
+
+    Returns
+    -------
+    str
+        The JSON string
+    """
+    def serialize(self):
+        return json.dumps(self._container)
+
+
 ####################################################################################################
 ## Helper Functions
 ####################################################################################################
@@ -248,7 +338,7 @@ def get_agent_record(node_dict):
 
     # Shared attribute
     agent_dict = {
-        'prov:type': PROV['Person']
+        'prov:type': PROV_PERSON
     }
 
     # Add to agent_dict if exists in node_dict
@@ -273,17 +363,20 @@ node_dict : dict
 
 auth_helper_instance: AuthHelper
     The auth helper instance passed in
+globus_groups_info : dict
+    The globus groups info already fetched by the caller, fetched with auth_helper_instance if None
     
 Returns
 -------
 dict
     The prov dict for organization 
 """
-def get_organization_record(node_dict, auth_helper_instance):
+def get_organization_record(node_dict, auth_helper_instance, globus_groups_info = None):
     group = {}
 
     # Get the globus groups info based on the groups json file in commons package
-    globus_groups_info = auth_helper_instance.get_globus_groups_info()
+    if globus_groups_info is None:
+        globus_groups_info = auth_helper_instance.get_globus_groups_info()
     groups_by_id_dict = globus_groups_info['by_id']
     groups_by_name_dict = globus_groups_info['by_name']
     
@@ -293,7 +386,7 @@ def get_organization_record(node_dict, auth_helper_instance):
 
     # Shared attribute
     org_dict = {
-        'prov:type': PROV['Organization']
+        'prov:type': PROV_ORGANIZATION
     }
 
     if 'group_uuid' in node_dict:
@@ -326,3 +419,26 @@ def get_organization_record(node_dict, auth_helper_instance):
         org_dict[group_name_prov_key] = group['displayname']
     
     return org_dict
+
+
+"""
+Encode an attribute value the same way as the PROV-JSON serializer of the prov package
+
+Parameters
+----------
+value : str, int, float, bool or dict
+    The attribute value
+
+Returns
+-------
+str, bool, dict
+    The PROV-JSON representation
+"""
+def encode_attribute_value(value):
+    # bool is a subclass of int but is supported natively by PROV-JSON
+    if type(value) is int:
+        return {'$': value, 'type': 'xsd:int'}
+    elif type(value) is float:
+        return {'$': value, 'type': 'xsd:double'}
+
+    return value
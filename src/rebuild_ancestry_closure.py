@@ -0,0 +1,108 @@
+import os
+import sys
+import logging
+import argparse
+from flask import Config
+
+# Local modules
+from schema import schema_neo4j_queries
+from hubmap_commons import neo4j_driver
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Backfill tool that rebuilds the HAS_ANCESTOR closure of the entities stored in Neo4j, see
+schema_neo4j_queries.rebuild_ancestry_closure_tx(). The entity writes of entity-api maintain the
+closure from then on, so set ANCESTRY_CLOSURE_READS = True in app.cfg once it has completed.
+
+Rebuilding is idempotent and can be run again at any time, E.g., after linkages were edited directly in Neo4j:
+
+    cd src && python rebuild_ancestry_closure.py [--entity-type Dataset] [--batch-size 500]
+"""
+
+
+"""
+Rebuild the closure of all the entities with the given label, paged by uuid
+
+Parameters
+----------
+driver : neo4j.Driver object
+    The neo4j database connection pool
+entity_type : str
+    The node label, Entity for all the entities
+batch_size : int
+    The number of entities rebuilt in one transaction
+
+Returns
+-------
+dict
+    The number of entities processed and HAS_ANCESTOR relationships created
+"""
+def rebuild_entity_type(driver, entity_type, batch_size):
+    counts = {
+        'entities': 0,
+        'relationships': 0
+    }
+
+    # The label comes from the command line arguments, labels can't be query parameters
+    read_query = (f"MATCH (e:{entity_type}) "
+                  f"WHERE e.uuid > $last_uuid AND e.entity_type <> 'Lab' "
+                  f"RETURN e.uuid AS uuid "
+                  f"ORDER BY e.uuid "
+                  f"LIMIT $batch_size")
+
+    last_uuid = ''
+
+    with driver.session() as session:
+        while True:
+            uuids = [record['uuid'] for record in session.run(read_query, last_uuid = last_uuid, batch_size = batch_size)]
+
+            if not uuids:
+                break
+
+            tx = session.begin_transaction()
+            try:
+                counts['relationships'] += schema_neo4j_queries.rebuild_ancestry_closure_tx(tx, uuids)
+                tx.commit()
+            finally:
+                if not tx.closed():
+                    tx.rollback()
+
+            counts['entities'] += len(uuids)
+            last_uuid = uuids[-1]
+
+            logger.info(f"{entity_type}: rebuilt up to uuid {last_uuid}, {counts}")
+
+    return counts
+
+
+def main():
+    logging.basicConfig(format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s', level=logging.INFO, datefmt='%Y-%m-%d %H:%M:%S')
+
+    parser = argparse.ArgumentParser(description = "Rebuild the HAS_ANCESTOR closure of the entities in Neo4j")
+    parser.add_argument('--entity-type', action = 'append', default = [], help = "The entity type to rebuild, can be repeated, all by default")
+    parser.add_argument('--batch-size', type = int, default = 500, help = "The number of entities rebuilt in one transaction")
+    args = parser.parse_args()
+
+    # Same configuration as the app
+    config = Config(os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance'))
+    config.from_pyfile('app.cfg')
+
+    driver = neo4j_driver.instance(config['NEO4J_URI'], config['NEO4J_USERNAME'], config['NEO4J_PASSWORD'])
+
+    try:
+        for entity_type in (args.entity_type or ['Entity']):
+            logger.info(f"Rebuilding the ancestry closure of {entity_type}")
+
+            counts = rebuild_entity_type(driver, entity_type, args.batch_size)
+
+            logger.info(f"Done with {entity_type}: {counts}")
+    finally:
+        neo4j_driver.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+import os
+import time
+import atexit
+import logging
+import threading
+
+# Local modules
+from schema import schema_http_client
+from schema.schema_constants import ReindexPriorityLevelEnum
+
+logger = logging.getLogger(__name__)
+
+
+"""
+Background dispatcher of the search-api reindex calls
+
+The write endpoints only enqueue the uuids and return as soon as Neo4j commits. A daemon thread
+of each worker process drains the queue:
+    - the same uuid enqueued multiple times is only reindexed once, with the highest priority
+      (lowest ReindexPriorityLevelEnum value) and the latest token
+    - bursts are coalesced during `coalesce_seconds` and dispatched in batches of at most
+      `batch_size` uuids, higher priority first
+    - failures are retried with exponential backoff up to `max_retries` times
+    - the pending uuids are flushed when the process exits
+    - bulk writers can wait for the queue to drain below a size, so they slow down to the
+      pace search-api accepts the reindex calls instead of sleeping a fixed time
+
+search-api only exposes `PUT /reindex/<uuid>`, so a batch is dispatched as individual calls
+that share the keep-alive connection pool of the upstream client
+
+Parameters
+----------
+search_api_url : str
+    The base URL of search-api
+batch_size : int
+    The max number of uuids dispatched in one batch
+coalesce_seconds : float
+    Seconds to wait for more uuids to coalesce after the first one is enqueued
+max_retries : int
+    The max number of retries of a failed reindex call
+backoff_seconds : float
+    The base of the exponential backoff between retries
+"""
+class ReindexDispatcher(object):
+
+    def __init__(self, search_api_url, batch_size = 50, coalesce_seconds = 1, max_retries = 5, backoff_seconds = 2):
+        self.search_api_url = search_api_url
+        self.batch_size = batch_size
+        self.coalesce_seconds = coalesce_seconds
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+        # Key: uuid, value: dict of priority_level, user_token, attempts, not_before, enqueued_at
+        self._pending = {}
+        self._lock = threading.RLock()
+        self._condition = threading.Condition(self._lock)
+        # Notified when uuids are taken off the queue, see wait_for_capacity()
+        self._drained = threading.Condition(self._lock)
+        self._thread = None
+        self._pid = None
+        self._stopped = False
+
+        atexit.register(self.shutdown)
+
+    """
+    Add the uuid to the queue, deduplicated against the pending uuids
+
+    Parameters
+    ----------
+    uuid : str
+        The uuid of the target entity
+    user_token : str
+        The user's globus groups token
+    priority_level : int
+        Value from the enumeration ReindexPriorityLevelEnum
+    """
+    def enqueue(self, uuid, user_token, priority_level = ReindexPriorityLevelEnum.HIGH.value):
+        with self._condition:
+            self._ensure_started()
+
+            item = self._pending.get(uuid)
+
+            if item is None:
+                self._pending[uuid] = {
+                    'priority_level': priority_level,
+                    'user_token': user_token,
+                    'attempts': 0,
+                    'not_before': 0,
+                    'enqueued_at': time.time()
+                }
+            else:
+                # Keep the highest priority and the latest token, a new request also resets the retries
+                item['priority_level'] = min(item['priority_level'], priority_level)
+                item['user_token'] = user_token
+                item['attempts'] = 0
+                item['not_before'] = 0
+
+            self._condition.notify()
+
+    """
+    Get the number of uuids waiting to be reindexed
+
+    Returns
+    -------
+    int
+        The queue size
+    """
+    def get_queue_size(self):
+        with self._condition:
+            return len(self._pending)
+
+    """
+    Block until fewer than `max_queue_size` uuids are waiting to be reindexed
+
+    The uuids failing against search-api stay in the queue while backing off, so the
+    wait gets longer when search-api is overloaded and returns right away when it keeps up
+
+    Parameters
+    ----------
+    max_queue_size : int
+        The queue size to get below
+    timeout : float
+        The max number of seconds to wait, None to wait until the queue drains
+
+    Returns
+    -------
+    bool
+        False if the timeout expired before the queue drained
+    """
+    def wait_for_capacity(self, max_queue_size, timeout = None):
+        with self._drained:
+            return self._drained.wait_for(lambda: len(self._pending) < max_queue_size or self._stopped, timeout = timeout)
+
+    """
+    Stop the background thread and dispatch all the pending uuids right away, without retries
+    """
+    def shutdown(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+            self._drained.notify_all()
+
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout = 30)
+
+        with self._condition:
+            remaining = list(self._pending.items())
+            self._pending.clear()
+
+        if remaining:
+            logger.info(f"Flushing {len(remaining)} pending reindex calls on shutdown")
+
+        for uuid, item in remaining:
+            self._dispatch(uuid, item)
+
+    # The thread is started lazily in each worker process since
+    # uwsgi forks the workers after the app gets loaded in the master
+    def _ensure_started(self):
+        if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._stopped = False
+            self._thread = threading.Thread(target = self._run, name = 'reindex-dispatcher', daemon = True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+
+                if self._stopped:
+                    return
+
+            # Let the burst coalesce before taking the batch
+            time.sleep(self.coalesce_seconds)
+
+            batch = self._take_batch()
+
+            if not batch:
+                # Everything pending is backing off, wait for the earliest retry or a new uuid
+                with self._condition:
+                    not_before_list = [item['not_before'] for item in self._pending.values()]
+                    if not_before_list:
+                        self._condition.wait(timeout = max(0, min(not_before_list) - time.time()))
+                continue
+
+            for uuid, item in batch:
+                if not self._dispatch(uuid, item):
+                    self._retry(uuid, item)
+
+    def _take_batch(self):
+        now = time.time()
+
+        with self._condition:
+            ready_items = [(uuid, item) for uuid, item in self._pending.items() if item['not_before'] <= now]
+            ready_items.sort(key = lambda uuid_item: (uuid_item[1]['priority_level'], uuid_item[1]['enqueued_at']))
+
+            batch = ready_items[:self.batch_size]
+            for uuid, item in batch:
+                del self._pending[uuid]
+
+            if batch:
+                self._drained.notify_all()
+
+        return batch
+
+    def _retry(self, uuid, item):
+        item['attempts'] += 1
+
+        if item['attempts'] > self.max_retries:
+            logger.error(f"Giving up reindexing uuid: {uuid} after {self.max_retries} retries")
+            return
+
+        item['not_before'] = time.time() + self.backoff_seconds * (2 ** (item['attempts'] - 1))
+
+        with self._condition:
+            # A new request of the same uuid may have been enqueued in the meantime
+            if uuid not in self._pending:
+                self._pending[uuid] = item
+
+            self._condition.notify()
+
+    """
+    Make a call to search-api to trigger reindex of this entity document in elasticsearch
+
+    Returns
+    -------
+    bool
+        True if search-api accepted the reindex request
+    """
+    def _dispatch(self, uuid, item):
+        headers = {
+            'Authorization': f"Bearer {item['user_token']}"
+        }
+
+        logger.info(f"Making a call to search-api to reindex uuid: {uuid}")
+
+        try:
+            response = schema_http_client.put(f"{self.search_api_url}/reindex/{uuid}"
+                                              , headers = headers
+                                              , params = {'priority': item['priority_level']})
+        except Exception as e:
+            logger.error(f"The search-api failed to initialize the reindex for uuid: {uuid}: {e}")
+            return False
+
+        # The reindex takes time, so 202 Accepted response status code indicates that
+        # the request has been accepted for processing, but the processing has not been completed
+        if response.status_code == 202:
+            logger.info(f"The search-api has accepted the reindex request for uuid: {uuid}")
+            return True
+
+        logger.error(f"The search-api failed to initialize the reindex for uuid: {uuid}, status code: {response.status_code}")
+        return False
@@ -2,6 +2,50 @@ from enum import Enum
 class SchemaConstants(object):
     MEMCACHED_TTL = 7200
 
+    # Max number of introspected tokens kept in the in-process LRU of each worker
+    TOKEN_INFO_CACHE_MAXSIZE = 1000
+
+    # Max number of id -> uuid mappings kept in the in-process map of each worker
+    ID_RESOLVER_CACHE_MAXSIZE = 100000
+
+    # Seconds each worker reuses the cache generations before reading them from Memcached again,
+    # which is how long the other workers may still serve the entries of a flushed generation
+    CACHE_GENERATION_REFRESH_SECONDS = 1
+
+    # Max seconds a cache fill lease is held in Memcached, and how often the other workers
+    # check for the filled cache while waiting, see schema_manager.single_flight()
+    SINGLE_FLIGHT_LEASE_SECONDS = 30
+    SINGLE_FLIGHT_POLL_SECONDS = 0.05
+
+    # Max number of dependents recorded under the dependents key of one entity, which keeps the key
+    # well below the 1MB item limit of Memcached, see schema_manager._append_cache_dependents()
+    MEMCACHED_MAX_DEPENDENTS = 5000
+
+    # The in-process L1 cache in front of Memcached, bounded by the total bytes of the pickled
+    # entries of each worker and a TTL shorter than MEMCACHED_TTL
+    L1_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    L1_CACHE_TTL = 300
+
+    # Max number of cache deletions by the other workers whose keys are dropped from the L1 cache
+    # one by one, a worker further behind clears its whole L1 cache instead
+    L1_CACHE_MAX_INVALIDATIONS = 100
+
+    # Max number of distinct query texts tracked per named Cypher query in the query registry,
+    # see schema_neo4j_queries.register_query()
+    NEO4J_QUERY_MAX_SHAPES = 20
+
+    # Number of entity property maps sent in the $rows of one UNWIND statement when creating
+    # multiple samples/datasets, see app_neo4j_queries.create_activity_outputs_tx()
+    NEO4J_BULK_CREATE_BATCH_SIZE = 500
+
+    # Max number of threads of each worker running the independent read triggers of an entity concurrently,
+    # see schema_manager.generate_triggered_data()
+    READ_TRIGGER_MAX_WORKERS = 16
+
+    # Max total bytes of the string literals and pickled values of the parsed list/json_string properties
+    # memoized by each worker, see schema_manager.convert_entity_str_literal()
+    PARSED_LITERAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
     INGEST_API_APP = 'ingest-api'
     ENTITY_API_APP = 'entity-api'
     COMPONENT_DATASET = 'component-dataset'
@@ -63,6 +107,7 @@ class Neo4jRelationshipEnum(Enum):
     IN_UPLOAD = 'IN_UPLOAD'
     REVISION_OF = 'REVISION_OF'
     USES_DATA = 'USES_DATA'
+    HAS_ANCESTOR = 'HAS_ANCESTOR'
 
 # Define an enumeration of re-index priority level types.
 # N.B. These are the same values maintained in ingest-api app.py _get_reindex_priority(), which
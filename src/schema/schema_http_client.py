@@ -0,0 +1,453 @@
+import time
+import logging
+import threading
+import http.client
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter, Retry
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Number of keep-alive connections kept in the pool of each upstream service
+# The uwsgi config runs 24 threads in each process, so this is enough for all threads to share one pool
+POOL_MAXSIZE = 32
+
+# Response headers kept in the compact HTTP cache entry, everything else is dropped
+CACHED_RESPONSE_HEADERS = ['Content-Type', 'ETag', 'Last-Modified']
+
+# Status codes retried with backoff, only for idempotent methods
+RETRY_STATUS_FORCELIST = [502, 503, 504]
+
+# In Python, "privacy" depends on "consenting adults'" levels of agreement, we can't force it.
+# A single leading underscore means you're not supposed to access it "from the outside"
+# Key: upstream service name, value: base URL
+_upstreams = {}
+# Key: upstream service name, value: requests.Session with a keep-alive connection pool
+_sessions = {}
+# Key: upstream service name, value: dict of counters
+_metrics = {}
+# Key: upstream service name, value: dict of the circuit breaker state
+_circuit_breakers = {}
+_lock = threading.Lock()
+
+# Default settings, can be overridden via configure()
+_settings = {
+    'connect_timeout': 5,
+    'read_timeout': 60,
+    'max_retries': 3,
+    'backoff_factor': 0.5,
+    'circuit_breaker_threshold': 5,
+    'circuit_breaker_reset_timeout': 30
+}
+
+
+"""
+Raised without making the request when the circuit breaker of the upstream service is open.
+A subclass of requests.exceptions.RequestException so the existing error handling applies
+"""
+class CircuitBreakerOpenException(requests.exceptions.RequestException):
+    pass
+
+
+"""
+Configure the timeouts, retries and circuit breaker of all the upstream services
+
+Parameters
+----------
+connect_timeout : float
+    Seconds to wait for the connection to be established
+read_timeout : float
+    Seconds to wait for the upstream service to send the response
+max_retries : int
+    Max number of retries on connection errors, and on 502/503/504 for idempotent methods
+backoff_factor : float
+    The backoff factor between retries, sleeps {backoff_factor} * (2 ** ({retry number} - 1)) seconds
+circuit_breaker_threshold : int
+    Number of consecutive failures to open the circuit breaker of an upstream service
+circuit_breaker_reset_timeout : float
+    Seconds the circuit breaker stays open before letting a trial request through
+"""
+def configure(connect_timeout = None,
+              read_timeout = None,
+              max_retries = None,
+              backoff_factor = None,
+              circuit_breaker_threshold = None,
+              circuit_breaker_reset_timeout = None):
+    settings = {
+        'connect_timeout': connect_timeout,
+        'read_timeout': read_timeout,
+        'max_retries': max_retries,
+        'backoff_factor': backoff_factor,
+        'circuit_breaker_threshold': circuit_breaker_threshold,
+        'circuit_breaker_reset_timeout': circuit_breaker_reset_timeout
+    }
+
+    with _lock:
+        _settings.update({key: value for key, value in settings.items() if value is not None})
+
+        # The existing sessions were created with the previous retry policy
+        _sessions.clear()
+
+
+####################################################################################################
+## Upstream services and connection pools
+####################################################################################################
+
+"""
+Register an upstream service so the requests to its base URL are pooled and measured under its name
+
+Parameters
+----------
+name : str
+    The name of the upstream service, e.g., 'uuid-api'
+base_url : str
+    The base URL of the upstream service
+"""
+def register_upstream(name, base_url):
+    with _lock:
+        _upstreams[name] = base_url.rstrip('/')
+
+
+"""
+Get the name of the upstream service that the target URL belongs to
+
+Parameters
+----------
+target_url : str
+    The target HTTP request URL
+
+Returns
+-------
+str
+    The name of the registered upstream service with the longest matching base URL,
+    otherwise the host (netloc) of the URL
+"""
+def get_upstream_name(target_url):
+    matched_name = None
+    matched_length = 0
+
+    with _lock:
+        for name, base_url in _upstreams.items():
+            if target_url.startswith(base_url) and len(base_url) > matched_length:
+                matched_name = name
+                matched_length = len(base_url)
+
+    if matched_name is None:
+        matched_name = urlparse(target_url).netloc
+
+    return matched_name
+
+
+"""
+Get the requests.Session of the upstream service, created with its own keep-alive
+connection pool on first use and shared by all the threads of this process
+
+Parameters
+----------
+upstream_name : str
+    The name of the upstream service
+
+Returns
+-------
+requests.Session
+    The pooled session of the upstream service
+"""
+def get_session(upstream_name):
+    with _lock:
+        session = _sessions.get(upstream_name)
+
+        if session is None:
+            # Connection errors are retried for all methods since no request was sent yet,
+            # while read errors and 5xx are only retried for the idempotent methods (not POST)
+            retries = Retry(total = _settings['max_retries'],
+                            backoff_factor = _settings['backoff_factor'],
+                            status_forcelist = RETRY_STATUS_FORCELIST,
+                            raise_on_status = False)
+            adapter = HTTPAdapter(pool_connections = 1, pool_maxsize = POOL_MAXSIZE, max_retries = retries)
+
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+            _sessions[upstream_name] = session
+
+    return session
+
+
+"""
+Make an HTTP request via the pooled session of the upstream service
+
+The configured timeouts apply unless `timeout` is specified in kwargs. The latency is measured and
+the outcome is tracked by the circuit breaker of the upstream service, a connection error, timeout,
+or 5xx response counts as a failure
+
+Parameters
+----------
+method : str
+    The HTTP method, e.g. 'GET', 'POST', 'PUT'
+target_url : str
+    The target HTTP request URL
+kwargs : dict
+    Other keyword arguments of requests.Session.request(), e.g. headers, json, params, verify
+
+Returns
+-------
+requests.Response
+    The Response object
+
+Raises
+------
+CircuitBreakerOpenException
+    When the circuit breaker of the upstream service is open
+requests.exceptions.RequestException
+    On connection errors and timeouts after all retries
+"""
+def request(method, target_url, **kwargs):
+    upstream_name = get_upstream_name(target_url)
+
+    _check_circuit_breaker(upstream_name)
+
+    session = get_session(upstream_name)
+    kwargs.setdefault('timeout', (_settings['connect_timeout'], _settings['read_timeout']))
+
+    start_time = time.perf_counter()
+    try:
+        response = session.request(method, target_url, **kwargs)
+    except requests.exceptions.RequestException:
+        _record_outcome(upstream_name, False)
+        raise
+    finally:
+        record_latency(upstream_name, time.perf_counter() - start_time)
+
+    _record_outcome(upstream_name, response.status_code < 500)
+
+    return response
+
+
+def get(target_url, **kwargs):
+    return request('GET', target_url, **kwargs)
+
+
+def post(target_url, **kwargs):
+    return request('POST', target_url, **kwargs)
+
+
+def put(target_url, **kwargs):
+    return request('PUT', target_url, **kwargs)
+
+
+####################################################################################################
+## Circuit breakers
+####################################################################################################
+
+def _get_circuit_breaker(upstream_name):
+    if upstream_name not in _circuit_breakers:
+        _circuit_breakers[upstream_name] = {
+            'consecutive_failures': 0,
+            'open_until': 0
+        }
+
+    return _circuit_breakers[upstream_name]
+
+
+"""
+Fail fast when the circuit breaker of the upstream service is open. Once the reset timeout
+passes, requests go through again and the next failure re-opens the circuit immediately
+
+Parameters
+----------
+upstream_name : str
+    The name of the upstream service
+"""
+def _check_circuit_breaker(upstream_name):
+    with _lock:
+        open_until = _get_circuit_breaker(upstream_name)['open_until']
+
+    if open_until > time.time():
+        msg = f"The circuit breaker of {upstream_name} is open after consecutive failures, request not sent"
+        logger.error(msg)
+        raise CircuitBreakerOpenException(msg)
+
+
+def _record_outcome(upstream_name, succeeded):
+    with _lock:
+        circuit_breaker = _get_circuit_breaker(upstream_name)
+
+        if succeeded:
+            circuit_breaker['consecutive_failures'] = 0
+            circuit_breaker['open_until'] = 0
+            return
+
+        circuit_breaker['consecutive_failures'] += 1
+
+        if circuit_breaker['consecutive_failures'] >= _settings['circuit_breaker_threshold']:
+            circuit_breaker['open_until'] = time.time() + _settings['circuit_breaker_reset_timeout']
+
+            logger.error(f"Opened the circuit breaker of {upstream_name} for {_settings['circuit_breaker_reset_timeout']} seconds "
+                         f"after {circuit_breaker['consecutive_failures']} consecutive failures")
+
+
+####################################################################################################
+## Compact HTTP cache entries
+####################################################################################################
+
+"""
+Convert the response into a compact cache entry that only contains the status code,
+body bytes and a few headers instead of pickling the whole requests.Response
+
+Parameters
+----------
+response : requests.Response
+    The response to cache
+fresh_until : float
+    The epoch time until which the entry can be used without revalidation
+
+Returns
+-------
+dict
+    The cache entry
+"""
+def to_cache_entry(response, fresh_until):
+    headers = {}
+    for header in CACHED_RESPONSE_HEADERS:
+        if header in response.headers:
+            headers[header] = response.headers[header]
+
+    return {
+        'status': response.status_code,
+        'body': response.content,
+        'headers': headers,
+        'fresh_until': fresh_until
+    }
+
+
+"""
+Rebuild a requests.Response from the compact cache entry so that callers can still use
+raise_for_status(), json(), text, etc. as with a live response
+
+Parameters
+----------
+target_url : str
+    The target HTTP request URL
+cache_entry : dict
+    The cache entry created by to_cache_entry()
+
+Returns
+-------
+requests.Response
+    The rebuilt Response object
+"""
+def from_cache_entry(target_url, cache_entry):
+    response = requests.Response()
+    response.status_code = cache_entry['status']
+    response.reason = http.client.responses.get(cache_entry['status'], '')
+    response.headers = CaseInsensitiveDict(cache_entry['headers'])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = target_url
+    response._content = cache_entry['body']
+
+    return response
+
+
+"""
+Get the conditional request headers to revalidate the cache entry with the upstream service
+
+Parameters
+----------
+cache_entry : dict
+    The cache entry created by to_cache_entry()
+
+Returns
+-------
+dict
+    The If-None-Match and/or If-Modified-Since headers, empty if the entry has no validators
+"""
+def get_revalidation_headers(cache_entry):
+    headers = {}
+
+    if 'ETag' in cache_entry['headers']:
+        headers['If-None-Match'] = cache_entry['headers']['ETag']
+
+    if 'Last-Modified' in cache_entry['headers']:
+        headers['If-Modified-Since'] = cache_entry['headers']['Last-Modified']
+
+    return headers
+
+
+####################################################################################################
+## Metrics
+####################################################################################################
+
+def _get_upstream_metrics(upstream_name):
+    if upstream_name not in _metrics:
+        _metrics[upstream_name] = {
+            'requests': 0,
+            'latency_seconds_total': 0.0,
+            'latency_seconds_max': 0.0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'cache_revalidations': 0
+        }
+
+    return _metrics[upstream_name]
+
+
+"""
+Record the latency of an HTTP request made to the upstream service
+
+Parameters
+----------
+upstream_name : str
+    The name of the upstream service
+latency : float
+    The latency in seconds
+"""
+def record_latency(upstream_name, latency):
+    with _lock:
+        upstream_metrics = _get_upstream_metrics(upstream_name)
+        upstream_metrics['requests'] += 1
+        upstream_metrics['latency_seconds_total'] += latency
+        upstream_metrics['latency_seconds_max'] = max(upstream_metrics['latency_seconds_max'], latency)
+
+
+"""
+Record the outcome of a cached HTTP GET of the upstream service
+
+Parameters
+----------
+target_url : str
+    The target HTTP request URL
+outcome : str
+    One of 'cache_hits', 'cache_misses', 'cache_revalidations'
+"""
+def record_cache_outcome(target_url, outcome):
+    upstream_name = get_upstream_name(target_url)
+
+    with _lock:
+        _get_upstream_metrics(upstream_name)[outcome] += 1
+
+
+"""
+Get the metrics of all the upstream services of this process
+
+Returns
+-------
+dict
+    The metrics keyed by upstream service name, with the cache hit ratio and average latency
+"""
+def get_metrics():
+    results = {}
+
+    with _lock:
+        for upstream_name, upstream_metrics in _metrics.items():
+            result = dict(upstream_metrics)
+            result['circuit_breaker_open'] = _get_circuit_breaker(upstream_name)['open_until'] > time.time()
+
+            cache_lookups = result['cache_hits'] + result['cache_misses'] + result['cache_revalidations']
+            result['cache_hit_ratio'] = round(result['cache_hits'] / cache_lookups, 4) if cache_lookups else None
+            result['latency_seconds_avg'] = round(result['latency_seconds_total'] / result['requests'], 4) if result['requests'] else None
+
+            results[upstream_name] = result
+
+    return results
@@ -1,10 +1,19 @@
+import os
 import ast
+import copy
+import json
+import time
+import pickle
+import sys
 import yaml
+import hashlib
 import logging
 import requests
+import threading
 import unicodedata
+import collections
 import concurrent.futures
-from flask import Response
+from flask import Response, g, has_request_context
 from datetime import datetime
 
 # Don't confuse urllib (Python native library) with urllib3 (3rd-party library, requests also uses urllib3)
@@ -16,6 +25,7 @@ from schema import schema_errors
 from schema import schema_triggers
 from schema import schema_validators
 from schema import schema_neo4j_queries
+from schema import schema_http_client
 from schema.schema_constants import SchemaConstants
 from schema.schema_constants import MetadataScopeEnum
 from schema.schema_constants import TriggerTypeEnum
@@ -42,8 +52,87 @@ _auth_helper = None
 _neo4j_driver = None
 _memcached_client = None
 _memcached_prefix = None
+
+# In-process LRU of the token introspection results, shared by all the threads of this worker
+# Key: (SHA-256 hex digest of the token, group_required), value: the user info dict
+_token_info_cache = collections.OrderedDict()
+_token_info_cache_lock = threading.Lock()
+_token_info_cache_stats = {
+    'hits': 0,
+    'memcached_hits': 0,
+    'misses': 0
+}
+
+# In-process map of resolved ids, a HuBMAP ID (or uuid) always points to the same uuid once minted
+# Key: upper-cased HuBMAP ID or lower-cased uuid, value: uuid
+_resolved_uuids = collections.OrderedDict()
+_resolved_uuids_lock = threading.Lock()
+
+# The cache generations read from Memcached, briefly reused by all the threads of this worker
+# Key: None for the global generation or the entity type, value: generation number
+_cache_generations = {}
+_cache_generations_fetched_at = 0
+_cache_generations_lock = threading.Lock()
+
+# In-process L1 cache in front of Memcached, the immutable values are kept as is and the others are
+# pickled so each caller gets its own copy, see _set_l1_cached_data()
+# Key: cache key, value: tuple of (expires at, data, pickled or not, size in bytes)
+_l1_cache = collections.OrderedDict()
+_l1_cache_bytes = 0
+# The last invalidation version read from Memcached, the L1 entries of the cache keys deleted by
+# the other workers since then are dropped once it changes, see _check_l1_cache_version()
+_l1_cache_version = None
+_l1_cache_lock = threading.Lock()
+_l1_cache_stats = {
+    'hits': 0,
+    'misses': 0,
+    'evictions': 0,
+    'invalidations': 0
+}
+
+# The cache fills in progress in this worker, so only one thread recomputes a missing cache key
+# Key: cache key, value: dict of the completion event, result, error and number of waiting threads
+_single_flight_fills = {}
+_single_flight_lock = threading.Lock()
+_single_flight_stats = {
+    'computations': 0,
+    'coalesced_threads': 0,
+    'coalesced_processes': 0
+}
+
+# In-process memo of the parsed list/dict property values, shared by all the threads of this worker
+# Key: (uuid, property key, last_modified_timestamp), value: tuple of (string literal, pickled value)
+_parsed_literals = collections.OrderedDict()
+_parsed_literals_bytes = 0
+_parsed_literals_lock = threading.Lock()
+_parsed_literals_stats = {
+    'hits': 0,
+    'misses': 0,
+    'evictions': 0
+}
 _organ_types = None
 
+# The execution plans compiled from the yaml schema by compile_schema_plans(), one per entity/activity class
+# Key: normalized class, value: dict of the trigger plans keyed by TriggerTypeEnum and the property flags keyed by property key
+_schema_plans = {}
+# The _schema the plans were compiled from, so the plans get recompiled once _schema is replaced
+_schema_plans_source = None
+_schema_plans_lock = threading.Lock()
+
+# The bounded executor of the independent read triggers of each entity, shared by all the threads of this worker
+_READ_TRIGGER_THREAD_NAME_PREFIX = 'read-trigger'
+_read_trigger_executor = None
+_read_trigger_executor_pid = None
+_read_trigger_executor_lock = threading.Lock()
+
+# The reindex_dispatcher.ReindexDispatcher of the application, used by the trigger methods
+# that update other entities in-process, see set_reindex_dispatcher()
+_reindex_dispatcher = None
+
+# Time spent in each trigger method, key: `Class.property:trigger_method`, value: dict of calls, total_ms and max_ms
+_trigger_timings = {}
+_trigger_timings_lock = threading.Lock()
+
 
 ####################################################################################################
 ## Provenance yaml schema initialization
@@ -93,6 +182,8 @@ def initialize(valid_yaml_file,
     global _memcached_prefix
 
     _schema = load_provenance_schema(valid_yaml_file)
+    compile_schema_plans()
+
     if uuid_api_url is not None:
         _uuid_api_url = uuid_api_url
     else:
@@ -126,6 +217,12 @@ def initialize(valid_yaml_file,
     _memcached_client = memcached_client_instance
     _memcached_prefix = memcached_prefix
 
+    # Each upstream service gets its own keep-alive connection pool and metrics
+    schema_http_client.register_upstream('uuid-api', _uuid_api_url)
+    schema_http_client.register_upstream('ingest-api', _ingest_api_url)
+    schema_http_client.register_upstream('ontology-api', _ontology_api_url)
+    schema_http_client.register_upstream('entity-api', _entity_api_url)
+
 
 ####################################################################################################
 ## Provenance yaml schema loading
@@ -155,6 +252,118 @@ def load_provenance_schema(valid_yaml_file):
         return schema_dict
 
 
+"""
+Compile the execution plans of every class defined in the loaded yaml schema
+
+For each (class, trigger type) the plan is a tuple of the properties having that trigger, in the same
+order as defined in the yaml, with the trigger methods already bound and the flags of the property
+precomputed, so the read path doesn't need to walk and inspect all the properties for each entity.
+The property flags of each class are used by remove_transient_and_none_values() and _normalize_metadata()
+"""
+def compile_schema_plans():
+    global _schema
+    global _schema_plans
+    global _schema_plans_source
+
+    schema_plans = {}
+
+    for schema_section in ['ACTIVITIES', 'ENTITIES']:
+        for normalized_class, class_schema in _schema[schema_section].items():
+            properties = class_schema['properties']
+
+            trigger_plans = {}
+            for trigger_type in TriggerTypeEnum:
+                bulk_trigger_type = f"bulk_{trigger_type.value}"
+                plan = []
+
+                for key in properties:
+                    if trigger_type.value not in properties[key]:
+                        continue
+
+                    method_name = properties[key][trigger_type.value]
+                    bulk_method_name = properties[key].get(bulk_trigger_type)
+
+                    # A missing method gets reported when the trigger is called, same as calling getattr() there
+                    method = getattr(schema_triggers, method_name, None)
+                    if method is None:
+                        logger.error(f"The {trigger_type.value} method {method_name} of {normalized_class}.{key} is not found in schema_triggers")
+
+                    plan.append({
+                        'property_key': key,
+                        'method_name': method_name,
+                        'method': method,
+                        'bulk_method_name': bulk_method_name,
+                        'bulk_method': getattr(schema_triggers, bulk_method_name, None) if bulk_method_name else None,
+                        'updated_peripherally': bool(properties[key].get('updated_peripherally', False)),
+                        'auto_update': bool(properties[key].get('auto_update', False)),
+                        'transient': bool(properties[key].get('transient', False)),
+                        # Only the read triggers run concurrently and need the order declared
+                        'depends_on': tuple(properties[key].get('depends_on', [])) if trigger_type in [TriggerTypeEnum.ON_READ, TriggerTypeEnum.ON_INDEX] else ()
+                    })
+
+                    # The loop of generate_triggered_data() runs the dependencies first in the yaml order
+                    preceding_keys = [preceding_entry['property_key'] for preceding_entry in plan[:-1]]
+                    for dependency_key in plan[-1]['depends_on']:
+                        if dependency_key not in preceding_keys:
+                            msg = f"Invalid depends_on of {normalized_class}.{key}: {dependency_key} must be a property with {trigger_type.value} defined before it"
+                            logger.critical(msg)
+                            raise ValueError(msg)
+
+                trigger_plans[trigger_type] = tuple(plan)
+
+            property_flags = {}
+            for key in properties:
+                property_flags[key] = {
+                    'transient': bool(properties[key].get('transient', False)),
+                    # Only `exposed: false` and `indexed: false` hide a property, not the absence of the flags
+                    'exposed': properties[key].get('exposed') is not False,
+                    'indexed': properties[key].get('indexed') is not False,
+                    # The string representation of Python dict and list to be converted by convert_str_literal()
+                    'str_literal': properties[key].get('type') in ['list', 'json_string']
+                }
+
+            schema_plans[normalized_class] = {
+                'triggers': trigger_plans,
+                'properties': property_flags
+            }
+
+    _schema_plans = schema_plans
+    _schema_plans_source = _schema
+
+    logger.info(f"Compiled the execution plans of {len(schema_plans)} classes from the provenance schema")
+
+
+"""
+Get the compiled execution plan of the given class, see compile_schema_plans()
+
+Parameters
+----------
+normalized_class : str
+    One of the types defined in the schema yaml: Activity, Collection, Donor, Sample, Dataset, Upload, Publication
+
+Returns
+-------
+dict
+    The trigger plans keyed by TriggerTypeEnum and the property flags keyed by property key
+"""
+def get_schema_plan(normalized_class):
+    global _schema
+    global _schema_plans_source
+
+    if _schema_plans_source is not _schema:
+        with _schema_plans_lock:
+            if _schema_plans_source is not _schema:
+                compile_schema_plans()
+
+    schema_plan = _schema_plans.get(normalized_class)
+
+    if schema_plan is None:
+        # Raises InvalidNormalizedTypeException
+        validate_normalized_class(normalized_class)
+
+    return schema_plan
+
+
 ####################################################################################################
 ## Helper functions
 ####################################################################################################
@@ -590,50 +799,60 @@ request_args: ImmutableMultiDict
     The Flask request.args passed in from application request
 user_token: str
     The user's globus nexus token, 'on_read_trigger' doesn't really need this
-existing_data_dict : dict
-    A dictionary that contains existing entity data
+existing_data_dict : dict or list
+    A dictionary that contains existing entity data, or a list of such dictionaries of entities
+    of the same normalized_class to run the `bulk_` variants of the triggers once for the whole list
 new_data_dict : dict
     A dictionary that contains incoming entity data
 properties_to_skip : list
     Any properties to skip running triggers
+bulk_trigger_data : dict
+    The (target_key, target_value) tuples keyed by property key already generated by the bulk triggers
+    for this entity, whose triggers are not called again
 
 Returns
 -------
-dict
-    A dictionary of trigger event methods generated data
+dict or list
+    A dictionary of trigger event methods generated data, or a list of such dictionaries
+    in the same order when existing_data_dict is a list
 """
 def generate_triggered_data(trigger_type: TriggerTypeEnum, normalized_class, request_args, user_token, existing_data_dict
-                            , new_data_dict, properties_to_skip = []):
-    global _schema
-
-    schema_section = None
-
-    # A bit validation
-    validate_trigger_type(trigger_type)
-    # Use validate_normalized_class instead of validate_normalized_entity_type()
-    # to allow "Activity"
-    validate_normalized_class(normalized_class)
-
-    # Determine the schema section based on class
-    if normalized_class == 'Activity':
-        schema_section = _schema['ACTIVITIES']
-    else:
-        schema_section = _schema['ENTITIES']
+                            , new_data_dict, properties_to_skip = [], bulk_trigger_data = None):
+    # The compiled plan of this class has the properties with the target trigger type in the yaml order,
+    # which decides the ordering of which trigger method gets to run first
+    schema_plan = get_schema_plan(normalized_class)
 
-    # The ordering of properties of this entity class defined in the yaml schema
-    # decides the ordering of which trigger method gets to run first
-    properties = schema_section[normalized_class]['properties']
-
-    logger.info(f"Skipping triggered data generation for the following properties: {properties_to_skip}")
+    try:
+        trigger_plan = schema_plan['triggers'][trigger_type]
+    except KeyError:
+        # Raises ValueError on an invalid trigger type
+        validate_trigger_type(trigger_type)
+        raise
+
+    if properties_to_skip:
+        logger.info("Skipping triggered data generation for the following properties: %s", properties_to_skip)
+
+    if isinstance(existing_data_dict, list):
+        return _generate_triggered_data_list(trigger_type, normalized_class, trigger_plan, request_args, user_token
+                                             , existing_data_dict, new_data_dict, properties_to_skip)
+
+    # Start the independent read triggers of this entity on the shared executor, the loop below
+    # merges their results in the yaml order as if the triggers were called there
+    trigger_futures = {}
+    if trigger_type in [TriggerTypeEnum.ON_READ, TriggerTypeEnum.ON_INDEX]:
+        trigger_futures = _submit_read_triggers(normalized_class, trigger_plan, request_args, user_token, existing_data_dict
+                                                , new_data_dict, properties_to_skip, bulk_trigger_data)
 
     # Set each property value and put all resulting data into a dictionary for:
     # before_create_trigger|before_update_trigger|on_read_trigger
     # No property value to be set for: after_create_trigger|after_update_trigger
     trigger_generated_data_dict = {}
-    for key in properties:
+    for entry in trigger_plan:
+        key = entry['property_key']
+
         # Among those properties that have the target trigger type,
         # we can skip the ones specified in the `properties_to_skip` by not running their triggers
-        if (trigger_type.value in properties[key]) and (key not in properties_to_skip):
+        if key not in properties_to_skip:
             # 'after_create_trigger' and 'after_update_trigger' don't generate property values
             # E.g., create relationships between nodes in neo4j
             # So just return the empty trigger_generated_data_dict
@@ -641,14 +860,14 @@ def generate_triggered_data(trigger_type: TriggerTypeEnum, normalized_class, req
                 # Only call the triggers if the propery key presents from the incoming data
                 # E.g., 'direct_ancestor_uuid' for Sample, 'dataset_uuids' for Collection
                 if key in new_data_dict:
-                    trigger_method_name = properties[key][trigger_type.value]
+                    trigger_method_name = entry['method_name']
 
                     try:
                         # Get the target trigger method defined in the schema_triggers.py module
-                        trigger_method_to_call = getattr(schema_triggers, trigger_method_name)
+                        trigger_method_to_call = entry['method'] or getattr(schema_triggers, trigger_method_name)
                         
                         target_uuid = existing_data_dict['uuid'] if existing_data_dict and 'uuid' in existing_data_dict else '';
-                        logger.info(f"To run {trigger_type.value}: {trigger_method_name} for {normalized_class} {target_uuid}")
+                        logger.info("To run %s: %s for %s %s", trigger_type.value, trigger_method_name, normalized_class, target_uuid)
 
                         # No return values for 'after_create_trigger' and 'after_update_trigger'
                         # because the property value is already set and stored in neo4j
@@ -667,13 +886,13 @@ def generate_triggered_data(trigger_type: TriggerTypeEnum, normalized_class, req
                 # IMPORTANT! Call the triggers for the properties:
                 # Case 1: specified in request JSON to be updated explicitly
                 # Case 2: defined as `auto_update: true` in the schema yaml, meaning will always be updated if the entity gets updated
-                if (key in new_data_dict) or (('auto_update' in properties[key]) and properties[key]['auto_update']):
-                    trigger_method_name = properties[key][trigger_type.value]
+                if (key in new_data_dict) or entry['auto_update']:
+                    trigger_method_name = entry['method_name']
                     try:
-                        trigger_method_to_call = getattr(schema_triggers, trigger_method_name)
+                        trigger_method_to_call = entry['method'] or getattr(schema_triggers, trigger_method_name)
                         
                         target_uuid = existing_data_dict['uuid'] if existing_data_dict and 'uuid' in existing_data_dict else '';
-                        logger.info(f"To run {trigger_type.value}: {trigger_method_name} for {normalized_class} {target_uuid}")
+                        logger.info("To run %s: %s for %s %s", trigger_type.value, trigger_method_name, normalized_class, target_uuid)
 
                         # Will set the trigger return value as the property value by default
                         # Unless the return value is to be assigned to another property different target key
@@ -687,7 +906,7 @@ def generate_triggered_data(trigger_type: TriggerTypeEnum, normalized_class, req
                         #the attribute from the existing_data_dict as well as make any updates to this attribute
                         #within this dictionary and return it so it can be saved in the scope of this loop and
                         #passed to other 'updated_peripherally' triggers                        
-                        if 'updated_peripherally' in properties[key] and properties[key]['updated_peripherally']: 
+                        if entry['updated_peripherally']: 
                             trigger_generated_data_dict = trigger_method_to_call(key, normalized_class, request_args, user_token, existing_data_dict, new_data_dict, trigger_generated_data_dict)
                         else:
                             target_key, target_value = trigger_method_to_call(key, normalized_class, request_args, user_token, existing_data_dict, new_data_dict)
@@ -715,13 +934,23 @@ def generate_triggered_data(trigger_type: TriggerTypeEnum, normalized_class, req
                         raise schema_errors.BeforeUpdateTriggerException
             else:
                 # Handling of all other trigger types: before_create_trigger|on_read_trigger
-                trigger_method_name = properties[key][trigger_type.value]
+                trigger_method_name = entry['method_name']
+
+                # Already generated for the whole list of entities by the bulk variant of this trigger
+                if bulk_trigger_data and (key in bulk_trigger_data):
+                    target_key, target_value = bulk_trigger_data[key]
+                    trigger_generated_data_dict[target_key] = target_value
+
+                    if key != target_key:
+                        trigger_generated_data_dict[key] = None
+
+                    continue
 
                 try:
-                    trigger_method_to_call = getattr(schema_triggers, trigger_method_name)
+                    trigger_method_to_call = entry['method'] or getattr(schema_triggers, trigger_method_name)
 
                     target_uuid = existing_data_dict['uuid'] if existing_data_dict and 'uuid' in existing_data_dict else '';
-                    logger.info(f"To run {trigger_type.value}: {trigger_method_name} for {normalized_class} {target_uuid}")
+                    logger.info("To run %s: %s for %s %s", trigger_type.value, trigger_method_name, normalized_class, target_uuid)
 
                     # Will set the trigger return value as the property value by default
                     # Unless the return value is to be assigned to another property different target key
@@ -735,11 +964,20 @@ def generate_triggered_data(trigger_type: TriggerTypeEnum, normalized_class, req
                     # the attribute from the existing_data_dict as well as make any updates to this attribute
                     # within this dictionary and return it so it can be saved in the scope of this loop and
                     # passed to other 'updated_peripherally' triggers                    
-                    if 'updated_peripherally' in properties[key] and properties[key]['updated_peripherally']:
+                    if entry['updated_peripherally']:
                         # Such trigger methods get executed but really do nothing internally
                         trigger_generated_data_dict = trigger_method_to_call(key, normalized_class, request_args, user_token, existing_data_dict, new_data_dict, trigger_generated_data_dict)
                     else:  
-                        target_key, target_value = trigger_method_to_call(key, normalized_class, request_args, user_token, existing_data_dict, new_data_dict)
+                        if key in trigger_futures:
+                            # Already running or done, re-raises the exception of the trigger method if any
+                            target_key, target_value = trigger_futures[key].result()
+                        elif entry['depends_on']:
+                            # The trigger gets the values generated by the triggers of the properties it depends on
+                            # along with the existing data, those properties are always defined before it in the yaml
+                            target_key, target_value = _call_trigger(normalized_class, entry, trigger_method_to_call, key, normalized_class, request_args, user_token, {**existing_data_dict, **trigger_generated_data_dict}, new_data_dict)
+                        else:
+                            target_key, target_value = _call_trigger(normalized_class, entry, trigger_method_to_call, key, normalized_class, request_args, user_token, existing_data_dict, new_data_dict)
+
                         trigger_generated_data_dict[target_key] = target_value
 
                         # Meanwhile, set the original property as None if target_key is different
@@ -784,7 +1022,211 @@ def generate_triggered_data(trigger_type: TriggerTypeEnum, normalized_class, req
     
     # Return after for loop
     return trigger_generated_data_dict
-    
+
+
+"""
+Generating triggered data for a list of entities of the same class, used by generate_triggered_data()
+
+The `bulk_` variant of a trigger (E.g., `bulk_on_read_trigger`) takes the whole list of entity dicts and
+resolves the property for all of them with a single query instead of one query per entity.
+The triggers without a bulk variant, or whose bulk variant fails, still run for each entity
+
+Parameters
+----------
+trigger_type : TriggerTypeEnum
+    One of the trigger types
+normalized_class : str
+    One of the types defined in the schema yaml: Activity, Collection, Donor, Sample, Dataset
+trigger_plan : tuple
+    The compiled plan of the normalized_class for the trigger_type, see compile_schema_plans()
+request_args: ImmutableMultiDict
+    The Flask request.args passed in from application request
+user_token: str
+    The user's globus nexus token
+existing_data_list : list
+    A list of dictionaries that contain existing entity data
+new_data_dict : dict
+    A dictionary that contains incoming entity data
+properties_to_skip : list
+    Any properties to skip running triggers
+
+Returns
+-------
+list
+    A list of dictionaries of trigger event methods generated data, in the same order as existing_data_list
+"""
+def _generate_triggered_data_list(trigger_type, normalized_class, trigger_plan, request_args, user_token, existing_data_list
+                                  , new_data_dict, properties_to_skip):
+    bulk_trigger_type = f"bulk_{trigger_type.value}"
+    entities_with_uuid = [existing_data_dict for existing_data_dict in existing_data_list if existing_data_dict and ('uuid' in existing_data_dict)]
+
+    # {uuid: {property_key: (target_key, target_value)}}
+    bulk_trigger_data = {existing_data_dict['uuid']: {} for existing_data_dict in entities_with_uuid}
+
+    for entry in trigger_plan:
+        key = entry['property_key']
+
+        if entry['bulk_method_name'] and (key not in properties_to_skip) and entities_with_uuid:
+            trigger_method_name = entry['bulk_method_name']
+
+            try:
+                trigger_method_to_call = entry['bulk_method'] or getattr(schema_triggers, trigger_method_name)
+
+                logger.info(f"To run {bulk_trigger_type}: {trigger_method_name} for {len(entities_with_uuid)} {normalized_class} entities")
+
+                target_key, target_values = trigger_method_to_call(key, normalized_class, request_args, user_token, entities_with_uuid)
+
+                for uuid in bulk_trigger_data:
+                    bulk_trigger_data[uuid][key] = (target_key, target_values.get(uuid))
+            except Exception:
+                # Fall back to calling the trigger of this property for each entity
+                msg = f"Failed to call the {bulk_trigger_type} method: {trigger_method_name}, running {trigger_type.value} for each entity instead"
+                # Log the full stack trace, prepend a line with our message
+                logger.exception(msg)
+
+    # Use a pool of threads to run the remaining triggers of each entity, same as get_complete_entities_list()
+    # `executor.map()` maintains the same order of results as the original list
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        helper_func = lambda existing_data_dict: generate_triggered_data(trigger_type, normalized_class, request_args, user_token
+                                                                         , existing_data_dict, new_data_dict, properties_to_skip
+                                                                         , bulk_trigger_data.get(existing_data_dict['uuid']) if existing_data_dict and ('uuid' in existing_data_dict) else None)
+
+        return list(executor.map(helper_func, existing_data_list))
+
+
+"""
+Submit the independent read triggers of one entity to the shared executor, used by generate_triggered_data()
+
+The triggers with `updated_peripherally` or `depends_on` in the yaml, and the ones already generated
+by a bulk trigger, are left to generate_triggered_data() to run in the calling thread in the yaml order
+
+Parameters
+----------
+normalized_class : str
+    One of the types defined in the schema yaml: Activity, Collection, Donor, Sample, Dataset
+trigger_plan : tuple
+    The compiled plan of the normalized_class for the trigger type, see compile_schema_plans()
+request_args: ImmutableMultiDict
+    The Flask request.args passed in from application request
+user_token: str
+    The user's globus nexus token
+existing_data_dict : dict
+    A dictionary that contains existing entity data
+new_data_dict : dict
+    A dictionary that contains incoming entity data
+properties_to_skip : list
+    Any properties to skip running triggers
+bulk_trigger_data : dict
+    The (target_key, target_value) tuples keyed by property key already generated by the bulk triggers
+
+Returns
+-------
+dict
+    The futures of the (target_key, target_value) tuples keyed by property key, empty when not worth running concurrently
+"""
+def _submit_read_triggers(normalized_class, trigger_plan, request_args, user_token, existing_data_dict
+                          , new_data_dict, properties_to_skip, bulk_trigger_data):
+    trigger_futures = {}
+
+    entries = [entry for entry in trigger_plan
+               if (entry['property_key'] not in properties_to_skip)
+               and (entry['method'] is not None)
+               and (not entry['updated_peripherally'])
+               and (not entry['depends_on'])
+               and not (bulk_trigger_data and (entry['property_key'] in bulk_trigger_data))]
+
+    # Nothing to overlap, or a trigger of another entity is generating this one on the shared executor,
+    # whose workers never wait for each other
+    if (len(entries) < 2) or threading.current_thread().name.startswith(_READ_TRIGGER_THREAD_NAME_PREFIX):
+        return trigger_futures
+
+    executor = _get_read_trigger_executor()
+
+    for entry in entries:
+        key = entry['property_key']
+        trigger_futures[key] = executor.submit(_call_trigger, normalized_class, entry, entry['method']
+                                               , key, normalized_class, request_args, user_token, existing_data_dict, new_data_dict)
+
+    return trigger_futures
+
+
+"""
+Get the bounded executor of the read triggers shared by all the threads of this worker process
+
+Returns
+-------
+concurrent.futures.ThreadPoolExecutor
+    The executor, created again in a forked worker process
+"""
+def _get_read_trigger_executor():
+    global _read_trigger_executor
+    global _read_trigger_executor_pid
+
+    with _read_trigger_executor_lock:
+        # The threads of an executor created before uWSGI forks the workers don't exist in the workers
+        if (_read_trigger_executor is None) or (_read_trigger_executor_pid != os.getpid()):
+            _read_trigger_executor = concurrent.futures.ThreadPoolExecutor(max_workers = SchemaConstants.READ_TRIGGER_MAX_WORKERS
+                                                                           , thread_name_prefix = _READ_TRIGGER_THREAD_NAME_PREFIX)
+            _read_trigger_executor_pid = os.getpid()
+
+        return _read_trigger_executor
+
+
+"""
+Call a trigger method and record how long it took, see get_trigger_timing_stats()
+
+Parameters
+----------
+normalized_class : str
+    The class the trigger method is called for
+entry : dict
+    The entry of the trigger method in the compiled plan
+trigger_method_to_call : function
+    The trigger method
+*args
+    The arguments of the trigger method
+
+Returns
+-------
+tuple
+    The return value of the trigger method
+"""
+def _call_trigger(normalized_class, entry, trigger_method_to_call, *args):
+    started_at = time.perf_counter()
+
+    try:
+        return trigger_method_to_call(*args)
+    finally:
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        timing_key = f"{normalized_class}.{entry['property_key']}:{entry['method_name']}"
+
+        with _trigger_timings_lock:
+            timing = _trigger_timings.setdefault(timing_key, {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            timing['calls'] += 1
+            timing['total_ms'] += elapsed_ms
+            timing['max_ms'] = max(timing['max_ms'], elapsed_ms)
+
+
+"""
+Get the time spent in each trigger method by this worker process
+
+Returns
+-------
+dict
+    The number of calls, total, average and max milliseconds keyed by `Class.property:trigger_method`,
+    ordered by the total time with the most expensive first
+"""
+def get_trigger_timing_stats():
+    with _trigger_timings_lock:
+        timings = {timing_key: dict(timing) for timing_key, timing in _trigger_timings.items()}
+
+    for timing in timings.values():
+        timing['avg_ms'] = round(timing['total_ms'] / timing['calls'], 3)
+        timing['total_ms'] = round(timing['total_ms'], 3)
+        timing['max_ms'] = round(timing['max_ms'], 3)
+
+    return dict(sorted(timings.items(), key = lambda item: item[1]['total_ms'], reverse = True))
+
 
 """
 Filter out the merged dict by getting rid of properties with None values
@@ -829,15 +1271,13 @@ dict
     A filtered dict that removed all transient properties and the ones with None values
 """
 def remove_transient_and_none_values(merged_dict, normalized_entity_type):
-    global _schema
-
-    properties = _schema['ENTITIES'][normalized_entity_type]['properties']
+    property_flags = get_schema_plan(normalized_entity_type)['properties']
 
     filtered_dict = {}
     for k, v in merged_dict.items():
         # Only keep the properties that don't have `transitent` flag or are marked as `transitent: false`
         # and at the same time the property value is not None
-        if (('transient' not in properties[k]) or ('transient' in properties[k] and not properties[k]['transient'])) and (v is not None):
+        if (not property_flags[k]['transient']) and (v is not None):
             filtered_dict[k] = v 
 
     return filtered_dict
@@ -878,8 +1318,8 @@ def get_complete_entity_result(request_args, token, entity_dict, properties_to_s
         # Need both client and prefix when fetching the cache
         # Do NOT fetch cache if properties_to_skip is specified
         if _memcached_client and _memcached_prefix and (not properties_to_skip):
-            cache_key = f'{_memcached_prefix}_complete_{entity_uuid}'
-            cache_result = _memcached_client.get(cache_key)
+            cache_key = get_entity_cache_key('complete', entity_uuid, entity_type)
+            cache_result = get_cached_data(cache_key)
 
         # As long as `properties_to_skip` is specified or when`?exclude` is used in query parameter
         # Do not return the cached data and store the new cache regardless of it's available or not - Zhou 10/10/2025
@@ -910,34 +1350,37 @@ def get_complete_entity_result(request_args, token, entity_dict, properties_to_s
             if cache_result is None:
                 if _memcached_client and _memcached_prefix:
                     logger.info(f'Cache of complete entity of {entity_type} {entity_uuid} not found or expired at time {datetime.now()}')
-                
-                # No error handling here since if a 'on_read_trigger' method fails, 
-                # the property value will be the error message
-                # Pass {} since no new_data_dict for 'on_read_trigger'
-                generated_on_read_trigger_data_dict = generate_triggered_data(  trigger_type=TriggerTypeEnum.ON_READ
-                                                                                , normalized_class=entity_type
-                                                                                , request_args=request_args
-                                                                                , user_token=token
-                                                                                , existing_data_dict=entity_dict
-                                                                                , new_data_dict={}
-                                                                                , properties_to_skip=properties_to_skip)
 
-                # Merge the entity info and the generated on read data into one dictionary
-                complete_entity_dict = {**entity_dict, **generated_on_read_trigger_data_dict}
+                def generate_complete_entity():
+                    # No error handling here since if a 'on_read_trigger' method fails, 
+                    # the property value will be the error message
+                    # Pass {} since no new_data_dict for 'on_read_trigger'
+                    generated_on_read_trigger_data_dict = generate_triggered_data(  trigger_type=TriggerTypeEnum.ON_READ
+                                                                                    , normalized_class=entity_type
+                                                                                    , request_args=request_args
+                                                                                    , user_token=token
+                                                                                    , existing_data_dict=entity_dict
+                                                                                    , new_data_dict={}
+                                                                                    , properties_to_skip=properties_to_skip)
 
-                # Remove properties of None value
-                complete_entity = remove_none_values(complete_entity_dict)
+                    # Merge the entity info and the generated on read data into one dictionary
+                    complete_entity_dict = {**entity_dict, **generated_on_read_trigger_data_dict}
 
-                # Need both client and prefix when creating the cache
-                # Do NOT cache when properties_to_skip is specified
-                if _memcached_client and _memcached_prefix and (not properties_to_skip):
-                    logger.info(f'Creating complete entity cache of {entity_type} {entity_uuid} at time {datetime.now()}')
+                    # Remove properties of None value
+                    complete_entity = remove_none_values(complete_entity_dict)
 
-                    cache_key = f'{_memcached_prefix}_complete_{entity_uuid}'
-                    _memcached_client.set(cache_key, complete_entity, expire = SchemaConstants.MEMCACHED_TTL)
+                    # Need both client and prefix when creating the cache
+                    # Do NOT cache when properties_to_skip is specified
+                    if _memcached_client and _memcached_prefix and (not properties_to_skip):
+                        _set_complete_entities_cache([(entity_dict, complete_entity)])
 
-                    logger.debug(f"Following is the complete {entity_type} cache created at time {datetime.now()} using key {cache_key}:")
-                    logger.debug(complete_entity)
+                    return complete_entity
+
+                # Only one thread/worker regenerates the same expired cache, the others wait for its result
+                if _memcached_client and _memcached_prefix:
+                    complete_entity = single_flight(get_entity_cache_key('complete', entity_uuid, entity_type), generate_complete_entity)
+                else:
+                    complete_entity = generate_complete_entity()
             else:
                 logger.info(f'Using complete entity cache of {entity_type} {entity_uuid} at time {datetime.now()}')
                 logger.debug(cache_result)
@@ -950,6 +1393,101 @@ def get_complete_entity_result(request_args, token, entity_dict, properties_to_s
     # One final return
     return complete_entity
 
+
+"""
+Cache the complete entities generated by get_complete_entity_result() or get_complete_entities_list(),
+each document is only cached once its entity is recorded as a dependent of all the entities
+embedded in it, so a write to any of them purges the document too
+
+Parameters
+----------
+documents : list
+    The (entity_dict, complete_entity) tuples of the entity dict based on neo4j record and
+    the complete entity with all the generated 'on_read_trigger' data
+"""
+def _set_complete_entities_cache(documents):
+    recorded_uuids = _record_cache_dependencies(documents)
+
+    data_dict = {}
+    for entity_dict, complete_entity in documents:
+        if entity_dict['uuid'] in recorded_uuids:
+            logger.info(f"Creating complete entity cache of {entity_dict['entity_type']} {entity_dict['uuid']} at time {datetime.now()}")
+
+            data_dict[get_entity_cache_key('complete', entity_dict['uuid'], entity_dict['entity_type'])] = complete_entity
+
+    set_many_cached_data(data_dict, expire = SchemaConstants.MEMCACHED_TTL)
+
+
+"""
+Get the cached provenance document of the given entity
+
+Parameters
+----------
+entity_dict : dict
+    The entity dict based on neo4j record
+depth : int
+    The maximum number of hops of the provenance traversal, None for the full tree
+
+Returns
+-------
+str
+    The PROV-JSON string, None if not cached
+"""
+def get_provenance_cache(entity_dict, depth):
+    if not (_memcached_client and _memcached_prefix):
+        return None
+
+    cache_key = get_entity_cache_key(_get_provenance_cache_type(depth), entity_dict['uuid'], entity_dict['entity_type'])
+    provenance_json = get_cached_data(cache_key)
+
+    if isinstance(provenance_json, str):
+        return provenance_json
+
+    return None
+
+
+"""
+Cache the provenance document of the given entity, each depth under its own key
+
+The document is recorded as a dependent of the entities in the graph, including the given entity
+itself, before it gets cached. The Activity nodes are left out since they are never updated and
+a change of the graph always writes one of its entities
+
+Parameters
+----------
+entity_dict : dict
+    The entity dict based on neo4j record
+depth : int
+    The maximum number of hops of the provenance traversal, None for the full tree
+provenance_json : str
+    The PROV-JSON string
+dependency_uuids : set
+    The uuids of all the Entity nodes in the provenance graph
+"""
+def set_provenance_cache(entity_dict, depth, provenance_json, dependency_uuids):
+    if not (_memcached_client and _memcached_prefix):
+        return
+
+    cache_type = _get_provenance_cache_type(depth)
+    dependent = _get_cache_dependent(entity_dict, cache_type)
+
+    # So a write to any entity in the graph purges the document
+    if dependent not in _append_cache_dependents([(dependent, set(dependency_uuids) | {entity_dict['uuid']})]):
+        return
+
+    cache_key = get_entity_cache_key(cache_type, entity_dict['uuid'], entity_dict['entity_type'])
+    set_cached_data(cache_key, provenance_json, expire = SchemaConstants.MEMCACHED_TTL)
+
+    logger.info(f"Created the provenance cache of {entity_dict['entity_type']} {entity_dict['uuid']} with depth {depth}")
+
+
+def _get_provenance_cache_type(depth):
+    if depth is None:
+        return 'provenance'
+
+    return f'provenance_{depth}'
+
+
 """
 Generate the entity metadata by reading Neo4j data and only running triggers for data which will go into an
 OpenSearch document. Any data from Neo4j which will not go into the OSS document must also be removed e.g.
@@ -1000,17 +1538,60 @@ list
     A list a complete entity dictionaries with all the normalized information
 """
 def get_complete_entities_list(request_args, token, entities_list, properties_to_skip = []):
-    complete_entities_list = []
-    
-    # Use a pool of threads to execute the time-consuming iteration asynchronously to avoid timeout - Zhou 2/6/2025
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        helper_func = lambda args: get_complete_entity_result(args[0], args[1], args[2], args[3])
-        args_list = [(request_args, token, entity_dict, properties_to_skip) for entity_dict in entities_list]
+    global _memcached_client
+    global _memcached_prefix
+
+    complete_entities_list = list(entities_list)
+
+    # Same as get_complete_entity_result(), the cache is neither used nor created
+    # when `properties_to_skip` is specified or `?exclude` is used in query parameter
+    use_cache = _memcached_client and _memcached_prefix and (not properties_to_skip) and (not get_excluded_query_props(request_args))
+
+    # Positions of the entities whose triggered data need to be generated, grouped by entity type
+    # so each bulk trigger resolves its property with one query for all the entities of the same type
+    indexes_by_entity_type = {}
+
+    for index, entity_dict in enumerate(entities_list):
+        # Keep the original entity_dict of an incorrectly created entity as get_complete_entity_result() does
+        if not (entity_dict and ('entity_type' in entity_dict) and ('uuid' in entity_dict)):
+            continue
+
+        if use_cache:
+            cache_result = get_cached_data(get_entity_cache_key('complete', entity_dict['uuid'], entity_dict['entity_type']))
+
+            if cache_result is not None:
+                complete_entities_list[index] = cache_result
+                continue
 
-        # The order of donors/organs/samples lists are not gurenteed with using `executor.submit()`
-        # `executor.map()` maintains the same order of results as the original submitted tasks
-        for result in executor.map(helper_func, args_list):
-            complete_entities_list.append(result)
+        indexes_by_entity_type.setdefault(entity_dict['entity_type'], []).append(index)
+
+    for entity_type, indexes in indexes_by_entity_type.items():
+        logger.info(f'Generating the {TriggerTypeEnum.ON_READ} data of {len(indexes)} {entity_type} entities')
+
+        # No error handling here since if a 'on_read_trigger' method fails, 
+        # the property value will be the error message
+        # Pass {} since no new_data_dict for 'on_read_trigger'
+        generated_on_read_trigger_data_list = generate_triggered_data(  trigger_type=TriggerTypeEnum.ON_READ
+                                                                        , normalized_class=entity_type
+                                                                        , request_args=request_args
+                                                                        , user_token=token
+                                                                        , existing_data_dict=[entities_list[index] for index in indexes]
+                                                                        , new_data_dict={}
+                                                                        , properties_to_skip=properties_to_skip)
+
+        for index, generated_on_read_trigger_data_dict in zip(indexes, generated_on_read_trigger_data_list):
+            entity_dict = entities_list[index]
+
+            # Merge the entity info and the generated on read data into one dictionary
+            # and remove properties of None value
+            complete_entity = remove_none_values({**entity_dict, **generated_on_read_trigger_data_dict})
+
+            complete_entities_list[index] = complete_entity
+
+    # The dependencies of all the generated entities are recorded and cached in batches
+    if use_cache:
+        _set_complete_entities_cache([(entities_list[index], complete_entities_list[index])
+                                      for indexes in indexes_by_entity_type.values() for index in indexes])
 
     return complete_entities_list
 
@@ -1092,7 +1673,7 @@ def normalize_entity_result_for_response(entity_dict, properties_to_exclude = []
                         # Only convert to Python list/dict when the string literal is not empty
                         # instead of returning the json-as-string or array-as-string
                         # convert_str_literal() also removes those control chars to avoid SyntaxError
-                        entity_dict[key] = convert_str_literal(entity_dict[key])
+                        entity_dict[key] = convert_entity_str_literal(entity_dict, key)
                     
                     # Add the target key with correct value of data type to the normalized_entity dict
                     normalized_entity[key] = entity_dict[key]
@@ -1583,26 +2164,251 @@ def validate_source_entity_type_for_derivation(normalized_source_entity_type):
 ####################################################################################################
 
 """
-Get user infomation dict based on the http request(headers)
-The result will be used by the trigger methods
+Get the auth context of the current request, which lives on flask.g and is
+discarded along with the application context when the request finishes
+
+Returns
+-------
+dict
+    The request-scoped auth context, None when called outside of a request
+    (e.g., from a background thread)
+"""
+def get_request_auth_context():
+    if not has_request_context():
+        return None
+
+    if 'auth_context' not in g:
+        g.auth_context = {}
+
+    return g.auth_context
+
+
+"""
+Resolve an auth related value (token, user info, group membership...) at most once per request
+
+Exceptions raised by the resolver are not memoized. A flask.Response returned by the
+AuthHelper methods (401/500 error responses) is memoized like any other value so that
+every caller within the same request sees the same outcome
 
 Parameters
 ----------
-request : Flask request object
-    The Flask request passed from the API endpoint 
+key : str
+    The name of the value within the request-scoped auth context
+resolver : function
+    The function to call when the value has not been resolved yet in this request
+args : tuple
+    The positional arguments passed to the resolver, also part of the memoization key
 
 Returns
 -------
-dict
-    A dict containing all the user info
+object
+    The resolved value
+"""
+def get_request_auth_value(key, resolver, *args):
+    auth_context = get_request_auth_context()
 
-    {
-        "scope": "urn:globus:auth:scope:nexus.api.globus.org:groups",
-        "name": "First Last",
-        "iss": "https://auth.globus.org",
-        "client_id": "21f293b0-5fa5-4ee1-9e0e-3cf88bd70114",
-        "active": True,
-        "nbf": 1603761442,
+    # Outside of a request context there is nothing to share the result with
+    if auth_context is None:
+        return resolver(*args)
+
+    # The flask request object is the same for the whole request and
+    # the token identifies the user, only use hashable arguments in the key
+    context_key = (key,) + tuple(arg for arg in args if isinstance(arg, (str, bool, int)))
+
+    if context_key not in auth_context:
+        auth_context[context_key] = resolver(*args)
+
+    return auth_context[context_key]
+
+
+"""
+Get the token introspection result (user info) via the cache shared by all the workers
+
+The result is looked up in the in-process LRU first, then in Memcached (when enabled), and
+only introspected against Globus via AuthHelper.getUserInfo() on a miss. Entries are keyed by
+the SHA-256 of the token so the raw token never gets stored, and they expire at the token's 'exp'.
+Error responses (invalid or expired tokens, Globus errors) are never cached
+
+Parameters
+----------
+token : str
+    The user token
+group_required : bool
+    When True, 'hmgroupids' is in the output
+
+Returns
+-------
+dict or flask.Response
+    The user info dict, or the flask.Response returned by AuthHelper.getUserInfo() on error
+"""
+def get_token_info(token, group_required = False):
+    global _auth_helper
+    global _memcached_client
+    global _memcached_prefix
+
+    # Parsed MAuthorization tokens come as a dict, not worth caching
+    if not isinstance(token, str):
+        return _auth_helper.getUserInfo(token, group_required)
+
+    token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    lru_key = (token_hash, group_required)
+    now = int(time.time())
+
+    with _token_info_cache_lock:
+        user_info = _token_info_cache.get(lru_key)
+
+        if user_info is not None:
+            if user_info['exp'] > now:
+                _token_info_cache.move_to_end(lru_key)
+                _token_info_cache_stats['hits'] += 1
+                return copy.deepcopy(user_info)
+
+            # Expired
+            del _token_info_cache[lru_key]
+
+    cache_key = None
+    if _memcached_client and _memcached_prefix:
+        cache_key = f'{_memcached_prefix}_token_info_{int(group_required)}_{token_hash}'
+        user_info = _memcached_client.get(cache_key)
+
+        if isinstance(user_info, dict) and user_info.get('exp', 0) > now:
+            logger.debug(f'Using the cached token introspection result of key: {cache_key}')
+
+            _cache_token_info(lru_key, user_info, 'memcached_hits')
+            return copy.deepcopy(user_info)
+
+    user_info = _auth_helper.getUserInfo(token, group_required)
+
+    with _token_info_cache_lock:
+        _token_info_cache_stats['misses'] += 1
+
+    # The process user info doesn't have 'exp', it's already cached by the commons AuthCache
+    if isinstance(user_info, dict) and isinstance(user_info.get('exp'), int) and user_info['exp'] > now:
+        _cache_token_info(lru_key, user_info)
+
+        if cache_key:
+            logger.info(f'Caching the token introspection result of key: {cache_key}')
+
+            _memcached_client.set(cache_key, user_info, expire = user_info['exp'] - now)
+
+    return user_info
+
+
+"""
+Add the user info to the in-process token introspection LRU, evicting the least recently used entries
+
+Parameters
+----------
+lru_key : tuple
+    The (token hash, group_required) key
+user_info : dict
+    The user info dict with 'exp'
+stat_key : str
+    The hit/miss counter to increase, optional
+"""
+def _cache_token_info(lru_key, user_info, stat_key = None):
+    with _token_info_cache_lock:
+        _token_info_cache[lru_key] = copy.deepcopy(user_info)
+        _token_info_cache.move_to_end(lru_key)
+
+        while len(_token_info_cache) > SchemaConstants.TOKEN_INFO_CACHE_MAXSIZE:
+            _token_info_cache.popitem(last = False)
+
+        if stat_key:
+            _token_info_cache_stats[stat_key] += 1
+
+
+"""
+Get the hit/miss counters of the token introspection cache of this worker process
+
+Returns
+-------
+dict
+    The counters and current in-process cache size
+"""
+def get_token_info_cache_stats():
+    with _token_info_cache_lock:
+        stats = dict(_token_info_cache_stats)
+        stats['size'] = len(_token_info_cache)
+
+    return stats
+
+
+"""
+Get the token from the Authorization header of the current request, parsed once per request
+
+Parameters
+----------
+request : Flask request object
+    The Flask request passed from the API endpoint
+
+Returns
+-------
+str or flask.Response
+    The token string, or a 401 flask.Response when the header is invalid
+    (that's how commons.auth_helper.getAuthorizationTokens() was designed)
+"""
+def get_request_user_token(request):
+    global _auth_helper
+
+    return get_request_auth_value('user_token', lambda req: _auth_helper.getAuthorizationTokens(req.headers), request)
+
+
+"""
+Check if the user of the current request belongs to the given Globus group
+The membership is resolved at most once per request for each group
+
+Parameters
+----------
+request : Flask request object
+    The Flask request passed from the API endpoint
+group_name : str
+    The Globus group name, e.g., 'HuBMAP-READ', 'HuBMAP-Data-Admin'
+
+Returns
+-------
+bool
+    True if the user belongs to the group, otherwise False
+
+Raises
+------
+Exception
+    When the user info can't be resolved from the token, see get_user_info()
+"""
+def user_in_group(request, group_name):
+    global _auth_helper
+
+    def resolve_membership(req, name):
+        # The property 'hmgroupids' is ALWAYS in the output with using get_user_info()
+        user_info = get_user_info(req)
+        group_uuid = _auth_helper.groupNameToId(name)['uuid']
+
+        return group_uuid in user_info['hmgroupids']
+
+    return get_request_auth_value('user_in_group', resolve_membership, request, group_name)
+
+
+"""
+Get user infomation dict based on the http request(headers)
+The result will be used by the trigger methods
+
+Parameters
+----------
+request : Flask request object
+    The Flask request passed from the API endpoint 
+
+Returns
+-------
+dict
+    A dict containing all the user info
+
+    {
+        "scope": "urn:globus:auth:scope:nexus.api.globus.org:groups",
+        "name": "First Last",
+        "iss": "https://auth.globus.org",
+        "client_id": "21f293b0-5fa5-4ee1-9e0e-3cf88bd70114",
+        "active": True,
+        "nbf": 1603761442,
         "token_type": "Bearer",
         "aud": ["nexus.api.globus.org", "21f293b0-5fa5-4ee1-9e0e-3cf88bd70114"],
         "iat": 1603761442,
@@ -1616,25 +2422,28 @@ dict
 """
 def get_user_info(request):
     global _auth_helper
+
+    # The bulk_update.InternalRequest of a background job carries the user info of the submitter,
+    # its token may be the internal token of a resumed job which must not be used for the permissions
+    internal_user_info = getattr(request, 'user_info', None)
+    if isinstance(internal_user_info, dict):
+        return internal_user_info
  
-    # `group_required` is a boolean, when True, 'hmgroupids' is in the output
-    user_info = _auth_helper.getUserInfoUsingRequest(request, True)
+    def resolve_user_info(req):
+        # Same as AuthHelper.getUserInfoUsingRequest() but goes through the token introspection cache
+        token = _auth_helper.getUserTokenFromRequest(req, True)
 
-    logger.info("======get_user_info()======")
-    logger.debug(user_info)
+        if isinstance(token, Response):
+            return token
 
-    # For debugging purposes
-    try:
-        auth_helper_instance = get_auth_helper_instance()
-        token = auth_helper_instance.getAuthorizationTokens(request.headers)
-        groups_list = auth_helper_instance.get_user_groups_deprecated(token)
+        # `group_required` is True so that 'hmgroupids' is in the output
+        return get_token_info(token, True)
 
-        logger.info("======Groups using get_user_groups_deprecated()======")
-        logger.debug(groups_list)
-    except Exception:
-        msg = "For debugging purposes, failed to parse the Authorization token by calling commons.auth_helper.getAuthorizationTokens()"
-        # Log the full stack trace, prepend a line with our message
-        logger.exception(msg)
+    # Resolved at most once per request, the 'hmgroupids' already covers the group membership
+    user_info = get_request_auth_value('user_info', resolve_user_info, request)
+
+    logger.info("======get_user_info()======")
+    logger.debug(user_info)
 
     # It returns error response when:
     # - invalid header or token
@@ -1708,6 +2517,191 @@ def get_hubmap_ids(id):
         raise requests.exceptions.RequestException(response.text)
 
 
+"""
+Resolve the given HuBMAP ID or UUID to the uuid of the entity
+
+The id is looked up in the in-process map, then Memcached, then Neo4j. Only ids unknown to
+Neo4j (e.g., submission ids) go to uuid-api via get_hubmap_ids()
+
+Parameters
+----------
+id : str
+    Either the uuid or hubmap_id of target entity
+
+Returns
+-------
+str
+    The uuid of the target entity
+
+Raises
+------
+requests.exceptions.RequestException
+    Raised by get_hubmap_ids() when uuid-api can't resolve the id
+"""
+def resolve_uuid(id):
+    resolved_dict = _resolve_uuids_without_uuid_api([id])
+
+    if id in resolved_dict:
+        return resolved_dict[id]
+
+    uuid = get_hubmap_ids(id.strip())['hm_uuid']
+    _cache_resolved_uuids({_normalize_id(id): uuid})
+
+    return uuid
+
+
+"""
+Resolve a list of HuBMAP IDs or UUIDs to the uuids of the entities in bulk
+
+All the ids are looked up in the in-process map first, then with one Memcached get_many()
+and one Neo4j query for the rest. Only ids unknown to Neo4j (e.g., submission ids) go to
+uuid-api one by one, unless use_uuid_api is False
+
+Parameters
+----------
+id_list : list
+    The uuids or hubmap_ids of target entities
+use_uuid_api : bool
+    Fall back to uuid-api for the ids unknown to Neo4j or not, default to True
+
+Returns
+-------
+dict
+    The resolved uuids keyed by the given ids, the ids that can't be resolved are not present
+"""
+def resolve_uuids(id_list, use_uuid_api = True):
+    resolved_dict = _resolve_uuids_without_uuid_api(id_list)
+
+    if not use_uuid_api:
+        return resolved_dict
+
+    for id in _valid_ids(id_list):
+        if id not in resolved_dict:
+            try:
+                resolved_dict[id] = get_hubmap_ids(id.strip())['hm_uuid']
+                _cache_resolved_uuids({_normalize_id(id): resolved_dict[id]})
+            except requests.exceptions.RequestException:
+                logger.info(f"Unable to resolve the id: {id} via uuid-api")
+
+    return resolved_dict
+
+
+"""
+Normalize the given id to the form used by Neo4j, uuids are lower case and HuBMAP IDs are upper case
+
+Parameters
+----------
+id : str
+    Either the uuid or hubmap_id of target entity
+
+Returns
+-------
+str
+    The normalized id, None if the id is not a non-empty string
+"""
+def _normalize_id(id):
+    if not isinstance(id, str) or not id.strip():
+        return None
+
+    id = id.strip()
+
+    return id.lower() if len(id) == 32 else id.upper()
+
+
+"""
+Get the distinct ids that can be resolved, the ids of a request body may be of any json type
+
+Parameters
+----------
+id_list : list
+    The uuids or hubmap_ids of target entities
+
+Returns
+-------
+set
+    The given ids that are non-empty strings
+"""
+def _valid_ids(id_list):
+    return {id for id in id_list if _normalize_id(id) is not None}
+
+
+"""
+Resolve the given ids with the in-process map, Memcached and Neo4j, without calling uuid-api
+
+Parameters
+----------
+id_list : list
+    The uuids or hubmap_ids of target entities
+
+Returns
+-------
+dict
+    The resolved uuids keyed by the given ids, the ids that can't be resolved (including the ones
+    that are not non-empty strings) are not present
+"""
+def _resolve_uuids_without_uuid_api(id_list):
+    global _memcached_client
+    global _memcached_prefix
+    global _neo4j_driver
+
+    normalized_ids_dict = {id: _normalize_id(id) for id in _valid_ids(id_list)}
+    found_dict = {}
+
+    with _resolved_uuids_lock:
+        for normalized_id in set(normalized_ids_dict.values()):
+            if normalized_id in _resolved_uuids:
+                _resolved_uuids.move_to_end(normalized_id)
+                found_dict[normalized_id] = _resolved_uuids[normalized_id]
+
+    missing_ids = set(normalized_ids_dict.values()) - set(found_dict.keys())
+
+    if missing_ids and _memcached_client and _memcached_prefix:
+        cache_keys_dict = {f'{_memcached_prefix}_resolved_uuid_{normalized_id}': normalized_id for normalized_id in missing_ids}
+        cache_result = _memcached_client.get_many(list(cache_keys_dict.keys()))
+
+        memcached_found_dict = {cache_keys_dict[cache_key]: uuid for cache_key, uuid in cache_result.items()}
+        _cache_resolved_uuids(memcached_found_dict, to_memcached = False)
+
+        found_dict.update(memcached_found_dict)
+        missing_ids = missing_ids - set(memcached_found_dict.keys())
+
+    if missing_ids:
+        neo4j_found_dict = schema_neo4j_queries.get_uuids_by_ids(_neo4j_driver, missing_ids)
+        _cache_resolved_uuids(neo4j_found_dict)
+
+        found_dict.update(neo4j_found_dict)
+
+    return {id: found_dict[normalized_id] for id, normalized_id in normalized_ids_dict.items() if normalized_id in found_dict}
+
+
+"""
+Add the resolved id -> uuid mappings to the in-process map and Memcached
+
+Parameters
+----------
+resolved_dict : dict
+    The uuids keyed by normalized ids
+to_memcached : bool
+    Also add the mappings to Memcached, default to True
+"""
+def _cache_resolved_uuids(resolved_dict, to_memcached = True):
+    global _memcached_client
+    global _memcached_prefix
+
+    if not resolved_dict:
+        return
+
+    with _resolved_uuids_lock:
+        _resolved_uuids.update(resolved_dict)
+
+        while len(_resolved_uuids) > SchemaConstants.ID_RESOLVER_CACHE_MAXSIZE:
+            _resolved_uuids.popitem(last = False)
+
+    if to_memcached and _memcached_client and _memcached_prefix:
+        cache_dict = {f'{_memcached_prefix}_resolved_uuid_{normalized_id}': uuid for normalized_id, uuid in resolved_dict.items()}
+        _memcached_client.set_many(cache_dict, expire = SchemaConstants.MEMCACHED_TTL)
+
+
 """
 Helper function to use the Ontology API to retrieve a valueset from UBKG containing
 allowed values for soft assays, which can be set on the beginning of (part before
@@ -1920,7 +2914,7 @@ def create_hubmap_ids(normalized_class, json_data_dict, user_token, user_info_di
 
     # Disable ssl certificate verification
     target_url = _uuid_api_url + SchemaConstants.UUID_API_ID_ENDPOINT
-    response = requests.post(url = target_url, headers = request_headers, json = json_to_post, verify = False, params = query_parms)
+    response = schema_http_client.post(target_url, headers = request_headers, json = json_to_post, verify = False, params = query_parms)
     
     # Invoke .raise_for_status(), an HTTPError will be raised with certain status codes
     response.raise_for_status()
@@ -2104,14 +3098,36 @@ user_token: str
     The user's globus nexus token
 user_info_dict : dict
     A dictionary that contains all user info to be used to generate the related properties
-count : int
-    The number of Activities to be generated
 
 Returns
 -------
 dict: A dict of gnerated Activity data
 """
 def generate_activity_data(normalized_entity_type, request_args, user_token, user_info_dict):
+    return generate_activities_data(normalized_entity_type, request_args, user_token, user_info_dict, 1)[0]
+
+
+"""
+Generate properties data of multiple Activity nodes, the ids are created with one uuid-api call
+
+Parameters
+----------
+normalized_entity_type : str
+    One of the entity types defined in the schema yaml: Donor, Sample, Dataset
+request_args: ImmutableMultiDict
+    The Flask request.args passed in from application request
+user_token: str
+    The user's globus nexus token
+user_info_dict : dict
+    A dictionary that contains all user info to be used to generate the related properties
+count : int
+    The number of Activities to be generated
+
+Returns
+-------
+list: The dicts of generated Activity data
+"""
+def generate_activities_data(normalized_entity_type, request_args, user_token, user_info_dict, count):
     # Activity is not an Entity
     normalized_activity_type = 'Activity'
 
@@ -2119,20 +3135,24 @@ def generate_activity_data(normalized_entity_type, request_args, user_token, use
     # Will be used when calling `set_activity_creation_action()` trigger method
     normalized_entity_type_dict = {'normalized_entity_type': normalized_entity_type}
 
-    # Create new ids for the Activity node
-    # This resulting list has only one dict
-    new_ids_dict_list = create_hubmap_ids(normalized_activity_type, json_data_dict = None, user_token = user_token, user_info_dict = None)
-    data_dict_for_activity = {**user_info_dict, **normalized_entity_type_dict, **new_ids_dict_list[0]}
+    # Create new ids for the Activity nodes
+    new_ids_dict_list = create_hubmap_ids(normalized_activity_type, json_data_dict = None, user_token = user_token, user_info_dict = None, count = count)
+
+    generated_activity_data_dicts = []
+    for new_ids_dict in new_ids_dict_list:
+        data_dict_for_activity = {**user_info_dict, **normalized_entity_type_dict, **new_ids_dict}
 
-    # Generate property values for Activity node
-    generated_activity_data_dict = generate_triggered_data( trigger_type=TriggerTypeEnum.BEFORE_CREATE
-                                                            , normalized_class=normalized_activity_type
-                                                            , request_args=request_args
-                                                            , user_token=user_token
-                                                            , existing_data_dict={}
-                                                            , new_data_dict=data_dict_for_activity)
+        # Generate property values for Activity node
+        generated_activity_data_dict = generate_triggered_data( trigger_type=TriggerTypeEnum.BEFORE_CREATE
+                                                                , normalized_class=normalized_activity_type
+                                                                , request_args=request_args
+                                                                , user_token=user_token
+                                                                , existing_data_dict={}
+                                                                , new_data_dict=data_dict_for_activity)
 
-    return generated_activity_data_dict
+        generated_activity_data_dicts.append(generated_activity_data_dict)
+
+    return generated_activity_data_dicts
 
 
 """
@@ -2179,6 +3199,44 @@ def get_auth_helper_instance():
     return _auth_helper
 
 
+"""
+Set the dispatcher queueing the search-api reindex calls of the entities updated by trigger methods
+
+Parameters
+----------
+reindex_dispatcher : reindex_dispatcher.ReindexDispatcher
+    The dispatcher of the application
+"""
+def set_reindex_dispatcher(reindex_dispatcher):
+    global _reindex_dispatcher
+
+    _reindex_dispatcher = reindex_dispatcher
+
+
+"""
+Queue the reindex of the entities updated by a trigger method, in addition to the target entity
+which the application reindexes itself
+
+Parameters
+----------
+uuids : list
+    The uuids of the entities to be reindexed
+user_token : str
+    The user's globus groups token
+priority_level : int
+    Value from the enumeration ReindexPriorityLevelEnum
+"""
+def reindex_entities(uuids, user_token, priority_level = ReindexPriorityLevelEnum.HIGH.value):
+    global _reindex_dispatcher
+
+    if _reindex_dispatcher is None:
+        logger.error(f"No reindex dispatcher set, unable to reindex the uuids: {', '.join(uuids)}")
+        return
+
+    for uuid in uuids:
+        _reindex_dispatcher.enqueue(uuid, user_token, priority_level)
+
+
 """
 Get the neo4j.Driver instance to be used by trigger methods
 
@@ -2228,12 +3286,15 @@ with removing any non-printable control characters if presents.
 Note: string representation of Python string can still contain control characters and should not be used by this method
 But if a string representation of Python string is used as input by mistake, control characters gets removed as a result. 
 
+The string is parsed with json.loads() first, which is much faster than ast.literal_eval() and succeeds for the
+properties rewritten by migrate_str_literals.py as well as the literals that happen to be valid JSON
+
 Parameters
 ----------
 data_str: str
     The string representation of the Python list/dict stored in Neo4j.
-    It's not stored in Neo4j as a json string! And we can't store it as a json string 
-    due to the way that Cypher handles single/double quotes.
+    It's not stored in Neo4j as a json string unless rewritten by migrate_str_literals.py,
+    the entity writes still store the Python string representation.
 
 Returns
 -------
@@ -2244,7 +3305,18 @@ def convert_str_literal(data_str):
     if isinstance(data_str, str):
         # First remove those non-printable control characters that will cause SyntaxError
         # Use unicodedata.category(), we can check each character starting with "C" is the control character
-        data_str = "".join(char for char in data_str if unicodedata.category(char)[0] != "C")
+        # Only scan the characters when there can be any, str.isprintable() is False for all of them
+        if not data_str.isprintable():
+            data_str = "".join(char for char in data_str if unicodedata.category(char)[0] != "C")
+
+        # JSON fast path, fall back to ast.literal_eval() for the Python literals, E.g., with single quotes or True/False/None
+        try:
+            data = json.loads(data_str)
+
+            if isinstance(data, (list, dict)):
+                return data
+        except ValueError:
+            pass
 
         # ast uses compile to compile the source string (which must be an expression) into an AST
         # If the source string is not a valid expression (like an empty string), a SyntaxError will be raised by compile
@@ -2267,13 +3339,107 @@ def convert_str_literal(data_str):
         return data_str
 
 
+"""
+Convert the string representation of a Python list/dict property of an entity with convert_str_literal(),
+the parsed values are memoized in this worker process
+
+The memo is keyed by the uuid, property key and last_modified_timestamp of the entity and only used when
+the string is still the same, each caller gets its own copy of the value
+
+Parameters
+----------
+entity_dict : dict
+    The entity dict based on neo4j record
+property_key : str
+    The key of the list/json_string property in entity_dict
+
+Returns
+-------
+list or dict or str
+    The desired Python list or dict object after evaluation or the original string input
+"""
+def convert_entity_str_literal(entity_dict, property_key):
+    global _parsed_literals_bytes
+
+    data_str = entity_dict[property_key]
+
+    if (not isinstance(data_str, str)) or ('uuid' not in entity_dict):
+        return convert_str_literal(data_str)
+
+    memo_key = (entity_dict['uuid'], property_key, entity_dict.get('last_modified_timestamp'))
+    pickled_data = None
+
+    with _parsed_literals_lock:
+        memo_entry = _parsed_literals.get(memo_key)
+
+        if (memo_entry is not None) and (memo_entry[0] == data_str):
+            _parsed_literals.move_to_end(memo_key)
+            _parsed_literals_stats['hits'] += 1
+            pickled_data = memo_entry[1]
+        else:
+            _parsed_literals_stats['misses'] += 1
+
+    if pickled_data is not None:
+        return pickle.loads(pickled_data)
+
+    data = convert_str_literal(data_str)
+
+    # Nothing to gain from memoizing the invalid literals
+    if isinstance(data, (list, dict)):
+        pickled_data = pickle.dumps(data, protocol = pickle.HIGHEST_PROTOCOL)
+        entry_bytes = len(data_str) + len(pickled_data)
+
+        # Not worth evicting everything else for a single huge value
+        if entry_bytes <= SchemaConstants.PARSED_LITERAL_CACHE_MAX_BYTES // 10:
+            with _parsed_literals_lock:
+                previous_entry = _parsed_literals.pop(memo_key, None)
+                if previous_entry is not None:
+                    _parsed_literals_bytes -= len(previous_entry[0]) + len(previous_entry[1])
+
+                _parsed_literals[memo_key] = (data_str, pickled_data)
+                _parsed_literals_bytes += entry_bytes
+
+                # Evict the least recently used values
+                while _parsed_literals_bytes > SchemaConstants.PARSED_LITERAL_CACHE_MAX_BYTES:
+                    _, evicted_entry = _parsed_literals.popitem(last = False)
+                    _parsed_literals_bytes -= len(evicted_entry[0]) + len(evicted_entry[1])
+                    _parsed_literals_stats['evictions'] += 1
+
+    return data
+
+
+"""
+Get the counters of the parsed property values memoized by convert_entity_str_literal() in this worker process
+
+Returns
+-------
+dict
+    The counters, current number of entries and size in bytes
+"""
+def get_parsed_literal_cache_stats():
+    with _parsed_literals_lock:
+        stats = dict(_parsed_literals_stats)
+        stats['size'] = len(_parsed_literals)
+        stats['bytes'] = _parsed_literals_bytes
+
+    return stats
+
+
 """
 Get the response to an HTTP request of the target URL
 
+Responses are cached in Memcached as compact entries of the status code, body bytes and a few
+headers. An entry is used as is for SchemaConstants.MEMCACHED_TTL seconds. When the upstream
+service provided an ETag or Last-Modified, the entry is kept around for another TTL period
+after that and gets revalidated with a conditional request, a 304 refreshes it without
+transferring the body again. 5xx responses are never cached
+
 Parameters
 ----------
 target_url: str
     The target HTTP request URL
+internal_token_used: bool
+    Send the internal token in the Authorization header or not, default to False
 
 Returns
 -------
@@ -2284,43 +3450,74 @@ def make_request_get(target_url, internal_token_used = False):
     global _memcached_client
     global _memcached_prefix
 
-    response = None
+    cache_key = None
+    cache_entry = None
+    now = time.time()
 
     if _memcached_client and _memcached_prefix:
-        cache_key = f'{_memcached_prefix}{target_url}'
-        response = _memcached_client.get(cache_key)
-
-    # Use the cached data if found and still valid
-    # Otherwise, make a fresh query and add to cache
-    if response is None:
-        if _memcached_client and _memcached_prefix:
-            logger.info(f'HTTP response cache not found or expired. Making a new HTTP request of GET {target_url} at time {datetime.now()}')
-        
-        if internal_token_used:
-            # Use modified version of globus app secret from configuration as the internal token
-            auth_helper_instance = get_auth_helper_instance()
-            request_headers = {
-                'Authorization': f'Bearer {auth_helper_instance.getProcessSecret()}'
-            }
+        # Hash the URL to stay within the Memcached key length limit
+        cache_key = f'{get_cache_namespace()}_http_{hashlib.sha256(target_url.encode("utf-8")).hexdigest()}'
+        cache_entry = get_cached_data(cache_key)
 
-            # Disable ssl certificate verification
-            response = requests.get(url = target_url, headers = request_headers, verify = False)
-        else:
-            response = requests.get(url = target_url, verify = False)
+        # Skip anything that isn't a compact entry
+        if not isinstance(cache_entry, dict):
+            cache_entry = None
 
-        if _memcached_client and _memcached_prefix:
+    # Use the cached data if found and still fresh
+    if cache_entry and cache_entry['fresh_until'] > now:
+        logger.info(f'Using HTTP response cache of GET {target_url} at time {datetime.now()}')
+
+        schema_http_client.record_cache_outcome(target_url, 'cache_hits')
+        return schema_http_client.from_cache_entry(target_url, cache_entry)
+
+    request_headers = {}
+
+    if internal_token_used:
+        # Use modified version of globus app secret from configuration as the internal token
+        auth_helper_instance = get_auth_helper_instance()
+        request_headers['Authorization'] = f'Bearer {auth_helper_instance.getProcessSecret()}'
+
+    # Revalidate the stale entry instead of getting the full response again
+    if cache_entry:
+        request_headers.update(schema_http_client.get_revalidation_headers(cache_entry))
+
+    if cache_key:
+        logger.info(f'HTTP response cache not found or stale. Making a new HTTP request of GET {target_url} at time {datetime.now()}')
+
+    # Disable ssl certificate verification
+    response = schema_http_client.get(target_url, headers = request_headers, verify = False)
+
+    if cache_entry and response.status_code == 304:
+        logger.info(f'Revalidated HTTP response cache of GET {target_url} at time {datetime.now()}')
+
+        schema_http_client.record_cache_outcome(target_url, 'cache_revalidations')
+
+        cache_entry['fresh_until'] = now + SchemaConstants.MEMCACHED_TTL
+        set_cached_data(cache_key, cache_entry, expire = SchemaConstants.MEMCACHED_TTL * 2)
+
+        return schema_http_client.from_cache_entry(target_url, cache_entry)
+
+    if cache_key:
+        schema_http_client.record_cache_outcome(target_url, 'cache_misses')
+
+        if response.status_code < 500:
             logger.info(f'Creating HTTP response cache of GET {target_url} at time {datetime.now()}')
 
-            cache_key = f'{_memcached_prefix}{target_url}'
-            _memcached_client.set(cache_key, response, expire = SchemaConstants.MEMCACHED_TTL)
-    else:
-        logger.info(f'Using HTTP response cache of GET {target_url} at time {datetime.now()}')
+            cache_entry = schema_http_client.to_cache_entry(response, now + SchemaConstants.MEMCACHED_TTL)
+
+            # Keep the entries with validators for another TTL period so they can be revalidated
+            expire = SchemaConstants.MEMCACHED_TTL
+            if schema_http_client.get_revalidation_headers(cache_entry):
+                expire = SchemaConstants.MEMCACHED_TTL * 2
+
+            set_cached_data(cache_key, cache_entry, expire = expire)
 
     return response
 
 
 """
-Delete the cached data for the given entity uuids
+Delete the cached data for the given entity uuids, as well as the cached documents of
+other entities that depend on them based on the dependency index recorded at cache-fill time
 
 Parameters
 ----------
@@ -2332,16 +3529,712 @@ def delete_memcached_cache(uuids_list):
     global _memcached_prefix
 
     if _memcached_client and _memcached_prefix:
-        cache_keys = []
-        for uuid in uuids_list:
-            cache_keys.append(f'{_memcached_prefix}_neo4j_{uuid}')
-            cache_keys.append(f'{_memcached_prefix}_complete_{uuid}')
-            cache_keys.append(f'{_memcached_prefix}_complete_index_{uuid}')
+        cache_namespace = get_cache_namespace()
+        dependents_keys = [f'{cache_namespace}_dependents_{uuid}' for uuid in uuids_list]
+        dependents_dict = _memcached_client.get_many(dependents_keys) or {}
+
+        cache_keys = list(dependents_keys)
+
+        # Key: uuid, value: entity type, None when unknown
+        target_uuids_dict = {uuid: None for uuid in uuids_list}
+        for dependents in dependents_dict.values():
+            if isinstance(dependents, str):
+                for dependent in dependents.split():
+                    dependent_uuid, _, dependent_entity_type = dependent.partition(':')
+                    dependent_entity_type, _, cache_type = dependent_entity_type.partition(':')
+
+                    if cache_type:
+                        # Just the one document, E.g., the provenance of a given depth
+                        cache_keys.append(get_entity_cache_key(cache_type, dependent_uuid, dependent_entity_type))
+                    else:
+                        target_uuids_dict.setdefault(dependent_uuid, dependent_entity_type or None)
+
+        for uuid, entity_type in target_uuids_dict.items():
+            cache_keys.append(f'{cache_namespace}_neo4j_{uuid}')
+
+            # The generation of each entity type is part of the key, so try all of them when the type is unknown
+            entity_types = [entity_type] if entity_type else get_all_entity_types()
+            for entity_type in entity_types:
+                cache_keys.append(get_entity_cache_key('complete', uuid, entity_type))
+                cache_keys.append(get_entity_cache_key('complete_index', uuid, entity_type))
+                cache_keys.append(get_entity_cache_key('provenance', uuid, entity_type))
         _memcached_client.delete_many(cache_keys)
+        _delete_l1_cached_data(cache_keys)
+
+        # Make the other workers drop the L1 entries of just these keys, see _check_l1_cache_version()
+        l1_version_key = f'{_memcached_prefix}_l1_version'
+        l1_version = _memcached_client.incr(l1_version_key, 1, noreply = False)
+        if l1_version is None:
+            l1_version = _init_cache_generation(l1_version_key)
+        try:
+            _memcached_client.set(_get_l1_invalidation_key(l1_version), cache_keys, expire = SchemaConstants.L1_CACHE_TTL)
+        except Exception:
+            # The other workers clear their whole L1 cache when the keys of a version are missing
+            logger.exception(f"Failed to save the L1 cache invalidation of version {l1_version}")
+        _check_l1_cache_version(l1_version)
 
         logger.info(f"Deleted cache by key: {', '.join(cache_keys)}")
 
 
+"""
+Get the uuids of the other entities that each cached document depends on, which are the
+entities embedded in the document and, for Sample/Dataset/Publication, all the ancestors
+since some generated properties (e.g. Dataset.title) are derived from the ancestors' data.
+The ancestors of all the given entities are fetched with a single query
+
+Parameters
+----------
+documents : list
+    The (entity_dict, cached_dict) tuples of the entity dict based on neo4j record and
+    the complete entity dict or index metadata dict to be cached
+
+Returns
+-------
+dict
+    The sets of uuids of the entities each cached document depends on, keyed by entity uuid
+"""
+def get_cache_dependency_uuids_dict(documents):
+    dependency_uuids_dict = {}
+    ancestors_entity_uuids = []
+
+    def collect_uuids(value, dependency_uuids):
+        if isinstance(value, dict):
+            for key, nested_value in value.items():
+                if isinstance(nested_value, str) and (key == 'uuid' or key.endswith('_uuid')):
+                    dependency_uuids.add(nested_value)
+                elif isinstance(nested_value, list) and key.endswith('_uuids'):
+                    dependency_uuids.update(item for item in nested_value if isinstance(item, str))
+                else:
+                    collect_uuids(nested_value, dependency_uuids)
+        elif isinstance(value, list):
+            for item in value:
+                collect_uuids(item, dependency_uuids)
+
+    for entity_dict, cached_dict in documents:
+        dependency_uuids = dependency_uuids_dict.setdefault(entity_dict['uuid'], set())
+        collect_uuids(cached_dict, dependency_uuids)
+
+        entity_type = entity_dict['entity_type']
+        if entity_type == 'Sample' or entity_type_instanceof(entity_type, 'Dataset'):
+            ancestors_entity_uuids.append(entity_dict['uuid'])
+
+    if ancestors_entity_uuids:
+        ancestor_uuids_dict = schema_neo4j_queries.get_ancestor_uuids_by_uuids(_neo4j_driver, ancestors_entity_uuids)
+
+        for entity_uuid, ancestor_uuids in ancestor_uuids_dict.items():
+            dependency_uuids_dict[entity_uuid].update(ancestor_uuids)
+
+    for entity_uuid, dependency_uuids in dependency_uuids_dict.items():
+        dependency_uuids.discard(entity_uuid)
+
+    return dependency_uuids_dict
+
+
+"""
+Record the documents of the given entities as dependents of each entity they depend on,
+which must happen before the documents get cached so a write to a dependency in between
+can't leave a stale document behind
+
+Parameters
+----------
+documents : list
+    The (entity_dict, cached_dict) tuples of the entity dict based on neo4j record and
+    the complete entity dict or index metadata dict to be cached
+
+Returns
+-------
+set
+    The uuids of the entities whose documents can be cached
+"""
+def _record_cache_dependencies(documents):
+    try:
+        dependency_uuids_dict = get_cache_dependency_uuids_dict(documents)
+    except Exception:
+        # Without the dependency index the documents would outlive writes to their dependencies
+        logger.exception(f"Failed to get the cache dependencies of {len(documents)} entities, not caching them")
+        return set()
+
+    dependents_dict = {_get_cache_dependent(entity_dict): entity_dict['uuid'] for entity_dict, cached_dict in documents}
+    recorded_dependents = _append_cache_dependents([(dependent, dependency_uuids_dict[entity_uuid]) for dependent, entity_uuid in dependents_dict.items()])
+
+    return {dependents_dict[dependent] for dependent in recorded_dependents}
+
+
+"""
+Get the dependent recorded under the dependents keys for the cached documents of the given entity,
+which is "uuid:entity_type" for all the documents of the entity, or "uuid:entity_type:cache_type"
+for just the document of the given cache type, see delete_memcached_cache()
+
+Parameters
+----------
+entity_dict : dict
+    The entity dict based on neo4j record
+cache_type : str
+    The cache type of the single document, E.g., provenance_2, None for all the documents
+
+Returns
+-------
+str
+    The dependent
+"""
+def _get_cache_dependent(entity_dict, cache_type = None):
+    dependent = f"{entity_dict['uuid']}:{entity_dict['entity_type']}"
+
+    if cache_type:
+        dependent = f"{dependent}:{cache_type}"
+
+    return dependent
+
+
+"""
+Append the given dependents to the dependents of each of their dependency uuids
+
+The dependents of an entity are kept as a space-separated string under one memcached key
+which is only appended to, so concurrent cache fills don't overwrite each other. All the keys are
+read with one get_many and each key gets a single append for all the given dependents, which
+doesn't wait for the reply when the key exists. A dependent already recorded is not appended
+again, and no more than SchemaConstants.MEMCACHED_MAX_DEPENDENTS dependents are recorded per
+uuid. The memcached errors are logged instead of raised since this runs on the read path
+
+Parameters
+----------
+dependencies : list
+    The (dependent, dependency_uuids) tuples of the dependent returned by _get_cache_dependent()
+    and the uuids of the entities its cached documents depend on
+
+Returns
+-------
+set
+    The dependents recorded under the dependents keys of all their dependency uuids, the
+    documents of the other dependents must not be cached
+"""
+def _append_cache_dependents(dependencies):
+    global _memcached_client
+
+    cache_namespace = get_cache_namespace()
+
+    # Key: dependents key, value: the new dependents in the given order
+    new_dependents_dict = {}
+    for dependent, dependency_uuids in dependencies:
+        for dependency_uuid in dependency_uuids:
+            new_dependents_dict.setdefault(f'{cache_namespace}_dependents_{dependency_uuid}', {})[dependent] = None
+
+    try:
+        dependents_dict = _memcached_client.get_many(list(new_dependents_dict.keys())) or {}
+    except Exception:
+        logger.exception(f"Failed to get the cache dependents of {len(dependencies)} documents")
+        return set()
+
+    skipped_dependents = set()
+    for key, new_dependents in new_dependents_dict.items():
+        dependents = dependents_dict.get(key)
+        recorded_dependents = set(dependents.split()) if isinstance(dependents, str) else set()
+
+        for dependent in list(new_dependents):
+            if dependent in recorded_dependents:
+                del new_dependents[dependent]
+
+        # Skip caching the documents that don't fit, deleting them would not help on the next read
+        room = max(SchemaConstants.MEMCACHED_MAX_DEPENDENTS - len(recorded_dependents), 0)
+        if len(new_dependents) > room:
+            logger.warning(f"Too many cache dependents under {key}, not caching {len(new_dependents) - room} documents")
+            skipped_dependents.update(list(new_dependents)[room:])
+
+    try:
+        for key, new_dependents in new_dependents_dict.items():
+            value = ''.join(f"{dependent} " for dependent in new_dependents if dependent not in skipped_dependents)
+
+            if key in dependents_dict:
+                if value:
+                    _memcached_client.append(key, value, noreply = True)
+
+                # Memcached ignores the expire of the append command, so the key is touched
+                # to outlive the documents about to be cached
+                _memcached_client.touch(key, expire = SchemaConstants.MEMCACHED_TTL, noreply = True)
+            elif value and not _memcached_client.add(key, value, expire = SchemaConstants.MEMCACHED_TTL, noreply = False):
+                # Added by another process in the meantime
+                if not _memcached_client.append(key, value, noreply = False):
+                    logger.warning(f"Failed to append to the cache dependents under {key}, not caching {len(dependencies)} documents")
+                    return set()
+                _memcached_client.touch(key, expire = SchemaConstants.MEMCACHED_TTL, noreply = True)
+    except Exception:
+        logger.exception(f"Failed to record the cache dependents of {len(dependencies)} documents")
+        return set()
+
+    return {dependent for dependent, dependency_uuids in dependencies if dependent not in skipped_dependents}
+
+
+"""
+Get the namespace of the cache keys, which contains the global cache generation and
+optionally the generation of the given entity type. Incrementing a generation makes all the
+keys of the previous one unreachable, and the orphaned entries just expire with their TTL
+
+Parameters
+----------
+entity_type : str
+    The normalized entity type, None for the keys not tied to an entity type
+
+Returns
+-------
+str
+    The cache key namespace, or just the Memcached prefix when Memcached is not used
+"""
+def get_cache_namespace(entity_type = None):
+    global _memcached_client
+    global _memcached_prefix
+
+    if not (_memcached_client and _memcached_prefix):
+        return _memcached_prefix
+
+    generations = _get_cache_generations()
+    cache_namespace = f'{_memcached_prefix}_{generations.get(None, 0)}'
+
+    if entity_type:
+        cache_namespace = f'{cache_namespace}.{entity_type}{generations.get(entity_type, 0)}'
+
+    return cache_namespace
+
+
+"""
+Get the cache key of the complete entity or index metadata of the given entity
+
+Parameters
+----------
+cache_type : str
+    Either 'complete' or 'complete_index'
+entity_uuid : str
+    The uuid of the entity
+entity_type : str
+    The normalized entity type
+
+Returns
+-------
+str
+    The cache key
+"""
+def get_entity_cache_key(cache_type, entity_uuid, entity_type):
+    return f'{get_cache_namespace(entity_type)}_{cache_type}_{entity_uuid}'
+
+
+"""
+Increment the global cache generation, or the generation of the given entity type,
+which is a single Memcached operation instead of flushing the whole Memcached server
+
+Parameters
+----------
+entity_type : str
+    The normalized entity type, None to invalidate all the cached data of this deployment
+"""
+def increment_cache_generation(entity_type = None):
+    global _memcached_client
+    global _cache_generations_fetched_at
+
+    if _memcached_client and _memcached_prefix:
+        generation_key = _get_cache_generation_key(entity_type)
+
+        if _memcached_client.incr(generation_key, 1, noreply = False) is None:
+            # Evicted or never used, a new one is started from the current time
+            _init_cache_generation(generation_key)
+
+        logger.info(f"Incremented the cache generation by key: {generation_key}")
+
+        # Make this worker pick up the new generation immediately
+        with _cache_generations_lock:
+            _cache_generations_fetched_at = 0
+
+
+def _get_cache_generation_key(entity_type = None):
+    if entity_type:
+        return f'{_memcached_prefix}_generation_{entity_type}'
+
+    return f'{_memcached_prefix}_generation'
+
+
+# A generation is started from the current epoch seconds rather than 0 so that an evicted
+# generation key never brings back the entries of an older generation
+def _init_cache_generation(generation_key):
+    generation = int(time.time())
+
+    if not _memcached_client.add(generation_key, generation, expire = 0, noreply = False):
+        # Started by another worker in the meantime
+        generation = _memcached_client.get(generation_key)
+
+    return generation
+
+
+def _get_cache_generations():
+    global _cache_generations
+    global _cache_generations_fetched_at
+
+    now = time.time()
+
+    with _cache_generations_lock:
+        if now - _cache_generations_fetched_at < SchemaConstants.CACHE_GENERATION_REFRESH_SECONDS:
+            return _cache_generations
+
+    # Key: generation key, value: None for the global generation or the entity type
+    generation_keys_dict = {_get_cache_generation_key(entity_type): entity_type for entity_type in [None] + get_all_entity_types()}
+    l1_version_key = f'{_memcached_prefix}_l1_version'
+    results = _memcached_client.get_many(list(generation_keys_dict.keys()) + [l1_version_key]) or {}
+
+    # Drop the L1 cache entries of the keys deleted by any worker
+    l1_version = results.get(l1_version_key)
+    if l1_version is None:
+        l1_version = _init_cache_generation(l1_version_key)
+    _check_l1_cache_version(l1_version)
+
+    generations = {}
+    for generation_key, entity_type in generation_keys_dict.items():
+        generation = results.get(generation_key)
+
+        if generation is None:
+            generation = _init_cache_generation(generation_key)
+
+        generations[entity_type] = generation if isinstance(generation, int) else 0
+
+    with _cache_generations_lock:
+        _cache_generations = generations
+        _cache_generations_fetched_at = now
+
+    return generations
+
+
+"""
+Get the cached data from the in-process L1 cache, or from Memcached on L1 miss, which
+then gets added to the L1 cache of this worker
+
+Parameters
+----------
+cache_key : str
+    The cache key
+
+Returns
+-------
+object
+    The cached data, None if not found
+"""
+def get_cached_data(cache_key):
+    global _memcached_client
+
+    if not (_memcached_client and _memcached_prefix):
+        return None
+
+    # Picks up the invalidations by the other workers
+    _get_cache_generations()
+
+    now = time.time()
+
+    with _l1_cache_lock:
+        l1_entry = _l1_cache.get(cache_key)
+
+        if l1_entry is not None and l1_entry[0] > now:
+            _l1_cache.move_to_end(cache_key)
+            _l1_cache_stats['hits'] += 1
+            l1_data, pickled = l1_entry[1], l1_entry[2]
+        else:
+            _l1_cache_stats['misses'] += 1
+            l1_data, pickled = None, False
+
+    if l1_data is not None:
+        # The immutable values are shared, the others are copied by unpickling
+        return pickle.loads(l1_data) if pickled else l1_data
+
+    data = _memcached_client.get(cache_key)
+
+    if data is not None:
+        _set_l1_cached_data(cache_key, data)
+
+    return data
+
+
+"""
+Save the data to both Memcached and the in-process L1 cache
+
+Parameters
+----------
+cache_key : str
+    The cache key
+data : object
+    The data to cache
+expire : int
+    The Memcached TTL in seconds, the L1 cache uses the shorter of it and SchemaConstants.L1_CACHE_TTL
+"""
+def set_cached_data(cache_key, data, expire = SchemaConstants.MEMCACHED_TTL):
+    global _memcached_client
+
+    if _memcached_client and _memcached_prefix:
+        # Only a cache miss for the next reads, E.g., when the data exceeds the item size limit
+        try:
+            _memcached_client.set(cache_key, data, expire = expire)
+        except Exception:
+            logger.exception(f"Failed to cache the data of key {cache_key}")
+            return
+
+        _set_l1_cached_data(cache_key, data, expire)
+
+
+"""
+Save multiple data to both Memcached, with a single set_many, and the in-process L1 cache
+
+Parameters
+----------
+data_dict : dict
+    The data to cache keyed by cache key
+expire : int
+    The Memcached TTL in seconds, the L1 cache uses the shorter of it and SchemaConstants.L1_CACHE_TTL
+"""
+def set_many_cached_data(data_dict, expire = SchemaConstants.MEMCACHED_TTL):
+    global _memcached_client
+
+    if _memcached_client and _memcached_prefix and data_dict:
+        try:
+            failed_keys = _memcached_client.set_many(data_dict, expire = expire) or []
+        except Exception:
+            logger.exception(f"Failed to cache the data of keys {', '.join(data_dict.keys())}")
+            return
+
+        for cache_key, data in data_dict.items():
+            if cache_key not in failed_keys:
+                _set_l1_cached_data(cache_key, data, expire)
+
+
+"""
+Get the L1 cache counters of this worker process
+
+Returns
+-------
+dict
+    The counters, current number of entries and size in bytes
+"""
+def get_l1_cache_stats():
+    with _l1_cache_lock:
+        stats = dict(_l1_cache_stats)
+        stats['size'] = len(_l1_cache)
+        stats['bytes'] = _l1_cache_bytes
+
+    return stats
+
+
+def _set_l1_cached_data(cache_key, data, expire = SchemaConstants.MEMCACHED_TTL):
+    global _l1_cache_bytes
+
+    # The immutable values (e.g. the PROV-JSON strings) need no copy on read, unpickling
+    # is the cheapest deep copy of the others (several times faster than copy.deepcopy())
+    if _is_immutable(data):
+        l1_data, pickled, size = data, False, sys.getsizeof(data)
+    else:
+        l1_data = pickle.dumps(data, protocol = pickle.HIGHEST_PROTOCOL)
+        pickled, size = True, len(l1_data)
+
+    # Not worth evicting everything else for a single huge entry
+    if size > SchemaConstants.L1_CACHE_MAX_BYTES // 10:
+        return
+
+    expires_at = time.time() + min(expire, SchemaConstants.L1_CACHE_TTL)
+
+    with _l1_cache_lock:
+        previous_entry = _l1_cache.pop(cache_key, None)
+        if previous_entry is not None:
+            _l1_cache_bytes -= previous_entry[3]
+
+        _l1_cache[cache_key] = (expires_at, l1_data, pickled, size)
+        _l1_cache_bytes += size
+
+        while _l1_cache_bytes > SchemaConstants.L1_CACHE_MAX_BYTES:
+            evicted_key, evicted_entry = _l1_cache.popitem(last = False)
+            _l1_cache_bytes -= evicted_entry[3]
+            _l1_cache_stats['evictions'] += 1
+
+
+def _is_immutable(data):
+    if isinstance(data, (str, bytes, int, float, bool, type(None))):
+        return True
+
+    if isinstance(data, (tuple, frozenset)):
+        return all(_is_immutable(item) for item in data)
+
+    return False
+
+
+def _delete_l1_cached_data(cache_keys):
+    global _l1_cache_bytes
+
+    with _l1_cache_lock:
+        for cache_key in cache_keys:
+            l1_entry = _l1_cache.pop(cache_key, None)
+            if l1_entry is not None:
+                _l1_cache_bytes -= l1_entry[3]
+
+
+def _get_l1_invalidation_key(l1_version):
+    return f'{_memcached_prefix}_l1_invalidated_{l1_version}'
+
+
+"""
+Drop the L1 cache entries of the keys deleted by delete_memcached_cache() in any worker since the
+last invalidation version seen by this worker. Each deletion increments the version and saves its
+cache keys under the new version, so only the deleted keys are dropped. The whole L1 cache is only
+cleared when this worker is too far behind or the deleted keys of a version are gone
+
+Parameters
+----------
+l1_version : int
+    The current invalidation version read from Memcached
+"""
+def _check_l1_cache_version(l1_version):
+    global _l1_cache_bytes
+    global _l1_cache_version
+
+    with _l1_cache_lock:
+        previous_l1_version = _l1_cache_version
+
+        # Also skip the older versions read by the other threads in the meantime
+        if (l1_version == previous_l1_version) or (isinstance(l1_version, int) and isinstance(previous_l1_version, int) and l1_version < previous_l1_version):
+            return
+
+        _l1_cache_version = l1_version
+
+    if previous_l1_version is None:
+        return
+
+    cache_keys = None
+    if isinstance(l1_version, int) and isinstance(previous_l1_version, int) and (l1_version - previous_l1_version <= SchemaConstants.L1_CACHE_MAX_INVALIDATIONS):
+        invalidation_keys = [_get_l1_invalidation_key(version) for version in range(previous_l1_version + 1, l1_version + 1)]
+        invalidations_dict = _memcached_client.get_many(invalidation_keys) or {}
+
+        if len(invalidations_dict) == len(invalidation_keys):
+            cache_keys = [cache_key for invalidation_key in invalidation_keys for cache_key in invalidations_dict[invalidation_key]]
+
+    if cache_keys is None:
+        with _l1_cache_lock:
+            _l1_cache.clear()
+            _l1_cache_bytes = 0
+            _l1_cache_stats['invalidations'] += 1
+    else:
+        _delete_l1_cached_data(cache_keys)
+
+
+"""
+Compute the missing cached data only once across all the threads and worker processes.
+
+The first thread of this worker that misses the cache key does the fill, the other threads wait
+for its result. Across processes, the fill is guarded by a lease created with the Memcached `add`
+command, so the workers that don't get the lease poll the cache key until the data appears or
+the lease times out, in which case they compute it themselves
+
+Parameters
+----------
+cache_key : str
+    The Memcached key of the data being filled
+compute_func : function
+    The function that computes the data and saves it to Memcached under cache_key
+
+Returns
+-------
+object
+    The computed data, or the data filled by another thread or worker
+"""
+def single_flight(cache_key, compute_func):
+    with _single_flight_lock:
+        cache_fill = _single_flight_fills.get(cache_key)
+        is_leader = cache_fill is None
+
+        if is_leader:
+            cache_fill = {
+                'event': threading.Event(),
+                'result': None,
+                'error': None,
+                'waiters': 0
+            }
+            _single_flight_fills[cache_key] = cache_fill
+        else:
+            cache_fill['waiters'] += 1
+
+    if not is_leader:
+        if not cache_fill['event'].wait(timeout = SchemaConstants.SINGLE_FLIGHT_LEASE_SECONDS):
+            logger.error(f"Timed out waiting for another thread to fill the cache key {cache_key}")
+            return compute_func()
+
+        if cache_fill['error'] is not None:
+            raise cache_fill['error']
+
+        _increment_single_flight_stat('coalesced_threads')
+
+        # Each thread gets its own copy since the callers may modify the result
+        return copy.deepcopy(cache_fill['result'])
+
+    try:
+        result = _single_flight_across_processes(cache_key, compute_func)
+        cache_fill['result'] = result
+    except Exception as e:
+        cache_fill['error'] = e
+        raise
+    finally:
+        with _single_flight_lock:
+            _single_flight_fills.pop(cache_key, None)
+            waiters = cache_fill['waiters']
+
+        cache_fill['event'].set()
+
+    return copy.deepcopy(result) if waiters else result
+
+
+def _single_flight_across_processes(cache_key, compute_func):
+    if not (_memcached_client and _memcached_prefix):
+        _increment_single_flight_stat('computations')
+        return compute_func()
+
+    lease_key = f'{cache_key}_lease'
+    lease_acquired = _memcached_client.add(lease_key, os.getpid(), expire = SchemaConstants.SINGLE_FLIGHT_LEASE_SECONDS, noreply = False)
+
+    if not lease_acquired:
+        deadline = time.time() + SchemaConstants.SINGLE_FLIGHT_LEASE_SECONDS
+
+        # Stop waiting once the lease is gone (filled, failed, or Memcached unavailable)
+        while (time.time() < deadline) and (_memcached_client.get(lease_key) is not None):
+            time.sleep(SchemaConstants.SINGLE_FLIGHT_POLL_SECONDS)
+
+            result = _memcached_client.get(cache_key)
+            if result is not None:
+                _increment_single_flight_stat('coalesced_processes')
+                return result
+
+        result = _memcached_client.get(cache_key)
+        if result is not None:
+            _increment_single_flight_stat('coalesced_processes')
+            return result
+
+    try:
+        _increment_single_flight_stat('computations')
+        return compute_func()
+    finally:
+        if lease_acquired:
+            _memcached_client.delete(lease_key)
+
+
+def _increment_single_flight_stat(stat_key):
+    with _single_flight_lock:
+        _single_flight_stats[stat_key] += 1
+
+
+"""
+Get the single-flight counters of this worker process, the coalesced threads and processes
+are the recomputations saved
+
+Returns
+-------
+dict
+    The counters of cache fills computed and coalesced
+"""
+def get_single_flight_stats():
+    with _single_flight_lock:
+        stats = dict(_single_flight_stats)
+        stats['recomputations_saved'] = stats['coalesced_threads'] + stats['coalesced_processes']
+        stats['in_progress'] = len(_single_flight_fills)
+
+    return stats
+
+
 """
 Retrive the organ types from ontology-api
 
@@ -2495,8 +4388,8 @@ def _get_metadata_result(request, token, entity_dict, metadata_scope:MetadataSco
         # Need both client and prefix when fetching the cache
         # Do NOT fetch cache if properties_to_skip is specified
         if _memcached_client and _memcached_prefix and (not properties_to_skip):
-            cache_key = f'{_memcached_prefix}_complete_index_{entity_uuid}'
-            cache_result = _memcached_client.get(cache_key)
+            cache_key = get_entity_cache_key('complete_index', entity_uuid, entity_type)
+            cache_result = get_cached_data(cache_key)
 
         # Use the cached data if found and still valid
         # Otherwise, calculate and add to cache
@@ -2545,11 +4438,12 @@ def _get_metadata_result(request, token, entity_dict, metadata_scope:MetadataSco
 
             # Need both client and prefix when creating the cache
             # Do NOT cache when properties_to_skip is specified
-            if _memcached_client and _memcached_prefix and (not properties_to_skip):
+            # So a write to any of the entities embedded in this document purges it too
+            if _memcached_client and _memcached_prefix and (not properties_to_skip) and _record_cache_dependencies([(entity_dict, metadata_dict)]):
                 logger.info(f'Creating complete entity cache of {entity_type} {entity_uuid} at time {datetime.now()}')
 
-                cache_key = f'{_memcached_prefix}_complete_index_{entity_uuid}'
-                _memcached_client.set(cache_key, metadata_dict, expire=SchemaConstants.MEMCACHED_TTL)
+                cache_key = get_entity_cache_key('complete_index', entity_uuid, entity_type)
+                set_cached_data(cache_key, metadata_dict, expire=SchemaConstants.MEMCACHED_TTL)
 
                 logger.debug(
                     f"Following is the complete {entity_type} cache created at time {datetime.now()} using key {cache_key}:")
@@ -2591,8 +4485,6 @@ dict
     An entity metadata dictionary with keys that are all normalized appropriately for the metadata_scope argument value.
 """
 def _normalize_metadata(entity_dict, metadata_scope:MetadataScopeEnum, properties_to_skip=[]):
-    global _schema
-
     # When the entity_dict is unavailable or the entity was incorrectly created, do not
     # try to normalize.
     if not entity_dict or 'entity_type' not in entity_dict:
@@ -2601,12 +4493,12 @@ def _normalize_metadata(entity_dict, metadata_scope:MetadataScopeEnum, propertie
     normalized_metadata = {}
 
     normalized_entity_type = entity_dict['entity_type']
-    properties = _schema['ENTITIES'][normalized_entity_type]['properties']
+    property_flags = get_schema_plan(normalized_entity_type)['properties']
 
     for key in entity_dict:
         # Only return the properties defined in the schema yaml
         # Exclude additional schema yaml properties, if specified
-        if  key not in properties:
+        if  key not in property_flags:
             # Skip Neo4j entity properties not found in the schema yaml
             continue
         if  key in properties_to_skip:
@@ -2615,18 +4507,16 @@ def _normalize_metadata(entity_dict, metadata_scope:MetadataScopeEnum, propertie
         if  entity_dict[key] is None:
             # Do not include properties in the metadata if they are empty
             continue
-        if  'exposed' in properties[key] and \
-            properties[key]['exposed'] is False:
+        if  not property_flags[key]['exposed']:
             # Do not include properties in the metadata if they are not exposed
             continue
         if  metadata_scope is MetadataScopeEnum.INDEX and \
-            'indexed' in properties[key] and \
-            properties[key]['indexed'] is False:
+            not property_flags[key]['indexed']:
             # Do not include properties in metadata for indexing if they are not True i.e. False or non-boolean
             continue
         # Only run convert_str_literal() on string representation of Python dict and list with removing control characters
         # No convertion for string representation of Python string, meaning that can still contain control characters
-        if entity_dict[key] and (properties[key]['type'] in ['list', 'json_string']):
+        if entity_dict[key] and property_flags[key]['str_literal']:
             logger.info(
                 f"Executing convert_str_literal() on {normalized_entity_type}.{key} of uuid: {entity_dict['uuid']}")
 
@@ -2634,7 +4524,7 @@ def _normalize_metadata(entity_dict, metadata_scope:MetadataScopeEnum, propertie
             # Only convert to Python list/dict when the string literal is not empty
             # instead of returning the json-as-string or array-as-string
             # convert_str_literal() also removes those control chars to avoid SyntaxError
-            entity_dict[key] = convert_str_literal(entity_dict[key])
+            entity_dict[key] = convert_entity_str_literal(entity_dict, key)
 
         # Add the target key with correct value of data type to the normalized_entity dict
         normalized_metadata[key] = entity_dict[key]
@@ -1,14 +1,25 @@
+from typing import Iterable, Optional, Union
 import neo4j
 from neo4j.exceptions import TransactionError
 from neo4j import Session as Neo4jSession
 from schema.schema_constants import SchemaConstants, Neo4jRelationshipEnum
+import hashlib
+import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 # The filed name of the single result record
 record_field_name = 'result'
 
+# Named queries built by this process, see register_query()
+_query_registry = {}
+_query_registry_lock = threading.Lock()
+
+# Whether the ancestry reads use the materialized HAS_ANCESTOR closure, see set_ancestry_closure_reads()
+_ancestry_closure_reads = False
+
 ####################################################################################################
 ## Functions can be called by app.py, schema_manager.py, and schema_triggers.py
 ####################################################################################################
@@ -39,14 +50,13 @@ def create_entity(neo4j_driver, entity_type, entity_data_dict, superclass = None
     if superclass is not None:
         labels = f':Entity:{entity_type}:{superclass}'
 
-    node_properties_map = build_properties_map(entity_data_dict)
-    
+    parameters = build_properties_params(entity_data_dict)
+
     query = (f"CREATE (e{labels}) "
-             f"SET e = {node_properties_map} "
+             f"{properties_set_clause('e')}"
              f"RETURN e AS {record_field_name}")
 
-    logger.info("======create_entity() query======")
-    logger.debug(query)
+    register_query('create_entity', query)
 
     try:
         with neo4j_driver.session() as session:
@@ -54,7 +64,7 @@ def create_entity(neo4j_driver, entity_type, entity_data_dict, superclass = None
 
             tx = session.begin_transaction()
 
-            result = tx.run(query)
+            result = tx.run(query, parameters)
             record = result.single()
             entity_node = record[record_field_name]
 
@@ -95,14 +105,13 @@ def get_entity(neo4j_driver, uuid):
     result = {}
 
     query = (f"MATCH (e:Entity) "
-             f"WHERE e.uuid = '{uuid}' "
+             f"WHERE e.uuid = $uuid "
              f"RETURN e AS {record_field_name}")
 
-    logger.info("======get_entity() query======")
-    logger.debug(query)
+    register_query('get_entity', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             # Convert the neo4j node into Python dict
@@ -110,6 +119,124 @@ def get_entity(neo4j_driver, uuid):
 
     return result
 
+"""
+Get the entities from the neo4j database with the given uuids.
+
+Parameters
+----------
+uuids : Union[str, Iterable]
+    The uuid(s) of the entities to get.
+fields : Union[dict, Iterable, None], optional
+    The fields to return for each entity. If None, all fields are returned.
+    If a dict, the keys are the database fields to return and the values are the names to return them as.
+    If an iterable, the fields to return. Defaults to None.
+
+Returns
+-------
+Optional[List[neo4j.Record]]:
+    The entity records with the given uuids, or None if no datasets were found.
+    The specified fields are returned for each entity.
+Raises
+------
+ValueError
+    If fields is not a dict, an iterable, or None.
+"""
+def get_entities_by_uuid(neo4j_driver,
+                         uuids: Union[str, Iterable],
+                         fields: Union[dict, Iterable, None] = None) -> Optional[list]:
+
+    if isinstance(uuids, str):
+        uuids = [uuids]
+    if not isinstance(uuids, list):
+        uuids = list(uuids)
+
+    if fields is None or len(fields) == 0:
+        return_stmt = 'e'
+    elif isinstance(fields, dict):
+        return_stmt = ', '.join([f'e.{field} AS {name}' for field, name in fields.items()])
+    elif isinstance(fields, Iterable):
+        return_stmt = ', '.join([f'e.{field} AS {field}' for field in fields])
+    else:
+        raise ValueError("fields must be a dict or an iterable")
+
+    with neo4j_driver.session() as session:
+        length = len(uuids)
+        query = "MATCH (e:Entity) WHERE e.uuid IN $uuids RETURN " + return_stmt
+        register_query('get_entities_by_uuid', query)
+        records = session.run(query, uuids=uuids).fetch(length)
+        if records is None or len(records) == 0:
+            return None
+
+        return records
+
+
+"""
+Get multiple entity dicts with a single query, see get_entities_by_uuid()
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+uuids : list
+    The uuids of target entities
+
+Returns
+-------
+dict
+    A dictionary of entity details keyed by uuid, only the uuids found in neo4j are present
+"""
+def get_entities_by_uuids(neo4j_driver, uuids):
+    results = {}
+
+    if not uuids:
+        return results
+
+    for record in get_entities_by_uuid(neo4j_driver, uuids) or []:
+        entity_dict = node_to_dict(record['e'])
+        results[entity_dict['uuid']] = entity_dict
+
+    return results
+
+
+"""
+Resolve multiple UUIDs or HuBMAP IDs to UUIDs with a single query
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+ids : list
+    The UUIDs or upper-cased HuBMAP IDs (e.g. HBM123.ABCD.456) of target entities
+
+Returns
+-------
+dict
+    A dictionary of uuids keyed by both the uuid and HuBMAP ID of each entity found in neo4j
+"""
+def get_uuids_by_ids(neo4j_driver, ids):
+    results = {}
+
+    if not ids:
+        return results
+
+    query = ("MATCH (e:Entity) "
+             "WHERE e.uuid IN $ids OR e.hubmap_id IN $ids "
+             "RETURN e.uuid AS uuid, e.hubmap_id AS hubmap_id")
+
+    register_query('get_uuids_by_ids', query)
+
+    with neo4j_driver.session() as session:
+        records = session.run(query, ids = list(ids))
+
+        for record in records:
+            results[record['uuid']] = record['uuid']
+
+            if record['hubmap_id']:
+                results[record['hubmap_id']] = record['uuid']
+
+    return results
+
+
 """
 Given a list of UUIDs, return a dict mapping uuid -> entity_node
 Only UUIDs present in Neo4j will be returned.
@@ -139,6 +266,8 @@ def identify_existing_dataset_entities(neo4j_driver, dataset_uuid_list:list):
         RETURN  e.uuid AS uuid
     """
 
+    register_query('identify_existing_dataset_entities', query)
+
     with neo4j_driver.session() as session:
         results = session.run(query, param_uuids=dataset_uuid_list)
         return [record["uuid"] for record in results]
@@ -161,14 +290,13 @@ dict
     A dictionary of entity uuids that don't pass the filter, grouped by entity_type
 """
 def filter_ancestors_by_type(neo4j_driver, direct_ancestor_uuids, entity_type):
-    query = (f"MATCH (e:Entity) "
-             f"WHERE e.uuid in {direct_ancestor_uuids} AND toLower(e.entity_type) <> '{entity_type.lower()}' "
-             f"RETURN e.entity_type AS entity_type, collect(e.uuid) AS uuids")
-    logger.info("======filter_ancestors_by_type======")
-    logger.debug(query)
+    query = ("MATCH (e:Entity) "
+             "WHERE e.uuid in $uuids AND toLower(e.entity_type) <> $entity_type "
+             "RETURN e.entity_type AS entity_type, collect(e.uuid) AS uuids")
+    register_query('filter_ancestors_by_type', query)
 
     with neo4j_driver.session() as session:
-        records = session.run(query).data()
+        records = session.run(query, uuids = list(direct_ancestor_uuids), entity_type = entity_type.lower()).data()
           
     return records if records else None
 
@@ -196,22 +324,21 @@ def get_children(neo4j_driver, uuid, property_key = None):
     if property_key:
         query = (f"MATCH (e:Entity)-[:ACTIVITY_INPUT]->(:Activity)-[:ACTIVITY_OUTPUT]->(child:Entity) "
                  # The target entity can't be a Lab
-                 f"WHERE e.uuid='{uuid}' AND e.entity_type <> 'Lab' "
+                 f"WHERE e.uuid=$uuid AND e.entity_type <> 'Lab' "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(child.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(child[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (e:Entity)-[:ACTIVITY_INPUT]->(:Activity)-[:ACTIVITY_OUTPUT]->(child:Entity) "
                  # The target entity can't be a Lab
-                 f"WHERE e.uuid='{uuid}' AND e.entity_type <> 'Lab' "
+                 f"WHERE e.uuid=$uuid AND e.entity_type <> 'Lab' "
                  f"WITH COLLECT(DISTINCT child) AS uniqueChildren "
-                 f"RETURN [a IN uniqueChildren | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), {fields_to_omit}))] AS {record_field_name}")
+                 f"RETURN [a IN uniqueChildren | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), $fields_to_omit))] AS {record_field_name}")
 
-    logger.info("======get_children() query======")
-    logger.debug(query)
+    register_query('get_children', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key, 'fields_to_omit': fields_to_omit})
 
         if record and record[record_field_name]:
             if property_key:
@@ -247,22 +374,21 @@ def get_parents(neo4j_driver, uuid, property_key = None):
     if property_key:
         query = (f"MATCH (e:Entity)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(parent:Entity) "
                  # Filter out the Lab entities
-                 f"WHERE e.uuid='{uuid}' AND parent.entity_type <> 'Lab' "
+                 f"WHERE e.uuid=$uuid AND parent.entity_type <> 'Lab' "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(parent.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(parent[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (e:Entity)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(parent:Entity) "
                  # Filter out the Lab entities
-                 f"WHERE e.uuid='{uuid}' AND parent.entity_type <> 'Lab' "
+                 f"WHERE e.uuid=$uuid AND parent.entity_type <> 'Lab' "
                  f"WITH COLLECT(DISTINCT parent) AS uniqueParents "
-                 f"RETURN [a IN uniqueParents | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), {fields_to_omit}))] AS {record_field_name}")
+                 f"RETURN [a IN uniqueParents | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), $fields_to_omit))] AS {record_field_name}")
 
-    logger.info("======get_parents() query======")
-    logger.debug(query)
+    register_query('get_parents', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key, 'fields_to_omit': fields_to_omit})
 
         if record and record[record_field_name]:
             if property_key:
@@ -298,16 +424,16 @@ def get_siblings(neo4j_driver, uuid, property_key=None):
     if property_key:
         query = (f"MATCH (e:Entity)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(parent:Entity) "
                  # filter out the Lab entities
-                 f"WHERE e.uuid='{uuid}' AND parent.entity_type <> 'Lab' "
+                 f"WHERE e.uuid=$uuid AND parent.entity_type <> 'Lab' "
                  f"MATCH (sibling:Entity)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(parent) "
                  f"WHERE sibling <> e "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() returns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(sibling.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(sibling[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (e:Entity)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(parent:Entity) "
                  # filter out the Lab entities
-                 f"WHERE e.uuid='{uuid}' AND parent.entity_type <> 'Lab' "
+                 f"WHERE e.uuid=$uuid AND parent.entity_type <> 'Lab' "
                  f"MATCH (sibling:Entity)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(parent) "
                  f"WHERE sibling <> e "
                  # COLLECT() returns a list
@@ -315,11 +441,10 @@ def get_siblings(neo4j_driver, uuid, property_key=None):
                  f"RETURN apoc.coll.toSet(COLLECT(sibling)) AS {record_field_name}")
 
 
-    logger.info("======get_siblings() query======")
-    logger.debug(query)
+    register_query('get_siblings', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key})
 
         if record and record[record_field_name]:
             if property_key:
@@ -354,16 +479,16 @@ def get_tuplets(neo4j_driver, uuid, property_key=None):
     if property_key:
         query = (f"MATCH (e:Entity)<-[:ACTIVITY_OUTPUT]-(a:Activity)<-[:ACTIVITY_INPUT]-(parent:Entity) "
                  # filter out the Lab entities
-                 f"WHERE e.uuid='{uuid}' AND parent.entity_type <> 'Lab' "
+                 f"WHERE e.uuid=$uuid AND parent.entity_type <> 'Lab' "
                  f"MATCH (tuplet:Entity)<-[:ACTIVITY_OUTPUT]-(a) "
                  f"WHERE tuplet <> e "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() returns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(tuplet.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(tuplet[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (e:Entity)<-[:ACTIVITY_OUTPUT]-(a:Activity)<-[:ACTIVITY_INPUT]-(parent:Entity) "
                  # filter out the Lab entities
-                 f"WHERE e.uuid='{uuid}' AND parent.entity_type <> 'Lab' "
+                 f"WHERE e.uuid=$uuid AND parent.entity_type <> 'Lab' "
                  f"MATCH (tuplet:Entity)<-[:ACTIVITY_OUTPUT]-(a:Activity) "
                  f"WHERE tuplet <> e "
                  # COLLECT() returns a list
@@ -371,11 +496,10 @@ def get_tuplets(neo4j_driver, uuid, property_key=None):
                  f"RETURN apoc.coll.toSet(COLLECT(tuplet)) AS {record_field_name}")
 
 
-    logger.info("======get_tuplets() query======")
-    logger.debug(query)
+    register_query('get_tuplets', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key})
 
         if record and record[record_field_name]:
             if property_key:
@@ -407,25 +531,29 @@ list
 def get_ancestors(neo4j_driver, uuid, property_key = None):
     results = []
     fields_to_omit = SchemaConstants.OMITTED_FIELDS
+
+    if _ancestry_closure_reads:
+        # The closure has no Lab entities and no duplicates
+        match_clause = "MATCH (e:Entity {uuid: $uuid})-[:HAS_ANCESTOR]->(ancestor:Entity) "
+    else:
+        match_clause = ("MATCH (e:Entity)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(ancestor:Entity) "
+                        # Filter out the Lab entities
+                        "WHERE e.uuid=$uuid AND ancestor.entity_type <> 'Lab' ")
+
     if property_key:
-        query = (f"MATCH (e:Entity)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(ancestor:Entity) "
-                 # Filter out the Lab entities
-                 f"WHERE e.uuid='{uuid}' AND ancestor.entity_type <> 'Lab' "
+        query = (match_clause +
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(ancestor.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(ancestor[$property_key])) AS {record_field_name}")
     else:
-        query = (f"MATCH (e:Entity)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(ancestor:Entity) "
-                 # Filter out the Lab entities
-                 f"WHERE e.uuid='{uuid}' AND ancestor.entity_type <> 'Lab' "
+        query = (match_clause +
                  f"WITH COLLECT(DISTINCT ancestor) AS uniqueAncestors "
-                 f"RETURN [a IN uniqueAncestors | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), {fields_to_omit}))] AS {record_field_name}")
+                 f"RETURN [a IN uniqueAncestors | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), $fields_to_omit))] AS {record_field_name}")
 
-    logger.info("======get_ancestors() query======")
-    logger.debug(query)
+    register_query('get_ancestors', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key, 'fields_to_omit': fields_to_omit})
 
         if record and record[record_field_name]:
             if property_key:
@@ -438,6 +566,51 @@ def get_ancestors(neo4j_driver, uuid, property_key = None):
     return results
 
 
+"""
+Get the uuids of all the ancestors of multiple entities with a single query
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+uuids : list
+    The uuids of target entities
+
+Returns
+-------
+dict
+    A dictionary of the lists of unique ancestor uuids keyed by entity uuid, the list is empty if not found
+"""
+def get_ancestor_uuids_by_uuids(neo4j_driver, uuids):
+    results = {uuid: [] for uuid in uuids}
+
+    if not uuids:
+        return results
+
+    if _ancestry_closure_reads:
+        # The closure has no Lab entities and no duplicates
+        match_clause = ("UNWIND $uuids AS uuid "
+                        "MATCH (e:Entity {uuid: uuid})-[:HAS_ANCESTOR]->(ancestor:Entity) ")
+    else:
+        match_clause = ("UNWIND $uuids AS uuid "
+                        "MATCH (e:Entity {uuid: uuid})<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(ancestor:Entity) "
+                        # Filter out the Lab entities
+                        "WHERE ancestor.entity_type <> 'Lab' ")
+
+    query = (match_clause +
+             f"RETURN uuid, COLLECT(DISTINCT ancestor.uuid) AS {record_field_name}")
+
+    register_query('get_ancestor_uuids_by_uuids', query)
+
+    with neo4j_driver.session() as session:
+        records = session.run(query, uuids = list(uuids))
+
+        for record in records:
+            results[record['uuid']] = record[record_field_name]
+
+    return results
+
+
 """
 Get all descendants by uuid
 
@@ -458,25 +631,30 @@ dict
 def get_descendants(neo4j_driver, uuid, property_key = None):
     results = []
     fields_to_omit = SchemaConstants.OMITTED_FIELDS
+
+    if _ancestry_closure_reads:
+        match_clause = ("MATCH (e:Entity {uuid: $uuid})<-[:HAS_ANCESTOR]-(descendant:Entity) "
+                        # The target entity can't be a Lab
+                        "WHERE e.entity_type <> 'Lab' ")
+    else:
+        match_clause = ("MATCH (e:Entity)-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]->(descendant:Entity) "
+                        # The target entity can't be a Lab
+                        "WHERE e.uuid=$uuid AND e.entity_type <> 'Lab' ")
+
     if property_key:
-        query = (f"MATCH (e:Entity)-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]->(descendant:Entity) "
-                 # The target entity can't be a Lab
-                 f"WHERE e.uuid='{uuid}' AND e.entity_type <> 'Lab' "
+        query = (match_clause +
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(descendant.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(descendant[$property_key])) AS {record_field_name}")
     else:
-        query = (f"MATCH (e:Entity)-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]->(descendant:Entity) "
-                 # The target entity can't be a Lab
-                 f"WHERE e.uuid='{uuid}' AND e.entity_type <> 'Lab' "
+        query = (match_clause +
                  f"WITH COLLECT(DISTINCT descendant) AS uniqueDescendants "
-                 f"RETURN [a IN uniqueDescendants | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), {fields_to_omit}))] AS {record_field_name}")                 
+                 f"RETURN [a IN uniqueDescendants | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), $fields_to_omit))] AS {record_field_name}")                 
 
-    logger.info("======get_descendants() query======")
-    logger.debug(query)
+    register_query('get_descendants', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key, 'fields_to_omit': fields_to_omit})
 
         if record and record[record_field_name]:
             if property_key:
@@ -511,22 +689,21 @@ def get_collections(neo4j_driver, uuid, property_key = None):
 
     if property_key:
         query = (f"MATCH (c:Collection)<-[:IN_COLLECTION]-(ds:Dataset) "
-                 f"WHERE ds.uuid='{uuid}' "
+                 f"WHERE ds.uuid=$uuid "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(c.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(c[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (c:Collection)<-[:IN_COLLECTION]-(ds:Dataset) "
-                 f"WHERE ds.uuid='{uuid}' "
+                 f"WHERE ds.uuid=$uuid "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
                  f"RETURN apoc.coll.toSet(COLLECT(c)) AS {record_field_name}")
 
-    logger.info("======get_collections() query======")
-    logger.debug(query)
+    register_query('get_collections', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key})
 
         if record and record[record_field_name]:
             if property_key:
@@ -560,22 +737,21 @@ def get_uploads(neo4j_driver, uuid, property_key = None):
     results = []
     if property_key:
         query = (f"MATCH (u:Upload)<-[:IN_UPLOAD]-(ds:Dataset) "
-                 f"WHERE ds.uuid='{uuid}' "
+                 f"WHERE ds.uuid=$uuid "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(u.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(u[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (u:Upload)<-[:IN_UPLOAD]-(ds:Dataset) "
-                 f"WHERE ds.uuid='{uuid}' "
+                 f"WHERE ds.uuid=$uuid "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
                  f"RETURN apoc.coll.toSet(COLLECT(u)) AS {record_field_name}")
 
-    logger.info("======get_uploads() query======")
-    logger.debug(query)
+    register_query('get_uploads', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key})
         if record and record[record_field_name]:
             if property_key:
                 # Just return the list of property values from each entity node
@@ -611,25 +787,24 @@ def get_dataset_direct_ancestors(neo4j_driver, uuid, property_key = None, proper
 
     if property_key:
         query = (f"MATCH (s:Entity)-[:ACTIVITY_INPUT]->(a:Activity)-[:ACTIVITY_OUTPUT]->(t:Dataset) " 
-                 f"WHERE t.uuid = '{uuid}' "
-                 f"RETURN apoc.coll.toSet(COLLECT(s.{property_key})) AS {record_field_name}")
+                 f"WHERE t.uuid = $uuid "
+                 f"RETURN apoc.coll.toSet(COLLECT(s[$property_key])) AS {record_field_name}")
     else:
         if properties_to_exclude:
             query = (f"MATCH (s:Entity)-[:ACTIVITY_INPUT]->(a:Activity)-[:ACTIVITY_OUTPUT]->(t:Dataset) "
-                     f"WHERE t.uuid = '{uuid}' "
+                     f"WHERE t.uuid = $uuid "
                      f"WITH apoc.coll.toSet(COLLECT(s)) AS uniqueDirectAncestors "
-                     f"RETURN [a IN uniqueDirectAncestors | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), {properties_to_exclude}))] AS {record_field_name}")
+                     f"RETURN [a IN uniqueDirectAncestors | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), $properties_to_exclude))] AS {record_field_name}")
         else:
             query = (f"MATCH (s:Entity)-[:ACTIVITY_INPUT]->(a:Activity)-[:ACTIVITY_OUTPUT]->(t:Dataset) "
-                     f"WHERE t.uuid = '{uuid}' "
+                     f"WHERE t.uuid = $uuid "
                      f"RETURN apoc.coll.toSet(COLLECT(s)) AS {record_field_name}")
 
-    logger.info("======get_dataset_direct_ancestors() query======")
-    logger.debug(query)
+    register_query('get_dataset_direct_ancestors', query)
 
     # Sessions will often be created and destroyed using a with block context
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key, 'properties_to_exclude': properties_to_exclude})
 
         if record and record[record_field_name]:
             if property_key:
@@ -642,6 +817,52 @@ def get_dataset_direct_ancestors(neo4j_driver, uuid, property_key = None, proper
     return results
 
 
+"""
+Get the direct ancestors of multiple datasets with a single query
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+uuids : list
+    The uuids of target datasets
+properties_to_exclude : list
+    A list of node properties to exclude from result
+
+Returns
+-------
+dict
+    A dictionary of the unique lists of direct ancestor dicts keyed by dataset uuid,
+    the value is an empty list for the uuids without direct ancestors
+"""
+def get_dataset_direct_ancestors_by_uuids(neo4j_driver, uuids, properties_to_exclude = []):
+    results = {uuid: [] for uuid in uuids}
+
+    if not uuids:
+        return results
+
+    if properties_to_exclude:
+        query = (f"UNWIND $uuids AS uuid "
+                 f"MATCH (s:Entity)-[:ACTIVITY_INPUT]->(a:Activity)-[:ACTIVITY_OUTPUT]->(t:Dataset {{uuid: uuid}}) "
+                 f"WITH uuid, apoc.coll.toSet(COLLECT(s)) AS uniqueDirectAncestors "
+                 f"RETURN uuid, [a IN uniqueDirectAncestors | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), $properties_to_exclude))] AS {record_field_name}")
+    else:
+        query = (f"UNWIND $uuids AS uuid "
+                 f"MATCH (s:Entity)-[:ACTIVITY_INPUT]->(a:Activity)-[:ACTIVITY_OUTPUT]->(t:Dataset {{uuid: uuid}}) "
+                 f"RETURN uuid, apoc.coll.toSet(COLLECT(s)) AS {record_field_name}")
+
+    register_query('get_dataset_direct_ancestors_by_uuids', query)
+
+    with neo4j_driver.session() as session:
+        records = session.run(query, uuids = list(uuids), properties_to_exclude = properties_to_exclude)
+
+        for record in records:
+            # Convert the list of nodes to a list of dicts
+            results[record['uuid']] = nodes_to_dicts(record[record_field_name])
+
+    return results
+
+
 """
 For every Sample organ associated with the given dataset_uuid, retrieve the
 organ information and organ Donor information for use in composing a title for the Dataset.
@@ -661,21 +882,26 @@ list : List containing the source metadata (string representation of a Python di
 def get_dataset_donor_organs_info(neo4j_driver, dataset_uuid):
 
     with neo4j_driver.session() as session:
-        ds_donors_organs_query = (  f"MATCH (e:Dataset)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(org:Sample)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(d:Donor)"
-                                    f" WHERE e.uuid='{dataset_uuid}'"
-                                    f"   AND org.sample_category IS NOT NULL"
-                                    f"   AND org.sample_category='organ'"
-                                    f"   AND org.organ IS NOT NULL"
-                                    f" RETURN apoc.coll.toSet(COLLECT({{donor_uuid: d.uuid"
-                                    f"                                  , donor_metadata: d.metadata"
-                                    f"                                  , organ_type: org.organ}})) AS donorOrganSet")
-
-        logger.info("======get_dataset_donor_organs_info() ds_donors_organs_query======")
-        logger.debug(ds_donors_organs_query)
+        if _ancestry_closure_reads:
+            match_clause = "MATCH (e:Dataset)-[:HAS_ANCESTOR]->(org:Sample)-[:HAS_ANCESTOR]->(d:Donor)"
+        else:
+            match_clause = "MATCH (e:Dataset)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(org:Sample)<-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]-(d:Donor)"
+
+        ds_donors_organs_query = (  match_clause +
+                                    " WHERE e.uuid=$dataset_uuid"
+                                    "   AND org.sample_category IS NOT NULL"
+                                    "   AND org.sample_category='organ'"
+                                    "   AND org.organ IS NOT NULL"
+                                    " RETURN apoc.coll.toSet(COLLECT({donor_uuid: d.uuid"
+                                    "                                  , donor_metadata: d.metadata"
+                                    "                                  , organ_type: org.organ})) AS donorOrganSet")
+
+        register_query('get_dataset_donor_organs_info', ds_donors_organs_query)
 
         with neo4j_driver.session() as session:
             record = session.read_transaction(execute_readonly_tx
-                                              , ds_donors_organs_query)
+                                              , ds_donors_organs_query
+                                              , {'dataset_uuid': dataset_uuid})
 
     return record['donorOrganSet'] if record and record['donorOrganSet'] else []
 
@@ -696,13 +922,12 @@ str
     The entity_type string
 """
 def get_entity_type(neo4j_driver, entity_uuid: str) -> str:
-    query: str = f"Match (ent {{uuid: '{entity_uuid}'}}) return ent.entity_type"
+    query: str = "Match (ent {uuid: $entity_uuid}) return ent.entity_type"
 
-    logger.info("======get_entity_type() query======")
-    logger.debug(query)
+    register_query('get_entity_type', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'entity_uuid': entity_uuid})
         if record and len(record) == 1:
             return record[0]
 
@@ -725,13 +950,12 @@ str
     The creation action string
 """
 def get_entity_creation_action_activity(neo4j_driver, entity_uuid: str) -> str:
-    query: str = f"MATCH (ds:Dataset {{uuid:'{entity_uuid}'}})<-[:ACTIVITY_OUTPUT]-(a:Activity) RETURN a.creation_action"
+    query: str = "MATCH (ds:Dataset {uuid:$entity_uuid})<-[:ACTIVITY_OUTPUT]-(a:Activity) RETURN a.creation_action"
 
-    logger.info("======get_entity_creation_action() query======")
-    logger.debug(query)
+    register_query('get_entity_creation_action', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'entity_uuid': entity_uuid})
         if record and len(record) == 1:
             return record[0]
 
@@ -776,6 +1000,9 @@ def link_entity_to_direct_ancestors(neo4j_driver, entity_uuid, direct_ancestor_u
             create_outgoing_activity_relationships_tx(tx=tx
                                                       , source_node_uuids=direct_ancestor_uuids
                                                       , activity_node_uuid=activity_uuid)
+
+            # Keep the ancestry closure of this entity and its descendants in sync within the same transaction
+            update_ancestry_closure_tx(tx, [entity_uuid])
                     
             tx.commit()
     except TransactionError as te:
@@ -816,6 +1043,8 @@ def add_new_ancestors_to_existing_activity(neo4j_driver, new_ancestor_uuids, act
             create_outgoing_activity_relationships_tx(tx=tx
                                                       , source_node_uuids=new_ancestor_uuids
                                                       , activity_node_uuid=activity_uuid)
+
+            update_ancestry_closure_tx(tx, [dataset_uuid])
                     
             tx.commit()
     except TransactionError as te:
@@ -846,7 +1075,9 @@ def get_parent_activity_uuid_from_entity(neo4j_driver, entity_uuid):
         MATCH (activity:Activity)-[:ACTIVITY_OUTPUT]->(entity:Entity {uuid: $entity_uuid})
         RETURN activity.uuid AS activity_uuid
     """
-    
+
+    register_query('get_parent_activity_uuid_from_entity', query)
+
     with neo4j_driver.session() as session:
         result = session.run(query, entity_uuid=entity_uuid)
         
@@ -994,14 +1225,13 @@ def get_previous_revision_uuid(neo4j_driver, uuid):
     # Don't use [r:REVISION_OF] because 
     # Binding a variable length relationship pattern to a variable ('r') is deprecated
     query = (f"MATCH (e:Entity)-[:REVISION_OF]->(previous_revision:Entity) "
-             f"WHERE e.uuid='{uuid}' "
+             f"WHERE e.uuid=$uuid "
              f"RETURN previous_revision.uuid AS {record_field_name}")
 
-    logger.info("======get_previous_revision_uuid() query======")
-    logger.debug(query)
+    register_query('get_previous_revision_uuid', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             result = record[record_field_name]
@@ -1009,6 +1239,42 @@ def get_previous_revision_uuid(neo4j_driver, uuid):
     return result
 
 
+"""
+Get the uuids of the previous revision entities of multiple entities with a single query
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+uuids : list
+    The uuids of target entities
+
+Returns
+-------
+dict
+    A dictionary of previous revision uuids keyed by entity uuid, the value is None if not found
+"""
+def get_previous_revision_uuid_by_uuids(neo4j_driver, uuids):
+    results = {uuid: None for uuid in uuids}
+
+    if not uuids:
+        return results
+
+    query = (f"UNWIND $uuids AS uuid "
+             f"MATCH (e:Entity {{uuid: uuid}})-[:REVISION_OF]->(previous_revision:Entity) "
+             f"RETURN uuid, previous_revision.uuid AS {record_field_name}")
+
+    register_query('get_previous_revision_uuid_by_uuids', query)
+
+    with neo4j_driver.session() as session:
+        records = session.run(query, uuids = list(uuids))
+
+        for record in records:
+            results[record['uuid']] = record[record_field_name]
+
+    return results
+
+
 """
 Get the uuids of previous revision entities for a given entity
 
@@ -1030,14 +1296,13 @@ def get_previous_revision_uuids(neo4j_driver, uuid):
     # Don't use [r:REVISION_OF] because
     # Binding a variable length relationship pattern to a variable ('r') is deprecated
     query = (f"MATCH (e:Entity)-[:REVISION_OF]->(previous_revision:Entity) "
-             f"WHERE e.uuid='{uuid}' "
+             f"WHERE e.uuid=$uuid "
              f"RETURN COLLECT(previous_revision.uuid) AS {record_field_name}")
 
-    logger.info("======get_previous_revision_uuids() query======")
-    logger.debug(query)
+    register_query('get_previous_revision_uuids', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             result = record[record_field_name]
@@ -1066,14 +1331,13 @@ def get_next_revision_uuid(neo4j_driver, uuid):
     # Don't use [r:REVISION_OF] because 
     # Binding a variable length relationship pattern to a variable ('r') is deprecated
     query = (f"MATCH (e:Entity)<-[:REVISION_OF]-(next_revision:Entity) "
-             f"WHERE e.uuid='{uuid}' "
+             f"WHERE e.uuid=$uuid "
              f"RETURN next_revision.uuid AS {record_field_name}")
 
-    logger.info("======get_next_revision_uuid() query======")
-    logger.debug(query)
+    register_query('get_next_revision_uuid', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             result = record[record_field_name]
@@ -1102,14 +1366,13 @@ def get_next_revision_uuids(neo4j_driver, uuid):
     # Don't use [r:REVISION_OF] because
     # Binding a variable length relationship pattern to a variable ('r') is deprecated
     query = (f"MATCH (e:Entity)<-[:REVISION_OF]-(next_revision:Entity) "
-             f"WHERE e.uuid='{uuid}' "
+             f"WHERE e.uuid=$uuid "
              f"RETURN COLLECT(next_revision.uuid) AS {record_field_name}")
 
-    logger.info("======get_next_revision_uuids() query======")
-    logger.debug(query)
+    register_query('get_next_revision_uuids', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             result = record[record_field_name]
@@ -1138,18 +1401,17 @@ def get_collection_associated_datasets(neo4j_driver, uuid, property_key = None):
     results = []
     if property_key:
         query = (f"MATCH (e:Entity)-[:IN_COLLECTION|:USES_DATA]->(c:Collection) "
-                 f"WHERE c.uuid = '{uuid}' "
-                 f"RETURN apoc.coll.toSet(COLLECT(e.{property_key})) AS {record_field_name}")
+                 f"WHERE c.uuid = $uuid "
+                 f"RETURN apoc.coll.toSet(COLLECT(e[$property_key])) AS {record_field_name}")
     else:
         query = (f"MATCH (e:Entity)-[:IN_COLLECTION|:USES_DATA]->(c:Collection) "
-                 f"WHERE c.uuid = '{uuid}' "
+                 f"WHERE c.uuid = $uuid "
                  f"RETURN apoc.coll.toSet(COLLECT(e)) AS {record_field_name}")
 
-    logger.info("======get_collection_associated_datasets() query======")
-    logger.debug(query)
+    register_query('get_collection_associated_datasets', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key})
 
         if record and record[record_field_name]:
             if property_key:
@@ -1186,24 +1448,23 @@ def get_dataset_collections(neo4j_driver, uuid, property_key = None, properties_
 
     if property_key:
         query = (f"MATCH (e:Entity)-[:IN_COLLECTION]->(c:Collection) "
-                 f"WHERE e.uuid = '{uuid}' "
-                 f"RETURN apoc.coll.toSet(COLLECT(c.{property_key})) AS {record_field_name}")
+                 f"WHERE e.uuid = $uuid "
+                 f"RETURN apoc.coll.toSet(COLLECT(c[$property_key])) AS {record_field_name}")
     else:
         if properties_to_exclude:
             query = (f"MATCH (e:Entity)-[:IN_COLLECTION]->(c:Collection) "
-                     f"WHERE e.uuid = '{uuid}' "
+                     f"WHERE e.uuid = $uuid "
                      f"WITH apoc.coll.toSet(COLLECT(c)) AS uniqueCollections "
-                     f"RETURN [c IN uniqueCollections | apoc.create.vNode(labels(c), apoc.map.removeKeys(properties(c), {properties_to_exclude}))] AS {record_field_name}")
+                     f"RETURN [c IN uniqueCollections | apoc.create.vNode(labels(c), apoc.map.removeKeys(properties(c), $properties_to_exclude))] AS {record_field_name}")
         else:
             query = (f"MATCH (e:Entity)-[:IN_COLLECTION]->(c:Collection) "
-                     f"WHERE e.uuid = '{uuid}' "
+                     f"WHERE e.uuid = $uuid "
                      f"RETURN apoc.coll.toSet(COLLECT(c)) AS {record_field_name}")
 
-    logger.info("======get_dataset_collections() query======")
-    logger.debug(query)
+    register_query('get_dataset_collections', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key, 'properties_to_exclude': properties_to_exclude})
 
         if record and record[record_field_name]:
             if property_key:
@@ -1215,6 +1476,53 @@ def get_dataset_collections(neo4j_driver, uuid, property_key = None, properties_
 
     return results
 
+
+"""
+Get the associated collections of multiple datasets or publications with a single query
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+uuids : list
+    The uuids of datasets or publications
+properties_to_exclude : list
+    A list of node properties to exclude from result
+
+Returns
+-------
+dict
+    A dictionary of the lists of collection dicts keyed by dataset uuid,
+    the value is an empty list for the uuids not in any collection
+"""
+def get_dataset_collections_by_uuids(neo4j_driver, uuids, properties_to_exclude = []):
+    results = {uuid: [] for uuid in uuids}
+
+    if not uuids:
+        return results
+
+    if properties_to_exclude:
+        query = (f"UNWIND $uuids AS uuid "
+                 f"MATCH (e:Entity {{uuid: uuid}})-[:IN_COLLECTION]->(c:Collection) "
+                 f"WITH uuid, apoc.coll.toSet(COLLECT(c)) AS uniqueCollections "
+                 f"RETURN uuid, [c IN uniqueCollections | apoc.create.vNode(labels(c), apoc.map.removeKeys(properties(c), $properties_to_exclude))] AS {record_field_name}")
+    else:
+        query = (f"UNWIND $uuids AS uuid "
+                 f"MATCH (e:Entity {{uuid: uuid}})-[:IN_COLLECTION]->(c:Collection) "
+                 f"RETURN uuid, apoc.coll.toSet(COLLECT(c)) AS {record_field_name}")
+
+    register_query('get_dataset_collections_by_uuids', query)
+
+    with neo4j_driver.session() as session:
+        records = session.run(query, uuids = list(uuids), properties_to_exclude = properties_to_exclude)
+
+        for record in records:
+            # Convert the list of nodes to a list of dicts
+            results[record['uuid']] = nodes_to_dicts(record[record_field_name])
+
+    return results
+
+
 """
 Get the associated collection for a given publication
 
@@ -1235,14 +1543,13 @@ dict
 def get_publication_associated_collection(neo4j_driver, uuid):
     result = {}
     query = (f"MATCH (p:Publication)-[:USES_DATA]->(c:Collection) "
-             f"WHERE p.uuid = '{uuid}' "
+             f"WHERE p.uuid = $uuid "
              f"RETURN c as {record_field_name}")
 
-    logger.info("=====get_publication_associated_collection() query======")
-    logger.debug(query)
+    register_query('get_publication_associated_collection', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             # Convert the neo4j node into Python dict
@@ -1270,15 +1577,14 @@ dict
 """
 def get_collection_associated_publication(neo4j_driver, uuid):
     result = {}
-    query = (f"MATCH (p:Publication)-[:USES_DATA]->(c:Collection) "
-             f"WHERE c.uuid = '{uuid}' "
-             f"RETURN {{uuid: p.uuid, hubmap_id: p.hubmap_id, title: p.title}} AS publication")
+    query = ("MATCH (p:Publication)-[:USES_DATA]->(c:Collection) "
+             "WHERE c.uuid = $uuid "
+             "RETURN {uuid: p.uuid, hubmap_id: p.hubmap_id, title: p.title} AS publication")
 
-    logger.info("=====get_collection_associated_publication() query======")
-    logger.debug(query)
+    register_query('get_collection_associated_publication', query)
 
     with neo4j_driver.session() as session:
-        record = session.run(query).single()
+        record = session.run(query, uuid = uuid).single()
         if record:
             result = record["publication"]
     return result
@@ -1307,19 +1613,18 @@ def get_dataset_upload(neo4j_driver, uuid, properties_to_exclude = []):
 
     if properties_to_exclude:
         query = (f"MATCH (e:Entity)-[:IN_UPLOAD]->(s:Upload) "
-                 f"WHERE e.uuid = '{uuid}' "
+                 f"WHERE e.uuid = $uuid "
                  f"WITH s AS up "
-                 f"RETURN apoc.create.vNode(labels(up), apoc.map.removeKeys(properties(up), {properties_to_exclude})) AS {record_field_name}")
+                 f"RETURN apoc.create.vNode(labels(up), apoc.map.removeKeys(properties(up), $properties_to_exclude)) AS {record_field_name}")
     else:
         query = (f"MATCH (e:Entity)-[:IN_UPLOAD]->(s:Upload) "
-                 f"WHERE e.uuid = '{uuid}' "
+                 f"WHERE e.uuid = $uuid "
                  f"RETURN s AS {record_field_name}")
 
-    logger.info("======get_dataset_upload() query======")
-    logger.debug(query)
+    register_query('get_dataset_upload', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'properties_to_exclude': properties_to_exclude})
 
         if record and record[record_field_name]:
             # Convert the node to a dict
@@ -1328,6 +1633,50 @@ def get_dataset_upload(neo4j_driver, uuid, properties_to_exclude = []):
     return result
 
 
+"""
+Get the associated Uploads of multiple datasets with a single query
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+uuids : list
+    The uuids of datasets
+properties_to_exclude : list
+    A list of node properties to exclude from result
+
+Returns
+-------
+dict
+    A dictionary of Upload dicts keyed by dataset uuid, the value is an empty dict for the uuids not in any Upload
+"""
+def get_dataset_upload_by_uuids(neo4j_driver, uuids, properties_to_exclude = []):
+    results = {uuid: {} for uuid in uuids}
+
+    if not uuids:
+        return results
+
+    if properties_to_exclude:
+        query = (f"UNWIND $uuids AS uuid "
+                 f"MATCH (e:Entity {{uuid: uuid}})-[:IN_UPLOAD]->(s:Upload) "
+                 f"RETURN uuid, apoc.create.vNode(labels(s), apoc.map.removeKeys(properties(s), $properties_to_exclude)) AS {record_field_name}")
+    else:
+        query = (f"UNWIND $uuids AS uuid "
+                 f"MATCH (e:Entity {{uuid: uuid}})-[:IN_UPLOAD]->(s:Upload) "
+                 f"RETURN uuid, s AS {record_field_name}")
+
+    register_query('get_dataset_upload_by_uuids', query)
+
+    with neo4j_driver.session() as session:
+        records = session.run(query, uuids = list(uuids), properties_to_exclude = properties_to_exclude)
+
+        for record in records:
+            # Convert the node to a dict
+            results[record['uuid']] = node_to_dict(record[record_field_name])
+
+    return results
+
+
 """
 Get a list of associated dataset dicts for a given collection
 
@@ -1348,27 +1697,18 @@ list
 def get_collection_datasets(neo4j_driver, uuid, properties_to_exclude = []):
     results = []
 
-    fields_to_omit = SchemaConstants.OMITTED_FIELDS
-
+    # The same query with or without properties_to_exclude
+    fields_to_omit = properties_to_exclude + SchemaConstants.OMITTED_FIELDS
 
-    if properties_to_exclude:
-        merged_list = properties_to_exclude + fields_to_omit
-        
-        query = (f"MATCH (e:Dataset)-[:IN_COLLECTION]->(c:Collection) "
-                 f"WHERE c.uuid = '{uuid}' "
-                 f"WITH COLLECT(DISTINCT e) AS uniqueDataset "
-                 f"RETURN [a IN uniqueDataset | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), {merged_list}))] AS {record_field_name}")
-    else:
-        query = (f"MATCH (e:Dataset)-[:IN_COLLECTION]->(c:Collection) "
-                 f"WHERE c.uuid = '{uuid}' "
-                 f"WITH COLLECT(DISTINCT e) AS uniqueDataset "
-                 f"RETURN [a IN uniqueDataset | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), {fields_to_omit}))] AS {record_field_name}")
+    query = (f"MATCH (e:Dataset)-[:IN_COLLECTION]->(c:Collection) "
+             f"WHERE c.uuid = $uuid "
+             f"WITH COLLECT(DISTINCT e) AS uniqueDataset "
+             f"RETURN [a IN uniqueDataset | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), $fields_to_omit))] AS {record_field_name}")
 
-    logger.info("======get_collection_datasets() query======")
-    logger.debug(query)
+    register_query('get_collection_datasets', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'fields_to_omit': fields_to_omit})
 
         if record and record[record_field_name]:
             # Convert the list of nodes to a list of dicts
@@ -1398,14 +1738,13 @@ def get_collection_datasets_data_access_levels(neo4j_driver, uuid):
     results = []
 
     query = (f"MATCH (d:Dataset)-[:IN_COLLECTION]->(c:Collection) "
-             f"WHERE c.uuid = '{uuid}' "
+             f"WHERE c.uuid = $uuid "
              f"RETURN COLLECT(DISTINCT d.data_access_level) AS {record_field_name}")
 
-    logger.info("======get_collection_datasets_data_access_levels() query======")
-    logger.debug(query)
+    register_query('get_collection_datasets_data_access_levels', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             # Just return the list of values
@@ -1434,14 +1773,13 @@ def get_collection_datasets_statuses(neo4j_driver, uuid):
     results = []
 
     query = (f"MATCH (d: Dataset)-[:IN_COLLECTION]->(c:Collection) "
-             f"WHERE c.uuid = '{uuid}' "
+             f"WHERE c.uuid = $uuid "
              f"RETURN COLLECT(DISTINCT d.status) AS {record_field_name}")
 
-    logger.info("======get_collection_datasets_statuses() query======")
-    logger.debug(query)
+    register_query('get_collection_datasets_statuses', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         if record and record[record_field_name]:
             # Just return the list of values
@@ -1464,28 +1802,21 @@ dataset_uuids_list : list
     A list of dataset uuids to be linked to Upload
 """
 def link_datasets_to_upload(neo4j_driver, upload_uuid, dataset_uuids_list):
-    # Join the list of uuids and wrap each string in single quote
-    joined_str = ', '.join("'{0}'".format(dataset_uuid) for dataset_uuid in dataset_uuids_list)
-    # Format a string to be used in Cypher query.
-    # E.g., ['fb6757b606ac35be7fa85062fde9c2e1', 'ku0gd44535be7fa85062fde98gt5']
-    dataset_uuids_list_str = '[' + joined_str + ']'
-
     try:
         with neo4j_driver.session() as session:
             tx = session.begin_transaction()
 
             logger.info("Create relationships between the target Upload and the given Datasets")
 
-            query = (f"MATCH (s:Upload), (d:Dataset) "
-                     f"WHERE s.uuid = '{upload_uuid}' AND d.uuid IN {dataset_uuids_list_str} "
+            query = ("MATCH (s:Upload), (d:Dataset) "
+                     "WHERE s.uuid = $upload_uuid AND d.uuid IN $dataset_uuids "
                      # Use MERGE instead of CREATE to avoid creating the existing relationship multiple times
                      # MERGE creates the relationship only if there is no existing relationship
-                     f"MERGE (s)<-[r:IN_UPLOAD]-(d)") 
+                     "MERGE (s)<-[r:IN_UPLOAD]-(d)") 
 
-            logger.info("======link_datasets_to_upload() query======")
-            logger.debug(query)
+            register_query('link_datasets_to_upload', query)
 
-            tx.run(query)
+            tx.run(query, upload_uuid = upload_uuid, dataset_uuids = list(dataset_uuids_list))
             tx.commit()
     except TransactionError as te:
         msg = f"TransactionError from calling link_datasets_to_upload(): {te.value}"
@@ -1513,26 +1844,19 @@ dataset_uuids_list : list
     A list of dataset uuids to be unlinked from Upload
 """
 def unlink_datasets_from_upload(neo4j_driver, upload_uuid, dataset_uuids_list):
-    # Join the list of uuids and wrap each string in single quote
-    joined_str = ', '.join("'{0}'".format(dataset_uuid) for dataset_uuid in dataset_uuids_list)
-    # Format a string to be used in Cypher query.
-    # E.g., ['fb6757b606ac35be7fa85062fde9c2e1', 'ku0gd44535be7fa85062fde98gt5']
-    dataset_uuids_list_str = '[' + joined_str + ']'
-
     try:
         with neo4j_driver.session() as session:
             tx = session.begin_transaction()
 
             logger.info("Delete relationships between the target Upload and the given Datasets")
 
-            query = (f"MATCH (s:Upload)<-[r:IN_UPLOAD]-(d:Dataset) "
-                     f"WHERE s.uuid = '{upload_uuid}' AND d.uuid IN {dataset_uuids_list_str} "
-                     f"DELETE r") 
+            query = ("MATCH (s:Upload)<-[r:IN_UPLOAD]-(d:Dataset) "
+                     "WHERE s.uuid = $upload_uuid AND d.uuid IN $dataset_uuids "
+                     "DELETE r") 
 
-            logger.info("======unlink_datasets_from_upload() query======")
-            logger.debug(query)
+            register_query('unlink_datasets_from_upload', query)
 
-            tx.run(query)
+            tx.run(query, upload_uuid = upload_uuid, dataset_uuids = list(dataset_uuids_list))
             tx.commit()
     except TransactionError as te:
         msg = f"TransactionError from calling unlink_datasets_from_upload(): {te.value}"
@@ -1568,32 +1892,24 @@ list
 """
 def get_upload_datasets(neo4j_driver, uuid, property_key = None, properties_to_exclude = []):
     results = []
-    fields_to_omit = SchemaConstants.OMITTED_FIELDS
+    # The same query with or without properties_to_exclude
+    fields_to_omit = properties_to_exclude + SchemaConstants.OMITTED_FIELDS
     if property_key:
         query = (f"MATCH (e:Dataset)-[:IN_UPLOAD]->(s:Upload) "
-                 f"WHERE s.uuid = '{uuid}' "
+                 f"WHERE s.uuid = $uuid "
                  # COLLECT() returns a list
                  # apoc.coll.toSet() reruns a set containing unique nodes
-                 f"RETURN apoc.coll.toSet(COLLECT(e.{property_key})) AS {record_field_name}")
+                 f"RETURN apoc.coll.toSet(COLLECT(e[$property_key])) AS {record_field_name}")
     else:
-        if properties_to_exclude:
-            merged_list = properties_to_exclude + fields_to_omit
+        query = (f"MATCH (e:Dataset)-[:IN_UPLOAD]->(s:Upload) "
+                 f"WHERE s.uuid = $uuid "
+                 f"WITH COLLECT(DISTINCT e) AS uniqueUploads "
+                 f"RETURN [a IN uniqueUploads | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), $fields_to_omit))] AS {record_field_name}")
 
-            query = (f"MATCH (e:Dataset)-[:IN_UPLOAD]->(s:Upload) "
-                     f"WHERE s.uuid = '{uuid}' "
-                     f"WITH COLLECT(DISTINCT e) AS uniqueUploads "
-                     f"RETURN [a IN uniqueUploads | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), {merged_list}))] AS {record_field_name}")
-        else:
-            query = (f"MATCH (e:Dataset)-[:IN_UPLOAD]->(s:Upload) "
-                     f"WHERE s.uuid = '{uuid}' "
-                     f"WITH COLLECT(DISTINCT e) AS uniqueUploads "
-                     f"RETURN [a IN uniqueUploads | apoc.create.vNode(labels(a), apoc.map.removeKeys(properties(a), {fields_to_omit}))] AS {record_field_name}")
-
-    logger.info("======get_upload_datasets() query======")
-    logger.debug(query)
+    register_query('get_upload_datasets', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key, 'fields_to_omit': fields_to_omit})
 
         if record and record[record_field_name]:
             if property_key:
@@ -1625,14 +1941,13 @@ list
 def get_found_dataset_uuids(neo4j_driver, uuids):
     query = (
         f"MATCH (e:Dataset) "
-        f"WHERE e.uuid IN {uuids} "
+        f"WHERE e.uuid IN $uuids "
         f"RETURN COLLECT(e.uuid) AS {record_field_name}")
 
-    logger.info("======get_not_found_or_not_dataset_uuids() query======")
-    logger.debug(query)
+    register_query('get_not_found_or_not_dataset_uuids', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuids': list(uuids)})
 
         uuids_list = record[record_field_name]
 
@@ -1657,14 +1972,13 @@ list
 def get_component_dataset_uuids(neo4j_driver, uuid):
     query = (
         f"MATCH (c:Dataset)<-[:ACTIVITY_OUTPUT]-(a:Activity)<-[:ACTIVITY_INPUT]-(p:Dataset) "
-        f"WHERE p.uuid='{uuid}' AND a.creation_action='Multi-Assay Split' "
+        f"WHERE p.uuid=$uuid AND a.creation_action='Multi-Assay Split' "
         f"RETURN COLLECT(c.uuid) AS {record_field_name}")
 
-    logger.info("======get_component_dataset_uuids() query======")
-    logger.debug(query)
+    register_query('get_component_dataset_uuids', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         uuids_list = record[record_field_name]
 
@@ -1692,16 +2006,15 @@ int
 def count_attached_published_datasets(neo4j_driver, entity_type, uuid):
     query = (f"MATCH (e:{entity_type})-[:ACTIVITY_INPUT|ACTIVITY_OUTPUT*]->(d:Dataset) "
              # Use the string function toLower() to avoid case-sensetivity issue
-             f"WHERE e.uuid='{uuid}' AND toLower(d.status) = 'published' "
+             f"WHERE e.uuid=$uuid AND toLower(d.status) = 'published' "
              # COLLECT() returns a list
              # apoc.coll.toSet() reruns a set containing unique nodes
              f"RETURN COUNT(d) AS {record_field_name}")
 
-    logger.info("======count_attached_published_datasets() query======")
-    logger.debug(query)
+    register_query('count_attached_published_datasets', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid})
 
         count = record[record_field_name]
 
@@ -1733,26 +2046,25 @@ def get_sample_direct_ancestor(neo4j_driver, uuid, property_key = None, properti
     if property_key:
         query = (f"MATCH (s:Sample)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(parent:Entity) "
                  # Filter out the Lab entity if it's the ancestor
-                 f"WHERE s.uuid='{uuid}' AND parent.entity_type <> 'Lab' "
-                 f"RETURN parent.{property_key} AS {record_field_name}")
+                 f"WHERE s.uuid=$uuid AND parent.entity_type <> 'Lab' "
+                 f"RETURN parent[$property_key] AS {record_field_name}")
     else:
         if properties_to_exclude:
             query = (f"MATCH (s:Sample)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(parent:Entity) "
                  # Filter out the Lab entity if it's the ancestor
-                 f"WHERE s.uuid='{uuid}' AND parent.entity_type <> 'Lab' "
+                 f"WHERE s.uuid=$uuid AND parent.entity_type <> 'Lab' "
                  f"WITH parent AS p "
-                 f"RETURN apoc.create.vNode(labels(p), apoc.map.removeKeys(properties(p), {properties_to_exclude})) AS {record_field_name}")
+                 f"RETURN apoc.create.vNode(labels(p), apoc.map.removeKeys(properties(p), $properties_to_exclude)) AS {record_field_name}")
         else:
             query = (f"MATCH (s:Sample)<-[:ACTIVITY_OUTPUT]-(:Activity)<-[:ACTIVITY_INPUT]-(parent:Entity) "
                  # Filter out the Lab entity if it's the ancestor
-                 f"WHERE s.uuid='{uuid}' AND parent.entity_type <> 'Lab' "
+                 f"WHERE s.uuid=$uuid AND parent.entity_type <> 'Lab' "
                  f"RETURN parent AS {record_field_name}")
 
-    logger.info("======get_sample_direct_ancestor() query======")
-    logger.debug(query)
+    register_query('get_sample_direct_ancestor', query)
 
     with neo4j_driver.session() as session:
-        record = session.read_transaction(execute_readonly_tx, query)
+        record = session.read_transaction(execute_readonly_tx, query, {'uuid': uuid, 'property_key': property_key, 'properties_to_exclude': properties_to_exclude})
 
         if record and record[record_field_name]:
             if property_key:
@@ -1784,15 +2096,15 @@ dict
     A dictionary of updated entity details returned from the Cypher query
 """
 def update_entity(neo4j_driver, entity_type, entity_data_dict, uuid):
-    node_properties_map = build_properties_map(entity_data_dict)
+    parameters = build_properties_params(entity_data_dict)
+    parameters['uuid'] = uuid
 
     query = (f"MATCH (e:{entity_type}) "
-             f"WHERE e.uuid = '{uuid}' "
-             f"SET e += {node_properties_map} "
+             f"WHERE e.uuid = $uuid "
+             f"{properties_set_clause('e', '+=')}"
              f"RETURN e AS {record_field_name}")
 
-    logger.info("======update_entity() query======")
-    logger.debug(query)
+    register_query('update_entity', query)
 
     try:
         with neo4j_driver.session() as session:
@@ -1800,7 +2112,7 @@ def update_entity(neo4j_driver, entity_type, entity_data_dict, uuid):
 
             tx = session.begin_transaction()
 
-            result = tx.run(query)
+            result = tx.run(query, parameters)
             record = result.single()
             entity_node = record[record_field_name]
 
@@ -1822,6 +2134,172 @@ def update_entity(neo4j_driver, entity_type, entity_data_dict, uuid):
         raise TransactionError(msg)
 
 
+"""
+Update the properties of multiple existing entity nodes of the same type in one transaction,
+with one UNWIND statement per batch of entities
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+entity_type : str
+    One of the normalized entity types: Dataset, Upload, Collection, Sample, Donor
+entity_data_dicts : dict
+    The properties to be updated keyed by the uuid of each target entity
+batch_size : int
+    The number of entities updated by one statement
+
+Returns
+-------
+dict
+    The updated entity dicts keyed by uuid
+"""
+def update_entities(neo4j_driver, entity_type, entity_data_dicts, batch_size = SchemaConstants.NEO4J_BULK_CREATE_BATCH_SIZE):
+    try:
+        with neo4j_driver.session() as session:
+            tx = session.begin_transaction()
+
+            results = update_entities_tx(tx, entity_type, entity_data_dicts, batch_size)
+
+            tx.commit()
+
+            return results
+    except TransactionError as te:
+        msg = f"TransactionError from calling update_entities(): {te}"
+        # Log the full stack trace, prepend a line with our message
+        logger.exception(msg)
+
+        if tx.closed() == False:
+            logger.error("Failed to commit update_entities() transaction, rollback")
+
+            tx.rollback()
+
+        raise TransactionError(tx, msg)
+
+
+"""
+Update the properties of multiple existing entity nodes of the same type within the given transaction
+
+Parameters
+----------
+tx : neo4j.Transaction object
+    The neo4j.Transaction object instance
+entity_type : str
+    One of the normalized entity types: Dataset, Upload, Collection, Sample, Donor
+entity_data_dicts : dict
+    The properties to be updated keyed by the uuid of each target entity
+batch_size : int
+    The number of entities updated by one statement
+
+Returns
+-------
+dict
+    The updated entity dicts keyed by uuid
+"""
+def update_entities_tx(tx, entity_type, entity_data_dicts, batch_size = SchemaConstants.NEO4J_BULK_CREATE_BATCH_SIZE):
+    query = (f"UNWIND $rows AS row "
+             f"MATCH (e:{entity_type}) "
+             f"WHERE e.uuid = row.uuid "
+             f"{properties_set_clause('e', '+=', params = 'row')}"
+             f"RETURN e AS {record_field_name}")
+
+    register_query('update_entities', query)
+
+    uuids = list(entity_data_dicts)
+    batch_size = max(batch_size, 1)
+    results = {}
+
+    for index in range(0, len(uuids), batch_size):
+        rows = [{**build_properties_params(entity_data_dicts[uuid]), 'uuid': uuid} for uuid in uuids[index:index + batch_size]]
+
+        for record in tx.run(query, rows = rows):
+            entity_dict = node_to_dict(record[record_field_name])
+            results[entity_dict['uuid']] = entity_dict
+
+    # Same as update_entity() failing on a missing node, don't commit a partial update
+    if len(results) != len(uuids):
+        raise TransactionError(tx, f"Updated {len(results)} of {len(uuids)} {entity_type} nodes, some uuids not found")
+
+    return results
+
+
+"""
+Set the status of all the component datasets of a Multi-Assay Split parent dataset in one transaction,
+with the same last modified user and timestamp as the parent and a new entry in each status_history
+
+The components already in the given status or Published are left as is, same as the validators
+of `PUT /entities/<id>` rejecting such a status update
+
+Parameters
+----------
+neo4j_driver : neo4j.Driver object
+    The neo4j database connection pool
+uuid : str
+    The uuid of the parent dataset
+status : str
+    The new status of the parent dataset
+last_modified_dict : dict
+    The last_modified_timestamp, last_modified_user_sub, last_modified_user_email and
+    last_modified_user_displayname of the parent dataset
+
+Returns
+-------
+list
+    The uuids of the updated component datasets
+"""
+def update_component_datasets_status(neo4j_driver, uuid, status, last_modified_dict):
+    query = ("MATCH (c:Dataset)<-[:ACTIVITY_OUTPUT]-(a:Activity)<-[:ACTIVITY_INPUT]-(p:Dataset) "
+             "WHERE p.uuid=$uuid AND a.creation_action='Multi-Assay Split' "
+             "RETURN DISTINCT c.uuid AS uuid, c.status AS status, c.status_history AS status_history")
+
+    register_query('get_component_datasets_status', query)
+
+    status_entry = {
+        'status': status,
+        'changed_by_email': last_modified_dict['last_modified_user_email'],
+        'change_timestamp': last_modified_dict['last_modified_timestamp']
+    }
+
+    try:
+        with neo4j_driver.session() as session:
+            tx = session.begin_transaction()
+
+            entity_data_dicts = {}
+            for record in tx.run(query, uuid = uuid):
+                component_status = (record['status'] or '').lower()
+
+                if component_status in [status.lower(), SchemaConstants.DATASET_STATUS_PUBLISHED]:
+                    continue
+
+                # Same parsing as the set_status_history() trigger method
+                status_history = []
+                if record['status_history']:
+                    status_history = json.loads(record['status_history'].replace("'", "\""))
+
+                entity_data_dicts[record['uuid']] = {
+                    **last_modified_dict,
+                    'status': status,
+                    'status_history': status_history + [status_entry]
+                }
+
+            update_entities_tx(tx, 'Dataset', entity_data_dicts)
+
+            tx.commit()
+
+            return list(entity_data_dicts)
+    except TransactionError as te:
+        msg = f"TransactionError from calling update_component_datasets_status(): {te}"
+        # Log the full stack trace, prepend a line with our message
+        logger.exception(msg)
+
+        if tx.closed() == False:
+            logger.error("Failed to commit update_component_datasets_status() transaction, rollback")
+
+            tx.rollback()
+
+        raise TransactionError(tx, msg)
+
+
 """
 Create a new activity node in neo4j
 
@@ -1838,16 +2316,15 @@ neo4j.node
     A neo4j node instance of the newly created entity node
 """
 def create_activity_tx(tx, activity_data_dict):
-    node_properties_map = build_properties_map(activity_data_dict)
+    parameters = build_properties_params(activity_data_dict)
 
     query = (f"CREATE (e:Activity) "
-             f"SET e = {node_properties_map} "
+             f"{properties_set_clause('e')}"
              f"RETURN e AS {record_field_name}")
 
-    logger.info("======create_activity_tx() query======")
-    logger.debug(query)
+    register_query('create_activity_tx', query)
 
-    result = tx.run(query)
+    result = tx.run(query, parameters)
     record = result.single()
     node = record[record_field_name]
 
@@ -1867,6 +2344,9 @@ def validate_direct_ancestors(neo4j_driver, entity_uuids, allowed_types, disallo
     WHERE NOT label_ok OR has_forbidden_prop
     RETURN DISTINCT n.uuid AS invalid_uuid
     """
+
+    register_query('validate_direct_ancestors', query)
+
     with neo4j_driver.session() as session:
         result = session.run(query, 
                              uuids=entity_uuids, 
@@ -1877,7 +2357,7 @@ def validate_direct_ancestors(neo4j_driver, entity_uuids, allowed_types, disallo
 
 
 """
-Build the property key-value pairs to be used in the Cypher clause for node creation/update
+Build the query parameters of the node properties to be used in the Cypher clause for node creation/update
 
 Parameters
 ----------
@@ -1886,45 +2366,58 @@ entity_data_dict : dict
 
 Returns
 -------
-str
-    A string representation of the node properties map containing 
-    key-value pairs to be used in Cypher clause
+dict
+    The node properties to be bound to $properties, and the list of the property keys
+    to be set with the neo4j TIMESTAMP() function to be bound to $timestamp_keys
 """
-def build_properties_map(entity_data_dict):
-    separator = ', '
-    node_properties_list = []
+def build_properties_params(entity_data_dict):
+    node_properties = {}
+    timestamp_keys = []
 
     for key, value in entity_data_dict.items():
         if isinstance(value, (int, bool)):
             # Treat integer and boolean as is
-            key_value_pair = f"{key}: {value}"
+            node_properties[key] = value
         elif isinstance(value, str):
             # Special case is the value is 'TIMESTAMP()' string
-            # Remove the quotes since neo4j only takes TIMESTAMP() as a function
+            # neo4j only takes TIMESTAMP() as a function, see properties_set_clause()
             if value == 'TIMESTAMP()':
-                key_value_pair = f"{key}: {value}"
+                timestamp_keys.append(key)
             else:
-                # Escape single quote
-                escaped_str = value.replace("'", r"\'")
-                # Quote the value
-                key_value_pair = f"{key}: '{escaped_str}'"
+                node_properties[key] = value
         else:
             # Convert list and dict to string, retain the original data without removing any control characters
             # Will need to call schema_manager.convert_str_literal() to convert the list/dict literal back to object
-            # Note that schema_manager.convert_str_literal() removes any control characters to avoid SyntaxError 
-            # Must also escape single quotes in the string to build a valid Cypher query
-            escaped_str = str(value).replace("'", r"\'")
-            # Also need to quote the string value
-            key_value_pair = f"{key}: '{escaped_str}'"
+            # Note that schema_manager.convert_str_literal() removes any control characters to avoid SyntaxError
+            node_properties[key] = str(value)
 
-        # Add to the list
-        node_properties_list.append(key_value_pair)
+    return {'properties': node_properties, 'timestamp_keys': timestamp_keys}
+
+
+"""
+Build the Cypher SET clause of the node properties bound by build_properties_params()
 
-    # Example: {uuid: 'eab7fd6911029122d9bbd4d96116db9b', rui_location: 'Joe <info>', lab_tissue_sample_id: 'dadsadsd'}
-    # Note: all the keys are not quoted, otherwise Cypher syntax error
-    node_properties_map = f"{{ {separator.join(node_properties_list)} }}"
+Parameters
+----------
+variable : str
+    The variable of the target node in the query
+operator : str
+    `=` to replace all the node properties on creation, `+=` to add/update the given properties
+params : str
+    The map holding the `properties` and `timestamp_keys` built by build_properties_params(),
+    E.g., the row variable of an UNWIND, None for the $properties and $timestamp_keys parameters
+
+Returns
+-------
+str
+    The SET clause which is the same for any node properties
+"""
+def properties_set_clause(variable, operator = '=', params = None):
+    properties = f"{params}.properties" if params else "$properties"
+    timestamp_keys = f"{params}.timestamp_keys" if params else "$timestamp_keys"
 
-    return node_properties_map
+    return (f"SET {variable} {operator} {properties}, "
+            f"{variable} += apoc.map.fromLists({timestamp_keys}, [key IN {timestamp_keys} | TIMESTAMP()]) ")
 
 
 """
@@ -2000,14 +2493,13 @@ def create_relationship_tx(tx, source_node_uuid, target_node_uuid, relationship,
         outgoing = direction
 
     query = (f"MATCH (s), (t) "
-             f"WHERE s.uuid = '{source_node_uuid}' AND t.uuid = '{target_node_uuid}' "
+             f"WHERE s.uuid = $source_node_uuid AND t.uuid = $target_node_uuid "
              f"CREATE (s){incoming}[r:{relationship}]{outgoing}(t) "
              f"RETURN type(r) AS {record_field_name}")
 
-    logger.info("======create_relationship_tx() query======")
-    logger.debug(query)
+    register_query('create_relationship_tx', query)
 
-    result = tx.run(query)
+    result = tx.run(query, source_node_uuid = source_node_uuid, target_node_uuid = target_node_uuid)
 
 """
 Create multiple relationships between a target node and each node in
@@ -2041,6 +2533,8 @@ def _create_relationships_unwind_tx(tx:Neo4jSession, source_uuid_list:list, targ
         f"RETURN src_uuid AS linked_uuid"
     )
 
+    register_query('_create_relationships_unwind_tx', query)
+
     result = tx.run(  query=query
                     , target_uuid=target_uuid
                     , source_uuid_list=source_uuid_list)
@@ -2061,14 +2555,13 @@ target_node_uuid : str
 """
 def create_outgoing_activity_relationships_tx(tx, source_node_uuids:list, activity_node_uuid:str):
     # N.B. Neo4j CQL CREATE command supports only directional relationships
-    query = (f"MATCH (e:Entity), (a:Activity)"
-             f" WHERE e.uuid IN {source_node_uuids} AND a.uuid = '{activity_node_uuid}'"
-             f" CREATE (e) - [r:ACTIVITY_INPUT]->(a)")
+    query = ("MATCH (e:Entity), (a:Activity)"
+             " WHERE e.uuid IN $source_node_uuids AND a.uuid = $activity_node_uuid"
+             " CREATE (e) - [r:ACTIVITY_INPUT]->(a)")
 
-    logger.info("======create_outgoing_activity_relationships_tx() query======")
-    logger.debug(query)
+    register_query('create_outgoing_activity_relationships_tx', query)
 
-    result = tx.run(query)
+    result = tx.run(query, source_node_uuids = list(source_node_uuids), activity_node_uuid = activity_node_uuid)
 
 """
 Execute a unit of work in a managed read transaction
@@ -2079,18 +2572,172 @@ tx : transaction_function
     a function that takes a transaction as an argument and does work with the transaction
 query : str
     The target cypher query to run
+parameters : dict
+    The values bound to the $parameters of the query, None by default
 
 Returns
 -------
 neo4j.Record or None
     A single record returned from the Cypher query
 """
-def execute_readonly_tx(tx, query):
-    result = tx.run(query)
+def execute_readonly_tx(tx, query, parameters = None):
+    result = tx.run(query, parameters)
     record = result.single()
     return record
 
 
+"""
+Log a named query and record its text in the query registry before it gets executed
+
+All the values of a query are bound as $parameters, so each name should only ever
+have a few distinct query texts (e.g. with or without a property key filter), which
+neo4j plans once and reuses from its query plan cache
+
+Parameters
+----------
+query_name : str
+    The name of the query, usually the name of the function building it,
+    prefixed with the module name outside of this module (e.g. 'app_neo4j_queries.get_siblings')
+query : str
+    The target cypher query to run
+
+Returns
+-------
+str
+    The given query
+"""
+def register_query(query_name, query):
+    logger.info(f"======{query_name}() query======")
+    logger.debug(query)
+
+    shape = hashlib.md5(query.encode('utf-8')).hexdigest()[:12]
+
+    with _query_registry_lock:
+        entry = _query_registry.setdefault(query_name, {'shapes': set(), 'executions': 0, 'overflow': False})
+        entry['executions'] += 1
+
+        if shape not in entry['shapes']:
+            # Values interpolated into the query text show up as one new shape per call
+            if len(entry['shapes']) < SchemaConstants.NEO4J_QUERY_MAX_SHAPES:
+                entry['shapes'].add(shape)
+            elif not entry['overflow']:
+                entry['overflow'] = True
+                logger.warning(f"More than {SchemaConstants.NEO4J_QUERY_MAX_SHAPES} distinct texts of the {query_name}() query, "
+                               "values are likely interpolated instead of bound as parameters")
+
+    return query
+
+
+"""
+Get the number of distinct texts and executions of each named query of this process
+
+Returns
+-------
+dict
+    The shapes count, executions count, and whether the shapes limit was reached, keyed by query name
+"""
+def get_query_registry():
+    with _query_registry_lock:
+        return {query_name: {'shapes': len(entry['shapes']),
+                             'executions': entry['executions'],
+                             'overflow': entry['overflow']}
+                for query_name, entry in sorted(_query_registry.items())}
+
+
+"""
+Set whether get_ancestors(), get_descendants(), get_dataset_donor_organs_info() and the ancestry
+reads of app_neo4j_queries use the materialized HAS_ANCESTOR closure instead of walking the
+ACTIVITY_INPUT/ACTIVITY_OUTPUT paths. Only enable it once the closure has been backfilled with
+rebuild_ancestry_closure.py, the writes keep it up to date either way
+
+Parameters
+----------
+enabled : bool
+    True to read the closure
+"""
+def set_ancestry_closure_reads(enabled):
+    global _ancestry_closure_reads
+
+    _ancestry_closure_reads = bool(enabled)
+
+
+"""
+Check if the ancestry reads use the materialized HAS_ANCESTOR closure
+
+Returns
+-------
+bool
+    True if enabled by set_ancestry_closure_reads()
+"""
+def ancestry_closure_reads_enabled():
+    return _ancestry_closure_reads
+
+
+"""
+Recompute the ancestry closure of the given entities and all their descendants after their
+direct ancestors have been linked or unlinked in the same transaction
+
+The descendants are found through the closure itself, which is still correct for them since
+changing the ancestors of an entity doesn't change its descendants
+
+Parameters
+----------
+tx : neo4j.Transaction object
+    The neo4j.Transaction object instance
+entity_uuids : list
+    The uuids of the entities whose direct ancestors have changed
+"""
+def update_ancestry_closure_tx(tx, entity_uuids):
+    query = (f"UNWIND $entity_uuids AS entity_uuid "
+             f"MATCH (:Entity {{uuid: entity_uuid}})<-[:HAS_ANCESTOR]-(descendant:Entity) "
+             f"RETURN COLLECT(DISTINCT descendant.uuid) AS {record_field_name}")
+
+    register_query('update_ancestry_closure_tx', query)
+
+    record = tx.run(query, entity_uuids = entity_uuids).single()
+    descendant_uuids = record[record_field_name] if record else []
+
+    rebuild_ancestry_closure_tx(tx, list(dict.fromkeys(list(entity_uuids) + descendant_uuids)))
+
+
+"""
+Replace the materialized ancestry closure of each given entity, which is one HAS_ANCESTOR relationship
+from the entity to each of its non-Lab ancestors through the Activity nodes. The donor and organ sets
+of an entity are its Donor and organ Sample ancestors in the closure
+
+Parameters
+----------
+tx : neo4j.Transaction object
+    The neo4j.Transaction object instance
+entity_uuids : list
+    The uuids of the target entities
+
+Returns
+-------
+int
+    The number of HAS_ANCESTOR relationships created
+"""
+def rebuild_ancestry_closure_tx(tx, entity_uuids):
+    query = (f"UNWIND $entity_uuids AS entity_uuid "
+             f"MATCH (e:Entity {{uuid: entity_uuid}}) "
+             f"OPTIONAL MATCH (e)-[old:HAS_ANCESTOR]->(:Entity) "
+             f"DELETE old "
+             f"WITH DISTINCT e "
+             # Visits each ancestor once no matter how many paths lead to it
+             f"CALL apoc.path.subgraphNodes(e, {{relationshipFilter: '<ACTIVITY_INPUT|<ACTIVITY_OUTPUT', minLevel: 1}}) YIELD node "
+             f"WITH e, node "
+             # Filter out the Lab entities, same as the traversal queries
+             f"WHERE node:Entity AND node.entity_type <> 'Lab' "
+             f"CREATE (e)-[:HAS_ANCESTOR]->(node) "
+             f"RETURN COUNT(node) AS {record_field_name}")
+
+    register_query('rebuild_ancestry_closure_tx', query)
+
+    record = tx.run(query, entity_uuids = entity_uuids).single()
+
+    return record[record_field_name] if record else 0
+
+
 ####################################################################################################
 ## Internal Functions
 ####################################################################################################
@@ -2106,14 +2753,13 @@ uuid : str
     The uuid to target entity (child of those direct ancestors)
 """
 def _delete_activity_node_and_linkages_tx(tx, uuid):
-    query = (f"MATCH (s:Entity)-[in:ACTIVITY_INPUT]->(a:Activity)-[out:ACTIVITY_OUTPUT]->(t:Entity) "
-             f"WHERE t.uuid = '{uuid}' "
-             f"DELETE in, a, out")
+    query = ("MATCH (s:Entity)-[in:ACTIVITY_INPUT]->(a:Activity)-[out:ACTIVITY_OUTPUT]->(t:Entity) "
+             "WHERE t.uuid = $uuid "
+             "DELETE in, a, out")
 
-    logger.info("======_delete_activity_node_and_linkages_tx() query======")
-    logger.debug(query)
+    register_query('_delete_activity_node_and_linkages_tx', query)
 
-    result = tx.run(query)
+    result = tx.run(query, uuid = uuid)
 
 """
 Delete only the ACTIVITY_INPUT linkages between a target entity and a specific set of its direct ancestors.
@@ -2135,8 +2781,7 @@ def delete_ancestor_linkages_tx(neo4j_driver, entity_uuid, ancestor_uuids):
         "DELETE r"
     )
 
-    logger.info("======delete_ancestor_linkages_tx() query======")
-    logger.debug(query)
+    register_query('delete_ancestor_linkages_tx', query)
 
     try:
         with neo4j_driver.session() as session:
@@ -2147,7 +2792,8 @@ def delete_ancestor_linkages_tx(neo4j_driver, entity_uuid, ancestor_uuids):
                 entity_uuid=entity_uuid,
                 ancestor_uuids=ancestor_uuids
             )
-            
+
+            update_ancestry_closure_tx(tx, [entity_uuid])
             
             tx.commit()
             
@@ -2172,14 +2818,13 @@ uuid : str
     The uuid to target publication
 """
 def _delete_publication_associated_collection_linkages_tx(tx, uuid):
-    query = (f"MATCH (p:Publication)-[r:USES_DATA]->(c:Collection) "
-             f"WHERE p.uuid = '{uuid}' "
-             f"DELETE r")
+    query = ("MATCH (p:Publication)-[r:USES_DATA]->(c:Collection) "
+             "WHERE p.uuid = $uuid "
+             "DELETE r")
 
-    logger.info("======_delete_publication_associated_collection_linkages_tx() query======")
-    logger.debug(query)
+    register_query('_delete_publication_associated_collection_linkages_tx', query)
 
-    result = tx.run(query)
+    result = tx.run(query, uuid = uuid)
 
 """
 Delete the linkages between a Collection and its member Datasets
@@ -2192,12 +2837,11 @@ uuid : str
     The uuid of the Collection, related to Datasets by an IN_COLLECTION relationship
 """
 def _delete_collection_linkages_tx(tx, uuid):
-    query = (f"MATCH (d:Dataset)-[in:IN_COLLECTION]->(c:Collection)"
-             f" WHERE c.uuid = '{uuid}' "
-             f" DELETE in")
+    query = ("MATCH (d:Dataset)-[in:IN_COLLECTION]->(c:Collection)"
+             " WHERE c.uuid = $uuid "
+             " DELETE in")
 
-    logger.info("======_delete_collection_linkages_tx() query======")
-    logger.debug(query)
+    register_query('_delete_collection_linkages_tx', query)
 
-    result = tx.run(query)
+    result = tx.run(query, uuid = uuid)
 
@@ -16,6 +16,7 @@ from flask import current_app as app
 from schema import schema_manager
 from schema import schema_errors
 from schema import schema_neo4j_queries
+from schema import schema_http_client
 from schema.schema_constants import SchemaConstants
 
 logger = logging.getLogger(__name__)
@@ -52,8 +53,8 @@ str: The neo4j TIMESTAMP() function as string
 """
 def set_timestamp(property_key, normalized_type, request_args, user_token, existing_data_dict, new_data_dict):
     # Use the neo4j TIMESTAMP() function during entity creation
-    # Will be proessed in app_neo4j_queries._build_properties_map() 
-    # and schema_neo4j_queries._build_properties_map()
+    # Will be proessed in schema_neo4j_queries.build_properties_params()
+    # and set by schema_neo4j_queries.properties_set_clause()
     return property_key, 'TIMESTAMP()'
 
 
@@ -792,6 +793,43 @@ def get_dataset_collections(property_key, normalized_type, request_args, user_to
     return property_key, schema_manager.normalize_entities_list_for_response(collections_list)
 
 
+"""
+TriggerTypeEnum.ON_READ bulk variant of get_dataset_collections()
+
+Trigger event method of getting the lists of collections for multiple Datasets with a single query
+
+Parameters
+----------
+property_key : str
+    The target property key
+normalized_type : str
+    One of the types defined in the schema yaml: Dataset
+request_args: ImmutableMultiDict
+    The Flask request.args passed in from application request
+user_token: str
+    The user's globus nexus token
+existing_data_dicts : list
+    A list of dictionaries that contain all existing properties of each entity
+
+Returns
+-------
+str: The target property key
+dict: The lists of associated collections with all the normalized information keyed by entity uuid
+"""
+def get_dataset_collections_bulk(property_key, normalized_type, request_args, user_token, existing_data_dicts):
+    uuids = [existing_data_dict['uuid'] for existing_data_dict in existing_data_dicts]
+
+    logger.info(f"Executing 'get_dataset_collections_bulk()' trigger method on {len(uuids)} uuids")
+
+    neo4j_props_to_exclude = _get_excluded_neo4j_props(property_key, request_args)
+
+    collections_by_uuid = schema_neo4j_queries.get_dataset_collections_by_uuids(schema_manager.get_neo4j_driver_instance(), uuids, properties_to_exclude = neo4j_props_to_exclude)
+
+    # Get rid of the entity node properties that are not defined in the yaml schema
+    # as well as the ones defined as `exposed: false` in the yaml schema
+    return property_key, {uuid: schema_manager.normalize_entities_list_for_response(collections_list) for uuid, collections_list in collections_by_uuid.items()}
+
+
 """
 TriggerTypeEnum.ON_READ
 
@@ -911,6 +949,43 @@ def get_dataset_upload(property_key, normalized_type, request_args, user_token,
     return property_key, schema_manager.normalize_entity_result_for_response(upload_dict)
 
 
+"""
+TriggerTypeEnum.ON_READ bulk variant of get_dataset_upload()
+
+Trigger event method of getting the associated Uploads for multiple Datasets with a single query
+
+Parameters
+----------
+property_key : str
+    The target property key
+normalized_type : str
+    One of the types defined in the schema yaml: Dataset
+request_args: ImmutableMultiDict
+    The Flask request.args passed in from application request
+user_token: str
+    The user's globus nexus token
+existing_data_dicts : list
+    A list of dictionaries that contain all existing properties of each entity
+
+Returns
+-------
+str: The target property key
+dict: The dicts of associated Upload detail with all the normalized information keyed by entity uuid
+"""
+def get_dataset_upload_bulk(property_key, normalized_type, request_args, user_token, existing_data_dicts):
+    uuids = [existing_data_dict['uuid'] for existing_data_dict in existing_data_dicts]
+
+    logger.info(f"Executing 'get_dataset_upload_bulk()' trigger method on {len(uuids)} uuids")
+
+    neo4j_props_to_exclude = _get_excluded_neo4j_props(property_key, request_args)
+
+    uploads_by_uuid = schema_neo4j_queries.get_dataset_upload_by_uuids(schema_manager.get_neo4j_driver_instance(), uuids, properties_to_exclude = neo4j_props_to_exclude)
+
+    # Get rid of the entity node properties that are not defined in the yaml schema
+    # as well as the ones defined as `exposed: false` in the yaml schema
+    return property_key, {uuid: schema_manager.normalize_entity_result_for_response(upload_dict) for uuid, upload_dict in uploads_by_uuid.items()}
+
+
 """
 TriggerTypeEnum.AFTER_CREATE and TriggerTypeEnum.AFTER_UPDATE
 
@@ -1055,6 +1130,43 @@ def get_dataset_direct_ancestors(property_key, normalized_type, request_args, us
     return property_key, schema_manager.normalize_entities_list_for_response(direct_ancestors_list)
 
 
+"""
+TriggerTypeEnum.ON_READ bulk variant of get_dataset_direct_ancestors()
+
+Trigger event method of getting the lists of direct ancestors for multiple datasets or publications with a single query
+
+Parameters
+----------
+property_key : str
+    The target property key
+normalized_type : str
+    One of the types defined in the schema yaml: Dataset
+request_args: ImmutableMultiDict
+    The Flask request.args passed in from application request
+user_token: str
+    The user's globus nexus token
+existing_data_dicts : list
+    A list of dictionaries that contain all existing properties of each entity
+
+Returns
+-------
+str: The target property key
+dict: The lists of associated direct ancestors with all the normalized information keyed by entity uuid
+"""
+def get_dataset_direct_ancestors_bulk(property_key, normalized_type, request_args, user_token, existing_data_dicts):
+    uuids = [existing_data_dict['uuid'] for existing_data_dict in existing_data_dicts]
+
+    logger.info(f"Executing 'get_dataset_direct_ancestors_bulk()' trigger method on {len(uuids)} uuids")
+
+    neo4j_props_to_exclude = _get_excluded_neo4j_props(property_key, request_args)
+
+    direct_ancestors_by_uuid = schema_neo4j_queries.get_dataset_direct_ancestors_by_uuids(schema_manager.get_neo4j_driver_instance(), uuids, properties_to_exclude = neo4j_props_to_exclude)
+
+    # Get rid of the entity node properties that are not defined in the yaml schema
+    # as well as the ones defined as `exposed: false` in the yaml schema
+    return property_key, {uuid: schema_manager.normalize_entities_list_for_response(direct_ancestors_list) for uuid, direct_ancestors_list in direct_ancestors_by_uuid.items()}
+
+
 """
 TriggerTypeEnum.ON_READ
 
@@ -1390,6 +1502,37 @@ def get_previous_revision_uuid(property_key, normalized_type, request_args, user
     return property_key, previous_revision_uuid
 
 
+"""
+TriggerTypeEnum.ON_READ bulk variant of get_previous_revision_uuid()
+
+Trigger event method of getting the uuids of the previous revision datasets of multiple datasets with a single query
+
+Parameters
+----------
+property_key : str
+    The target property key
+normalized_type : str
+    One of the types defined in the schema yaml: Dataset
+request_args: ImmutableMultiDict
+    The Flask request.args passed in from application request
+user_token: str
+    The user's globus nexus token
+existing_data_dicts : list
+    A list of dictionaries that contain all existing properties of each entity
+
+Returns
+-------
+str: The target property key
+dict: The uuid strings of previous revision entities or None if not found keyed by entity uuid
+"""
+def get_previous_revision_uuid_bulk(property_key, normalized_type, request_args, user_token, existing_data_dicts):
+    uuids = [existing_data_dict['uuid'] for existing_data_dict in existing_data_dicts]
+
+    logger.info(f"Executing 'get_previous_revision_uuid_bulk()' trigger method on {len(uuids)} uuids")
+
+    return property_key, schema_neo4j_queries.get_previous_revision_uuid_by_uuids(schema_manager.get_neo4j_driver_instance(), uuids)
+
+
 """
 TriggerTypeEnum.ON_READ
 
@@ -1610,7 +1753,7 @@ def commit_thumbnail_file(property_key, normalized_type, request_args, user_toke
         }
         
         # Disable ssl certificate verification
-        response = requests.post(url = ingest_api_target_url, headers = request_headers, json = json_to_post, verify = False) 
+        response = schema_http_client.post(ingest_api_target_url, headers = request_headers, json = json_to_post, verify = False) 
 
         if response.status_code != 200:
             msg = f"Failed to commit the thumbnail file of tmp_file_id {tmp_file_id} via ingest-api for entity uuid: {entity_uuid}"
@@ -1717,7 +1860,7 @@ def delete_thumbnail_file(property_key, normalized_type, request_args, user_toke
     }
 
     # Disable ssl certificate verification
-    response = requests.post(url = ingest_api_target_url, headers = request_headers, json = json_to_post, verify = False) 
+    response = schema_http_client.post(ingest_api_target_url, headers = request_headers, json = json_to_post, verify = False) 
 
     # response.json() returns an empty array because
     # there's no thumbnail file left once the only one gets removed
@@ -1768,33 +1911,30 @@ def update_status(property_key, normalized_type, request_args, user_token, exist
     # Only apply to non-published parent datasets
     if status.lower() != 'published':
         # Only sync the child component datasets status for Multi-Assay Split
-        component_dataset_uuids = schema_neo4j_queries.get_component_dataset_uuids(schema_manager.get_neo4j_driver_instance(), uuid)
-        
-        for comp_uuid in component_dataset_uuids:
-            url = schema_manager.get_entity_api_url() + SchemaConstants.ENTITY_API_UPDATE_ENDPOINT + '/' + comp_uuid
+        # All the components are updated in one transaction, instead of a PUT call per component
+        last_modified_dict = {key: existing_data_dict[key] for key in ['last_modified_timestamp',
+                                                                       'last_modified_user_sub',
+                                                                       'last_modified_user_email',
+                                                                       'last_modified_user_displayname']}
 
-            # When the parent dataset status update disables reindex via query string '?reindex=false'
-            # We'll also disable the reindex call to search-api upon each subsequent child component dataset update
-            reindex = 'followed'
-            if schema_manager.suppress_reindex(request_args): 
-                url += '?reindex=false'
-                reindex = 'suppressed'
+        component_dataset_uuids = schema_neo4j_queries.update_component_datasets_status(schema_manager.get_neo4j_driver_instance(), uuid, status, last_modified_dict)
 
-            logger.info(f"Update parent Multi-Assay Split dataset {uuid} status to {status}, with re-indexing {reindex}.")
-            logger.info(f'Update child component dataset {comp_uuid} status to {status}, with re-indexing {reindex}.')
+        if not component_dataset_uuids:
+            return
 
-            request_headers = {
-                'Authorization': f'Bearer {user_token}',
-                SchemaConstants.HUBMAP_APP_HEADER: SchemaConstants.INGEST_API_APP,
-                SchemaConstants.INTERNAL_TRIGGER: SchemaConstants.COMPONENT_DATASET
-            }
+        logger.info(f"Updated the status of the child component datasets of parent Multi-Assay Split dataset {uuid} to {status}: {', '.join(component_dataset_uuids)}")
 
-            status_body = {"status": status}
+        schema_manager.delete_memcached_cache(component_dataset_uuids)
 
-            response = requests.put(url=url, headers=request_headers, json=status_body)
+        # When the parent dataset status update disables reindex via query string '?reindex=false'
+        # We'll also disable the reindex of the child component datasets
+        suppress_reindex = schema_manager.suppress_reindex(request_args)
 
-            if response.status_code != 200:
-                logger.error(f'Failed to update child component dataset {comp_uuid} status: {response.text}')
+        if suppress_reindex:
+            logger.info(f"Re-indexing suppressed for the child component datasets of {uuid}")
+        else:
+            reindex_priority = schema_manager.get_reindex_priority(request_args, suppress_reindex)
+            schema_manager.reindex_entities(component_dataset_uuids, user_token, reindex_priority)
 
 
 ####################################################################################################
@@ -2505,7 +2645,7 @@ def _commit_files(target_property_key, property_key, normalized_type, request_ar
             }
 
             # Disable ssl certificate verification
-            response = requests.post(url = ingest_api_target_url, headers = request_headers, json = json_to_post, verify = False) 
+            response = schema_http_client.post(ingest_api_target_url, headers = request_headers, json = json_to_post, verify = False) 
     
             if response.status_code != 200:
                 msg = f"Failed to commit the file of temp_file_id {temp_file_id} via ingest-api for entity uuid: {entity_uuid}"
@@ -2618,7 +2758,7 @@ def _delete_files(target_property_key, property_key, normalized_type, request_ar
     }
 
     # Disable ssl certificate verification
-    response = requests.post(url = ingest_api_target_url, headers = request_headers, json = json_to_post, verify = False) 
+    response = schema_http_client.post(ingest_api_target_url, headers = request_headers, json = json_to_post, verify = False) 
 
     if response.status_code != 200:
         msg = f"Failed to remove the files via ingest-api for entity uuid: {entity_uuid}"
@@ -491,8 +491,7 @@ def validate_if_retraction_permitted(property_key, normalized_entity_type, reque
     try:
         # The property 'hmgroupids' is ALWAYS in the output with using schema_manager.get_user_info()
         # when the token in request is a nexus_token
-        user_info = schema_manager.get_user_info(request)
-        hubmap_admin_group_uuid = schema_manager.get_auth_helper_instance().groupNameToId('HuBMAP-Data-Admin')['uuid']
+        in_admin_group = schema_manager.user_in_group(request, 'HuBMAP-Data-Admin')
     except Exception as e:
         # Log the full stack trace, prepend a line with our message
         logger.exception(e)
@@ -502,7 +501,7 @@ def validate_if_retraction_permitted(property_key, normalized_entity_type, reque
         # We treat such cases as the user not in the HuBMAP-READ group
         raise ValueError("Failed to parse the permission based on token, retraction is not allowed")
 
-    if hubmap_admin_group_uuid not in user_info['hmgroupids']:
+    if not in_admin_group:
         raise ValueError("Permission denied, retraction is not allowed")
 
 
@@ -844,8 +843,7 @@ def validate_in_admin_group(property_key, normalized_entity_type, request, exist
     try:
         # The property 'hmgroupids' is ALWAYS in the output with using schema_manager.get_user_info()
         # when the token in request is a nexus_token
-        user_info = schema_manager.get_user_info(request)
-        hubmap_admin_group_uuid = schema_manager.get_auth_helper_instance().groupNameToId('HuBMAP-Data-Admin')['uuid']
+        in_admin_group = schema_manager.user_in_group(request, 'HuBMAP-Data-Admin')
     except Exception as e:
         # Log the full stack trace, prepend a line with our message
         logger.exception(e)
@@ -855,7 +853,7 @@ def validate_in_admin_group(property_key, normalized_entity_type, request, exist
         # We treat such cases as the user not in the HuBMAP-Data group
         raise ValueError("Failed to parse the permission based on token, retraction is not allowed")
 
-    if hubmap_admin_group_uuid not in user_info['hmgroupids']:
+    if not in_admin_group:
         raise ValueError(f"Permission denied, not permitted to set property {property_key}")
 
 
@@ -0,0 +1,75 @@
+import re
+import unittest
+from unittest.mock import MagicMock, patch
+
+import app_neo4j_queries
+from schema import schema_neo4j_queries
+
+
+class TestAncestryClosure(unittest.TestCase):
+
+    def tearDown(self):
+        schema_neo4j_queries.set_ancestry_closure_reads(False)
+        schema_neo4j_queries._query_registry.clear()
+
+    def test_update_rebuilds_the_entity_and_its_descendants(self):
+        tx = MagicMock()
+        tx.run.return_value.single.side_effect = [{'result': ['child-uuid', 'grandchild-uuid']}, {'result': 5}]
+
+        schema_neo4j_queries.update_ancestry_closure_tx(tx, ['sample-uuid'])
+
+        descendants_call, rebuild_call = tx.run.call_args_list
+        self.assertIn('HAS_ANCESTOR', descendants_call[0][0])
+        self.assertIn('apoc.path.subgraphNodes', rebuild_call[0][0])
+        self.assertEqual(rebuild_call[1]['entity_uuids'], ['sample-uuid', 'child-uuid', 'grandchild-uuid'])
+
+    def test_reads_use_the_closure_once_enabled(self):
+        neo4j_driver = MagicMock()
+        session = neo4j_driver.session.return_value.__enter__.return_value
+        session.read_transaction.return_value = {'result': ['donor-uuid']}
+
+        self.assertEqual(schema_neo4j_queries.get_ancestors(neo4j_driver, 'dataset-uuid', 'uuid'), ['donor-uuid'])
+        self.assertIn('ACTIVITY_INPUT|ACTIVITY_OUTPUT*', session.read_transaction.call_args[0][1])
+
+        schema_neo4j_queries.set_ancestry_closure_reads(True)
+        schema_neo4j_queries.get_ancestors(neo4j_driver, 'dataset-uuid', 'uuid')
+
+        query = session.read_transaction.call_args[0][1]
+        self.assertIn('-[:HAS_ANCESTOR]->(ancestor:Entity)', query)
+        self.assertNotIn('*', query)
+
+    def test_traversals_only_follow_the_activity_relationships(self):
+        # The HAS_ANCESTOR shortcuts are written even when the closure reads are disabled,
+        # a variable length path of any type would go through them to the sibling branches
+        traversal_calls = [
+            lambda driver: app_neo4j_queries.get_ancestor_organs(driver, 'uuid'),
+            lambda driver: app_neo4j_queries.get_associated_organs_from_dataset(driver, 'uuid'),
+            lambda driver: app_neo4j_queries.get_associated_samples_from_dataset(driver, 'uuid'),
+            lambda driver: app_neo4j_queries.get_associated_donors_from_dataset(driver, 'uuid'),
+            lambda driver: app_neo4j_queries.get_individual_prov_info(driver, 'uuid'),
+            lambda driver: app_neo4j_queries.get_all_dataset_samples(driver, 'uuid'),
+            lambda driver: app_neo4j_queries.get_sankey_info(driver, True),
+            lambda driver: app_neo4j_queries.get_unpublished(driver),
+            lambda driver: app_neo4j_queries.get_paired_dataset(driver, 'uuid', 'CODEX', None),
+            lambda driver: app_neo4j_queries.get_paired_dataset(driver, 'uuid', 'CODEX', 2)
+        ]
+
+        for closure_reads in [False, True]:
+            schema_neo4j_queries.set_ancestry_closure_reads(closure_reads)
+
+            for traversal_call in traversal_calls:
+                queries = []
+                with patch('schema.schema_neo4j_queries.register_query', side_effect = lambda name, query: queries.append(query)):
+                    try:
+                        traversal_call(MagicMock())
+                    except Exception:
+                        # Only the query text matters, not what the code does with the mocked records
+                        pass
+
+                self.assertTrue(queries)
+                for query in queries:
+                    self.assertIsNone(re.search(r'\[\w*\*', query), query)
+
+
+if __name__ == '__main__':
+    unittest.main()
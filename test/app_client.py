@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from flask import Config
+
+# The schema_manager globals set by schema_manager.initialize() when importing the app
+SCHEMA_MANAGER_GLOBALS = ['_schema', '_uuid_api_url', '_ingest_api_url', '_ontology_api_url', '_entity_api_url',
+                          '_auth_helper', '_neo4j_driver', '_memcached_client', '_memcached_prefix']
+
+# Value: the schema_manager globals of the app, restored by use_app_schema_manager()
+_app_schema_manager_globals = {}
+
+
+"""
+Import the app module once per test process with the example configuration, a mocked Neo4j driver
+and AuthHelper, no Memcached and a temporary jobs database, so the endpoints can be called with the
+Flask test client without any of the backing services. The schema_manager globals are left as they
+were for the other tests, see use_app_schema_manager()
+
+Returns
+-------
+module
+    The imported app module
+"""
+def load_app():
+    if 'app' in sys.modules:
+        return sys.modules['app']
+
+    from schema import schema_manager
+
+    previous_globals = {name: getattr(schema_manager, name) for name in SCHEMA_MANAGER_GLOBALS}
+    from_pyfile = Config.from_pyfile
+
+    def from_example_pyfile(config, filename, silent = False):
+        loaded = from_pyfile(config, f'{filename}.example', silent)
+        config.update(MEMCACHED_MODE = False,
+                      JOBS_DB_PATH = os.path.join(tempfile.mkdtemp(), 'jobs.db'),
+                      JOBS_POLL_SECONDS = 3600,
+                      SCHEMA_YAML_FILE = os.path.join(os.path.dirname(config.root_path), 'schema', 'provenance_schema.yaml'))
+        return loaded
+
+    with patch.object(Config, 'from_pyfile', from_example_pyfile), \
+         patch('hubmap_commons.neo4j_driver.instance', return_value = MagicMock()), \
+         patch('hubmap_commons.hm_auth.AuthHelper.isInitialized', return_value = True), \
+         patch('hubmap_commons.hm_auth.AuthHelper.instance', return_value = MagicMock()), \
+         patch('schema.schema_manager.make_request_get', side_effect = Exception("No REFERENCE redirects in the tests")):
+        import app
+
+    _app_schema_manager_globals.update({name: getattr(schema_manager, name) for name in SCHEMA_MANAGER_GLOBALS})
+    for name, value in previous_globals.items():
+        setattr(schema_manager, name, value)
+
+    # No background jobs in the tests
+    app.job_runner.ensure_started = lambda: None
+
+    return app
+
+
+"""
+Use the schema_manager globals of the app, E.g., the loaded provenance schema, for the duration of the given test
+
+Parameters
+----------
+test_case : unittest.TestCase
+    The running test case
+"""
+def use_app_schema_manager(test_case):
+    load_app()
+
+    patcher = patch.multiple('schema.schema_manager', **_app_schema_manager_globals)
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
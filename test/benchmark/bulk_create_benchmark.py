@@ -0,0 +1,112 @@
+"""
+Benchmark of creating multiple samples with one UNWIND statement per batch, as done by
+app_neo4j_queries.create_multiple_samples(), against the previous loop of one CREATE statement
+per sample in the same transaction
+
+Requires a Neo4j instance with APOC, ideally a local scratch one. The nodes created by each run are
+marked with a `benchmark_run` property and deleted afterwards:
+
+    cd src && python ../test/benchmark/bulk_create_benchmark.py bolt://localhost:7687 neo4j 123 --count 500 --batch-size 500
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src'))
+
+import neo4j
+
+# Local modules
+import app_neo4j_queries
+from schema import schema_neo4j_queries
+
+
+def build_samples(count, run_id):
+    return [{'uuid': uuid.uuid4().hex,
+             'hubmap_id': f'HBM{index:03}.BNCH.{index:03}',
+             'entity_type': 'Sample',
+             'sample_category': 'block',
+             'created_timestamp': 'TIMESTAMP()',
+             'metadata': {'index': index},
+             'benchmark_run': run_id} for index in range(count)]
+
+
+def build_activity(run_id):
+    return {'uuid': uuid.uuid4().hex, 'creation_action': 'Create Sample Activity', 'created_timestamp': 'TIMESTAMP()', 'benchmark_run': run_id}
+
+
+# The previous implementation: one statement per sample
+def create_samples_loop(driver, samples_dict_list, activity_data_dict, direct_ancestor_uuid):
+    with driver.session() as session:
+        tx = session.begin_transaction()
+
+        schema_neo4j_queries.create_activity_tx(tx, activity_data_dict)
+        schema_neo4j_queries.create_relationship_tx(tx, direct_ancestor_uuid, activity_data_dict['uuid'], 'ACTIVITY_INPUT', '->')
+
+        for sample_dict in samples_dict_list:
+            parameters = schema_neo4j_queries.build_properties_params(sample_dict)
+            parameters['activity_uuid'] = activity_data_dict['uuid']
+
+            query = (f"MATCH (a:Activity) "
+                     f"WHERE a.uuid = $activity_uuid "
+                     f"CREATE (e:Entity:Sample) "
+                     f"{schema_neo4j_queries.properties_set_clause('e')}"
+                     f"CREATE (a)-[:ACTIVITY_OUTPUT]->(e)")
+
+            tx.run(query, parameters)
+
+        tx.commit()
+
+
+def create_samples_unwind(driver, samples_dict_list, activity_data_dict, direct_ancestor_uuid, batch_size):
+    with driver.session() as session:
+        tx = session.begin_transaction()
+
+        app_neo4j_queries.create_activity_outputs_tx(tx, 'Sample', samples_dict_list, activity_data_dict, direct_ancestor_uuid, batch_size)
+
+        tx.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark the creation of multiple samples")
+    parser.add_argument('uri')
+    parser.add_argument('username')
+    parser.add_argument('password')
+    parser.add_argument('--count', type = int, default = 500, help = "The number of samples created per run")
+    parser.add_argument('--batch-size', type = int, default = 500, help = "The number of samples per UNWIND statement")
+    parser.add_argument('--runs', type = int, default = 5, help = "The number of runs of each implementation")
+    args = parser.parse_args()
+
+    driver = neo4j.GraphDatabase.driver(args.uri, auth = (args.username, args.password))
+    run_id = uuid.uuid4().hex
+    ancestor_uuid = uuid.uuid4().hex
+
+    try:
+        with driver.session() as session:
+            session.run("CREATE (d:Entity:Donor {uuid: $uuid, entity_type: 'Donor', benchmark_run: $run_id})", uuid = ancestor_uuid, run_id = run_id).consume()
+
+        for name, create_samples in [('loop', lambda samples, activity: create_samples_loop(driver, samples, activity, ancestor_uuid)),
+                                     ('unwind', lambda samples, activity: create_samples_unwind(driver, samples, activity, ancestor_uuid, args.batch_size))]:
+            durations = []
+
+            for _ in range(args.runs):
+                samples = build_samples(args.count, run_id)
+                activity = build_activity(run_id)
+
+                start = time.perf_counter()
+                create_samples(samples, activity)
+                durations.append(time.perf_counter() - start)
+
+            best = min(durations)
+            print(f"{name}: best {best:.3f}s of {args.runs} runs, {args.count / best:.0f} samples/s")
+    finally:
+        with driver.session() as session:
+            session.run("MATCH (n {benchmark_run: $run_id}) DETACH DELETE n", run_id = run_id).consume()
+
+        driver.close()
+
+
+if __name__ == '__main__':
+    main()
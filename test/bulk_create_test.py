@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock
+
+from neo4j.exceptions import TransactionError
+
+import app_neo4j_queries
+from schema import schema_neo4j_queries
+
+
+class FakeNode(object):
+
+    def __init__(self, properties):
+        self._properties = properties
+
+
+class TestBulkCreate(unittest.TestCase):
+
+    def setUp(self):
+        self.tx = MagicMock()
+        # Each statement returns one node per row
+        self.tx.run.side_effect = lambda query, **parameters: [{'result': FakeNode(row['properties'])} for row in parameters['rows']]
+
+    def test_one_statement_per_batch(self):
+        samples = [{'uuid': f'sample-{index}', 'created_timestamp': 'TIMESTAMP()', 'metadata': {'index': index}} for index in range(5)]
+
+        created = app_neo4j_queries.create_activity_outputs_tx(self.tx, 'Sample', samples, {'uuid': 'activity-uuid'}, 'donor-uuid', batch_size = 2)
+
+        self.assertEqual([sample['uuid'] for sample in created], [f'sample-{index}' for index in range(5)])
+        self.assertEqual(self.tx.run.call_count, 3)
+
+        first_call, second_call, _ = self.tx.run.call_args_list
+        # The Activity node and its relationships are created by the first statement
+        self.assertIn('CREATE (a:Activity)', first_call[0][0])
+        self.assertEqual(first_call[1]['direct_ancestor_uuid'], 'donor-uuid')
+        self.assertEqual(first_call[1]['rows'][0], {'properties': {'uuid': 'sample-0', 'metadata': "{'index': 0}"}, 'timestamp_keys': ['created_timestamp']})
+        self.assertEqual(second_call[1]['activity_uuid'], 'activity-uuid')
+        self.assertEqual(len(second_call[1]['rows']), 2)
+
+    def test_missing_direct_ancestor_fails(self):
+        self.tx.run.side_effect = lambda query, **parameters: []
+
+        with self.assertRaises(TransactionError):
+            app_neo4j_queries.create_activity_outputs_tx(self.tx, 'Sample', [{'uuid': 'sample-uuid'}], {'uuid': 'activity-uuid'}, 'missing-uuid')
+
+    def test_update_entities_in_one_transaction(self):
+        driver = MagicMock()
+        tx = driver.session.return_value.__enter__.return_value.begin_transaction.return_value
+        tx.run.side_effect = lambda query, **parameters: [{'result': FakeNode({'uuid': row['uuid'], **row['properties']})} for row in parameters['rows']]
+
+        updated = schema_neo4j_queries.update_entities(driver, 'Dataset', {f'dataset-{index}': {'status': 'QA', 'last_modified_timestamp': 'TIMESTAMP()'} for index in range(3)}, batch_size = 2)
+
+        self.assertEqual(updated['dataset-2'], {'uuid': 'dataset-2', 'status': 'QA'})
+        self.assertEqual(tx.run.call_count, 2)
+        self.assertEqual(tx.run.call_args_list[0][1]['rows'][0], {'properties': {'status': 'QA'}, 'timestamp_keys': ['last_modified_timestamp'], 'uuid': 'dataset-0'})
+        tx.commit.assert_called_once()
+
+    def test_update_entities_missing_node_rolls_back(self):
+        driver = MagicMock()
+        tx = driver.session.return_value.__enter__.return_value.begin_transaction.return_value
+        tx.run.side_effect = lambda query, **parameters: []
+        tx.closed.return_value = False
+
+        with self.assertRaises(TransactionError):
+            schema_neo4j_queries.update_entities(driver, 'Dataset', {'missing-uuid': {'status': 'QA'}})
+
+        tx.commit.assert_not_called()
+        tx.rollback.assert_called_once()
+
+    def test_update_component_datasets_status_in_one_transaction(self):
+        driver = MagicMock()
+        tx = driver.session.return_value.__enter__.return_value.begin_transaction.return_value
+        components = [
+            {'uuid': 'component-1', 'status': 'New', 'status_history': "[{'status': 'New'}]"},
+            {'uuid': 'component-2', 'status': 'New', 'status_history': None},
+            {'uuid': 'component-3', 'status': 'QA', 'status_history': None},
+            {'uuid': 'component-4', 'status': 'Published', 'status_history': None}
+        ]
+
+        def run(query, **parameters):
+            if 'Multi-Assay Split' in query:
+                return components
+            return [{'result': FakeNode({'uuid': row['uuid'], **row['properties']})} for row in parameters['rows']]
+
+        tx.run.side_effect = run
+        last_modified_dict = {
+            'last_modified_timestamp': 1700000000000,
+            'last_modified_user_sub': 'sub',
+            'last_modified_user_email': 'user@example.org',
+            'last_modified_user_displayname': 'User'
+        }
+
+        updated_uuids = schema_neo4j_queries.update_component_datasets_status(driver, 'parent-uuid', 'QA', last_modified_dict)
+
+        # The components already in QA or Published are left as is
+        self.assertEqual(updated_uuids, ['component-1', 'component-2'])
+        self.assertEqual(tx.run.call_count, 2)
+
+        rows = tx.run.call_args_list[1][1]['rows']
+        status_entry = {'status': 'QA', 'changed_by_email': 'user@example.org', 'change_timestamp': 1700000000000}
+        self.assertEqual(rows[0]['properties']['status_history'], str([{'status': 'New'}, status_entry]))
+        self.assertEqual(rows[1]['properties']['status_history'], str([status_entry]))
+        self.assertEqual(rows[1]['properties']['last_modified_user_sub'], 'sub')
+        tx.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import io
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from neo4j.exceptions import TransactionError
+
+import app_neo4j_queries
+import bulk_registration
+
+
+SAMPLES_TSV = ("source_id\tlab_id\tsample_type\torgan_type\tsample_protocol\tdescription\trui_location\n"
+               "donor-uuid\tsmpl_01\tOrgan\tbr\t10.17504/protocols.io.bjuxknxn\t\t\n"
+               "\n"
+               "donor-uuid\tsmpl_02\torgan\tHT\t10.17504/protocols.io.bjuxknxn\tsecond\t\n"
+               "organ-uuid\tsmpl_03\tblock\t\t10.17504/protocols.io.bjuxknxn\t\t{\"x\": 1}\n")
+
+
+class TestBulkRegistration(unittest.TestCase):
+
+    def test_rows_are_read_in_chunks_and_mapped(self):
+        reader = bulk_registration.open_tsv(io.BytesIO(SAMPLES_TSV.encode('utf-8')), 'Sample')
+        chunks = list(bulk_registration.read_chunks(reader, 2))
+
+        # The blank line is skipped
+        self.assertEqual([[row_number for row_number, tsv_row in chunk] for chunk in chunks], [[1, 2], [3]])
+
+        json_data_dict = bulk_registration.to_json_data('Sample', chunks[0][0][1])
+        self.assertEqual(json_data_dict, {
+            'direct_ancestor_uuid': 'donor-uuid',
+            'lab_tissue_sample_id': 'smpl_01',
+            'sample_category': 'organ',
+            'organ': 'BR',
+            'protocol_url': '10.17504/protocols.io.bjuxknxn'
+        })
+        self.assertEqual(bulk_registration.to_json_data('Sample', chunks[1][0][1])['rui_location'], {'x': 1})
+
+    def test_extra_cells_are_invalid_after_json_round_trip(self):
+        reader = bulk_registration.open_tsv(io.BytesIO(b"lab_name\tselection_protocol\nd1\tp1\textra\n"), 'Donor')
+        row_number, tsv_row = next(bulk_registration.read_chunks(reader, 10))[0]
+
+        # As stored by a background job
+        stored_row = json.loads(json.dumps(tsv_row))
+        self.assertEqual(stored_row[bulk_registration.EXTRA_CELLS_KEY], ['extra'])
+
+        for row in [tsv_row, stored_row, {'lab_name': 'd1', 'null': ['extra']}]:
+            with self.assertRaises(ValueError):
+                bulk_registration.to_json_data('Donor', row)
+
+    def test_missing_required_columns(self):
+        with self.assertRaises(ValueError):
+            bulk_registration.open_tsv(io.BytesIO(b"lab_id\tdescription\nd1\tfirst\n"), 'Donor')
+
+    def test_sample_source_rules(self):
+        organ_types_dict = {'BR': 'Brain'}
+        donor = {'uuid': 'donor-uuid', 'entity_type': 'Donor'}
+
+        bulk_registration.validate_sample_source({'direct_ancestor_uuid': 'donor-uuid', 'sample_category': 'organ', 'organ': 'BR'}, donor, organ_types_dict)
+
+        for json_data_dict, direct_ancestor_dict in [
+            ({'direct_ancestor_uuid': 'missing', 'sample_category': 'organ', 'organ': 'BR'}, None),
+            ({'direct_ancestor_uuid': 'donor-uuid', 'sample_category': 'organ', 'organ': 'XX'}, donor),
+            ({'direct_ancestor_uuid': 'donor-uuid', 'sample_category': 'block'}, donor),
+            ({'direct_ancestor_uuid': 'organ-uuid', 'sample_category': 'organ', 'organ': 'BR'}, {'uuid': 'organ-uuid', 'entity_type': 'Sample'})
+        ]:
+            with self.assertRaises(ValueError):
+                bulk_registration.validate_sample_source(json_data_dict, direct_ancestor_dict, organ_types_dict)
+
+    def test_rows_are_grouped_by_parent(self):
+        rows = [
+            (1, {'direct_ancestor_uuid': 'donor-uuid', 'organ': 'BR'}),
+            (2, {'direct_ancestor_uuid': 'donor-uuid', 'organ': 'HT'}),
+            (3, {'direct_ancestor_uuid': 'donor-uuid', 'organ': 'BR'})
+        ]
+
+        groups = bulk_registration.group_by_parent('Sample', rows)
+
+        self.assertEqual([[row_number for row_number, json_data_dict in group] for group in groups], [[1, 3], [2]])
+
+    def test_one_statement_per_batch_with_an_activity_per_entity(self):
+        tx = MagicMock()
+        tx.run.side_effect = lambda query, **parameters: [{'result': row['entity']['properties']['uuid']} for row in parameters['rows']]
+
+        donors = [{'uuid': f'donor-{index}', 'created_timestamp': 'TIMESTAMP()'} for index in range(3)]
+        activities = [{'uuid': f'activity-{index}'} for index in range(3)]
+
+        created_uuids = app_neo4j_queries.create_entities_with_activities_tx(tx, 'Donor', donors, activities, ['lab-uuid'] * 3, batch_size = 2)
+
+        self.assertEqual(created_uuids, ['donor-0', 'donor-1', 'donor-2'])
+        self.assertEqual(tx.run.call_count, 2)
+        self.assertEqual(tx.run.call_args_list[0][1]['rows'][1], {
+            'entity': {'properties': {'uuid': 'donor-1'}, 'timestamp_keys': ['created_timestamp']},
+            'activity': {'properties': {'uuid': 'activity-1'}, 'timestamp_keys': []},
+            'direct_ancestor_uuid': 'lab-uuid'
+        })
+
+        # Nothing gets created for the rows whose direct ancestor doesn't exist
+        tx.run.side_effect = lambda query, **parameters: []
+        with self.assertRaises(TransactionError):
+            app_neo4j_queries.create_entities_with_activities_tx(tx, 'Donor', donors, activities, ['lab-uuid'] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
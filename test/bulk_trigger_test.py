@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+from werkzeug.datastructures import ImmutableMultiDict
+
+from schema import schema_manager
+from schema.schema_constants import TriggerTypeEnum
+
+
+class TestBulkTriggers(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = schema_manager._schema
+        schema_manager._schema = {
+            'ACTIVITIES': {'Activity': {'properties': {}}},
+            'ENTITIES': {
+                'Dataset': {
+                    'properties': {
+                        'uuid': {'type': 'string'},
+                        'title': {'type': 'string', 'on_read_trigger': 'get_dataset_title'},
+                        'upload': {'type': 'json_string', 'on_read_trigger': 'get_dataset_upload', 'bulk_on_read_trigger': 'get_dataset_upload_bulk'}
+                    }
+                }
+            }
+        }
+
+    def tearDown(self):
+        schema_manager._schema = self.schema
+
+    @patch('schema.schema_manager.schema_triggers')
+    def test_bulk_trigger_runs_once_for_the_list(self, mock_triggers):
+        mock_triggers.get_dataset_upload_bulk.return_value = ('upload', {'uuid-1': {'uuid': 'upload-1'}, 'uuid-2': None})
+        mock_triggers.get_dataset_title.side_effect = lambda key, *args: (key, f"Title of {args[3]['uuid']}")
+
+        entities_list = [{'uuid': 'uuid-1', 'entity_type': 'Dataset'}, {'uuid': 'uuid-2', 'entity_type': 'Dataset'}]
+        generated_data_list = schema_manager.generate_triggered_data(TriggerTypeEnum.ON_READ, 'Dataset', ImmutableMultiDict(), None, entities_list, {})
+
+        mock_triggers.get_dataset_upload_bulk.assert_called_once()
+        mock_triggers.get_dataset_upload.assert_not_called()
+        self.assertEqual(generated_data_list, [
+            {'title': 'Title of uuid-1', 'upload': {'uuid': 'upload-1'}},
+            {'title': 'Title of uuid-2', 'upload': None}
+        ])
+
+    @patch('schema.schema_manager.schema_triggers')
+    def test_failed_bulk_trigger_falls_back_to_each_entity(self, mock_triggers):
+        mock_triggers.get_dataset_upload_bulk.side_effect = Exception('Neo4j is down')
+        mock_triggers.get_dataset_upload.side_effect = lambda key, *args: (key, {'uuid': f"upload-of-{args[3]['uuid']}"})
+        mock_triggers.get_dataset_title.return_value = ('title', 'Title')
+
+        entities_list = [{'uuid': 'uuid-1', 'entity_type': 'Dataset'}, {'uuid': 'uuid-2', 'entity_type': 'Dataset'}]
+        complete_entities_list = schema_manager.get_complete_entities_list(ImmutableMultiDict(), None, entities_list)
+
+        self.assertEqual(mock_triggers.get_dataset_upload.call_count, 2)
+        self.assertEqual([entity['upload']['uuid'] for entity in complete_entities_list], ['upload-of-uuid-1', 'upload-of-uuid-2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
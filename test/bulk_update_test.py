@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import MagicMock
+
+import bulk_update
+
+
+class TestBulkUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.existing = {f'uuid-{index}': {'uuid': f'uuid-{index}', 'status': 'New'} for index in range(5)}
+        self.load_entities = MagicMock(side_effect = lambda uuids: {uuid: self.existing[uuid] for uuid in uuids if uuid in self.existing})
+        self.write_updates = MagicMock(side_effect = lambda entity_data_dicts: {uuid: {**self.existing[uuid], **entity_data_dict} for uuid, entity_data_dict in entity_data_dicts.items()})
+        self.finish_update = MagicMock()
+        self.end_batch = MagicMock()
+
+    def apply(self, entity_updates, prepare_update):
+        return bulk_update.apply_updates(entity_updates, self.load_entities, prepare_update, self.write_updates,
+                                         self.finish_update, self.end_batch, batch_size = 2, max_workers = 2)
+
+    def test_one_write_and_one_end_per_batch(self):
+        entity_updates = {f'uuid-{index}': {'status': 'QA'} for index in range(5)}
+
+        results = self.apply(entity_updates, lambda uuid, json_data_dict, existing_entity_dict: dict(json_data_dict))
+
+        self.assertTrue(all(res['success'] for res in results.values()))
+        self.assertEqual(results['uuid-4']['data'], {'uuid': 'uuid-4', 'status': 'QA'})
+        self.assertEqual(self.write_updates.call_count, 3)
+        self.assertEqual([call.args[0] for call in self.end_batch.call_args_list], [['uuid-0', 'uuid-1'], ['uuid-2', 'uuid-3'], ['uuid-4']])
+        self.assertEqual(self.finish_update.call_count, 5)
+
+    def test_invalid_and_missing_entities_do_not_stop_the_batch(self):
+        entity_updates = {'uuid-0': {'status': 'QA'}, 'uuid-1': {'status': 'Bogus'}, 'missing': {'status': 'QA'}}
+
+        def prepare_update(uuid, json_data_dict, existing_entity_dict):
+            if json_data_dict['status'] == 'Bogus':
+                raise ValueError("The provided status value of Dataset is not valid")
+            return dict(json_data_dict)
+
+        results = self.apply(entity_updates, prepare_update)
+
+        self.assertTrue(results['uuid-0']['success'])
+        self.assertEqual(results['uuid-1'], {'success': False, 'data': "The provided status value of Dataset is not valid"})
+        self.assertFalse(results['missing']['success'])
+        self.assertEqual([call.args[0] for call in self.write_updates.call_args_list], [{'uuid-0': {'status': 'QA'}}])
+        self.assertEqual([call.args[0] for call in self.end_batch.call_args_list], [['uuid-0']])
+
+    def test_failed_write_fails_the_batch_only(self):
+        entity_updates = {f'uuid-{index}': {'status': 'QA'} for index in range(4)}
+        write_updates = self.write_updates.side_effect
+
+        def fail_first_write(entity_data_dicts):
+            if self.write_updates.call_count == 1:
+                raise Exception("Neo4j unavailable")
+            return write_updates(entity_data_dicts)
+
+        self.write_updates.side_effect = fail_first_write
+
+        results = self.apply(entity_updates, lambda uuid, json_data_dict, existing_entity_dict: dict(json_data_dict))
+
+        self.assertEqual([results[f'uuid-{index}']['success'] for index in range(4)], [False, False, True, True])
+        self.assertEqual([call.args[0] for call in self.end_batch.call_args_list], [['uuid-2', 'uuid-3']])
+
+    def test_failed_follow_up_still_ends_the_batch(self):
+        self.finish_update.side_effect = [Exception("after update failed"), None]
+
+        results = self.apply({'uuid-0': {'status': 'QA'}, 'uuid-1': {'status': 'QA'}}, lambda uuid, json_data_dict, existing_entity_dict: dict(json_data_dict))
+
+        self.assertFalse(results['uuid-0']['success'])
+        self.assertTrue(results['uuid-1']['success'])
+        self.end_batch.assert_called_once_with(['uuid-0', 'uuid-1'])
+
+    def test_is_update_applied(self):
+        entity_dict = {'uuid': 'uuid-0', 'status': 'QA', 'contributors': "[{'name': 'A'}]", 'count': 1}
+
+        self.assertTrue(bulk_update.is_update_applied({'status': 'QA', 'contributors': [{'name': 'A'}], 'count': 1}, entity_dict))
+        self.assertFalse(bulk_update.is_update_applied({'status': 'Published'}, entity_dict))
+        self.assertFalse(bulk_update.is_update_applied({'count': '1'}, entity_dict))
+        self.assertFalse(bulk_update.is_update_applied({'title': 'New title'}, entity_dict))
+
+
+if __name__ == '__main__':
+    unittest.main()
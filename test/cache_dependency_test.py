@@ -0,0 +1,205 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from schema import schema_manager
+
+
+class TestCacheDependencies(unittest.TestCase):
+
+    def setUp(self):
+        self.memcached_client = MagicMock()
+        schema_manager._memcached_client = self.memcached_client
+        schema_manager._memcached_prefix = 'test_'
+
+        generations_patcher = patch('schema.schema_manager._get_cache_generations', return_value = {None: 7, 'Dataset': 2, 'Upload': 3})
+        entity_types_patcher = patch('schema.schema_manager.get_all_entity_types', return_value = ['Dataset', 'Upload'])
+        generations_patcher.start()
+        entity_types_patcher.start()
+        self.addCleanup(generations_patcher.stop)
+        self.addCleanup(entity_types_patcher.stop)
+
+    def tearDown(self):
+        schema_manager._memcached_client = None
+        schema_manager._memcached_prefix = None
+
+    @patch('schema.schema_manager.schema_neo4j_queries.get_ancestor_uuids_by_uuids')
+    @patch('schema.schema_manager.entity_type_instanceof')
+    def test_dependency_uuids_include_embedded_entities_and_ancestors(self, mock_instanceof, mock_get_ancestor_uuids):
+        mock_instanceof.side_effect = lambda entity_type, superclass: entity_type == 'Dataset'
+        mock_get_ancestor_uuids.return_value = {'dataset-uuid': ['donor-uuid', 'sample-uuid'], 'dataset-2': ['donor-uuid']}
+
+        cached_dict = {
+            'uuid': 'dataset-uuid',
+            'upload': {'uuid': 'upload-uuid', 'title': 'Upload'},
+            'collections': [{'uuid': 'collection-uuid'}],
+            'previous_revision_uuid': 'previous-uuid',
+            'next_revision_uuids': ['next-uuid']
+        }
+        documents = [
+            ({'uuid': 'dataset-uuid', 'entity_type': 'Dataset'}, cached_dict),
+            ({'uuid': 'dataset-2', 'entity_type': 'Dataset'}, {'uuid': 'dataset-2'}),
+            ({'uuid': 'upload-uuid', 'entity_type': 'Upload'}, {'uuid': 'upload-uuid'})
+        ]
+
+        dependency_uuids_dict = schema_manager.get_cache_dependency_uuids_dict(documents)
+
+        # The ancestors of all the datasets are fetched with one query
+        mock_get_ancestor_uuids.assert_called_once_with(schema_manager._neo4j_driver, ['dataset-uuid', 'dataset-2'])
+        self.assertEqual(dependency_uuids_dict, {
+            'dataset-uuid': {'donor-uuid', 'sample-uuid', 'upload-uuid', 'collection-uuid', 'previous-uuid', 'next-uuid'},
+            'dataset-2': {'donor-uuid'},
+            'upload-uuid': set()
+        })
+
+    @patch('schema.schema_manager.get_cache_dependency_uuids_dict')
+    def test_record_appends_or_adds_dependents_once_per_key(self, mock_get_dependency_uuids_dict):
+        mock_get_dependency_uuids_dict.return_value = {'dataset-1': {'upload-uuid', 'donor-uuid'}, 'dataset-2': {'upload-uuid'}}
+        self.memcached_client.get_many.return_value = {'test__7_dependents_donor-uuid': 'sample-uuid:Sample '}
+        self.memcached_client.append.return_value = True
+        self.memcached_client.add.return_value = True
+
+        recorded_uuids = schema_manager._record_cache_dependencies([({'uuid': 'dataset-1', 'entity_type': 'Dataset'}, {}),
+                                                                    ({'uuid': 'dataset-2', 'entity_type': 'Dataset'}, {})])
+
+        self.assertEqual(recorded_uuids, {'dataset-1', 'dataset-2'})
+        self.memcached_client.get_many.assert_called_once()
+        self.memcached_client.add.assert_called_once_with('test__7_dependents_upload-uuid', 'dataset-1:Dataset dataset-2:Dataset ', expire = schema_manager.SchemaConstants.MEMCACHED_TTL, noreply = False)
+        self.memcached_client.append.assert_called_once_with('test__7_dependents_donor-uuid', 'dataset-1:Dataset ', noreply = True)
+        self.memcached_client.touch.assert_called_once_with('test__7_dependents_donor-uuid', expire = schema_manager.SchemaConstants.MEMCACHED_TTL, noreply = True)
+
+    @patch('schema.schema_manager.get_cache_dependency_uuids_dict')
+    def test_recorded_dependent_is_not_appended_again(self, mock_get_dependency_uuids_dict):
+        mock_get_dependency_uuids_dict.return_value = {'dataset-uuid': {'upload-uuid'}}
+        self.memcached_client.get_many.return_value = {'test__7_dependents_upload-uuid': 'dataset-uuid:Dataset '}
+
+        schema_manager._record_cache_dependencies([({'uuid': 'dataset-uuid', 'entity_type': 'Dataset'}, {})])
+
+        self.memcached_client.append.assert_not_called()
+        self.memcached_client.touch.assert_called_once_with('test__7_dependents_upload-uuid', expire = schema_manager.SchemaConstants.MEMCACHED_TTL, noreply = True)
+
+    @patch('schema.schema_manager.delete_memcached_cache')
+    @patch('schema.schema_manager.get_cache_dependency_uuids_dict')
+    def test_full_or_failing_dependents_skip_caching(self, mock_get_dependency_uuids_dict, mock_delete_memcached_cache):
+        mock_get_dependency_uuids_dict.return_value = {'dataset-uuid': {'donor-uuid'}}
+        dependents = ''.join(f'sample-{index}:Sample ' for index in range(schema_manager.SchemaConstants.MEMCACHED_MAX_DEPENDENTS))
+        self.memcached_client.get_many.return_value = {'test__7_dependents_donor-uuid': dependents}
+
+        schema_manager._set_complete_entities_cache([({'uuid': 'dataset-uuid', 'entity_type': 'Dataset'}, {'uuid': 'dataset-uuid'})])
+
+        # The document is neither cached nor are the caches of other entities deleted
+        self.memcached_client.append.assert_not_called()
+        self.memcached_client.set_many.assert_not_called()
+        mock_delete_memcached_cache.assert_not_called()
+
+        # The memcached errors don't fail the read
+        self.memcached_client.get_many.side_effect = Exception("Value too large")
+
+        recorded_uuids = schema_manager._record_cache_dependencies([({'uuid': 'dataset-uuid', 'entity_type': 'Dataset'}, {})])
+
+        self.assertEqual(recorded_uuids, set())
+        mock_delete_memcached_cache.assert_not_called()
+
+    @patch('schema.schema_manager.get_cache_dependency_uuids_dict')
+    def test_dependencies_are_recorded_before_the_documents_are_cached(self, mock_get_dependency_uuids_dict):
+        mock_get_dependency_uuids_dict.return_value = {'dataset-uuid': {'upload-uuid'}}
+        self.memcached_client.get_many.return_value = {}
+        self.memcached_client.add.return_value = True
+        self.memcached_client.set_many.return_value = []
+
+        schema_manager._set_complete_entities_cache([({'uuid': 'dataset-uuid', 'entity_type': 'Dataset'}, {'uuid': 'dataset-uuid'})])
+
+        method_names = [name for name, args, kwargs in self.memcached_client.method_calls if name in ['add', 'set_many']]
+        self.assertEqual(method_names, ['add', 'set_many'])
+        self.memcached_client.set_many.assert_called_once_with({'test__7.Dataset2_complete_dataset-uuid': {'uuid': 'dataset-uuid'}}, expire = schema_manager.SchemaConstants.MEMCACHED_TTL)
+
+    def test_provenance_of_each_depth_has_its_own_key(self):
+        self.memcached_client.get_many.return_value = {'test__7_dependents_donor-uuid': 'sample-uuid:Sample '}
+        self.memcached_client.add.return_value = True
+        entity_dict = {'uuid': 'dataset-uuid', 'entity_type': 'Dataset'}
+
+        schema_manager.set_provenance_cache(entity_dict, 2, '{"prov": 2}', {'donor-uuid', 'dataset-uuid'})
+
+        # Recorded under its own entity too so a write to the entity purges all the depths
+        self.memcached_client.append.assert_called_once_with('test__7_dependents_donor-uuid', 'dataset-uuid:Dataset:provenance_2 ', noreply = True)
+        self.memcached_client.add.assert_called_once_with('test__7_dependents_dataset-uuid', 'dataset-uuid:Dataset:provenance_2 ', expire = schema_manager.SchemaConstants.MEMCACHED_TTL, noreply = False)
+        self.memcached_client.set.assert_called_once_with('test__7.Dataset2_provenance_2_dataset-uuid', '{"prov": 2}', expire = schema_manager.SchemaConstants.MEMCACHED_TTL)
+
+        self.memcached_client.get.return_value = '{"prov": null}'
+        schema_manager._l1_cache.clear()
+
+        self.assertEqual(schema_manager.get_provenance_cache(entity_dict, None), '{"prov": null}')
+        self.memcached_client.get.assert_called_once_with('test__7.Dataset2_provenance_dataset-uuid')
+
+    def test_delete_purges_only_the_provenance_of_the_recorded_depth(self):
+        self.memcached_client.get_many.return_value = {'test__7_dependents_donor-uuid': 'dataset-uuid:Dataset:provenance_2 '}
+
+        schema_manager.delete_memcached_cache(['donor-uuid'])
+
+        cache_keys = self.memcached_client.delete_many.call_args[0][0]
+        self.assertIn('test__7.Dataset2_provenance_2_dataset-uuid', cache_keys)
+        self.assertNotIn('test__7.Dataset2_complete_dataset-uuid', cache_keys)
+
+    def test_delete_purges_dependents_in_one_batch(self):
+        self.memcached_client.get_many.return_value = {'test__7_dependents_upload-uuid': 'dataset-1:Dataset dataset-2:Dataset dataset-1:Dataset '}
+
+        schema_manager.delete_memcached_cache(['upload-uuid'])
+
+        self.memcached_client.delete_many.assert_called_once()
+        cache_keys = self.memcached_client.delete_many.call_args[0][0]
+        self.assertIn('test__7_dependents_upload-uuid', cache_keys)
+        for uuid in ['dataset-1', 'dataset-2']:
+            self.assertIn(f'test__7.Dataset2_complete_{uuid}', cache_keys)
+            self.assertIn(f'test__7.Dataset2_complete_index_{uuid}', cache_keys)
+            self.assertIn(f'test__7.Dataset2_provenance_{uuid}', cache_keys)
+            self.assertIn(f'test__7_neo4j_{uuid}', cache_keys)
+        # The type of the given uuid is unknown, so the keys of all entity types are deleted
+        for entity_type_namespace in ['test__7.Dataset2', 'test__7.Upload3']:
+            self.assertIn(f'{entity_type_namespace}_complete_upload-uuid', cache_keys)
+            self.assertIn(f'{entity_type_namespace}_complete_index_upload-uuid', cache_keys)
+        self.assertEqual(len(cache_keys), 1 + 4 + 4 + 7)
+
+
+class TestCacheGenerations(unittest.TestCase):
+
+    def setUp(self):
+        self.memcached_client = MagicMock()
+        schema_manager._memcached_client = self.memcached_client
+        schema_manager._memcached_prefix = 'test_'
+        schema_manager._cache_generations_fetched_at = 0
+
+        entity_types_patcher = patch('schema.schema_manager.get_all_entity_types', return_value = ['Dataset'])
+        entity_types_patcher.start()
+        self.addCleanup(entity_types_patcher.stop)
+
+    def tearDown(self):
+        schema_manager._memcached_client = None
+        schema_manager._memcached_prefix = None
+        schema_manager._cache_generations_fetched_at = 0
+
+    def test_entity_cache_key_contains_generations(self):
+        self.memcached_client.get_many.return_value = {'test__generation': 4, 'test__generation_Dataset': 9}
+
+        cache_key = schema_manager.get_entity_cache_key('complete', 'dataset-uuid', 'Dataset')
+
+        self.assertEqual(cache_key, 'test__4.Dataset9_complete_dataset-uuid')
+
+    def test_flush_increments_generation_instead_of_flush_all(self):
+        self.memcached_client.incr.return_value = 5
+
+        schema_manager.increment_cache_generation('Dataset')
+
+        self.memcached_client.incr.assert_called_once_with('test__generation_Dataset', 1, noreply = False)
+        self.memcached_client.flush_all.assert_not_called()
+
+    def test_missing_generation_is_started_from_current_time(self):
+        self.memcached_client.get_many.return_value = {}
+        self.memcached_client.add.return_value = True
+
+        with patch('schema.schema_manager.time.time', return_value = 1700000000):
+            cache_namespace = schema_manager.get_cache_namespace()
+
+        self.assertEqual(cache_namespace, 'test__1700000000')
+
+
+if __name__ == '__main__':
+    unittest.main()
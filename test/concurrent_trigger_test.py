@@ -0,0 +1,77 @@
+import threading
+import unittest
+from unittest.mock import patch
+from werkzeug.datastructures import ImmutableMultiDict
+
+from schema import schema_manager
+from schema.schema_constants import TriggerTypeEnum
+
+
+class TestConcurrentTriggers(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = schema_manager._schema
+        schema_manager._schema = {
+            'ACTIVITIES': {'Activity': {'properties': {}}},
+            'ENTITIES': {
+                'Dataset': {
+                    'properties': {
+                        'uuid': {'type': 'string'},
+                        'collections': {'type': 'list', 'on_read_trigger': 'get_dataset_collections'},
+                        'upload': {'type': 'json_string', 'on_read_trigger': 'get_dataset_upload'},
+                        'title': {'type': 'string', 'on_read_trigger': 'get_dataset_title', 'depends_on': ['upload']}
+                    }
+                }
+            }
+        }
+        schema_manager._trigger_timings.clear()
+
+    def tearDown(self):
+        schema_manager._schema = self.schema
+
+    @patch('schema.schema_manager.schema_triggers')
+    def test_independent_triggers_overlap_and_merge_in_order(self, mock_triggers):
+        both_started = threading.Barrier(2, timeout = 5)
+
+        def get_collections(key, *args):
+            both_started.wait()
+            return key, [{'uuid': 'collection-uuid'}]
+
+        def get_upload(key, *args):
+            both_started.wait()
+            return key, {'uuid': 'upload-uuid'}
+
+        mock_triggers.get_dataset_collections.side_effect = get_collections
+        mock_triggers.get_dataset_upload.side_effect = get_upload
+        # The dependent trigger sees the generated upload
+        mock_triggers.get_dataset_title.side_effect = lambda key, *args: (key, f"Title of {args[3]['upload']['uuid']}")
+
+        generated_data_dict = schema_manager.generate_triggered_data(TriggerTypeEnum.ON_READ, 'Dataset', ImmutableMultiDict(), None, {'uuid': 'dataset-uuid'}, {})
+
+        self.assertEqual(list(generated_data_dict.items()), [
+            ('collections', [{'uuid': 'collection-uuid'}]),
+            ('upload', {'uuid': 'upload-uuid'}),
+            ('title', 'Title of upload-uuid')
+        ])
+        self.assertEqual(schema_manager.get_trigger_timing_stats()['Dataset.upload:get_dataset_upload']['calls'], 1)
+
+    @patch('schema.schema_manager.schema_triggers')
+    def test_failed_trigger_value_is_the_error_message(self, mock_triggers):
+        mock_triggers.get_dataset_collections.side_effect = Exception('Neo4j is down')
+        mock_triggers.get_dataset_upload.return_value = ('upload', {'uuid': 'upload-uuid'})
+        mock_triggers.get_dataset_title.return_value = ('title', 'Title')
+
+        generated_data_dict = schema_manager.generate_triggered_data(TriggerTypeEnum.ON_READ, 'Dataset', ImmutableMultiDict(), None, {'uuid': 'dataset-uuid'}, {})
+
+        self.assertEqual(generated_data_dict['collections'], 'Failed to call the on_read_trigger method: get_dataset_collections')
+        self.assertEqual(generated_data_dict['upload'], {'uuid': 'upload-uuid'})
+
+    def test_dependency_must_be_defined_before(self):
+        schema_manager._schema['ENTITIES']['Dataset']['properties']['collections']['depends_on'] = ['title']
+
+        with self.assertRaises(ValueError):
+            schema_manager.get_schema_plan('Dataset')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from app_client import load_app, use_app_schema_manager
+from schema.schema_constants import DataVisibilityEnum
+
+app = load_app()
+
+ENTITIES_DICT = {
+    'public-uuid': {'uuid': 'public-uuid', 'entity_type': 'Donor', 'secret': 'x'},
+    'non-public-uuid': {'uuid': 'non-public-uuid', 'entity_type': 'Donor'},
+    'failing-uuid': {'uuid': 'failing-uuid', 'entity_type': 'Donor'}
+}
+
+
+def get_index_metadata(request, token, entity_dict):
+    if entity_dict['uuid'] == 'failing-uuid':
+        raise Exception("Trigger failed")
+
+    return dict(entity_dict)
+
+
+@patch('app.schema_manager.exclude_properties_from_response', side_effect = lambda fields_to_exclude, result: {key: value for key, value in result.items() if key != 'secret'})
+@patch('app.schema_manager.get_fields_to_exclude', return_value = ['secret'])
+@patch('app.schema_manager.normalize_document_result_for_response', side_effect = lambda entity_dict: entity_dict)
+@patch('app.schema_manager.get_index_metadata', side_effect = get_index_metadata)
+@patch('app._get_entity_visibility', side_effect = lambda entity_type, entity_dict: DataVisibilityEnum.NONPUBLIC if entity_dict['uuid'] == 'non-public-uuid' else DataVisibilityEnum.PUBLIC)
+@patch('app.schema_neo4j_queries.get_entities_by_uuids', return_value = ENTITIES_DICT)
+@patch('app.schema_manager.resolve_uuids', return_value = {'HBM111.AAAA.111': 'public-uuid', 'HBM222.BBBB.222': 'non-public-uuid', 'failing-uuid': 'failing-uuid'})
+class TestDocuments(unittest.TestCase):
+
+    def setUp(self):
+        use_app_schema_manager(self)
+        self.client = app.app.test_client()
+
+    def post_documents(self, id_list):
+        return self.client.post('/documents', json = id_list)
+
+    def test_one_line_per_id_in_order(self, *mocks):
+        response = self.post_documents(['HBM111.AAAA.111', 'HBM999.ZZZZ.999', 'HBM222.BBBB.222', 'failing-uuid'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+
+        documents = [json.loads(line) for line in response.get_data(as_text = True).splitlines()]
+
+        self.assertEqual(len(documents), 4)
+        # The public properties of a public entity without a token
+        self.assertEqual(documents[0], {'uuid': 'public-uuid', 'entity_type': 'Donor'})
+        self.assertEqual(documents[1], {'id': 'HBM999.ZZZZ.999', 'error': "Entity of id: HBM999.ZZZZ.999 not found"})
+        self.assertEqual(documents[2]['id'], 'HBM222.BBBB.222')
+        self.assertIn('non-public data', documents[2]['error'])
+        self.assertEqual(documents[3], {'id': 'failing-uuid', 'error': "Failed to generate the document of Donor failing-uuid"})
+
+    def test_non_public_entities_with_read_access(self, *mocks):
+        with patch('app.user_in_hubmap_read_group', return_value = True):
+            response = self.post_documents(['HBM222.BBBB.222', 'HBM111.AAAA.111'])
+
+        documents = [json.loads(line) for line in response.get_data(as_text = True).splitlines()]
+
+        self.assertEqual(documents, [{'uuid': 'non-public-uuid', 'entity_type': 'Donor'},
+                                     {'uuid': 'public-uuid', 'entity_type': 'Donor', 'secret': 'x'}])
+
+    def test_invalid_body(self, *mocks):
+        for id_list in [{'id': 'HBM111.AAAA.111'}, [], ['HBM111.AAAA.111', 1], ['  ']]:
+            response = self.post_documents(id_list)
+
+            self.assertEqual(response.status_code, 400)
+
+    @patch('app.DOCUMENTS_BATCH_MAX_SIZE', 2)
+    def test_batch_limit(self, *mocks):
+        self.assertEqual(self.post_documents(['HBM111.AAAA.111'] * 2).status_code, 200)
+
+        response = self.post_documents(['HBM111.AAAA.111'] * 3)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('at most 2 ids', response.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
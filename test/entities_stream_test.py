@@ -0,0 +1,51 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from app_client import load_app, use_app_schema_manager
+
+app = load_app()
+
+ENTITIES_LIST = [{'uuid': f'uuid-{index}', 'entity_type': 'Donor'} for index in range(5)]
+
+
+def get_entities_by_type_page(neo4j_driver, entity_type, last_uuid, page_size):
+    entities_list = [entity_dict for entity_dict in ENTITIES_LIST if last_uuid is None or entity_dict['uuid'] > last_uuid]
+    return entities_list[:page_size]
+
+
+@patch('app.schema_manager.normalize_entities_list_for_response', side_effect = lambda entities_list: entities_list)
+@patch('app.schema_manager.get_complete_entities_list', side_effect = lambda request_args, token, entities_list, properties_to_skip: list(entities_list))
+@patch('app.app_neo4j_queries.get_entities_by_type_page', side_effect = get_entities_by_type_page)
+@patch('app.get_user_token', return_value = 'token')
+class TestEntitiesStream(unittest.TestCase):
+
+    def setUp(self):
+        use_app_schema_manager(self)
+        self.client = app.app.test_client()
+
+    @patch('app.ENTITIES_STREAM_PAGE_SIZE', 2)
+    def test_all_pages_are_streamed(self, mock_get_user_token, mock_get_page, mock_get_complete_entities_list, mock_normalize):
+        response = self.client.get('/donor/entities?format=ndjson')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+
+        entities_list = [json.loads(line) for line in response.get_data(as_text = True).splitlines()]
+
+        self.assertEqual(entities_list, ENTITIES_LIST)
+        # The last uuid of each page is the cursor of the next one, until an empty page
+        self.assertEqual([call.args[2] for call in mock_get_page.call_args_list], [None, 'uuid-1', 'uuid-3', 'uuid-4'])
+        self.assertTrue(all(call.args[3] == 2 for call in mock_get_page.call_args_list))
+        self.assertEqual(mock_get_complete_entities_list.call_count, 3)
+
+    def test_format_cannot_be_combined_with_other_args(self, *mocks):
+        for query_string in ['format=ndjson&property=uuid', 'format=json']:
+            response = self.client.get(f'/donor/entities?{query_string}')
+
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("Only '?format=ndjson' is supported", response.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
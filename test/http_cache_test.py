@@ -0,0 +1,97 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from schema import schema_manager
+from schema import schema_http_client
+
+
+def build_response(status_code, content = b'', headers = None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers.update(headers or {})
+    return response
+
+
+class TestHttpCache(unittest.TestCase):
+
+    def setUp(self):
+        self.memcached_client = MagicMock()
+        self.memcached_client.get.return_value = None
+        schema_manager._memcached_client = self.memcached_client
+        schema_manager._memcached_prefix = 'test_'
+        schema_manager._l1_cache.clear()
+        schema_manager._l1_cache_bytes = 0
+
+    def tearDown(self):
+        schema_manager._memcached_client = None
+        schema_manager._memcached_prefix = None
+
+    def test_compact_entry_round_trip(self):
+        response = build_response(200, b'{"hm_uuid": "abc"}', {'Content-Type': 'application/json', 'Server': 'nginx'})
+
+        cache_entry = schema_http_client.to_cache_entry(response, time.time() + 60)
+        rebuilt_response = schema_http_client.from_cache_entry('http://uuid-api/uuid/abc', cache_entry)
+
+        self.assertNotIn('Server', cache_entry['headers'])
+        self.assertEqual(rebuilt_response.status_code, 200)
+        self.assertEqual(rebuilt_response.json(), {'hm_uuid': 'abc'})
+
+    @patch('schema.schema_http_client.get')
+    def test_fresh_entry_used_without_request(self, mock_get):
+        self.memcached_client.get.return_value = {'status': 200, 'body': b'ok', 'headers': {}, 'fresh_until': time.time() + 60}
+
+        response = schema_manager.make_request_get('http://uuid-api/uuid/abc')
+
+        self.assertEqual(response.content, b'ok')
+        mock_get.assert_not_called()
+
+    @patch('schema.schema_http_client.get', return_value = build_response(304))
+    def test_stale_entry_revalidated(self, mock_get):
+        self.memcached_client.get.return_value = {'status': 200, 'body': b'ok', 'headers': {'ETag': '"v1"'}, 'fresh_until': time.time() - 1}
+
+        response = schema_manager.make_request_get('http://uuid-api/uuid/abc')
+
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(mock_get.call_args.kwargs['headers']['If-None-Match'], '"v1"')
+        self.assertGreater(self.memcached_client.set.call_args[0][1]['fresh_until'], time.time())
+
+    @patch('schema.schema_http_client.get', return_value = build_response(503, b'unavailable'))
+    def test_server_error_not_cached(self, mock_get):
+        schema_manager.make_request_get('http://uuid-api/uuid/abc')
+
+        self.memcached_client.set.assert_not_called()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        schema_http_client.configure(circuit_breaker_threshold = 2, circuit_breaker_reset_timeout = 60)
+        schema_http_client._circuit_breakers.clear()
+
+    def tearDown(self):
+        schema_http_client.configure(circuit_breaker_threshold = 5, circuit_breaker_reset_timeout = 30)
+        schema_http_client._circuit_breakers.clear()
+
+    @patch('requests.Session.request', return_value = build_response(503))
+    def test_opens_after_consecutive_failures(self, mock_request):
+        for _ in range(2):
+            schema_http_client.get('http://failing-api/status')
+
+        with self.assertRaises(schema_http_client.CircuitBreakerOpenException):
+            schema_http_client.get('http://failing-api/status')
+
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch('requests.Session.request', return_value = build_response(200))
+    def test_default_timeout_applied(self, mock_request):
+        schema_http_client.get('http://working-api/status')
+
+        self.assertEqual(mock_request.call_args.kwargs['timeout'], (5, 60))
+
+
+if __name__ == '__main__':
+    unittest.main()
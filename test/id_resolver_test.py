@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import patch
+
+from schema import schema_manager
+
+
+class TestIdResolver(unittest.TestCase):
+
+    def setUp(self):
+        schema_manager._memcached_client = None
+        schema_manager._memcached_prefix = None
+        schema_manager._resolved_uuids.clear()
+
+    @patch('schema.schema_manager.get_hubmap_ids')
+    @patch('schema.schema_neo4j_queries.get_uuids_by_ids',
+           return_value={'HBM123.ABCD.456': 'a' * 32, 'a' * 32: 'a' * 32})
+    def test_resolved_from_neo4j_once(self, mock_get_uuids_by_ids, mock_get_hubmap_ids):
+        for _ in range(3):
+            self.assertEqual(schema_manager.resolve_uuid('hbm123.abcd.456'), 'a' * 32)
+
+        mock_get_uuids_by_ids.assert_called_once()
+        mock_get_hubmap_ids.assert_not_called()
+
+    @patch('schema.schema_manager.get_hubmap_ids', return_value={'hm_uuid': 'b' * 32})
+    @patch('schema.schema_neo4j_queries.get_uuids_by_ids', return_value={'a' * 32: 'a' * 32})
+    def test_bulk_falls_back_to_uuid_api(self, mock_get_uuids_by_ids, mock_get_hubmap_ids):
+        resolved_dict = schema_manager.resolve_uuids(['A' * 32, 'TEST0001-RK-1'])
+
+        self.assertEqual(resolved_dict, {'A' * 32: 'a' * 32, 'TEST0001-RK-1': 'b' * 32})
+        mock_get_uuids_by_ids.assert_called_once()
+        mock_get_hubmap_ids.assert_called_once_with('TEST0001-RK-1')
+
+    @patch('schema.schema_manager.get_hubmap_ids')
+    @patch('schema.schema_neo4j_queries.get_uuids_by_ids', return_value={'a' * 32: 'a' * 32})
+    def test_bulk_without_uuid_api(self, mock_get_uuids_by_ids, mock_get_hubmap_ids):
+        resolved_dict = schema_manager.resolve_uuids(['A' * 32, 'TEST0001-RK-1', 'TEST0001-RK-2'], use_uuid_api = False)
+
+        self.assertEqual(resolved_dict, {'A' * 32: 'a' * 32})
+        mock_get_hubmap_ids.assert_not_called()
+
+    @patch('schema.schema_manager.get_hubmap_ids')
+    @patch('schema.schema_neo4j_queries.get_uuids_by_ids', return_value={'a' * 32: 'a' * 32})
+    def test_bulk_skips_ids_that_are_not_strings(self, mock_get_uuids_by_ids, mock_get_hubmap_ids):
+        resolved_dict = schema_manager.resolve_uuids(['a' * 32, 1, None, ['list'], ' '])
+
+        self.assertEqual(resolved_dict, {'a' * 32: 'a' * 32})
+        self.assertEqual(mock_get_uuids_by_ids.call_args[0][1], {'a' * 32})
+        mock_get_hubmap_ids.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import time
+import tempfile
+import unittest
+
+import jobs
+
+
+class TestJobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.job_store = jobs.JobStore(os.path.join(self.temp_dir.name, 'jobs.db'), lease_seconds = 60)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_progress_counts_and_items(self):
+        job_id = self.job_store.create_job('bulk_update', {'entity_type': 'Dataset'}, [('uuid-1', {'status': 'QA'}), ('uuid-2', {'status': 'QA'}), ('uuid-3', {'status': 'QA'})], 'user-sub')
+
+        job = self.job_store.claim_job(job_id)
+        self.assertEqual(job['status'], jobs.JOB_STATUS_RUNNING)
+        self.assertEqual(job['params'], {'entity_type': 'Dataset'})
+        self.assertEqual(job['attempts'], 1)
+
+        self.job_store.set_item_results(job_id, {'uuid-1': (jobs.ITEM_STATUS_SUCCEEDED, None), 'uuid-2': (jobs.ITEM_STATUS_FAILED, 'Invalid status')})
+
+        job = self.job_store.get_job(job_id, include_items = True)
+        self.assertEqual(job['total'], 3)
+        self.assertEqual(job['counts'], {'pending': 1, 'succeeded': 1, 'failed': 1})
+        self.assertEqual(job['items'][1], {'key': 'uuid-2', 'status': 'failed', 'result': 'Invalid status'})
+        self.assertEqual(self.job_store.get_pending_items(job_id), [('uuid-3', {'status': 'QA'}, None)])
+
+        # Only the pending items get a marker
+        self.job_store.set_item_markers(job_id, {'uuid-1': 'ignored', 'uuid-3': {'status': 'QA'}})
+        self.assertEqual(self.job_store.get_pending_items(job_id), [('uuid-3', {'status': 'QA'}, {'status': 'QA'})])
+
+        self.job_store.finish_job(job_id, jobs.JOB_STATUS_COMPLETED)
+        self.assertEqual(self.job_store.get_job(job_id)['status'], jobs.JOB_STATUS_COMPLETED)
+        self.assertIsNone(self.job_store.get_job('missing'))
+
+    def test_only_abandoned_jobs_are_claimed_again(self):
+        job_id = self.job_store.create_job('bulk_update', {}, [('uuid-1', {})])
+
+        self.assertIsNotNone(self.job_store.claim_job())
+        # Still leased by the first worker
+        self.assertIsNone(self.job_store.claim_job())
+
+        # The lease expires when the worker stops renewing it
+        self.job_store.lease_seconds = -1
+        self.job_store.renew_lease(job_id)
+
+        job = self.job_store.claim_job()
+        self.assertEqual(job['id'], job_id)
+        self.assertEqual(job['attempts'], 2)
+
+    def test_claimed_job_is_not_claimed_by_the_monitor(self):
+        job_id = self.job_store.create_job('bulk_update', {}, [('uuid-1', {})], 'user-sub', claimed = True)
+
+        job = self.job_store.get_job(job_id)
+        self.assertEqual(job['status'], jobs.JOB_STATUS_RUNNING)
+        self.assertEqual(job['attempts'], 1)
+        self.assertIsNone(self.job_store.claim_job())
+
+    def test_purge_finished_jobs(self):
+        finished_job_id = self.job_store.create_job('bulk_update', {}, [('uuid-1', {})])
+        self.job_store.finish_job(finished_job_id, jobs.JOB_STATUS_COMPLETED)
+        queued_job_id = self.job_store.create_job('bulk_update', {}, [('uuid-2', {})])
+
+        self.job_store.purge_finished_jobs(time.time() + 1)
+
+        self.assertIsNone(self.job_store.get_job(finished_job_id))
+        self.assertIsNotNone(self.job_store.get_job(queued_job_id))
+
+
+class TestJobRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.job_store = jobs.JobStore(os.path.join(self.temp_dir.name, 'jobs.db'), lease_seconds = 60)
+        self.job_runner = jobs.JobRunner(self.job_store, resume_token_getter = lambda: 'internal-token', max_attempts = 2)
+        self.calls = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def wait_for_status(self, job_id, status):
+        for _ in range(100):
+            job = self.job_store.get_job(job_id)
+            if job['status'] == status:
+                return job
+            time.sleep(0.02)
+        self.fail(f"Job {job_id} is still {job['status']}")
+
+    def test_resumed_job_only_runs_pending_items(self):
+        def handler(job, items, report, mark, user_token):
+            self.calls.append(([(item_key, marker) for item_key, payload, marker in items], user_token))
+            report({item_key: (jobs.ITEM_STATUS_SUCCEEDED, None) for item_key, payload, marker in items})
+
+        self.job_runner.register_handler('bulk_update', handler)
+
+        # A job abandoned by a recycled worker after its first item
+        job_id = self.job_store.create_job('bulk_update', {}, [('uuid-1', {}), ('uuid-2', {})])
+        job = self.job_store.claim_job(job_id)
+        self.job_store.set_item_results(job_id, {'uuid-1': (jobs.ITEM_STATUS_SUCCEEDED, None)})
+        # Then died after writing the second item, before reporting it
+        self.job_store.set_item_markers(job_id, {'uuid-2': {'uuid': 'uuid-2'}})
+
+        self.job_runner._run_job(job, self.job_runner.resume_token_getter())
+
+        self.assertEqual(self.calls, [([('uuid-2', {'uuid': 'uuid-2'})], 'internal-token')])
+        job = self.job_store.get_job(job_id)
+        self.assertEqual(job['status'], jobs.JOB_STATUS_COMPLETED)
+        self.assertEqual(job['counts']['succeeded'], 2)
+
+    def test_submit_runs_with_user_token(self):
+        self.job_runner.ensure_started = lambda: None
+        self.job_runner.register_handler('bulk_update', lambda job, items, report, mark, user_token: self.calls.append(user_token))
+
+        job_id = self.job_runner.submit('bulk_update', {}, [('uuid-1', {})], 'user-sub', 'user-token')
+
+        self.wait_for_status(job_id, jobs.JOB_STATUS_COMPLETED)
+        self.assertEqual(self.calls, ['user-token'])
+
+        with self.assertRaises(ValueError):
+            self.job_runner.submit('unknown', {}, [], 'user-sub', 'user-token')
+
+    def test_failing_job_is_released_then_given_up(self):
+        def handler(job, items, report, mark, user_token):
+            raise Exception("Neo4j unavailable")
+
+        self.job_runner.register_handler('bulk_update', handler)
+        job_id = self.job_store.create_job('bulk_update', {}, [('uuid-1', {})])
+
+        for attempt in range(3):
+            job = self.job_store.claim_job()
+            self.assertEqual(job['attempts'], attempt + 1)
+            self.job_runner._run_job(job, 'internal-token')
+
+        job = self.job_store.get_job(job_id)
+        self.assertEqual(job['status'], jobs.JOB_STATUS_FAILED)
+        self.assertIsNone(self.job_store.claim_job())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import gzip
+import json
+import unittest
+from unittest.mock import patch
+
+from app_client import load_app
+
+app = load_app()
+
+
+@patch('app.try_stash_response_body', return_value = None)
+@patch('app.JSON_RESPONSE_GZIP_MIN_SIZE', 100)
+class TestJsonResponse(unittest.TestCase):
+
+    def get_response(self, result, headers = None):
+        with app.app.test_request_context(headers = headers or {}):
+            return app.json_response(result)
+
+    def test_large_body_gzipped_when_accepted(self, mock_stash):
+        result = {'b': 'x' * 200, 'a': [1, 2]}
+
+        response = self.get_response(result, {'Accept-Encoding': 'gzip, deflate'})
+        body = response.get_data()
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.headers['Content-Length'], str(len(body)))
+        self.assertEqual(response.mimetype, 'application/json')
+        # Same keys order as jsonify()
+        self.assertEqual(gzip.decompress(body), json.dumps(result, sort_keys = True, separators = (',', ':')).encode('utf-8'))
+
+    def test_large_body_not_gzipped_when_not_accepted(self, mock_stash):
+        response = self.get_response({'a': 'x' * 200})
+
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.headers['Content-Length'], str(len(response.get_data())))
+        self.assertEqual(json.loads(response.get_data()), {'a': 'x' * 200})
+
+    def test_small_body_below_threshold(self, mock_stash):
+        response = self.get_response({'a': 1}, {'Accept-Encoding': 'gzip'})
+
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertNotIn('Vary', response.headers)
+        self.assertEqual(response.get_data(), b'{"a":1}')
+        self.assertEqual(response.headers['Content-Length'], '7')
+
+    def test_stdlib_fallback_for_ints_beyond_64_bits(self, mock_stash):
+        result = {'big': 2 ** 70, 'small': 1}
+
+        with app.app.test_request_context():
+            body = app.encode_json_response_body(result)
+
+        self.assertEqual(json.loads(body), result)
+        self.assertEqual(json.loads(self.get_response(result).get_data()), result)
+
+
+if __name__ == '__main__':
+    unittest.main()
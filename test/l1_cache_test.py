@@ -0,0 +1,92 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from schema import schema_manager
+
+
+class TestL1Cache(unittest.TestCase):
+
+    def setUp(self):
+        self.memcached_client = MagicMock()
+        self.memcached_client.get.return_value = None
+        schema_manager._memcached_client = self.memcached_client
+        schema_manager._memcached_prefix = 'test_'
+        schema_manager._l1_cache.clear()
+        schema_manager._l1_cache_bytes = 0
+        schema_manager._l1_cache_version = 1
+
+        # Skip reading the cache generations and L1 version stamp from Memcached
+        schema_manager._cache_generations_fetched_at = time.time() + 3600
+
+    def tearDown(self):
+        schema_manager._memcached_client = None
+        schema_manager._memcached_prefix = None
+        schema_manager._l1_cache.clear()
+        schema_manager._l1_cache_bytes = 0
+        schema_manager._l1_cache_version = None
+        schema_manager._cache_generations_fetched_at = 0
+
+    def test_hit_skips_memcached_and_returns_a_copy(self):
+        schema_manager.set_cached_data('test_key', {'uuid': 'abc'})
+
+        first_result = schema_manager.get_cached_data('test_key')
+        first_result['uuid'] = 'modified'
+        second_result = schema_manager.get_cached_data('test_key')
+
+        self.assertEqual(second_result, {'uuid': 'abc'})
+        self.memcached_client.get.assert_not_called()
+
+    def test_expired_entry_falls_back_to_memcached(self):
+        schema_manager.set_cached_data('test_key', {'uuid': 'abc'}, expire = 1)
+        self.memcached_client.get.return_value = {'uuid': 'from-memcached'}
+
+        with patch('schema.schema_manager.time.time', return_value = time.time() + 2):
+            result = schema_manager.get_cached_data('test_key')
+
+        self.assertEqual(result, {'uuid': 'from-memcached'})
+
+    @patch('schema.schema_manager.SchemaConstants.L1_CACHE_MAX_BYTES', 2000)
+    def test_least_recently_used_entries_are_evicted_by_size(self):
+        for index in range(20):
+            schema_manager.set_cached_data(f'test_key_{index}', 'x' * 100)
+
+        self.assertLessEqual(schema_manager.get_l1_cache_stats()['bytes'], 2000)
+        self.assertNotIn('test_key_0', schema_manager._l1_cache)
+        self.assertIn('test_key_19', schema_manager._l1_cache)
+
+    def test_immutable_values_are_not_pickled(self):
+        schema_manager.set_cached_data('test_key', '{"prov": "json"}')
+
+        with patch('schema.schema_manager.pickle.loads') as mock_loads:
+            result = schema_manager.get_cached_data('test_key')
+
+        self.assertEqual(result, '{"prov": "json"}')
+        mock_loads.assert_not_called()
+
+    def test_new_version_drops_only_the_deleted_keys(self):
+        schema_manager.set_cached_data('test_key', {'uuid': 'abc'})
+        schema_manager.set_cached_data('other_key', {'uuid': 'def'})
+        self.memcached_client.get_many.return_value = {'test__l1_invalidated_2': ['test_key', 'missing_key'], 'test__l1_invalidated_3': []}
+
+        # Other workers deleted some cached data
+        schema_manager._check_l1_cache_version(3)
+
+        self.memcached_client.get_many.assert_called_once_with(['test__l1_invalidated_2', 'test__l1_invalidated_3'])
+        self.assertNotIn('test_key', schema_manager._l1_cache)
+        self.assertIn('other_key', schema_manager._l1_cache)
+        self.assertEqual(schema_manager.get_l1_cache_stats()['bytes'], schema_manager._l1_cache['other_key'][3])
+
+    def test_missing_or_too_many_invalidations_clear_the_cache(self):
+        for l1_version, invalidations_dict in [(2, {}), (3 + schema_manager.SchemaConstants.L1_CACHE_MAX_INVALIDATIONS, {})]:
+            schema_manager.set_cached_data('test_key', {'uuid': 'abc'})
+            self.memcached_client.get_many.return_value = invalidations_dict
+
+            schema_manager._check_l1_cache_version(l1_version)
+
+            self.assertEqual(schema_manager.get_l1_cache_stats()['size'], 0)
+            self.assertEqual(schema_manager.get_l1_cache_stats()['bytes'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from schema import schema_neo4j_queries
+
+
+class TestQueryParameters(unittest.TestCase):
+
+    def tearDown(self):
+        schema_neo4j_queries._query_registry.clear()
+
+    def test_properties_are_bound_as_parameters(self):
+        parameters = schema_neo4j_queries.build_properties_params({
+            'uuid': "abc'def",
+            'count': 3,
+            'contains_human_genetic_sequences': False,
+            'created_timestamp': 'TIMESTAMP()',
+            'metadata': {'key': 'value'}
+        })
+
+        self.assertEqual(parameters['properties'], {
+            'uuid': "abc'def",
+            'count': 3,
+            'contains_human_genetic_sequences': False,
+            # Same string literal as before, converted back by schema_manager.convert_str_literal()
+            'metadata': "{'key': 'value'}"
+        })
+        self.assertEqual(parameters['timestamp_keys'], ['created_timestamp'])
+
+    def test_same_query_text_for_different_uuids(self):
+        neo4j_driver = MagicMock()
+        session = neo4j_driver.session.return_value.__enter__.return_value
+        session.read_transaction.return_value = None
+
+        schema_neo4j_queries.get_children(neo4j_driver, 'uuid-1')
+        schema_neo4j_queries.get_children(neo4j_driver, 'uuid-2')
+
+        first_call, second_call = session.read_transaction.call_args_list
+        self.assertEqual(first_call[0][1], second_call[0][1])
+        self.assertEqual(second_call[0][2]['uuid'], 'uuid-2')
+        self.assertEqual(schema_neo4j_queries.get_query_registry()['get_children'],
+                         {'shapes': 1, 'executions': 2, 'overflow': False})
+
+    @patch('schema.schema_neo4j_queries.SchemaConstants.NEO4J_QUERY_MAX_SHAPES', 2)
+    def test_interpolated_values_are_reported(self):
+        for index in range(5):
+            schema_neo4j_queries.register_query('test_query', f"MATCH (e) WHERE e.uuid = 'uuid-{index}' RETURN e")
+
+        self.assertEqual(schema_neo4j_queries.get_query_registry()['test_query'],
+                         {'shapes': 2, 'executions': 5, 'overflow': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
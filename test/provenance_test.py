@@ -0,0 +1,68 @@
+import json
+import unittest
+from unittest.mock import MagicMock
+
+import provenance
+
+
+class TestProvenanceDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.auth_helper = MagicMock()
+        self.auth_helper.get_globus_groups_info.return_value = {
+            'by_id': {'group-uuid': {'uuid': 'group-uuid', 'displayname': 'Group', 'name': 'group'}},
+            'by_name': {'group': {'uuid': 'group-uuid', 'displayname': 'Group'}}
+        }
+
+        creator = {
+            'created_by_user_sub': 'user-sub',
+            'created_by_user_email': 'user@example.org',
+            'created_by_user_displayname': 'User',
+            'group_uuid': 'group-uuid'
+        }
+        self.provenance_dict = {
+            'nodes': [
+                {'uuid': 'lab-uuid', 'entity_type': 'Lab'},
+                {'uuid': 'activity-uuid', 'created_timestamp': 0, 'creation_action': 'Create Sample', 'protocol_url': None},
+                {'uuid': 'donor-uuid', 'entity_type': 'Donor', 'created_timestamp': 0, 'metadata': {}, **creator},
+                {'uuid': 'sample-uuid', 'entity_type': 'Sample', 'created_timestamp': 0, 'count': 2, **creator}
+            ],
+            'relationships': [
+                {'rel_data': {'type': 'ACTIVITY_OUTPUT'}, 'fromNode': {'uuid': 'activity-uuid'}, 'toNode': {'uuid': 'sample-uuid'}},
+                {'rel_data': {'type': 'ACTIVITY_INPUT'}, 'fromNode': {'uuid': 'donor-uuid'}, 'toNode': {'uuid': 'activity-uuid'}},
+                # The same relationship returned twice shares the anonymous id
+                {'rel_data': {'type': 'ACTIVITY_INPUT'}, 'fromNode': {'uuid': 'donor-uuid'}, 'toNode': {'uuid': 'activity-uuid'}},
+                {'rel_data': {'type': 'ACTIVITY_INPUT'}, 'fromNode': {'uuid': 'lab-uuid'}, 'toNode': {'uuid': 'activity-uuid'}}
+            ]
+        }
+
+    def test_document_matches_the_prov_json_serialization(self):
+        provenance_json = provenance.get_provenance_history('sample-uuid', self.provenance_dict, self.auth_helper)
+        prov_doc = json.loads(provenance_json)
+
+        self.assertEqual(list(prov_doc.keys()), ['prefix', 'agent', 'activity', 'actedOnBehalfOf', 'entity', 'wasGeneratedBy', 'used'])
+        self.assertEqual(prov_doc['prefix'], {'hubmap': 'https://hubmapconsortium.org/'})
+        self.assertEqual(list(prov_doc['agent'].keys()), ['hubmap:agent/user-sub', 'hubmap:organization/group-uuid'])
+        self.assertEqual(prov_doc['agent']['hubmap:organization/group-uuid']['prov:type'], {'$': 'prov:Organization', 'type': 'prov:QUALIFIED_NAME'})
+
+        activity = prov_doc['activity']['hubmap:activities/activity-uuid']
+        self.assertEqual(activity['prov:startTime'], '1970-01-01T00:00:00')
+        self.assertNotIn('hubmap:protocol_url', activity)
+
+        sample = prov_doc['entity']['hubmap:entities/sample-uuid']
+        self.assertEqual(sample['hubmap:count'], {'$': 2, 'type': 'xsd:int'})
+        self.assertNotIn('hubmap:metadata', prov_doc['entity']['hubmap:entities/donor-uuid'])
+
+        self.assertEqual(list(prov_doc['wasGeneratedBy'].keys()), ['_:id2'])
+        self.assertEqual(list(prov_doc['used'].keys()), ['_:id3', '_:id4'])
+        self.assertEqual(len(prov_doc['used']['_:id3']), 2)
+        self.assertEqual(prov_doc['used']['_:id4'], {'prov:activity': 'hubmap:activities/activity-uuid', 'prov:entity': 'hubmap:entities/lab-uuid'})
+
+    def test_groups_info_is_fetched_once_per_document(self):
+        provenance.get_provenance_history('sample-uuid', self.provenance_dict, self.auth_helper)
+
+        self.auth_helper.get_globus_groups_info.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import atexit
+import unittest
+from unittest.mock import MagicMock, patch
+
+from reindex_dispatcher import ReindexDispatcher
+from schema.schema_constants import ReindexPriorityLevelEnum
+
+
+class TestReindexDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.dispatcher = ReindexDispatcher('http://search-api', batch_size = 2, coalesce_seconds = 0, max_retries = 1, backoff_seconds = 0)
+        # Drive the queue directly instead of starting the background thread
+        self.dispatcher._ensure_started = MagicMock()
+
+    def tearDown(self):
+        atexit.unregister(self.dispatcher.shutdown)
+
+    def test_duplicate_uuids_keep_highest_priority(self):
+        self.dispatcher.enqueue('uuid-1', 'token-a', ReindexPriorityLevelEnum.LOW.value)
+        self.dispatcher.enqueue('uuid-1', 'token-b', ReindexPriorityLevelEnum.HIGH.value)
+        self.dispatcher.enqueue('uuid-1', 'token-c', ReindexPriorityLevelEnum.MEDIUM.value)
+
+        self.assertEqual(self.dispatcher.get_queue_size(), 1)
+        item = self.dispatcher._pending['uuid-1']
+        self.assertEqual(item['priority_level'], ReindexPriorityLevelEnum.HIGH.value)
+        self.assertEqual(item['user_token'], 'token-c')
+
+    def test_batch_is_sorted_by_priority_and_capped(self):
+        self.dispatcher.enqueue('uuid-low', 'token', ReindexPriorityLevelEnum.LOW.value)
+        self.dispatcher.enqueue('uuid-medium', 'token', ReindexPriorityLevelEnum.MEDIUM.value)
+        self.dispatcher.enqueue('uuid-high', 'token', ReindexPriorityLevelEnum.HIGH.value)
+
+        batch = self.dispatcher._take_batch()
+
+        self.assertEqual([uuid for uuid, item in batch], ['uuid-high', 'uuid-medium'])
+        self.assertEqual(self.dispatcher.get_queue_size(), 1)
+
+    @patch('reindex_dispatcher.schema_http_client.put')
+    def test_failed_call_is_retried_then_dropped(self, mock_put):
+        mock_put.return_value = MagicMock(status_code = 500)
+        self.dispatcher.enqueue('uuid-1', 'token', ReindexPriorityLevelEnum.HIGH.value)
+
+        uuid, item = self.dispatcher._take_batch()[0]
+        self.assertFalse(self.dispatcher._dispatch(uuid, item))
+        self.dispatcher._retry(uuid, item)
+        self.assertEqual(self.dispatcher.get_queue_size(), 1)
+
+        uuid, item = self.dispatcher._take_batch()[0]
+        self.dispatcher._retry(uuid, item)
+        self.assertEqual(self.dispatcher.get_queue_size(), 0)
+
+    def test_wait_for_capacity(self):
+        self.dispatcher.enqueue('uuid-1', 'token', ReindexPriorityLevelEnum.HIGH.value)
+        self.dispatcher.enqueue('uuid-2', 'token', ReindexPriorityLevelEnum.HIGH.value)
+
+        self.assertTrue(self.dispatcher.wait_for_capacity(3, timeout = 0))
+        self.assertFalse(self.dispatcher.wait_for_capacity(2, timeout = 0))
+
+        self.dispatcher._take_batch()
+        self.assertTrue(self.dispatcher.wait_for_capacity(1, timeout = 0))
+
+    @patch('reindex_dispatcher.schema_http_client.put')
+    def test_shutdown_flushes_pending(self, mock_put):
+        mock_put.return_value = MagicMock(status_code = 202)
+        self.dispatcher.enqueue('uuid-1', 'token', ReindexPriorityLevelEnum.HIGH.value)
+        self.dispatcher.enqueue('uuid-2', 'token', ReindexPriorityLevelEnum.LOW.value)
+
+        self.dispatcher.shutdown()
+
+        self.assertEqual(mock_put.call_count, 2)
+        self.assertEqual(self.dispatcher.get_queue_size(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
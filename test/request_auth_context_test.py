@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+import bulk_update
+from schema import schema_manager
+
+
+class TestRequestAuthContext(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.auth_helper = MagicMock()
+        self.auth_helper.getUserTokenFromRequest.return_value = 'token'
+        self.auth_helper.getUserInfo.return_value = {'hmgroupids': ['read-group-uuid']}
+        self.auth_helper.groupNameToId.side_effect = lambda name: {'uuid': f"{name.lower()}-uuid"}
+        schema_manager._auth_helper = self.auth_helper
+
+    def test_user_info_resolved_once_per_request(self):
+        with self.app.test_request_context(headers={'Authorization': 'Bearer token'}):
+            from flask import request
+            for _ in range(5):
+                schema_manager.get_user_info(request)
+
+        self.assertEqual(self.auth_helper.getUserInfo.call_count, 1)
+
+    def test_group_membership_resolved_once_per_request(self):
+        self.auth_helper.getUserInfo.return_value = {'hmgroupids': ['hubmap-read-uuid']}
+
+        with self.app.test_request_context(headers={'Authorization': 'Bearer token'}):
+            from flask import request
+            for _ in range(5):
+                self.assertTrue(schema_manager.user_in_group(request, 'HuBMAP-READ'))
+            self.assertFalse(schema_manager.user_in_group(request, 'HuBMAP-Data-Admin'))
+
+        self.assertEqual(self.auth_helper.getUserInfo.call_count, 1)
+        self.assertEqual(self.auth_helper.groupNameToId.call_count, 2)
+
+    def test_background_job_uses_the_submitter_groups(self):
+        # A resumed job only has the internal token, which belongs to a data admin
+        self.auth_helper.getUserInfo.return_value = {'hmgroupids': ['hubmap-data-admin-uuid']}
+        job_request = bulk_update.InternalRequest(args = {}, headers = {'Authorization': 'Bearer internal-token'}, method = 'PUT',
+                                                  user_info = {'sub': 'submitter', 'hmgroupids': ['hubmap-read-uuid']})
+
+        self.assertFalse(schema_manager.user_in_group(job_request, 'HuBMAP-Data-Admin'))
+        self.assertEqual(schema_manager.get_user_info(job_request)['sub'], 'submitter')
+        self.auth_helper.getUserInfo.assert_not_called()
+
+    def test_context_not_shared_across_requests(self):
+        for _ in range(2):
+            with self.app.test_request_context(headers={'Authorization': 'Bearer token'}):
+                from flask import request
+                schema_manager.get_user_info(request)
+
+        self.assertEqual(self.auth_helper.getUserInfo.call_count, 2)
+
+    def test_outside_request_context(self):
+        resolver = MagicMock(return_value='value')
+
+        schema_manager.get_request_auth_value('key', resolver, 'token')
+        schema_manager.get_request_auth_value('key', resolver, 'token')
+
+        self.assertEqual(resolver.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
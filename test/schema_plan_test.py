@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+
+from schema import schema_manager
+from schema.schema_constants import TriggerTypeEnum
+
+
+class TestSchemaPlans(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = schema_manager._schema
+        schema_manager._schema = {
+            'ACTIVITIES': {'Activity': {'properties': {}}},
+            'ENTITIES': {
+                'Sample': {
+                    'properties': {
+                        'uuid': {'type': 'string'},
+                        'last_modified_timestamp': {'type': 'integer', 'before_update_trigger': 'set_timestamp', 'auto_update': True},
+                        'metadata': {'type': 'json_string', 'indexed': False},
+                        'direct_ancestor': {'type': 'json_string', 'transient': True, 'on_read_trigger': 'get_sample_direct_ancestor'},
+                        'secret': {'type': 'string', 'exposed': False}
+                    }
+                }
+            }
+        }
+
+    def tearDown(self):
+        schema_manager._schema = self.schema
+
+    def test_plans_follow_the_yaml_order_and_flags(self):
+        schema_plan = schema_manager.get_schema_plan('Sample')
+
+        on_read_plan = schema_plan['triggers'][TriggerTypeEnum.ON_READ]
+        self.assertEqual([entry['property_key'] for entry in on_read_plan], ['direct_ancestor'])
+        self.assertTrue(on_read_plan[0]['transient'])
+        self.assertIs(on_read_plan[0]['method'], schema_manager.schema_triggers.get_sample_direct_ancestor)
+        self.assertTrue(schema_plan['triggers'][TriggerTypeEnum.BEFORE_UPDATE][0]['auto_update'])
+        self.assertEqual(schema_plan['triggers'][TriggerTypeEnum.AFTER_CREATE], ())
+
+    def test_plans_are_recompiled_when_the_schema_is_replaced(self):
+        schema_manager.get_schema_plan('Sample')
+        schema_manager._schema = {'ACTIVITIES': {'Activity': {'properties': {}}}, 'ENTITIES': {'Donor': {'properties': {}}}}
+
+        self.assertEqual(schema_manager.get_schema_plan('Donor')['properties'], {})
+        with self.assertRaises(schema_manager.schema_errors.InvalidNormalizedTypeException):
+            schema_manager.get_schema_plan('Sample')
+
+    def test_property_flags_drive_response_filtering(self):
+        self.assertEqual(schema_manager.remove_transient_and_none_values({'uuid': 'abc', 'direct_ancestor': {}, 'secret': None}, 'Sample'), {'uuid': 'abc'})
+
+        entity_dict = {'uuid': 'abc', 'entity_type': 'Sample', 'metadata': "{'key': 'value'}", 'secret': 'hidden'}
+        with patch('schema.schema_manager.convert_str_literal', return_value = {'key': 'value'}):
+            self.assertEqual(schema_manager._normalize_metadata(dict(entity_dict), schema_manager.MetadataScopeEnum.COMPLETE), {'uuid': 'abc', 'metadata': {'key': 'value'}})
+        self.assertEqual(schema_manager._normalize_metadata(dict(entity_dict), schema_manager.MetadataScopeEnum.INDEX), {'uuid': 'abc'})
+
+
+if __name__ == '__main__':
+    unittest.main()
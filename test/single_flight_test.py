@@ -0,0 +1,86 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from schema import schema_manager
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def tearDown(self):
+        schema_manager._memcached_client = None
+        schema_manager._memcached_prefix = None
+
+    def test_threads_missing_the_same_key_compute_once(self):
+        compute_started = threading.Event()
+        release_compute = threading.Event()
+        compute_calls = []
+        results = []
+
+        def compute():
+            compute_calls.append(1)
+            compute_started.set()
+            release_compute.wait(timeout = 5)
+            return {'uuid': 'abc', 'title': 'Dataset'}
+
+        def run():
+            results.append(schema_manager.single_flight('test_complete_abc', compute))
+
+        stats_before = schema_manager.get_single_flight_stats()
+
+        leader = threading.Thread(target = run)
+        leader.start()
+        compute_started.wait(timeout = 5)
+
+        followers = [threading.Thread(target = run) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+
+        # Wait until all the followers are waiting for the leader
+        while schema_manager._single_flight_fills['test_complete_abc']['waiters'] < 3:
+            threading.Event().wait(0.01)
+
+        release_compute.set()
+        for thread in [leader] + followers:
+            thread.join(timeout = 5)
+
+        stats_after = schema_manager.get_single_flight_stats()
+
+        self.assertEqual(len(compute_calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result == {'uuid': 'abc', 'title': 'Dataset'} for result in results))
+        # Each thread gets its own copy
+        self.assertEqual(len(set(id(result) for result in results)), 4)
+        self.assertEqual(stats_after['coalesced_threads'] - stats_before['coalesced_threads'], 3)
+        self.assertEqual(stats_after['in_progress'], 0)
+
+    @patch('schema.schema_manager.time.sleep')
+    def test_waits_for_the_worker_holding_the_lease(self, mock_sleep):
+        memcached_client = MagicMock()
+        memcached_client.add.return_value = False
+        # The lease key exists, then the other worker fills the cache key
+        memcached_client.get.side_effect = [12345, {'uuid': 'abc'}]
+        schema_manager._memcached_client = memcached_client
+        schema_manager._memcached_prefix = 'test_'
+        compute = MagicMock()
+
+        result = schema_manager.single_flight('test_complete_abc', compute)
+
+        self.assertEqual(result, {'uuid': 'abc'})
+        compute.assert_not_called()
+        memcached_client.delete.assert_not_called()
+
+    def test_releases_the_lease_after_computing(self):
+        memcached_client = MagicMock()
+        memcached_client.add.return_value = True
+        schema_manager._memcached_client = memcached_client
+        schema_manager._memcached_prefix = 'test_'
+
+        result = schema_manager.single_flight('test_complete_abc', lambda: {'uuid': 'abc'})
+
+        self.assertEqual(result, {'uuid': 'abc'})
+        memcached_client.delete.assert_called_once_with('test_complete_abc_lease')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import MagicMock
+
+from schema import schema_manager
+from migrate_str_literals import migrate_entity_type, to_canonical_json
+
+
+class TestStrLiterals(unittest.TestCase):
+
+    def setUp(self):
+        schema_manager._parsed_literals.clear()
+        schema_manager._parsed_literals_bytes = 0
+
+    def test_json_and_python_literals_parse_the_same(self):
+        data = {'name': "O'Brien", 'tags': ['a', 'b'], 'count': 2, 'note': 'line\nbreak'}
+
+        self.assertEqual(schema_manager.convert_str_literal(str(data)), data)
+        self.assertEqual(schema_manager.convert_str_literal(to_canonical_json(data)), data)
+        # Control characters are still removed
+        self.assertEqual(schema_manager.convert_str_literal("['a\x07b']"), ['ab'])
+        self.assertEqual(schema_manager.convert_str_literal("{'flag': True, 'value': None}"), {'flag': True, 'value': None})
+
+    def test_values_are_only_rewritten_when_literal_eval_agrees(self):
+        self.assertEqual(to_canonical_json({'a': [1, 'x']}), '{"a": [1, "x"]}')
+        self.assertIsNone(to_canonical_json({'flag': True}))
+
+    def test_parsed_values_are_memoized_per_version(self):
+        entity_dict = {'uuid': 'abc', 'last_modified_timestamp': 1, 'metadata': "{'key': 'value'}"}
+
+        first = schema_manager.convert_entity_str_literal(entity_dict, 'metadata')
+        first['key'] = 'changed'
+        second = schema_manager.convert_entity_str_literal(entity_dict, 'metadata')
+
+        # Each caller gets its own copy
+        self.assertEqual(second, {'key': 'value'})
+        self.assertEqual(schema_manager.get_parsed_literal_cache_stats()['hits'], 1)
+
+        # A different string of the same version is parsed again
+        entity_dict['metadata'] = "{'key': 'other'}"
+        self.assertEqual(schema_manager.convert_entity_str_literal(entity_dict, 'metadata'), {'key': 'other'})
+
+    def test_values_changed_since_read_are_not_overwritten(self):
+        session = MagicMock()
+        driver = MagicMock()
+        driver.session.return_value.__enter__.return_value = session
+
+        read_records = [{'uuid': 'abc', 'property_values': ["['a']", "{'key': 'value'}"]}]
+        # One of the two values was updated by another write in the meantime
+        session.run.side_effect = [read_records, MagicMock(**{'single.return_value': {'written': 1}}), []]
+
+        counts = migrate_entity_type(driver, 'Dataset', ['tags', 'metadata'], 10, True)
+
+        self.assertEqual(counts['rewritten'], 1)
+        self.assertEqual(counts['changed'], 1)
+        row = session.run.call_args_list[1].kwargs['rows'][0]
+        self.assertEqual(row['properties'], {'tags': '["a"]', 'metadata': '{"key": "value"}'})
+        self.assertEqual(row['original'], {'tags': "['a']", 'metadata': "{'key': 'value'}"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from schema import schema_manager
+
+
+class TestTokenInfoCache(unittest.TestCase):
+
+    def setUp(self):
+        self.auth_helper = MagicMock()
+        schema_manager._auth_helper = self.auth_helper
+        schema_manager._memcached_client = None
+        schema_manager._memcached_prefix = None
+        schema_manager._token_info_cache.clear()
+
+    def test_cached_until_exp(self):
+        self.auth_helper.getUserInfo.return_value = {'active': True, 'exp': int(time.time()) + 3600}
+
+        for _ in range(3):
+            schema_manager.get_token_info('token', True)
+
+        self.assertEqual(self.auth_helper.getUserInfo.call_count, 1)
+
+    def test_expired_entry_is_introspected_again(self):
+        self.auth_helper.getUserInfo.return_value = {'active': True, 'exp': int(time.time()) + 3600}
+        schema_manager.get_token_info('token', True)
+
+        # Force the expiration of the cached entry
+        for user_info in schema_manager._token_info_cache.values():
+            user_info['exp'] = int(time.time()) - 1
+
+        schema_manager.get_token_info('token', True)
+
+        self.assertEqual(self.auth_helper.getUserInfo.call_count, 2)
+
+    def test_error_response_not_cached(self):
+        self.auth_helper.getUserInfo.return_value = MagicMock()
+
+        schema_manager.get_token_info('token', False)
+        schema_manager.get_token_info('token', False)
+
+        self.assertEqual(self.auth_helper.getUserInfo.call_count, 2)
+
+    def test_memcached_shared_entry(self):
+        memcached_client = MagicMock()
+        memcached_client.get.return_value = {'active': True, 'exp': int(time.time()) + 3600}
+        schema_manager._memcached_client = memcached_client
+        schema_manager._memcached_prefix = 'test_'
+
+        before = schema_manager.get_token_info_cache_stats()['memcached_hits']
+        schema_manager.get_token_info('raw-secret-value', False)
+
+        self.auth_helper.getUserInfo.assert_not_called()
+        self.assertNotIn('raw-secret-value', memcached_client.get.call_args[0][0])
+        self.assertEqual(schema_manager.get_token_info_cache_stats()['memcached_hits'], before + 1)
+
+    def tearDown(self):
+        schema_manager._memcached_client = None
+        schema_manager._memcached_prefix = None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from unittest.mock import patch
+
+from werkzeug.exceptions import HTTPException
+
+from app_client import load_app, use_app_schema_manager
+from schema import schema_http_client
+
+app = load_app()
+
+
+@patch('schema.schema_manager._resolve_uuids_without_uuid_api', return_value = {})
+@patch('schema.schema_http_client.get', side_effect = schema_http_client.CircuitBreakerOpenException("Circuit breaker of uuid-api is open"))
+class TestUpstreamErrors(unittest.TestCase):
+
+    def setUp(self):
+        use_app_schema_manager(self)
+
+    def test_open_circuit_breaker_is_service_unavailable(self, mock_get, mock_resolve):
+        with app.app.test_request_context():
+            with self.assertRaises(HTTPException) as context:
+                app.query_target_entity('HBM123.ABCD.456', 'token')
+
+        self.assertEqual(context.exception.code, 503)
+
+    def test_open_circuit_breaker_response(self, mock_get, mock_resolve):
+        response = app.app.test_client().get('/entities/HBM123.ABCD.456/instanceof/Dataset')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('uuid-api', response.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()